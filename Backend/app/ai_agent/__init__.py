@@ -93,16 +93,28 @@ from app.ai_agent.settings_service import (
     get_settings_service,
     get_agent_settings,
 )
+from app.ai_agent.settings_cache import (
+    SettingsCache,
+    get_settings_cache,
+)
 from app.ai_agent.crm_sync_service import (
     CRMSyncService,
     FieldMapping,
     get_crm_sync_service,
 )
+from app.ai_agent.delayed_reply_queue import (
+    DelayedReplyQueue,
+    get_delayed_reply_queue,
+)
 from app.ai_agent.lead_profile_cache import (
     LeadProfileCacheService,
     CachedLeadProfile,
     get_lead_profile_cache,
 )
+from app.ai_agent.conversation_history_cache import (
+    ConversationHistoryCache,
+    get_conversation_history_cache,
+)
 
 __all__ = [
     # Conversation management
@@ -165,6 +177,8 @@ __all__ = [
     'AIAgentSettingsService',
     'get_settings_service',
     'get_agent_settings',
+    'SettingsCache',
+    'get_settings_cache',
     # CRM sync service
     'CRMSyncService',
     'FieldMapping',
@@ -173,4 +187,10 @@ __all__ = [
     'LeadProfileCacheService',
     'CachedLeadProfile',
     'get_lead_profile_cache',
+    # Delayed reply queue
+    'DelayedReplyQueue',
+    'get_delayed_reply_queue',
+    # Conversation history cache
+    'ConversationHistoryCache',
+    'get_conversation_history_cache',
 ]
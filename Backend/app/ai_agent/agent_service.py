@@ -70,6 +70,9 @@ from app.ai_agent.template_engine import (
     ResponseTemplateEngine,
     TemplateCategory,
 )
+from app.ai_agent.fast_path_responder import FastPathResponder, ROUTE_OBJECTION
+from app.ai_agent.context_budget import RollingSummary
+from app.utils.tracing import start_span, traced
 
 
 class ProcessingResult(Enum):
@@ -131,6 +134,7 @@ class AgentResponse:
     model_used: str = ""
     template_used: Optional[str] = None
     tokens_used: int = 0
+    prompt_tokens: int = 0
     used_fallback: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
@@ -161,6 +165,7 @@ class AgentResponse:
             "model_used": self.model_used,
             "template_used": self.template_used,
             "tokens_used": self.tokens_used,
+            "prompt_tokens": self.prompt_tokens,
             "used_fallback": self.used_fallback,
         }
 
@@ -196,6 +201,10 @@ class AgentSettings:
     use_templates_as_fallback: bool = True
     enable_a_b_testing: bool = True
 
+    # Fast path: answer routine messages from templates without the LLM
+    fast_path_enabled: bool = True
+    fast_path_confidence_threshold: float = 0.9
+
     # Stage exclusion
     excluded_stages: list = field(default_factory=lambda: [
         "Sphere", "Past Client", "Active Client", "Trash", "Dead"
@@ -253,6 +262,10 @@ class AIAgentService:
         self.lead_scorer = LeadScorer()
         self.objection_handler = ObjectionHandler()
         self.template_engine = ResponseTemplateEngine()
+        self.fast_path = FastPathResponder(
+            template_engine=self.template_engine,
+            confidence_threshold=self.settings.fast_path_confidence_threshold,
+        )
 
         # Response generator with settings (will be updated when DB settings load)
         self.response_generator = AIResponseGenerator(
@@ -333,6 +346,7 @@ class AIAgentService:
 
         return settings
 
+    @traced("agent.process_message")
     async def process_message(
         self,
         message: str,
@@ -455,11 +469,13 @@ class AIAgentService:
                 "current_state": conversation_context.state if conversation_context else "initial",
                 "last_ai_message": conversation_history[-1].get("content", "") if conversation_history else "",
             }
-            detected = await self.intent_detector.detect_async(
-                message=message,
-                conversation_context=intent_context,
-                use_llm_fallback=True,
-            )
+            with start_span("intent_detection") as intent_span:
+                detected = await self.intent_detector.detect_async(
+                    message=message,
+                    conversation_context=intent_context,
+                    use_llm_fallback=True,
+                )
+                intent_span.set_attribute("intent", detected.primary_intent.value)
 
             response.detected_intent = detected.primary_intent.value
             response.detected_sentiment = detected.sentiment
@@ -626,24 +642,67 @@ class AIAgentService:
                 if objection_response:
                     response.response_text = objection_response.response_text
                     response.template_used = "objection_handler"
+                    self.fast_path.stats.record_hit(
+                        ROUTE_OBJECTION,
+                        (datetime.utcnow() - start_time).total_seconds() * 1000,
+                    )
 
                     # Update state if objection suggests handoff
                     if objection_response.mark_as_closed:
                         response.should_handoff = True
                         response.handoff_reason = "Multiple objections - lead not interested"
 
-                    return self._finalize_response(
+                    return await self._finalize_response(
                         response=response,
                         detected=detected,
                         qual_manager=qual_manager,
                         conversation_context=conversation_context,
                         lead_profile=lead_profile,
                         start_time=start_time,
+                        fub_person_id=fub_person_id,
                     )
 
-            # Step 7: Generate AI response
             previous_state = conversation_context.state.value
+
+            # Step 6.5: Fast path - routine messages answered from templates, no LLM call
+            if self.settings.fast_path_enabled:
+                fast_reply = self.fast_path.respond(
+                    message=message,
+                    detected=detected,
+                    variables={
+                        "first_name": lead_profile.first_name,
+                        "agent_name": self.settings.agent_name,
+                        "brokerage_name": self.settings.brokerage_name,
+                    },
+                    last_ai_message=self._last_ai_message(conversation_history),
+                    acknowledgment=(
+                        response.extracted_info.get("channel_preference_ack")
+                        or response.extracted_info.get("channel_reduction_ack")
+                    ),
+                    lead_id=lead_id,
+                )
+
+                if fast_reply:
+                    response.response_text = fast_reply.text
+                    response.template_used = fast_reply.template_id or f"fast_path_{fast_reply.route}"
+                    response.extracted_info.update(fast_reply.extracted_info)
+                    response.previous_state = previous_state
+                    response.conversation_state = conversation_context.state.value
+
+                    return await self._finalize_response(
+                        response=response,
+                        detected=detected,
+                        qual_manager=qual_manager,
+                        conversation_context=conversation_context,
+                        lead_profile=lead_profile,
+                        start_time=start_time,
+                        fub_person_id=fub_person_id,
+                    )
+
+            # Step 7: Generate AI response
             qual_dict = qual_manager.data.to_dict()
+            rolling_summary = RollingSummary.from_dict(conversation_context.conversation_summary)
+            llm_started = datetime.utcnow()
             ai_response = await self.response_generator.generate_response(
                 incoming_message=message,
                 conversation_history=conversation_history or [],
@@ -663,14 +722,21 @@ class AIAgentService:
                     "assigned_agent": lead_profile.assigned_agent,
                     "tags": getattr(lead_profile, 'tags', []),
                     # Conversation metadata
-                    "messages_exchanged": len(conversation_context.conversation_history),
+                    "messages_exchanged": conversation_context.messages_exchanged,
                     "current_state": conversation_context.state.value,
                     "re_engagement_count": getattr(conversation_context, 're_engagement_count', 0),
                 },
                 current_state=conversation_context.state.value,
                 qualification_data=qual_dict,
                 lead_profile=lead_profile,
+                rolling_summary=rolling_summary,
+            )
+            self.fast_path.stats.record_llm_latency(
+                (datetime.utcnow() - llm_started).total_seconds() * 1000
             )
+            # Saved with the conversation (only written when it changed)
+            conversation_context.conversation_summary = rolling_summary.to_dict()
+            response.prompt_tokens = ai_response.prompt_tokens
 
             # Step 8: Use response or fallback
             if ai_response.quality in [ResponseQuality.EXCELLENT, ResponseQuality.GOOD, ResponseQuality.ACCEPTABLE]:
@@ -1449,6 +1515,13 @@ ACTION REQUIRED: Respond to this lead promptly!
         except Exception as e:
             logger.error(f"Error saving channel preference: {e}", exc_info=True)
 
+    def _last_ai_message(self, conversation_history: Optional[List[Dict[str, Any]]]) -> str:
+        """Content of our most recent message in the conversation."""
+        for msg in reversed(conversation_history or []):
+            if msg.get("direction") != "inbound":
+                return msg.get("content", "") or ""
+        return ""
+
     def _get_fallback_response(
         self,
         state: ConversationState,
@@ -1515,8 +1588,8 @@ ACTION REQUIRED: Respond to this lead promptly!
             logger.info(f"Appointment scheduling detected - forcing handoff (current score: {current_score.total})")
 
             # Boost score to reflect appointment interest (major signal)
-            if current_score.total < self.settings.auto_handoff_score:
-                score_boost = max(20, self.settings.auto_handoff_score - current_score.total + 10)
+            if current_score.total < self.settings.auto_handoff_score_threshold:
+                score_boost = max(20, self.settings.auto_handoff_score_threshold - current_score.total + 10)
                 logger.info(f"Boosting score by {score_boost} for appointment scheduling")
                 response.lead_score_delta = getattr(response, 'lead_score_delta', 0) + score_boost
                 response.lead_score = current_score.total + score_boost
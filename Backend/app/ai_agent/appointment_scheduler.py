@@ -26,6 +26,7 @@ from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from app.calendar.availability import FIRST_AVAILABLE
 from app.calendar.google_calendar import (
     GoogleCalendarService,
     GoogleCalendarServiceSingleton,
@@ -187,6 +188,8 @@ class AppointmentScheduler:
         appointment_type: AppointmentType = AppointmentType.PHONE_CONSULTATION,
         duration_minutes: int = None,
         supabase_client=None,
+        team_agent_ids: List[str] = None,
+        team_mode: str = FIRST_AVAILABLE,
     ) -> SchedulingResult:
         """
         Start the scheduling flow by offering available time slots.
@@ -203,6 +206,8 @@ class AppointmentScheduler:
             appointment_type: Type of appointment
             duration_minutes: Appointment duration
             supabase_client: Database client
+            team_agent_ids: Offer slots across these agents instead of one
+            team_mode: "first_available" or "round_robin" agent assignment
 
         Returns:
             SchedulingResult with available slots and response message
@@ -211,11 +216,19 @@ class AppointmentScheduler:
 
         # Get available slots from calendar
         try:
-            slots = await self.calendar.get_available_slots(
-                agent_user_id=agent_user_id,
-                duration_minutes=duration,
-                supabase_client=supabase_client,
-            )
+            if team_agent_ids:
+                slots = await self.calendar.get_team_slots(
+                    agent_user_ids=team_agent_ids,
+                    duration_minutes=duration,
+                    mode=team_mode,
+                    supabase_client=supabase_client,
+                )
+            else:
+                slots = await self.calendar.get_available_slots(
+                    agent_user_id=agent_user_id,
+                    duration_minutes=duration,
+                    supabase_client=supabase_client,
+                )
         except Exception as e:
             logger.error(f"Failed to get available slots: {e}")
             return SchedulingResult(
@@ -351,6 +364,9 @@ class AppointmentScheduler:
             )
 
         slot = context.selected_slot
+        if slot.agent_user_id:
+            # Team offer: book with the agent the slot was assigned to
+            context.agent_user_id = slot.agent_user_id
         appointment_title = self._get_appointment_title(context)
 
         # Create Google Calendar event
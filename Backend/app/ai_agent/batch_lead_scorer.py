@@ -0,0 +1,434 @@
+"""
+Batch Lead Scorer - Rescore and decay every lead in an organization at once.
+
+LeadScorer works on one lead at a time, and score decay only happened when
+something touched a lead, so tiers and prioritization drifted on stale
+scores. BatchLeadScorer rescores a whole organization per run:
+
+- Loads the scoring columns from ai_conversations page by page
+- Normalizes each distinct timeline/budget/motivation string once (leads
+  share a handful of values) and maps the LeadScorer tables back onto the
+  column with NumPy
+- Applies the decay curve (-5 per 30 inactive days, floor 5) to every lead
+  in one pass. Decay is stored in lead_score_decay and undone before being
+  reapplied, so runs are idempotent and a lead that replies gets its score
+  back.
+- Writes changed scores with chunked bulk RPC calls, then tiers + priority
+  scores via LeadRepository.bulk_update_tiers. Tiers come from
+  leads.last_activity_at, the column LeadRepository's tier filters use.
+- Publishes per-tier and per-temperature counts to lead_score_runs
+
+Without NumPy the same columns are scored lead by lead with LeadScorer.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.ai_agent.lead_scorer import LeadScorer, LeadTemperature, get_lead_temperature
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Activity tiers (same boundaries as LeadRepository._get_tier_filters)
+TIER_HOT_DAYS = 7
+TIER_WARM_DAYS = 30
+TIER_DORMANT_DAYS = 365
+
+# Score decay curve (same as LeadScorer.calculate_score_decay)
+DECAY_PERIOD_DAYS = 30
+DECAY_POINTS_PER_PERIOD = 5
+DECAY_FLOOR = 5
+
+SCORE_COLUMNS = (
+    "id, fub_person_id, lead_score, lead_score_decay, qualification_data, "
+    "last_human_message_at, created_at"
+)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _text(value: Any) -> Optional[str]:
+    """Qualification answers are usually strings; budgets are sometimes numbers."""
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def activity_tier(days_inactive: int) -> str:
+    """Lead tier for a number of days since the lead's last activity."""
+    if days_inactive < TIER_HOT_DAYS:
+        return "hot"
+    if days_inactive < TIER_WARM_DAYS:
+        return "warm"
+    if days_inactive < TIER_DORMANT_DAYS:
+        return "dormant"
+    return "archived"
+
+
+@dataclass
+class LeadScoreColumns:
+    """Scoring inputs for many leads, one entry per conversation in each list."""
+    conversation_ids: List[str] = field(default_factory=list)
+    person_ids: List[int] = field(default_factory=list)
+    pre_approved: List[Optional[bool]] = field(default_factory=list)
+    timelines: List[Optional[str]] = field(default_factory=list)
+    budgets: List[Optional[str]] = field(default_factory=list)
+    motivations: List[Optional[str]] = field(default_factory=list)
+    stored_scores: List[int] = field(default_factory=list)
+    applied_decay: List[int] = field(default_factory=list)
+    days_inactive: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.conversation_ids)
+
+    def append_row(self, row: Dict[str, Any], now: datetime):
+        """Add one ai_conversations row."""
+        qualification = row.get("qualification_data") or {}
+        last_activity = (
+            _parse_timestamp(row.get("last_human_message_at"))
+            or _parse_timestamp(row.get("created_at"))
+        )
+
+        self.conversation_ids.append(row["id"])
+        self.person_ids.append(int(row["fub_person_id"]))
+        self.pre_approved.append(qualification.get("pre_approved"))
+        self.timelines.append(_text(qualification.get("timeline")))
+        self.budgets.append(_text(qualification.get("budget")))
+        self.motivations.append(_text(qualification.get("motivation")))
+        self.stored_scores.append(int(row.get("lead_score") or 0))
+        self.applied_decay.append(int(row.get("lead_score_decay") or 0))
+        self.days_inactive.append(max(0, (now - last_activity).days) if last_activity else 0)
+
+
+@dataclass
+class LeadScoreBatch:
+    """Fresh scores for a LeadScoreColumns, in the same order."""
+    scores: List[int]
+    decay: List[int]
+    temperatures: List[str]
+    changed: List[bool]
+
+
+def _value_counts(values: Iterable[str]) -> Dict[str, int]:
+    result: Dict[str, int] = {}
+    for value in values:
+        result[value] = result.get(value, 0) + 1
+    return result
+
+
+def _table_lookup(values: Sequence[Optional[str]], score_fn: Callable[[str], int]) -> "np.ndarray":
+    """Score each distinct string once and map the scores back onto the column."""
+    keys = np.array(["" if v is None else v for v in values], dtype=object)
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int32)
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    table = np.array([score_fn(u) if u else 0 for u in uniques], dtype=np.int32)
+    return table[inverse]
+
+
+class BatchLeadScorer:
+    """
+    Rescores an organization's leads in bulk.
+
+    Usage:
+        scorer = get_batch_lead_scorer(supabase)
+        stats = await scorer.rescore_organization(organization_id)
+    """
+
+    PAGE_SIZE = 1000
+    WRITE_CHUNK_SIZE = 500
+
+    def __init__(self, supabase_client=None, lead_scorer: LeadScorer = None, lead_repository=None):
+        """
+        Initialize the batch scorer.
+
+        Args:
+            supabase_client: Supabase client
+            lead_scorer: LeadScorer whose tables and normalization are applied
+            lead_repository: LeadRepository used to write tiers (created on first use)
+        """
+        self.supabase = supabase_client
+        self.scorer = lead_scorer or LeadScorer()
+        self._lead_repository = lead_repository
+
+    @property
+    def vectorized(self) -> bool:
+        return np is not None
+
+    def score(self, columns: LeadScoreColumns) -> LeadScoreBatch:
+        """Fresh (decayed) scores and temperatures for every conversation."""
+        if self.vectorized:
+            return self._score_vectorized(columns)
+        return self._score_per_lead(columns)
+
+    def tiers(self, days_inactive: Sequence[int]) -> List[str]:
+        """Activity tier for each count of days since leads.last_activity_at."""
+        if not self.vectorized:
+            return [activity_tier(days) for days in days_inactive]
+        days = np.array(days_inactive, dtype=np.int32)
+        return np.select(
+            [days < TIER_HOT_DAYS, days < TIER_WARM_DAYS, days < TIER_DORMANT_DAYS],
+            ["hot", "warm", "dormant"],
+            default="archived",
+        ).tolist()
+
+    def _score_vectorized(self, columns: LeadScoreColumns) -> LeadScoreBatch:
+        scorer = self.scorer
+
+        pre_approved = np.array(
+            [scorer.MAX_PREAPPROVAL if v is True else 5 if v is False else 0 for v in columns.pre_approved],
+            dtype=np.int32,
+        )
+        timeline = _table_lookup(
+            columns.timelines,
+            lambda t: scorer.TIMELINE_SCORES.get(scorer._normalize_timeline(t), 5),
+        )
+        budget = _table_lookup(columns.budgets, scorer._calculate_budget_score)
+        motivation = _table_lookup(
+            columns.motivations,
+            lambda m: scorer.MOTIVATION_SCORES.get(scorer._normalize_motivation(m), 5),
+        )
+        qualification = np.clip(pre_approved + timeline + budget + motivation, 0, 100)
+
+        stored = np.array(columns.stored_scores, dtype=np.int32)
+        applied = np.array(columns.applied_decay, dtype=np.int32)
+        days = np.array(columns.days_inactive, dtype=np.int32)
+
+        # Undo the decay applied by the last run, then reapply for today
+        base = np.maximum(np.clip(stored + applied, 0, 100), qualification)
+        decay_points = (days // DECAY_PERIOD_DAYS) * DECAY_POINTS_PER_PERIOD
+        scores = np.where(days < DECAY_PERIOD_DAYS, base, np.maximum(DECAY_FLOOR, base - decay_points))
+        decay = base - scores
+
+        temperatures = np.select(
+            [scores >= scorer.HOT_THRESHOLD, scores >= scorer.WARM_THRESHOLD],
+            [LeadTemperature.HOT.value, LeadTemperature.WARM.value],
+            default=LeadTemperature.COLD.value,
+        )
+        return LeadScoreBatch(
+            scores=scores.tolist(),
+            decay=decay.tolist(),
+            temperatures=temperatures.tolist(),
+            changed=((scores != stored) | (decay != applied)).tolist(),
+        )
+
+    def _score_per_lead(self, columns: LeadScoreColumns) -> LeadScoreBatch:
+        batch = LeadScoreBatch(scores=[], decay=[], temperatures=[], changed=[])
+
+        for i in range(len(columns)):
+            qualification = self.scorer.calculate_score(
+                pre_approved=columns.pre_approved[i],
+                timeline=columns.timelines[i],
+                budget=columns.budgets[i],
+                motivation=columns.motivations[i],
+            ).total
+            stored = columns.stored_scores[i]
+            applied = columns.applied_decay[i]
+
+            base = max(max(0, min(100, stored + applied)), qualification)
+            score, decay = self.scorer.calculate_score_decay(base, columns.days_inactive[i])
+
+            batch.scores.append(score)
+            batch.decay.append(decay)
+            batch.temperatures.append(get_lead_temperature(score).value)
+            batch.changed.append(score != stored or decay != applied)
+
+        return batch
+
+    async def rescore_organization(self, organization_id: str, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Rescore every lead in an organization and write the results back.
+
+        Args:
+            organization_id: Organization to rescore
+            dry_run: Score and count without writing anything
+
+        Returns:
+            Run stats (counts per tier and temperature, rows written, timing)
+        """
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {
+            "organization_id": organization_id,
+            "leads_scored": 0,
+            "scores_changed": 0,
+            "scores_written": 0,
+            "tiers_written": 0,
+            "tier_counts": {},
+            "temperature_counts": {},
+            "vectorized": self.vectorized,
+        }
+
+        try:
+            columns = self._load_columns(organization_id)
+            activity = self._load_lead_activity(organization_id)
+        except Exception as e:
+            logger.error(f"Could not load lead scores for org {organization_id}: {e}")
+            stats["error"] = str(e)
+            return stats
+
+        scoring_started = time.perf_counter()
+        batch = self.score(columns)
+        tiers = dict(zip(activity, self.tiers(list(activity.values()))))
+        stats["scoring_ms"] = round((time.perf_counter() - scoring_started) * 1000, 2)
+
+        stats["leads_scored"] = len(columns)
+        stats["scores_changed"] = sum(batch.changed)
+        stats["tier_counts"] = _value_counts(tiers.values())
+        stats["temperature_counts"] = _value_counts(batch.temperatures)
+
+        if not dry_run and (len(columns) or tiers):
+            stats["scores_written"] = self._write_scores(columns, batch)
+            stats["tiers_written"] = await self._write_tiers(organization_id, columns, batch, tiers)
+            self._publish_counts(stats)
+
+        stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"Rescored {stats['leads_scored']} leads for org {organization_id} "
+            f"({stats['scores_changed']} changed, tiers {stats['tier_counts']}) in {stats['elapsed_ms']}ms"
+        )
+        return stats
+
+    def _load_columns(self, organization_id: str) -> LeadScoreColumns:
+        """Scoring columns for every conversation in the organization (id-cursor pages)."""
+        columns = LeadScoreColumns()
+        now = datetime.now(timezone.utc)
+        cursor = None
+
+        while True:
+            query = self.supabase.table("ai_conversations").select(SCORE_COLUMNS).eq(
+                "organization_id", organization_id
+            )
+            if cursor:
+                query = query.gt("id", cursor)
+            rows = query.order("id").limit(self.PAGE_SIZE).execute().data or []
+
+            for row in rows:
+                columns.append_row(row, now)
+
+            if len(rows) < self.PAGE_SIZE:
+                return columns
+            cursor = rows[-1]["id"]
+
+    def _load_lead_activity(self, organization_id: str) -> Dict[int, int]:
+        """Days since leads.last_activity_at per lead (leads without one get no tier)."""
+        activity: Dict[int, int] = {}
+        now = datetime.now(timezone.utc)
+        cursor = None
+
+        while True:
+            query = self.supabase.table("leads").select("id, fub_person_id, last_activity_at").eq(
+                "organization_id", organization_id
+            )
+            if cursor:
+                query = query.gt("id", cursor)
+            rows = query.order("id").limit(self.PAGE_SIZE).execute().data or []
+
+            for row in rows:
+                last_activity = _parse_timestamp(row.get("last_activity_at"))
+                if last_activity is None or not str(row.get("fub_person_id") or "").isdigit():
+                    continue
+                activity[int(row["fub_person_id"])] = max(0, (now - last_activity).days)
+
+            if len(rows) < self.PAGE_SIZE:
+                return activity
+            cursor = rows[-1]["id"]
+
+    def _write_scores(self, columns: LeadScoreColumns, batch: LeadScoreBatch) -> int:
+        """Write changed scores back to ai_conversations in chunks. Returns rows updated."""
+        changed = [i for i, is_changed in enumerate(batch.changed) if is_changed]
+        written = 0
+
+        for start in range(0, len(changed), self.WRITE_CHUNK_SIZE):
+            chunk = changed[start:start + self.WRITE_CHUNK_SIZE]
+            try:
+                result = self.supabase.rpc("apply_lead_scores", {
+                    "p_conversation_ids": [columns.conversation_ids[i] for i in chunk],
+                    "p_scores": [batch.scores[i] for i in chunk],
+                    "p_decays": [batch.decay[i] for i in chunk],
+                }).execute()
+                written += result.data if isinstance(result.data, int) else len(chunk)
+            except Exception as e:
+                logger.error(f"Failed to write {len(chunk)} lead scores: {e}")
+
+        return written
+
+    async def _write_tiers(
+        self,
+        organization_id: str,
+        columns: LeadScoreColumns,
+        batch: LeadScoreBatch,
+        tiers: Dict[int, str],
+    ) -> int:
+        """Write tiers and priority scores to the leads table."""
+        from app.database.lead_repository import LeadTier
+
+        if self._lead_repository is None:
+            from app.database.lead_repository import LeadRepository
+            self._lead_repository = LeadRepository(self.supabase)
+
+        # A lead with several conversations keeps its highest score
+        best: Dict[int, int] = {}
+        for i, person_id in enumerate(columns.person_ids):
+            if person_id not in best or batch.scores[i] > batch.scores[best[person_id]]:
+                best[person_id] = i
+        updates = [(pid, LeadTier(tier)) for pid, tier in tiers.items()]
+        priority_scores = {pid: batch.scores[i] for pid, i in best.items() if pid in tiers}
+
+        result = await self._lead_repository.bulk_update_tiers(
+            updates,
+            priority_scores=priority_scores,
+            organization_id=organization_id,
+        )
+        return result["success"]
+
+    def _publish_counts(self, stats: Dict[str, Any]):
+        """Record the run's counts in lead_score_runs (dashboards, prioritization)."""
+        try:
+            self.supabase.table("lead_score_runs").insert({
+                "organization_id": stats["organization_id"],
+                "leads_scored": stats["leads_scored"],
+                "scores_changed": stats["scores_changed"],
+                "tier_counts": stats["tier_counts"],
+                "temperature_counts": stats["temperature_counts"],
+                "scoring_ms": stats.get("scoring_ms"),
+                "vectorized": stats["vectorized"],
+            }).execute()
+        except Exception as e:
+            logger.warning(f"Could not publish lead score counts: {e}")
+
+
+# Global instance
+_batch_lead_scorer: Optional[BatchLeadScorer] = None
+_batch_lead_scorer_lock = threading.Lock()
+
+
+def get_batch_lead_scorer(supabase_client=None) -> BatchLeadScorer:
+    """Get the global batch lead scorer."""
+    global _batch_lead_scorer
+
+    if _batch_lead_scorer is None:
+        with _batch_lead_scorer_lock:
+            if _batch_lead_scorer is None:
+                _batch_lead_scorer = BatchLeadScorer(supabase_client)
+    if supabase_client and not _batch_lead_scorer.supabase:
+        _batch_lead_scorer.supabase = supabase_client
+
+    return _batch_lead_scorer
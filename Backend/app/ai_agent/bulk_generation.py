@@ -0,0 +1,469 @@
+"""
+Bulk Generation - Many LLM messages through one bounded worker pool.
+
+Follow-ups, initial outreach and the outreach backfills used to generate one
+lead at a time, each call opening its own HTTP session (and the backfills
+sleeping between leads). BulkGenerationEngine takes the whole batch:
+
+- One pooled LLMSession (keep-alive connections) shared by every call
+- A fixed number of workers, so a large batch never floods the provider
+- Identical requests are generated once and the result shared
+- Requests that share a system prompt wait for the first of the group, so
+  the provider's prompt cache is warm for the rest (the system prompt is
+  marked cacheable)
+- Each result is appended to a JSONL checkpoint as it completes; a rerun
+  with the same checkpoint skips what is already done. The same file is the
+  offline batch output: generate now, load_batch_results() and send later.
+
+LLMSession.api_url can point at any OpenAI-compatible or Anthropic-style
+endpoint, e.g. a local stub server in tests.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_OPENROUTER = "openrouter"
+PROVIDER_ANTHROPIC = "anthropic"
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
+
+DEFAULT_MODELS = {
+    PROVIDER_OPENROUTER: "anthropic/claude-sonnet-4",
+    PROVIDER_ANTHROPIC: "claude-sonnet-4-20250514",
+}
+
+
+class LLMError(Exception):
+    """LLM call failed (non-200 status or unusable response)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class GenerationRequest:
+    """One message to generate."""
+    key: str
+    system_prompt: str
+    user_prompt: str
+    max_tokens: int = 500
+    temperature: float = 0.7
+
+    def fingerprint(self) -> str:
+        """Identity of the LLM call; equal fingerprints are generated once."""
+        raw = json.dumps(
+            [self.system_prompt, self.user_prompt, self.max_tokens, self.temperature],
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def prefix_key(self) -> str:
+        return hashlib.sha1(self.system_prompt.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of one GenerationRequest."""
+    key: str
+    text: str = ""
+    model: str = ""
+    tokens: int = 0
+    error: Optional[str] = None
+    shared: bool = False  # Result of an identical request
+    from_checkpoint: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationResult":
+        return cls(
+            key=data["key"],
+            text=data.get("text", ""),
+            model=data.get("model", ""),
+            tokens=data.get("tokens", 0),
+            error=data.get("error"),
+            shared=data.get("shared", False),
+        )
+
+
+class LLMSession:
+    """
+    Pooled HTTP session for LLM completions.
+
+    Usage:
+        async with LLMSession.from_env(max_connections=8) as llm:
+            text, model, tokens = await llm.complete(system_prompt, user_prompt)
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        provider: str = PROVIDER_OPENROUTER,
+        api_url: str = None,
+        model: str = None,
+        max_connections: int = 8,
+        timeout_seconds: float = 60,
+    ):
+        """
+        Initialize the session (the HTTP pool opens on first use).
+
+        Args:
+            api_key: Provider API key
+            provider: PROVIDER_OPENROUTER (chat completions format) or
+                PROVIDER_ANTHROPIC (messages format)
+            api_url: Endpoint override (defaults to the provider's)
+            model: Model override (defaults to the provider's Sonnet)
+            max_connections: Connection pool size
+            timeout_seconds: Total timeout per call
+        """
+        self.api_key = api_key
+        self.provider = provider
+        self.api_url = api_url or (ANTHROPIC_URL if provider == PROVIDER_ANTHROPIC else OPENROUTER_URL)
+        self.model = model or DEFAULT_MODELS[provider]
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["LLMSession"]:
+        """Session for OPENROUTER_API_KEY, else ANTHROPIC_API_KEY; None if neither is set."""
+        openrouter_key = os.environ.get("OPENROUTER_API_KEY")
+        if openrouter_key:
+            return cls(openrouter_key, provider=PROVIDER_OPENROUTER, **kwargs)
+        anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
+        if anthropic_key:
+            return cls(anthropic_key, provider=PROVIDER_ANTHROPIC, **kwargs)
+        return None
+
+    async def __aenter__(self) -> "LLMSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _build_call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        temperature: float,
+        cache_prefix: bool,
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Headers and payload for the provider's request format."""
+        system_block: Dict[str, Any] = {"type": "text", "text": system_prompt}
+        if cache_prefix:
+            system_block["cache_control"] = {"type": "ephemeral"}
+
+        if self.provider == PROVIDER_ANTHROPIC:
+            headers = {
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01",
+                "Content-Type": "application/json",
+            }
+            payload = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "system": [system_block],
+                "messages": [{"role": "user", "content": user_prompt}],
+            }
+        else:
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://leadsynergy.com",
+                "X-Title": "LeadSynergy AI",
+            }
+            payload = {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": [system_block] if cache_prefix else system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            }
+        return headers, payload
+
+    async def complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        cache_prefix: bool = False,
+    ) -> Tuple[str, str, int]:
+        """
+        Generate one completion.
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User message
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            cache_prefix: Mark the system prompt cacheable (shared by many calls)
+
+        Returns:
+            Tuple of (text, model, total tokens)
+
+        Raises:
+            LLMError: Non-200 status or a response without text
+        """
+        headers, payload = self._build_call(system_prompt, user_prompt, max_tokens, temperature, cache_prefix)
+
+        async with self._get_session().post(self.api_url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise LLMError(f"LLM API error {response.status}: {error_text[:200]}", status=response.status)
+            data = await response.json()
+
+        try:
+            if self.provider == PROVIDER_ANTHROPIC:
+                text = data["content"][0]["text"]
+                usage = data.get("usage") or {}
+                tokens = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            else:
+                text = data["choices"][0]["message"]["content"]
+                tokens = (data.get("usage") or {}).get("total_tokens", 0)
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Unexpected LLM response: {e}")
+
+        return text.strip(), data.get("model", self.model), tokens
+
+
+def load_batch_results(path: str) -> Dict[str, GenerationResult]:
+    """
+    Read results written by BulkGenerationEngine (checkpoint / offline batch file).
+
+    A key written more than once keeps its last line.
+    """
+    results: Dict[str, GenerationResult] = {}
+    if not path or not os.path.exists(path):
+        return results
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = GenerationResult.from_dict(json.loads(line))
+            except (ValueError, KeyError) as e:
+                # A half-written last line after a crash is expected
+                logger.warning(f"Skipping bad line {line_number} in {path}: {e}")
+                continue
+            result.from_checkpoint = True
+            results[result.key] = result
+    return results
+
+
+class BulkGenerationEngine:
+    """
+    Generates a batch of requests through a bounded async worker pool.
+
+    Usage:
+        async with LLMSession.from_env() as llm:
+            engine = BulkGenerationEngine(llm, concurrency=8, checkpoint_path="out.jsonl")
+            results = await engine.run(requests)
+    """
+
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        llm: LLMSession,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: str = None,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            llm: Shared LLM session
+            concurrency: Number of workers (LLM calls in flight at once)
+            checkpoint_path: JSONL file to append results to and resume from
+        """
+        self.llm = llm
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_path = checkpoint_path
+        self._checkpoint_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {}
+
+    async def run(self, requests: Sequence[GenerationRequest]) -> Dict[str, GenerationResult]:
+        """
+        Generate every request not already in the checkpoint.
+
+        Failed requests are returned with an error and left out of the
+        checkpoint, so a rerun retries them.
+
+        Args:
+            requests: Requests to generate (keys must be unique)
+
+        Returns:
+            Dict of key -> GenerationResult, for every request
+        """
+        started = time.perf_counter()
+        results: Dict[str, GenerationResult] = {}
+
+        done = load_batch_results(self.checkpoint_path)
+        pending: List[GenerationRequest] = []
+        for req in requests:
+            previous = done.get(req.key)
+            if previous is not None and previous.ok:
+                results[req.key] = previous
+            else:
+                pending.append(req)
+
+        # Identical requests: one call, shared by every key
+        groups: Dict[str, List[GenerationRequest]] = {}
+        for req in pending:
+            groups.setdefault(req.fingerprint(), []).append(req)
+        calls = [group[0] for group in groups.values()]
+
+        # First call per system prompt goes first and warms the prefix cache
+        prefix_sizes: Dict[str, int] = {}
+        for req in calls:
+            prefix_sizes[req.prefix_key()] = prefix_sizes.get(req.prefix_key(), 0) + 1
+        warmed: Dict[str, asyncio.Event] = {}
+        leaders, followers = [], []
+        for req in calls:
+            prefix = req.prefix_key()
+            if prefix in warmed:
+                followers.append(req)
+            else:
+                warmed[prefix] = asyncio.Event()
+                leaders.append(req)
+
+        leader_ids = {id(req) for req in leaders}
+        queue: asyncio.Queue = asyncio.Queue()
+        for req in leaders + followers:
+            queue.put_nowait(req)
+
+        in_flight = 0
+        peak_in_flight = 0
+        tokens_used = 0
+
+        async def worker():
+            nonlocal in_flight, peak_in_flight, tokens_used
+            while True:
+                try:
+                    req = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                prefix = req.prefix_key()
+                event = warmed[prefix]
+                is_leader = id(req) in leader_ids
+                if not is_leader:
+                    await event.wait()
+
+                in_flight += 1
+                peak_in_flight = max(peak_in_flight, in_flight)
+                try:
+                    text, model, tokens = await self.llm.complete(
+                        req.system_prompt,
+                        req.user_prompt,
+                        max_tokens=req.max_tokens,
+                        temperature=req.temperature,
+                        cache_prefix=prefix_sizes[prefix] > 1,
+                    )
+                    result = GenerationResult(key=req.key, text=text, model=model, tokens=tokens)
+                    tokens_used += tokens
+                except Exception as e:
+                    logger.warning(f"Bulk generation failed for {req.key}: {e}")
+                    result = GenerationResult(key=req.key, error=str(e))
+                finally:
+                    in_flight -= 1
+                    if is_leader:
+                        event.set()
+
+                group = groups[req.fingerprint()]
+                for member in group:
+                    member_result = result if member is req else GenerationResult(
+                        **{**result.to_dict(), "key": member.key, "shared": True}
+                    )
+                    results[member.key] = member_result
+                self._write_checkpoint([results[member.key] for member in group])
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(calls)) or 1)))
+
+        self.stats = {
+            "requests": len(requests),
+            "from_checkpoint": len(requests) - len(pending),
+            "llm_calls": len(calls),
+            "deduplicated": len(pending) - len(calls),
+            "failed": sum(1 for r in results.values() if not r.ok),
+            "peak_in_flight": peak_in_flight,
+            "tokens": tokens_used,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(f"Bulk generation: {self.stats}")
+        return results
+
+    def _write_checkpoint(self, results: Iterable[GenerationResult]):
+        """Append successful results to the checkpoint file."""
+        if not self.checkpoint_path:
+            return
+        lines = [json.dumps(r.to_dict()) for r in results if r.ok]
+        if not lines:
+            return
+        try:
+            with self._checkpoint_lock:
+                with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+        except OSError as e:
+            logger.error(f"Could not write checkpoint {self.checkpoint_path}: {e}")
+
+
+async def run_bounded(
+    items: Sequence[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: int,
+) -> List[Any]:
+    """
+    Run worker(item) for every item with at most `concurrency` running at once.
+
+    Exceptions are returned in place of the item's result.
+
+    Returns:
+        Results in the order of items
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(item):
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(bounded(item) for item in items), return_exceptions=True)
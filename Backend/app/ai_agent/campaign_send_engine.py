@@ -0,0 +1,585 @@
+"""
+Campaign Send Engine - Paced, resumable sending for re-engagement campaigns.
+
+ReengagementCampaignManager splits a campaign into daily batches, but
+nothing actually worked through them at a controlled rate. The engine runs
+as a short periodic tick (Celery beat) and:
+
+- Spreads each day's batch evenly across the 8 AM - 8 PM texting window of
+  every recipient's timezone (send_after per lead, highest priority first)
+- Caps throughput per organization and across all organizations with
+  per-minute windows shared through Redis (in-process without Redis), so
+  campaigns stay under FUB API limits however many workers run
+- Claims due leads in chunks (claim_campaign_leads, FOR UPDATE SKIP
+  LOCKED), so overlapping ticks never pick up the same lead
+- Runs the compliance pre-flight for a whole chunk at once; leads outside
+  their window or over their daily cap are pushed back, opted-out / DNC
+  leads are skipped
+- Records sent/failed/skipped status and SMS counters with bulk updates
+
+Resuming after a crash: all state lives in ai_campaign_leads. A lead is
+moved to 'sending' before its message goes out and to 'sent' right after
+its chunk finishes. A lead left in 'sending' past CLAIM_LEASE_SECONDS was
+interrupted mid-send; it is marked failed (delivery unconfirmed) and never
+sent again, so a crash can drop a message but never double-send one.
+
+The actual send is injected as `deliver(lead, campaign)`, so this module
+knows nothing about FUB or message rendering.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from app.ai_agent.bulk_generation import run_bounded
+from app.ai_agent.compliance_checker import ComplianceChecker, ComplianceStatus
+from app.ai_agent.reengagement_campaign import CampaignStatus
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[bool]]
+
+INTERRUPTED_ERROR = "interrupted during send - delivery unconfirmed"
+
+# Compliance results that will clear later (push the lead back, don't skip it)
+DEFERRABLE_STATUSES = (ComplianceStatus.BLOCKED_OUTSIDE_HOURS, ComplianceStatus.BLOCKED_RATE_LIMIT)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def _resolve_timezone(name: Optional[str]):
+    try:
+        return pytz.timezone(name or ComplianceChecker.DEFAULT_TIMEZONE)
+    except pytz.exceptions.UnknownTimeZoneError:
+        return pytz.timezone(ComplianceChecker.DEFAULT_TIMEZONE)
+
+
+def spread_send_times(
+    count: int,
+    timezone: Optional[str],
+    now: datetime,
+    start_hour: int = ComplianceChecker.ALLOWED_START_HOUR,
+    end_hour: int = ComplianceChecker.ALLOWED_END_HOUR,
+) -> List[datetime]:
+    """
+    Evenly spaced send times inside the recipient's texting window.
+
+    Uses what is left of today's window, or tomorrow's window when today's
+    has closed.
+
+    Args:
+        count: Number of sends to place
+        timezone: Recipient IANA timezone (unknown names use the default)
+        now: Current time (naive UTC or aware)
+
+    Returns:
+        Naive UTC send times, earliest first
+    """
+    if count <= 0:
+        return []
+
+    tz = _resolve_timezone(timezone)
+    local_now = pytz.utc.localize(_naive_utc(now)).astimezone(tz)
+
+    def window(day: date) -> Tuple[datetime, datetime]:
+        midnight = datetime(day.year, day.month, day.day)
+        return (
+            tz.localize(midnight + timedelta(hours=start_hour)),
+            tz.localize(midnight + timedelta(hours=end_hour)),
+        )
+
+    start, end = window(local_now.date())
+    if local_now >= end:
+        start, end = window(local_now.date() + timedelta(days=1))
+    start = max(start, local_now)
+
+    step = (end - start) / count
+    return [_naive_utc(start + step * i) for i in range(count)]
+
+
+class ThroughputLimiter:
+    """
+    Per-minute send caps for each organization and for all organizations.
+
+    Counters are fixed one-minute windows. With Redis they are shared by
+    every worker; without it each process enforces the caps on its own.
+    """
+
+    KEY_PREFIX = "ai:campaign_sends"
+
+    def __init__(self, org_per_minute: int, global_per_minute: int, redis_client=None):
+        self.org_per_minute = org_per_minute
+        self.global_per_minute = global_per_minute
+        self.redis = redis_client
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _window() -> int:
+        return int(time.time() // 60)
+
+    def seconds_until_next_window(self) -> float:
+        return 60 - (time.time() % 60)
+
+    def reserve(self, organization_id: str, wanted: int) -> int:
+        """
+        Reserve up to `wanted` sends for this minute.
+
+        Returns:
+            Number of sends granted (0 when either cap is used up)
+        """
+        if wanted <= 0:
+            return 0
+        window = self._window()
+        global_key = f"{self.KEY_PREFIX}:global:{window}"
+        org_key = f"{self.KEY_PREFIX}:org:{organization_id}:{window}"
+
+        granted = self._take(global_key, wanted, self.global_per_minute)
+        if granted:
+            org_granted = self._take(org_key, granted, self.org_per_minute)
+            if org_granted < granted:
+                self._give_back(global_key, granted - org_granted)
+            granted = org_granted
+        return granted
+
+    def release(self, organization_id: str, count: int):
+        """Return reserved sends that were not used (deferred or skipped leads)."""
+        if count <= 0:
+            return
+        window = self._window()
+        self._give_back(f"{self.KEY_PREFIX}:global:{window}", count)
+        self._give_back(f"{self.KEY_PREFIX}:org:{organization_id}:{window}", count)
+
+    def _take(self, key: str, wanted: int, cap: int) -> int:
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.incrby(key, wanted)
+                pipe.expire(key, 120)
+                used = int(pipe.execute()[0])
+                over = max(0, used - cap)
+                if over:
+                    self.redis.decrby(key, min(over, wanted))
+                return max(0, wanted - over)
+            except Exception as e:
+                logger.warning(f"Redis send counter unavailable, limiting in-process: {e}")
+                self.redis = None
+
+        with self._lock:
+            self._counts = {k: v for k, v in self._counts.items() if k.endswith(f":{self._window()}")}
+            used = self._counts.get(key, 0)
+            granted = max(0, min(wanted, cap - used))
+            self._counts[key] = used + granted
+            return granted
+
+    def _give_back(self, key: str, count: int):
+        if self.redis is not None:
+            try:
+                self.redis.decrby(key, count)
+                return
+            except Exception as e:
+                logger.warning(f"Redis send counter unavailable: {e}")
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] = max(0, self._counts[key] - count)
+
+
+@dataclass
+class TickStats:
+    """What one engine tick did."""
+    campaigns: int = 0
+    scheduled: int = 0
+    claimed: int = 0
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+    deferred: int = 0
+    recovered: int = 0
+    completed: List[str] = field(default_factory=list)
+    by_organization: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "campaigns": self.campaigns,
+            "scheduled": self.scheduled,
+            "claimed": self.claimed,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "deferred": self.deferred,
+            "recovered": self.recovered,
+            "completed": list(self.completed),
+            "sent_by_organization": dict(self.by_organization),
+        }
+
+
+class CampaignSendEngine:
+    """
+    Works through running campaigns at a paced, capped rate.
+
+    Usage:
+        engine = CampaignSendEngine(supabase, deliver=send_campaign_sms)
+        stats = await engine.tick()
+    """
+
+    CLAIM_CHUNK_SIZE = 25
+    SEND_CONCURRENCY = 5
+    CLAIM_LEASE_SECONDS = 600
+    TICK_SECONDS = 50
+
+    ORG_SENDS_PER_MINUTE = 30
+    GLOBAL_SENDS_PER_MINUTE = 120
+
+    def __init__(
+        self,
+        supabase_client=None,
+        deliver: Optional[Deliver] = None,
+        campaign_manager=None,
+        compliance_checker: ComplianceChecker = None,
+        limiter: ThroughputLimiter = None,
+    ):
+        """
+        Initialize the send engine.
+
+        Args:
+            supabase_client: Supabase client
+            deliver: async deliver(lead_row, campaign_row) -> True when the message went out
+            campaign_manager: ReengagementCampaignManager for bulk status updates
+            compliance_checker: Compliance pre-flight (created from supabase_client if omitted)
+            limiter: Throughput caps (Redis-backed when Redis is reachable)
+        """
+        self.supabase = supabase_client
+        self.deliver = deliver
+        self.compliance = compliance_checker or ComplianceChecker(supabase_client=supabase_client)
+        self._campaign_manager = campaign_manager
+
+        if limiter is None:
+            redis_client = None
+            try:
+                from app.service.redis_service import RedisServiceSingleton
+                redis_client = RedisServiceSingleton.get_instance().redis
+            except Exception as e:
+                logger.warning(f"Redis not available, campaign send caps are per process: {e}")
+            limiter = ThroughputLimiter(self.ORG_SENDS_PER_MINUTE, self.GLOBAL_SENDS_PER_MINUTE, redis_client)
+        self.limiter = limiter
+
+    @property
+    def campaign_manager(self):
+        if self._campaign_manager is None:
+            from app.ai_agent.reengagement_campaign import ReengagementCampaignManager
+            self._campaign_manager = ReengagementCampaignManager(self.supabase)
+        return self._campaign_manager
+
+    async def tick(self, organization_id: str = None, max_seconds: float = None) -> Dict[str, Any]:
+        """
+        Run one pass over every running campaign.
+
+        Schedules newly due batches, then claims and sends due leads chunk by
+        chunk (round-robin across campaigns) until nothing is due or the tick
+        runs out of time.
+
+        Args:
+            organization_id: Only run this organization's campaigns
+            max_seconds: Time budget (default TICK_SECONDS)
+
+        Returns:
+            TickStats as a dict
+        """
+        stats = TickStats()
+        if self.deliver is None:
+            logger.error("Campaign send engine has no deliver function; nothing sent")
+            return stats.to_dict()
+        deadline = time.monotonic() + (max_seconds if max_seconds is not None else self.TICK_SECONDS)
+
+        stats.recovered = self.recover_interrupted()
+
+        campaigns = self._running_campaigns(organization_id)
+        stats.campaigns = len(campaigns)
+        now = datetime.utcnow()
+        for campaign in campaigns:
+            stats.scheduled += self.schedule_due_batches(campaign, now)
+
+        active = list(campaigns)
+        while active and time.monotonic() < deadline:
+            progressed = False
+            for campaign in list(active):
+                outcome = await self._run_chunk(campaign, stats)
+                if outcome is None:
+                    active.remove(campaign)
+                    if self._is_finished(campaign["id"]):
+                        self._complete(campaign["id"])
+                        stats.completed.append(campaign["id"])
+                elif outcome:
+                    progressed = True
+
+            if active and not progressed:
+                # Every remaining campaign is capped for this minute
+                wait = self.limiter.seconds_until_next_window()
+                if time.monotonic() + wait >= deadline:
+                    break
+                await asyncio.sleep(wait)
+
+        result = stats.to_dict()
+        if stats.claimed or stats.recovered or stats.scheduled:
+            logger.info(f"Campaign send tick: {result}")
+        return result
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _running_campaigns(self, organization_id: str = None) -> List[Dict[str, Any]]:
+        try:
+            query = self.supabase.table("ai_campaigns").select(
+                "id, organization_id, campaign_type, daily_limit, message_template, custom_message, started_at"
+            ).eq("status", CampaignStatus.RUNNING.value)
+            if organization_id:
+                query = query.eq("organization_id", organization_id)
+            return query.execute().data or []
+        except Exception as e:
+            logger.error(f"Error loading running campaigns: {e}")
+            return []
+
+    def _current_batch(self, campaign: Dict[str, Any], now: datetime) -> int:
+        started = campaign.get("started_at")
+        if not started:
+            return 0
+        started_at = _naive_utc(datetime.fromisoformat(started.replace("Z", "+00:00")))
+        return max(0, (now.date() - started_at.date()).days)
+
+    def schedule_due_batches(self, campaign: Dict[str, Any], now: datetime = None) -> int:
+        """
+        Give every lead in today's (and any missed) batch a send time.
+
+        Leads are grouped by timezone and spread over what's left of that
+        timezone's texting window, highest priority first.
+
+        Returns:
+            Number of leads scheduled
+        """
+        now = now or datetime.utcnow()
+        batch = self._current_batch(campaign, now)
+
+        try:
+            rows = self.supabase.table("ai_campaign_leads").select(
+                "fub_person_id, priority_score, recipient_timezone"
+            ).eq("campaign_id", campaign["id"]).eq("status", "pending").is_(
+                "send_after", "null"
+            ).lte("scheduled_batch", batch).order("priority_score", desc=True).execute().data or []
+        except Exception as e:
+            logger.error(f"Error loading unscheduled leads for campaign {campaign['id']}: {e}")
+            return 0
+
+        if not rows:
+            return 0
+
+        by_timezone: Dict[Optional[str], List[int]] = defaultdict(list)
+        for row in rows:
+            by_timezone[row.get("recipient_timezone")].append(row["fub_person_id"])
+
+        person_ids: List[int] = []
+        send_after: List[str] = []
+        for timezone, ids in by_timezone.items():
+            person_ids.extend(ids)
+            send_after.extend(t.isoformat() for t in spread_send_times(len(ids), timezone, now))
+
+        return self._set_send_times(campaign["id"], person_ids, send_after)
+
+    def _set_send_times(
+        self,
+        campaign_id: str,
+        person_ids: List[int],
+        send_after: List[str],
+        claim_token: str = None,
+    ) -> int:
+        """Set send_after for pending leads (and release leads held by claim_token)."""
+        if not person_ids:
+            return 0
+        try:
+            result = self.supabase.rpc("schedule_campaign_sends", {
+                "p_campaign_id": campaign_id,
+                "p_person_ids": person_ids,
+                "p_send_after": send_after,
+                "p_claim_token": claim_token,
+            }).execute()
+            return result.data if isinstance(result.data, int) else len(person_ids)
+        except Exception as e:
+            logger.error(f"Error scheduling {len(person_ids)} sends for campaign {campaign_id}: {e}")
+            return 0
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+
+    async def _run_chunk(self, campaign: Dict[str, Any], stats: TickStats) -> Optional[int]:
+        """
+        Claim and send one chunk for a campaign.
+
+        Returns:
+            Leads claimed (0 = capped this minute), or None when nothing is due
+        """
+        org_id = campaign["organization_id"]
+        granted = self.limiter.reserve(org_id, self.CLAIM_CHUNK_SIZE)
+        if not granted:
+            return 0
+
+        claim_token = str(uuid.uuid4())
+        leads = self._claim(campaign["id"], granted, claim_token)
+        if len(leads) < granted:
+            self.limiter.release(org_id, granted - len(leads))
+        if not leads:
+            return None
+        stats.claimed += len(leads)
+
+        sendable = await self._preflight(campaign, leads, claim_token, stats)
+        self.limiter.release(org_id, len(leads) - len(sendable))
+
+        results = await run_bounded(sendable, lambda lead: self.deliver(lead, campaign), self.SEND_CONCURRENCY)
+
+        sent: List[int] = []
+        errors: Dict[int, str] = {}
+        for lead, result in zip(sendable, results):
+            person_id = lead["fub_person_id"]
+            if result is True:
+                sent.append(person_id)
+            else:
+                errors[person_id] = str(result) if isinstance(result, Exception) else "delivery failed"
+
+        await self._record(campaign, sendable, sent, errors)
+        stats.sent += len(sent)
+        stats.failed += len(errors)
+        stats.by_organization[org_id] += len(sent)
+        return len(leads)
+
+    def _claim(self, campaign_id: str, limit: int, claim_token: str) -> List[Dict[str, Any]]:
+        try:
+            result = self.supabase.rpc("claim_campaign_leads", {
+                "p_campaign_id": campaign_id,
+                "p_limit": limit,
+                "p_claim_token": claim_token,
+            }).execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error claiming leads for campaign {campaign_id}: {e}")
+            return []
+
+    async def _preflight(
+        self,
+        campaign: Dict[str, Any],
+        leads: List[Dict[str, Any]],
+        claim_token: str,
+        stats: TickStats,
+    ) -> List[Dict[str, Any]]:
+        """Compliance check for a claimed chunk. Returns the leads that may be sent now."""
+        person_ids = [lead["fub_person_id"] for lead in leads]
+        timezones = {lead["fub_person_id"]: lead.get("recipient_timezone") for lead in leads}
+        checks = await self.compliance.check_sms_compliance_batch(
+            person_ids, campaign["organization_id"], timezones,
+        )
+
+        sendable: List[Dict[str, Any]] = []
+        deferred: List[Tuple[int, datetime]] = []
+        skipped: Dict[int, str] = {}
+        for lead in leads:
+            person_id = lead["fub_person_id"]
+            check = checks.get(person_id)
+            if check is None or check.can_send:
+                sendable.append(lead)
+            elif check.status in DEFERRABLE_STATUSES and check.next_allowed_time:
+                deferred.append((person_id, _naive_utc(check.next_allowed_time)))
+            else:
+                skipped[person_id] = check.reason or check.status.value
+
+        if deferred:
+            self._set_send_times(
+                campaign["id"],
+                [person_id for person_id, _ in deferred],
+                [send_at.isoformat() for _, send_at in deferred],
+                claim_token=claim_token,
+            )
+        if skipped:
+            await self.campaign_manager.mark_leads_failed(campaign["id"], skipped, status="skipped")
+
+        stats.deferred += len(deferred)
+        stats.skipped += len(skipped)
+        return sendable
+
+    async def _record(
+        self,
+        campaign: Dict[str, Any],
+        sendable: List[Dict[str, Any]],
+        sent: List[int],
+        errors: Dict[int, str],
+    ):
+        """Bulk-write the chunk's outcome and count the texts against each lead's daily cap."""
+        if sent:
+            await self.campaign_manager.mark_leads_sent(campaign["id"], sent)
+            phones = {
+                lead["fub_person_id"]: lead.get("phone_number")
+                for lead in sendable if lead.get("phone_number")
+            }
+            await self.compliance.increment_message_counts(sent, campaign["organization_id"], phones)
+        if errors:
+            await self.campaign_manager.mark_leads_failed(campaign["id"], errors)
+
+    # ------------------------------------------------------------------
+    # Recovery and completion
+    # ------------------------------------------------------------------
+
+    def recover_interrupted(self) -> int:
+        """
+        Close out sends interrupted by a crash.
+
+        Leads still 'sending' after CLAIM_LEASE_SECONDS may or may not have
+        received their message, so they are marked failed instead of being
+        retried.
+
+        Returns:
+            Number of leads recovered
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.CLAIM_LEASE_SECONDS)).isoformat()
+        try:
+            result = self.supabase.table("ai_campaign_leads").update({
+                "status": "failed",
+                "error_message": INTERRUPTED_ERROR,
+            }).eq("status", "sending").lt("claimed_at", cutoff).execute()
+        except Exception as e:
+            logger.error(f"Error recovering interrupted campaign sends: {e}")
+            return 0
+
+        recovered = len(result.data or [])
+        if recovered:
+            logger.warning(f"Marked {recovered} interrupted campaign sends as failed (not resent)")
+        return recovered
+
+    def _is_finished(self, campaign_id: str) -> bool:
+        try:
+            result = self.supabase.table("ai_campaign_leads").select("fub_person_id").eq(
+                "campaign_id", campaign_id
+            ).in_("status", ["pending", "sending"]).limit(1).execute()
+            return not result.data
+        except Exception as e:
+            logger.error(f"Error checking campaign {campaign_id} progress: {e}")
+            return False
+
+    def _complete(self, campaign_id: str):
+        try:
+            self.supabase.table("ai_campaigns").update({
+                "status": CampaignStatus.COMPLETED.value,
+                "completed_at": datetime.utcnow().isoformat(),
+            }).eq("id", campaign_id).eq("status", CampaignStatus.RUNNING.value).execute()
+            logger.info(f"Campaign {campaign_id} completed")
+        except Exception as e:
+            logger.error(f"Error completing campaign {campaign_id}: {e}")
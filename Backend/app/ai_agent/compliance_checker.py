@@ -19,7 +19,7 @@ Key Rules:
 import logging
 import re
 from dataclasses import dataclass
-from datetime import datetime, time, timedelta
+from datetime import datetime, date, timedelta
 from typing import Optional, Dict, Any, Tuple, List
 from enum import Enum
 import pytz
@@ -63,6 +63,16 @@ class ComplianceResult:
         }
 
 
+@dataclass
+class TimeWindow:
+    """Texting window state for one timezone at a point in time."""
+    timezone: str
+    is_allowed: bool
+    next_allowed_time: Optional[datetime]
+    local_date: date
+    next_day_start: datetime
+
+
 class ComplianceChecker:
     """
     Checks SMS and communication compliance.
@@ -86,6 +96,9 @@ class ComplianceChecker:
     # Default timezone if unknown (Mountain Time for Colorado-based operations)
     DEFAULT_TIMEZONE = "America/Denver"
 
+    # Max person IDs per sms_consent query (keeps the PostgREST URL bounded)
+    CONSENT_BATCH_SIZE = 500
+
     # Stage patterns that BLOCK AI outreach entirely
     # These stages mean the lead should NOT receive automated AI messages
     BLOCK_STAGE_PATTERNS = [
@@ -133,12 +146,58 @@ class ComplianceChecker:
         Returns:
             ComplianceResult with status and details
         """
-        warnings = []
         tz = recipient_timezone or self.DEFAULT_TIMEZONE
 
         # Get consent record
         consent = await self._get_consent_record(fub_person_id, organization_id)
 
+        return self._evaluate_compliance(consent, tz, self._get_time_window(tz))
+
+    async def check_sms_compliance_batch(
+        self,
+        person_ids: List[int],
+        organization_id: Optional[str] = None,
+        recipient_timezones: Optional[Dict[int, str]] = None,
+    ) -> Dict[int, ComplianceResult]:
+        """
+        Compliance pre-flight for a batch of leads.
+
+        Loads consent rows with one sms_consent query per CONSENT_BATCH_SIZE
+        leads and computes the texting window once per distinct timezone,
+        so checking thousands of leads costs a handful of queries.
+
+        Args:
+            person_ids: FUB person IDs to check
+            organization_id: Organization ID (None matches consent rows from any org)
+            recipient_timezones: Optional per-lead timezone (defaults to DEFAULT_TIMEZONE)
+
+        Returns:
+            Dict of fub_person_id -> ComplianceResult
+        """
+        recipient_timezones = recipient_timezones or {}
+        consents = await self._get_consent_records(person_ids, organization_id)
+
+        now = datetime.now(pytz.utc)
+        windows: Dict[str, TimeWindow] = {}
+        results: Dict[int, ComplianceResult] = {}
+
+        for person_id in person_ids:
+            tz = recipient_timezones.get(person_id) or self.DEFAULT_TIMEZONE
+            if tz not in windows:
+                windows[tz] = self._get_time_window(tz, now)
+            results[person_id] = self._evaluate_compliance(consents.get(int(person_id)), tz, windows[tz])
+
+        return results
+
+    def _evaluate_compliance(
+        self,
+        consent: Optional[Dict[str, Any]],
+        tz: str,
+        window: TimeWindow,
+    ) -> ComplianceResult:
+        """Apply the compliance rules to a consent record and texting window."""
+        warnings = []
+
         # Check 1: Opt-out status
         if consent and consent.get("opted_out"):
             return ComplianceResult(
@@ -162,38 +221,30 @@ class ComplianceChecker:
             )
 
         # Check 4: Time window
-        time_ok, next_allowed = self._check_time_window(tz)
-        if not time_ok:
+        if not window.is_allowed:
             return ComplianceResult(
                 status=ComplianceStatus.BLOCKED_OUTSIDE_HOURS,
                 can_send=False,
                 reason=f"Outside allowed texting hours (8 AM - 8 PM {tz})",
-                next_allowed_time=next_allowed,
+                next_allowed_time=window.next_allowed_time,
             )
 
         # Check 5: Rate limit
         if consent:
-            messages_today = consent.get("messages_sent_today", 0)
+            messages_today = consent.get("messages_sent_today") or 0
             last_message_date = consent.get("last_message_date")
 
             # Reset counter if it's a new day
-            today = datetime.now(pytz.timezone(tz)).date()
-            if last_message_date and str(last_message_date) != str(today):
+            if last_message_date and str(last_message_date) != str(window.local_date):
                 messages_today = 0
 
             if messages_today >= self.MAX_MESSAGES_PER_DAY:
-                # Calculate next allowed time (tomorrow at 8 AM)
-                tomorrow = today + timedelta(days=1)
-                next_allowed = datetime.combine(
-                    tomorrow,
-                    time(self.ALLOWED_START_HOUR, 0),
-                    tzinfo=pytz.timezone(tz)
-                )
                 return ComplianceResult(
                     status=ComplianceStatus.BLOCKED_RATE_LIMIT,
                     can_send=False,
                     reason=f"Rate limit reached ({self.MAX_MESSAGES_PER_DAY} messages per day)",
-                    next_allowed_time=next_allowed,
+                    # Tomorrow at 8 AM
+                    next_allowed_time=window.next_day_start,
                 )
 
         # All checks passed
@@ -335,36 +386,43 @@ class ComplianceChecker:
         Returns:
             Tuple of (is_allowed, next_allowed_time)
         """
+        window = self._get_time_window(timezone_str)
+        return window.is_allowed, window.next_allowed_time
+
+    def _get_time_window(self, timezone_str: str, now: Optional[datetime] = None) -> TimeWindow:
+        """
+        Compute the texting window for a timezone.
+
+        Args:
+            timezone_str: IANA timezone name (unknown names use DEFAULT_TIMEZONE)
+            now: Aware reference time (defaults to the current time)
+        """
         try:
             tz = pytz.timezone(timezone_str)
         except pytz.exceptions.UnknownTimeZoneError:
             tz = pytz.timezone(self.DEFAULT_TIMEZONE)
 
-        now = datetime.now(tz)
+        now = now.astimezone(tz) if now else datetime.now(tz)
         current_hour = now.hour
+        today_start = now.replace(tzinfo=None, hour=self.ALLOWED_START_HOUR, minute=0, second=0, microsecond=0)
+        next_day_start = tz.localize(today_start + timedelta(days=1))
 
         if self.ALLOWED_START_HOUR <= current_hour < self.ALLOWED_END_HOUR:
-            return True, None
-
-        # Calculate next allowed time
-        if current_hour < self.ALLOWED_START_HOUR:
+            next_allowed = None
+        elif current_hour < self.ALLOWED_START_HOUR:
             # Before start time today
-            next_allowed = now.replace(
-                hour=self.ALLOWED_START_HOUR,
-                minute=0,
-                second=0,
-                microsecond=0
-            )
+            next_allowed = tz.localize(today_start)
         else:
             # After end time, next morning
-            tomorrow = now.date() + timedelta(days=1)
-            next_allowed = datetime.combine(
-                tomorrow,
-                time(self.ALLOWED_START_HOUR, 0),
-                tzinfo=tz
-            )
-
-        return False, next_allowed
+            next_allowed = next_day_start
+
+        return TimeWindow(
+            timezone=tz.zone,
+            is_allowed=next_allowed is None,
+            next_allowed_time=next_allowed,
+            local_date=now.date(),
+            next_day_start=next_day_start,
+        )
 
     async def _get_consent_record(
         self,
@@ -389,6 +447,62 @@ class ComplianceChecker:
 
         return None
 
+    async def _get_consent_records(
+        self,
+        person_ids: List[int],
+        organization_id: Optional[str] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Get consent records for many leads, keyed by fub_person_id."""
+        if not self.supabase or not person_ids:
+            return {}
+
+        records: Dict[int, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(person_ids))
+
+        for start in range(0, len(unique_ids), self.CONSENT_BATCH_SIZE):
+            chunk = unique_ids[start:start + self.CONSENT_BATCH_SIZE]
+            try:
+                query = self.supabase.table("sms_consent").select("*").in_("fub_person_id", chunk)
+                if organization_id:
+                    query = query.eq("organization_id", organization_id)
+                result = query.execute()
+
+                for row in result.data or []:
+                    person_id = int(row["fub_person_id"])
+                    current = records.get(person_id)
+                    records[person_id] = self._merge_consent_rows(current, row) if current else row
+            except Exception as e:
+                logger.error(f"Error fetching consent records for {len(chunk)} leads: {e}")
+
+        return records
+
+    @staticmethod
+    def _merge_consent_rows(current: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Combine two consent rows for the same lead (one per organization).
+
+        The strictest view wins: opted out or on DNC if either row says so,
+        and the message count of the most recent day (highest if tied).
+        """
+        merged = dict(current)
+        if row.get("opted_out") and not current.get("opted_out"):
+            merged["opted_out"] = True
+            merged["opted_out_at"] = row.get("opted_out_at")
+        merged["is_on_dnc"] = bool(current.get("is_on_dnc") or row.get("is_on_dnc"))
+        merged["consent_given"] = bool(current.get("consent_given") or row.get("consent_given"))
+
+        current_day = str(current.get("last_message_date") or "")
+        row_day = str(row.get("last_message_date") or "")
+        if row_day > current_day:
+            merged["last_message_date"] = row.get("last_message_date")
+            merged["messages_sent_today"] = row.get("messages_sent_today") or 0
+        elif row_day == current_day:
+            merged["messages_sent_today"] = max(
+                current.get("messages_sent_today") or 0,
+                row.get("messages_sent_today") or 0,
+            )
+        return merged
+
     async def record_consent(
         self,
         fub_person_id: int,
@@ -528,9 +642,66 @@ class ComplianceChecker:
             organization_id: Organization ID
             phone_number: Lead's phone number (required if no existing consent record)
         """
-        if not self.supabase:
-            return False
+        phone_numbers = {fub_person_id: phone_number} if phone_number else None
+        return await self.increment_message_counts([fub_person_id], organization_id, phone_numbers) > 0
+
+    async def increment_message_counts(
+        self,
+        person_ids: List[int],
+        organization_id: str,
+        phone_numbers: Optional[Dict[int, str]] = None,
+    ) -> int:
+        """
+        Atomically increment the daily message count for a batch of leads.
 
+        Runs as a single increment_sms_message_counts call, so concurrent
+        senders can't lose updates and a campaign batch costs one round trip.
+        Leads without a consent record get one created when a phone number
+        is supplied. Falls back to per-lead updates if the function is
+        unavailable.
+
+        Args:
+            person_ids: FUB person IDs that were just messaged
+            organization_id: Organization ID
+            phone_numbers: Optional fub_person_id -> phone for leads that may lack a record
+
+        Returns:
+            Number of consent records updated or created
+        """
+        if not self.supabase or not person_ids:
+            return 0
+
+        phone_numbers = phone_numbers or {}
+        unique_ids = list(dict.fromkeys(person_ids))
+        phones = [
+            self._normalize_phone(phone_numbers[pid]) if phone_numbers.get(pid) else None
+            for pid in unique_ids
+        ]
+
+        try:
+            result = self.supabase.rpc("increment_sms_message_counts", {
+                "p_organization_id": organization_id,
+                "p_person_ids": unique_ids,
+                "p_phone_numbers": phones,
+                "p_today": str(datetime.utcnow().date()),
+            }).execute()
+            return int(result.data or 0)
+        except Exception as e:
+            logger.warning(f"Bulk message count increment failed, updating per lead: {e}")
+
+        updated = 0
+        for person_id in unique_ids:
+            if await self._increment_message_count_single(person_id, organization_id, phone_numbers.get(person_id)):
+                updated += 1
+        return updated
+
+    async def _increment_message_count_single(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        phone_number: str = None,
+    ) -> bool:
+        """Read-modify-write increment for one lead (fallback path)."""
         try:
             consent = await self._get_consent_record(fub_person_id, organization_id)
             today = datetime.utcnow().date()
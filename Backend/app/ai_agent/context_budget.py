@@ -0,0 +1,226 @@
+"""
+Context Budget - Token-budgeted prompt sections and rolling summaries.
+
+The response prompt is built from many optional sections (lead profile,
+qualification data, conversation intelligence, hints) plus the message
+history. Left unchecked their size varies a lot from lead to lead, and so do
+latency and cost. This module keeps the prompt inside a token budget:
+
+- estimate_tokens(): cheap size estimate (~4 characters per token)
+- fit_sections(): keeps required sections, then the rest in priority order;
+  a section that doesn't fit is cut at a line boundary or dropped
+- RollingSummary: facts from messages older than the verbatim history
+  window. Each message is folded in once; the summary is stored with the
+  conversation so old turns are never scanned again.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Don't keep a truncated section smaller than this
+MIN_TRUNCATED_TOKENS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of prompt text."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class ContextSection:
+    """One block of prompt context."""
+    name: str
+    text: str
+    priority: int = 5  # Lower is kept first
+    required: bool = False
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class BudgetReport:
+    """What fit_sections kept, cut and dropped."""
+    budget: int
+    tokens_by_section: Dict[str, int] = field(default_factory=dict)
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens_by_section.values())
+
+
+def _truncate_lines(text: str, max_tokens: int) -> str:
+    """Leading lines of text that fit in max_tokens."""
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept).rstrip()
+
+
+def fit_sections(
+    sections: Sequence[ContextSection],
+    budget: Optional[int],
+) -> Tuple[List[ContextSection], BudgetReport]:
+    """
+    Choose the sections that fit in a token budget.
+
+    Required sections are always kept. The others are taken in priority
+    order (ties keep their original order) while they fit; the first one that
+    doesn't fit is cut at a line boundary if enough room is left, otherwise
+    dropped. Kept sections are returned in their original order.
+
+    Args:
+        sections: Candidate sections, in prompt order
+        budget: Token budget for all sections (None keeps everything)
+
+    Returns:
+        Tuple of (kept sections, report)
+    """
+    report = BudgetReport(budget=budget or 0)
+    sections = [s for s in sections if s.text]
+
+    if budget is None:
+        for section in sections:
+            report.tokens_by_section[section.name] = section.tokens
+        return list(sections), report
+
+    remaining = budget - sum(s.tokens for s in sections if s.required)
+    chosen: Dict[int, ContextSection] = {}
+
+    for index, section in enumerate(sections):
+        if section.required:
+            chosen[index] = section
+
+    optional = sorted(
+        (index for index, s in enumerate(sections) if not s.required),
+        key=lambda index: sections[index].priority,
+    )
+    for index in optional:
+        section = sections[index]
+        if section.tokens <= remaining:
+            chosen[index] = section
+            remaining -= section.tokens
+            continue
+
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            text = _truncate_lines(section.text, remaining)
+            if estimate_tokens(text) >= MIN_TRUNCATED_TOKENS:
+                cut = ContextSection(section.name, text, section.priority)
+                chosen[index] = cut
+                remaining -= cut.tokens
+                report.truncated.append(section.name)
+                continue
+        report.dropped.append(section.name)
+
+    kept = [chosen[index] for index in sorted(chosen)]
+    for section in kept:
+        report.tokens_by_section[section.name] = section.tokens
+    return kept, report
+
+
+def message_key(message: Dict[str, Any]) -> str:
+    """Stable identity of a history message (timestamp, direction, content)."""
+    content = message.get("content", "") or ""
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+    return f"{message.get('timestamp') or ''}|{message.get('direction', '')}|{digest}"
+
+
+@dataclass
+class RollingSummary:
+    """
+    Running summary of conversation turns that no longer go to the LLM verbatim.
+
+    Facts keep the latest mention of each kind, so the summary stays small
+    however long the conversation gets.
+
+    Usage:
+        summary = RollingSummary.from_dict(context.conversation_summary)
+        summary.fold(older_messages)
+        context.conversation_summary = summary.to_dict()
+    """
+
+    # Keyword triggers for facts the lead mentioned
+    FACT_KEYWORDS = {
+        "budget": ["$", "k", "thousand"],
+        "timeline": ["month", "year", "soon", "asap"],
+        "requirements": ["bedroom", "bath", "garage", "yard"],
+    }
+    MAX_FACT_CHARS = 50
+
+    facts: Dict[str, str] = field(default_factory=dict)
+    folded_count: int = 0
+    last_folded_key: Optional[str] = None
+
+    def fold(self, messages: Sequence[Dict[str, Any]]) -> int:
+        """
+        Fold messages into the summary, skipping ones already folded.
+
+        Args:
+            messages: Messages leaving the verbatim window, oldest first
+
+        Returns:
+            Number of messages newly folded
+        """
+        start = 0
+        if self.last_folded_key:
+            keys = [message_key(m) for m in messages]
+            if self.last_folded_key in keys:
+                start = len(keys) - keys[::-1].index(self.last_folded_key)
+
+        new_messages = messages[start:]
+        for message in new_messages:
+            self._fold_message(message)
+        if new_messages:
+            self.folded_count += len(new_messages)
+            self.last_folded_key = message_key(new_messages[-1])
+        return len(new_messages)
+
+    def _fold_message(self, message: Dict[str, Any]):
+        if message.get("direction") != "inbound":
+            return
+        raw = message.get("content", "") or ""
+        content = raw.lower()
+        for kind, keywords in self.FACT_KEYWORDS.items():
+            if any(word in content for word in keywords):
+                self.facts[kind] = raw[:self.MAX_FACT_CHARS]
+
+    def to_text(self) -> str:
+        """Summary line for the prompt."""
+        if not self.facts:
+            return "Early conversation: Introductions and initial qualification"
+        return " | ".join(
+            f"Lead mentioned {kind}: {self.facts[kind]}"
+            for kind in self.FACT_KEYWORDS if kind in self.facts
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "facts": dict(self.facts),
+            "folded_count": self.folded_count,
+            "last_folded_key": self.last_folded_key,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RollingSummary":
+        data = data or {}
+        return cls(
+            facts=dict(data.get("facts") or {}),
+            folded_count=data.get("folded_count", 0),
+            last_folded_key=data.get("last_folded_key"),
+        )
@@ -0,0 +1,286 @@
+"""
+Conversation History Cache - Per-person conversation window kept in Redis.
+
+Every inbound text used to re-query `ai_message_log`, over-fetch rows and
+re-run the same privacy/enrichment filters before the AI saw the history.
+This keeps a rolling window of already-filtered, pre-shaped history entries
+per lead so readers get the last N turns with a single Redis call.
+
+Strategy:
+- log_ai_message (and other ai_message_log writers) → append to the window
+- Appends only land on a warm window (RPUSHX) so a partial window is never
+  mistaken for the full history; every append also bumps a per-lead version
+- Cold miss → one filtered backfill from ai_message_log, cached only if the
+  window is still absent and no append landed during the DB read
+  (WATCH/MULTI on the window and version keys)
+- Redis unavailable → falls back to the database read transparently
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Number of filtered entries kept per lead
+HISTORY_WINDOW_SIZE = 50
+
+# Window TTL - refreshed on every append
+HISTORY_TTL_SECONDS = 7 * 24 * 3600
+
+# Extra rows fetched on backfill to account for filtered-out messages
+BACKFILL_OVERFETCH = 20
+
+# Historical sync rows longer than this are almost always enrichment dumps
+MAX_HISTORICAL_SYNC_LENGTH = 500
+
+
+def is_conversation_message(content: Optional[str], ai_model: Optional[str] = None) -> bool:
+    """
+    Check whether an ai_message_log row belongs in the conversation history.
+
+    Skips privacy placeholders (FUB hides some bodies) and enrichment/skip
+    trace data that historical_sync logged as messages.
+    """
+    content = content or ""
+
+    if "Body is hidden" in content or "hidden for privacy" in content.lower():
+        return False
+
+    if ai_model == "historical_sync" and (
+        "Contact Information:" in content
+        or "Criminal History" in content
+        or "Email Owner:" in content
+        or "Phone Numbers" in content and "Addresses" in content
+        or "Risk Assessment:" in content
+        or "Test note from" in content
+        or "Re-engagement Test" in content
+        or len(content) > MAX_HISTORICAL_SYNC_LENGTH
+    ):
+        return False
+
+    return True
+
+
+def shape_history_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an ai_message_log row into a conversation history entry."""
+    direction = row.get("direction") or "outbound"
+    return {
+        "role": "lead" if direction == "inbound" else "agent",
+        "direction": direction,
+        "content": row.get("message_content") or "",
+        "channel": row.get("channel"),
+        "timestamp": row.get("created_at"),
+    }
+
+
+class ConversationHistoryCache:
+    """
+    Redis-backed rolling window of conversation history per lead.
+
+    Usage:
+        cache = get_conversation_history_cache(supabase_client)
+
+        # Read the last 15 turns (Redis, or DB backfill on a cold miss)
+        history = cache.get_recent(person_id, limit=15)
+
+        # Keep the window warm after logging a message
+        cache.append(row)
+    """
+
+    KEY_PREFIX = "ai:history"
+
+    def __init__(
+        self,
+        supabase_client=None,
+        window_size: int = HISTORY_WINDOW_SIZE,
+        ttl_seconds: int = HISTORY_TTL_SECONDS,
+    ):
+        self.supabase = supabase_client
+        self.window_size = window_size
+        self.ttl_seconds = ttl_seconds
+        self.redis = None
+
+        try:
+            from app.service.redis_service import RedisServiceSingleton
+            self.redis = RedisServiceSingleton.get_instance()
+        except Exception as e:
+            logger.warning(f"Redis not available, conversation history cache disabled: {e}")
+
+    def _key(self, fub_person_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{fub_person_id}"
+
+    def _version_key(self, fub_person_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{fub_person_id}:v"
+
+    # ========================================
+    # READ PATH
+    # ========================================
+
+    def get_recent(self, fub_person_id: int, limit: int = 15) -> List[Dict[str, Any]]:
+        """
+        Get the last `limit` conversation turns for a lead, oldest first.
+
+        Served from the Redis window when warm; on a cold miss the window is
+        backfilled from ai_message_log with the history filters applied.
+        """
+        if limit <= 0:
+            return []
+
+        if self.redis is not None and limit <= self.window_size:
+            try:
+                raw = self.redis.redis.lrange(self._key(fub_person_id), -limit, -1)
+                if raw:
+                    return self._decode(raw)
+            except redis.RedisError as e:
+                logger.debug(f"History cache read failed for person {fub_person_id}: {e}")
+                return self._load_from_db(fub_person_id, limit)
+
+        history = self._backfill(fub_person_id, max(limit, self.window_size))
+        return history[-limit:]
+
+    def _load_from_db(self, fub_person_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Filtered backfill of the last `limit` turns from ai_message_log."""
+        if not self.supabase:
+            return []
+
+        try:
+            result = self.supabase.table("ai_message_log").select(
+                "direction, channel, message_content, ai_model, created_at"
+            ).eq(
+                "fub_person_id", fub_person_id
+            ).order(
+                "created_at", desc=True
+            ).limit(limit + BACKFILL_OVERFETCH).execute()
+
+            rows = list(reversed(result.data or []))
+            history = [
+                shape_history_entry(row) for row in rows
+                if is_conversation_message(row.get("message_content"), row.get("ai_model"))
+            ]
+            return history[-limit:]
+        except Exception as e:
+            logger.error(f"Error fetching conversation history: {e}")
+            return []
+
+    def _backfill(self, fub_person_id: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Read the history from the DB and cache it as the lead's window.
+
+        An append that lands between the DB read and the write would be
+        missing from (or overwritten by) the cached window, so the window and
+        version keys are watched across the read and the window is only
+        written if neither changed and it is still absent.
+        """
+        if self.redis is None:
+            return self._load_from_db(fub_person_id, limit)
+
+        key = self._key(fub_person_id)
+        history: List[Dict[str, Any]] = []
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(key, self._version_key(fub_person_id))
+                history = self._load_from_db(fub_person_id, limit)
+                # Only cache a complete window: an empty result may just mean the
+                # lead has no history yet, which the next append can't extend.
+                if history and not pipe.exists(key):
+                    pipe.multi()
+                    pipe.rpush(key, *[json.dumps(entry, default=str) for entry in history[-self.window_size:]])
+                    pipe.expire(key, self.ttl_seconds)
+                    pipe.execute()
+                return history
+        except redis.WatchError:
+            logger.debug(f"History for person {fub_person_id} changed during backfill, not cached")
+            return history
+        except redis.RedisError as e:
+            logger.debug(f"History cache backfill failed for person {fub_person_id}: {e}")
+            return self._load_from_db(fub_person_id, limit)
+
+    @staticmethod
+    def _decode(raw: List[str]) -> List[Dict[str, Any]]:
+        history = []
+        for item in raw:
+            try:
+                history.append(json.loads(item))
+            except (TypeError, ValueError):
+                continue
+        return history
+
+    # ========================================
+    # WRITE PATH
+    # ========================================
+
+    def append(self, row: Dict[str, Any]) -> bool:
+        """
+        Append a logged ai_message_log row to the lead's cached window.
+
+        Rows that the history filters would skip are ignored. If the window
+        is cold nothing is written - the next read backfills from the DB,
+        which already contains this row. The version bump makes a backfill
+        that read the DB before this row was logged drop its result.
+        """
+        fub_person_id = row.get("fub_person_id")
+        if self.redis is None or not fub_person_id:
+            return False
+
+        if not is_conversation_message(row.get("message_content"), row.get("ai_model")):
+            return False
+
+        entry = shape_history_entry(row)
+        if not entry["timestamp"]:
+            entry["timestamp"] = datetime.utcnow().isoformat()
+
+        key = self._key(fub_person_id)
+        version_key = self._version_key(fub_person_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.rpushx(key, json.dumps(entry, default=str))
+            pipe.ltrim(key, -self.window_size, -1)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.ttl_seconds)
+            pushed = pipe.execute()[0]
+            return bool(pushed)
+        except redis.RedisError as e:
+            logger.debug(f"History cache append failed for person {fub_person_id}: {e}")
+            # Drop the window rather than leave it missing a message
+            self.invalidate(fub_person_id)
+            return False
+
+    def invalidate(self, fub_person_id: int) -> bool:
+        """Drop the cached window (next read backfills from the DB)."""
+        if self.redis is None:
+            return False
+
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(self._key(fub_person_id))
+            pipe.incr(self._version_key(fub_person_id))
+            pipe.expire(self._version_key(fub_person_id), self.ttl_seconds)
+            return bool(pipe.execute()[0])
+        except redis.RedisError as e:
+            logger.debug(f"History cache invalidation failed for person {fub_person_id}: {e}")
+            return False
+
+
+# Global instance
+_history_cache: Optional[ConversationHistoryCache] = None
+_history_cache_lock = threading.Lock()
+
+
+def get_conversation_history_cache(supabase_client=None) -> ConversationHistoryCache:
+    """Get the global conversation history cache."""
+    global _history_cache
+
+    if _history_cache is None:
+        with _history_cache_lock:
+            if _history_cache is None:
+                _history_cache = ConversationHistoryCache(supabase_client)
+    if supabase_client and not _history_cache.supabase:
+        _history_cache.supabase = supabase_client
+
+    return _history_cache
@@ -105,10 +105,16 @@ class ConversationContext:
     last_ai_message_at: Optional[datetime] = None
     last_human_message_at: Optional[datetime] = None
     message_count: int = 0
+    # Every message in the conversation; conversation_history is only the tail
+    messages_exchanged: int = 0
     objections_encountered: List[str] = field(default_factory=list)
     handoff_reason: Optional[str] = None
     assigned_agent_id: Optional[str] = None
 
+    # Rolling summary of turns older than the verbatim prompt history
+    # (context_budget.RollingSummary.to_dict())
+    conversation_summary: Dict[str, Any] = field(default_factory=dict)
+
     # Lead info from FUB
     lead_name: str = ""
     lead_first_name: str = ""
@@ -121,6 +127,9 @@ class ConversationContext:
     agent_name: str = "Sarah"
     brokerage_name: str = "our team"
 
+    # Persistence bookkeeping (see ConversationManager.save_context)
+    _saved_columns: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "conversation_id": self.conversation_id,
@@ -134,9 +143,11 @@ class ConversationContext:
             "last_ai_message_at": self.last_ai_message_at.isoformat() if self.last_ai_message_at else None,
             "last_human_message_at": self.last_human_message_at.isoformat() if self.last_human_message_at else None,
             "message_count": self.message_count,
+            "messages_exchanged": self.messages_exchanged,
             "objections_encountered": self.objections_encountered,
             "handoff_reason": self.handoff_reason,
             "assigned_agent_id": self.assigned_agent_id,
+            "conversation_summary": self.conversation_summary,
             "lead_name": self.lead_name,
             "lead_first_name": self.lead_first_name,
             "lead_phone": self.lead_phone,
@@ -144,10 +155,14 @@ class ConversationContext:
             "lead_source": self.lead_source,
         }
 
-    # Keep only the last N messages in JSONB to prevent unbounded growth.
+    # Keep only the last N messages in memory to prevent unbounded growth.
     # Full audit trail lives in ai_message_log table (individual rows, indexed).
     MAX_STORED_MESSAGES = 50
 
+    # Messages written back to the conversation_history column. The row only
+    # carries a short tail for quick reads; older turns come from ai_message_log.
+    HISTORY_TAIL_SIZE = 20
+
     def add_message(self, direction: str, content: str, channel: str = "sms"):
         """Add a message to conversation history."""
         self.conversation_history.append({
@@ -156,6 +171,7 @@ class ConversationContext:
             "channel": channel,
             "timestamp": datetime.utcnow().isoformat(),
         })
+        self.messages_exchanged += 1
         # Truncate to prevent JSONB bloat — full history is in ai_message_log
         if len(self.conversation_history) > self.MAX_STORED_MESSAGES:
             self.conversation_history = self.conversation_history[-self.MAX_STORED_MESSAGES:]
@@ -166,6 +182,35 @@ class ConversationContext:
         else:
             self.last_human_message_at = datetime.utcnow()
 
+    def persisted_columns(self) -> Dict[str, Any]:
+        """Column values written to ai_conversations by save_context."""
+        return {
+            "state": self.state.value,
+            "lead_score": self.lead_score,
+            "qualification_data": self.qualification_data.to_dict(),
+            "conversation_history": self.conversation_history[-self.HISTORY_TAIL_SIZE:],
+            "messages_exchanged": self.messages_exchanged,
+            "last_ai_message_at": self.last_ai_message_at.isoformat() if self.last_ai_message_at else None,
+            "last_human_message_at": self.last_human_message_at.isoformat() if self.last_human_message_at else None,
+            "handoff_reason": self.handoff_reason,
+            "assigned_agent_id": self.assigned_agent_id,
+            "conversation_summary": dict(self.conversation_summary),
+        }
+
+    def changed_columns(self) -> Dict[str, Any]:
+        """Columns that differ from the last loaded/saved row (all of them if unknown)."""
+        columns = self.persisted_columns()
+        if self._saved_columns is None:
+            return columns
+        return {
+            name: value for name, value in columns.items()
+            if self._saved_columns.get(name) != value
+        }
+
+    def mark_saved(self):
+        """Record the current values as what the database row holds."""
+        self._saved_columns = self.persisted_columns()
+
     def should_handoff(self) -> tuple[bool, Optional[str]]:
         """Determine if conversation should be handed off to human."""
         # Exceeded max AI messages
@@ -212,6 +257,15 @@ class ConversationManager:
         "just_browsing": 0,
     }
 
+    # Columns read when loading a conversation. conversation_history only holds
+    # the bounded tail (ConversationContext.HISTORY_TAIL_SIZE).
+    CONTEXT_COLUMNS = (
+        "id, fub_person_id, user_id, organization_id, state, lead_score, "
+        "qualification_data, conversation_history, last_ai_message_at, "
+        "last_human_message_at, handoff_reason, assigned_agent_id, conversation_summary, "
+        "messages_exchanged"
+    )
+
     def __init__(self, supabase_client=None):
         """Initialize the conversation manager."""
         self.supabase = supabase_client
@@ -227,7 +281,7 @@ class ConversationManager:
 
         # Try to find existing active conversation
         if self.supabase:
-            result = self.supabase.table("ai_conversations").select("*").eq(
+            result = self.supabase.table("ai_conversations").select(self.CONTEXT_COLUMNS).eq(
                 "fub_person_id", fub_person_id
             ).eq(
                 "organization_id", organization_id
@@ -268,12 +322,19 @@ class ConversationManager:
             result = self.supabase.table("ai_conversations").insert(insert_data).execute()
             if result.data:
                 context.conversation_id = result.data[0]["id"]
+                context.mark_saved()
 
         return context
 
     def _context_from_db(self, data: Dict[str, Any]) -> ConversationContext:
-        """Create ConversationContext from database row."""
-        return ConversationContext(
+        """
+        Create ConversationContext from database row.
+
+        Only the in-row history tail is kept; the full history is in
+        ai_message_log, and messages_exchanged carries the real count.
+        """
+        history = data.get("conversation_history") or []
+        context = ConversationContext(
             conversation_id=data["id"],
             fub_person_id=data["fub_person_id"],
             user_id=data["user_id"],
@@ -281,33 +342,39 @@ class ConversationManager:
             state=ConversationState(data["state"]),
             lead_score=data["lead_score"],
             qualification_data=QualificationData.from_dict(data.get("qualification_data", {})),
-            conversation_history=data.get("conversation_history", []),
+            conversation_history=history[-ConversationContext.HISTORY_TAIL_SIZE:],
+            messages_exchanged=data.get("messages_exchanged") or len(history),
             last_ai_message_at=datetime.fromisoformat(data["last_ai_message_at"]) if data.get("last_ai_message_at") else None,
             last_human_message_at=datetime.fromisoformat(data["last_human_message_at"]) if data.get("last_human_message_at") else None,
             handoff_reason=data.get("handoff_reason"),
             assigned_agent_id=data.get("assigned_agent_id"),
+            conversation_summary=data.get("conversation_summary") or {},
         )
+        context.mark_saved()
+        return context
 
     async def save_context(self, context: ConversationContext) -> bool:
-        """Save conversation context to database."""
+        """
+        Save conversation context to database.
+
+        Only columns that changed since the context was loaded (or last saved)
+        are sent. The history column is rewritten as a bounded tail and only
+        when new messages were added; the messages themselves are logged to
+        ai_message_log by the callers.
+        """
         if not self.supabase or not context.conversation_id:
             return False
 
-        update_data = {
-            "state": context.state.value,
-            "lead_score": context.lead_score,
-            "qualification_data": context.qualification_data.to_dict(),
-            "conversation_history": context.conversation_history,
-            "last_ai_message_at": context.last_ai_message_at.isoformat() if context.last_ai_message_at else None,
-            "last_human_message_at": context.last_human_message_at.isoformat() if context.last_human_message_at else None,
-            "handoff_reason": context.handoff_reason,
-            "assigned_agent_id": context.assigned_agent_id,
-        }
+        update_data = context.changed_columns()
+        if not update_data:
+            return True
 
         result = self.supabase.table("ai_conversations").update(update_data).eq(
             "id", context.conversation_id
         ).execute()
 
+        if result.data:
+            context.mark_saved()
         return bool(result.data)
 
     def determine_next_state(
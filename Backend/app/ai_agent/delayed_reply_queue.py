@@ -0,0 +1,463 @@
+"""
+Delayed Reply Queue - Durable human-like delay before AI replies go out.
+
+Replies used to wait out their "think + type" delay with asyncio.sleep()
+inside process_inbound_text. That pinned the lead profile, conversation
+context and agent response in memory for up to 90s per lead, and a restart
+during the wait silently dropped the reply.
+
+Now the ready reply is written to scheduled_messages (sequence_type
+'delayed_reply') with its send time and the handler returns. A dispatcher
+running on the persistent webhook loop sends it when it's due:
+
+- Redis sorted set (score = send-at epoch) holds the due index. A
+  pending→sending status update in the DB claims a reply; only then is it
+  dropped from the index, so a crash between the two leaves it indexed
+  (and the next dispatcher just finds it no longer pending)
+- Delivery is at-most-once: a reply still 'sending' after SENDING_LEASE_SECONDS
+  (its dispatcher died mid-send) is marked failed, never resent
+- A newer inbound message from the same lead supersedes (skips) any reply
+  still waiting, so leads never get an answer to an outdated question
+- On start-up, pending rows are re-indexed so replies queued before a
+  restart still go out
+- Without Redis, replies fall back to per-process timers (same durability
+  as the old sleep, but the coroutine is still released)
+
+The actual send + bookkeeping is injected as `deliver`, so this module knows
+nothing about Playwright or conversation state.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_TYPE = "delayed_reply"
+SUPERSEDED_REASON = "superseded_by_newer_inbound"
+INTERRUPTED_ERROR = "Interrupted while sending (not resent)"
+
+
+class ReplySkipped(Exception):
+    """Raised by `deliver` when a claimed reply should no longer be sent."""
+
+
+class DelayedReplyQueue:
+    """Persist delayed replies and dispatch them when due."""
+
+    TABLE_NAME = "scheduled_messages"
+    DUE_KEY = "ai:delayed_replies:due"
+    POLL_SECONDS = 0.5
+    BATCH_SIZE = 20
+    SENDING_LEASE_SECONDS = 600  # well past the Playwright queue wait + login + send
+    SWEEP_SECONDS = 60
+
+    def __init__(
+        self,
+        supabase_client=None,
+        deliver: Optional[Callable[[Dict[str, Any]], Awaitable[bool]]] = None,
+    ):
+        self.supabase = supabase_client
+        self.deliver = deliver
+
+        self.redis = None
+        try:
+            from app.service.redis_service import RedisServiceSingleton
+            self.redis = RedisServiceSingleton.get_instance()
+        except Exception as e:
+            logger.warning(f"Redis not available, delayed replies use in-process timers: {e}")
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._sending = 0
+        self._start_lock = threading.Lock()
+        self._stats = {"queued": 0, "sent": 0, "failed": 0, "skipped": 0, "superseded": 0, "recovered": 0, "interrupted": 0}
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        fub_person_id: int,
+        message_content: str,
+        send_at: datetime,
+        organization_id: str = None,
+        user_id: str = None,
+        payload: Dict[str, Any] = None,
+        channel: str = "sms",
+    ) -> Optional[str]:
+        """
+        Persist a ready reply and schedule it.
+
+        Args:
+            fub_person_id: FUB person ID
+            message_content: Reply text
+            send_at: When to send (naive UTC)
+            organization_id: Organization ID
+            user_id: User ID
+            payload: JSON-serializable data `deliver` needs after sending
+            channel: Message channel
+
+        Returns:
+            scheduled_messages ID, or None if the reply couldn't be persisted
+            (the caller should send inline instead)
+        """
+        if not self.supabase:
+            return None
+
+        try:
+            result = self.supabase.table(self.TABLE_NAME).insert({
+                "fub_person_id": fub_person_id,
+                "channel": channel,
+                "message_content": message_content,
+                "scheduled_for": send_at.isoformat(),
+                "status": "pending",
+                "sequence_type": SEQUENCE_TYPE,
+                "organization_id": organization_id,
+                "user_id": user_id,
+                "payload": payload or {},
+                "created_at": datetime.utcnow().isoformat(),
+            }).execute()
+        except Exception as e:
+            logger.error(f"Error queuing delayed reply for person {fub_person_id}: {e}")
+            return None
+
+        if not result.data:
+            logger.error(f"Failed to queue delayed reply for person {fub_person_id}")
+            return None
+
+        message_id = str(result.data[0]["id"])
+        self._schedule(message_id, send_at)
+        self._stats["queued"] += 1
+        logger.info(f"Queued delayed reply {message_id} for person {fub_person_id} at {send_at.isoformat()}")
+        return message_id
+
+    def supersede(self, fub_person_id: int) -> int:
+        """
+        Skip every reply still waiting for this lead.
+
+        Called right before the reply to a newer inbound message is queued -
+        the pending reply answers an older message. Leads the AI isn't enabled
+        for never get here, so their queued replies are left alone.
+
+        Returns:
+            Number of replies superseded
+        """
+        if not self.supabase:
+            return 0
+
+        try:
+            result = self.supabase.table(self.TABLE_NAME).update({
+                "status": "skipped",
+                "skipped_reason": SUPERSEDED_REASON,
+                "skipped_at": datetime.utcnow().isoformat(),
+            }).eq("fub_person_id", fub_person_id).eq(
+                "sequence_type", SEQUENCE_TYPE
+            ).eq("status", "pending").execute()
+        except Exception as e:
+            logger.error(f"Error superseding delayed replies for person {fub_person_id}: {e}")
+            return 0
+
+        message_ids = [str(row["id"]) for row in (result.data or [])]
+        if not message_ids:
+            return 0
+
+        self._unschedule(message_ids)
+        self._stats["superseded"] += len(message_ids)
+        logger.info(f"Superseded {len(message_ids)} pending replies for person {fub_person_id}")
+        return len(message_ids)
+
+    # ------------------------------------------------------------------
+    # Dispatcher
+    # ------------------------------------------------------------------
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Run the dispatcher on `loop` (idempotent). Re-indexes pending replies first."""
+        with self._start_lock:
+            if self._loop is loop and (self._dispatcher is None or not self._dispatcher.done()):
+                return  # running, or its creation is already scheduled
+            self._loop = loop
+            self._dispatcher = None
+
+        self.recover_interrupted()
+        self.recover_pending()
+
+        def create():
+            self._dispatcher = asyncio.ensure_future(self._dispatch_loop())
+
+        if _running_loop() is loop:
+            create()
+        else:
+            loop.call_soon_threadsafe(create)
+
+    def recover_pending(self) -> int:
+        """Index pending replies from the DB (e.g. after a restart). Returns how many."""
+        if not self.supabase:
+            return 0
+
+        try:
+            result = self.supabase.table(self.TABLE_NAME).select("id, scheduled_for").eq(
+                "sequence_type", SEQUENCE_TYPE
+            ).eq("status", "pending").execute()
+        except Exception as e:
+            logger.error(f"Error recovering delayed replies: {e}")
+            return 0
+
+        recovered = 0
+        for row in result.data or []:
+            message_id = str(row["id"])
+            if message_id in self._timers:
+                continue
+            send_at = _parse_utc(row.get("scheduled_for")) or datetime.utcnow()
+            self._schedule(message_id, send_at, nx=True)
+            recovered += 1
+
+        if recovered:
+            self._stats["recovered"] += recovered
+            logger.info(f"Recovered {recovered} pending delayed replies")
+        return recovered
+
+    def recover_interrupted(self) -> int:
+        """
+        Close out replies whose dispatcher died mid-send.
+
+        Replies still 'sending' after SENDING_LEASE_SECONDS may or may not
+        have reached the lead, so they are marked failed instead of being
+        resent.
+
+        Returns:
+            Number of replies recovered
+        """
+        if not self.supabase:
+            return 0
+
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.SENDING_LEASE_SECONDS)).isoformat()
+        try:
+            result = self.supabase.table(self.TABLE_NAME).update({
+                "status": "failed",
+                "error_message": INTERRUPTED_ERROR,
+            }).eq("sequence_type", SEQUENCE_TYPE).eq("status", "sending").lt("claimed_at", cutoff).execute()
+        except Exception as e:
+            logger.error(f"Error recovering interrupted delayed replies: {e}")
+            return 0
+
+        recovered = len(result.data or [])
+        if recovered:
+            self._stats["interrupted"] += recovered
+            logger.warning(f"Marked {recovered} interrupted delayed replies as failed (not resent)")
+        return recovered
+
+    async def dispatch_due(self) -> int:
+        """Claim and send every reply whose time has come. Returns how many were claimed."""
+        if self.redis is None:
+            return 0
+
+        try:
+            client = self.redis.redis
+            due = client.zrangebyscore(self.DUE_KEY, 0, time.time(), start=0, num=self.BATCH_SIZE)
+        except Exception as e:
+            logger.warning(f"Delayed reply index unavailable: {e}")
+            return 0
+
+        claimed = []
+        for message_id in due:
+            try:
+                row = self._claim(message_id)
+            except Exception as e:
+                # Left in the index - retried on the next poll
+                logger.error(f"Error claiming delayed reply {message_id}: {e}")
+                continue
+            # Claimed, or no longer pending (superseded, or another dispatcher has it)
+            try:
+                client.zrem(self.DUE_KEY, message_id)
+            except Exception as e:
+                logger.warning(f"Could not drop reply {message_id} from the due index: {e}")
+            if row is not None:
+                claimed.append(row)
+
+        if claimed:
+            await asyncio.gather(*(self._send(row) for row in claimed))
+        return len(claimed)
+
+    async def _dispatch_loop(self):
+        last_sweep = time.monotonic()
+        while True:
+            try:
+                await self.dispatch_due()
+                if time.monotonic() - last_sweep >= self.SWEEP_SECONDS:
+                    last_sweep = time.monotonic()
+                    self.recover_interrupted()
+            except Exception as e:
+                logger.error(f"Delayed reply dispatcher error: {e}")
+            await asyncio.sleep(self.POLL_SECONDS)
+
+    async def _dispatch(self, message_id: str) -> bool:
+        """Claim one reply in the DB and hand it to `deliver` (local timer path)."""
+        self._timers.pop(message_id, None)
+
+        try:
+            row = self._claim(message_id)
+        except Exception as e:
+            logger.error(f"Error claiming delayed reply {message_id}: {e}")
+            return False
+        if row is None:
+            return False  # superseded, cancelled or another worker has it
+        return await self._send(row)
+
+    async def _send(self, row: Dict[str, Any]) -> bool:
+        """Hand a claimed reply to `deliver` and record the outcome."""
+        message_id = str(row["id"])
+        self._sending += 1
+        try:
+            delivered = bool(await self.deliver(row)) if self.deliver else False
+            update = (
+                {"status": "sent", "sent_at": datetime.utcnow().isoformat()}
+                if delivered
+                else {"status": "failed", "error_message": "Delivery failed"}
+            )
+        except ReplySkipped as e:
+            delivered = False
+            update = {"status": "skipped", "skipped_reason": str(e), "skipped_at": datetime.utcnow().isoformat()}
+            logger.info(f"Delayed reply {message_id} skipped: {e}")
+        except Exception as e:
+            delivered = False
+            update = {"status": "failed", "error_message": str(e)}
+            logger.error(f"Delayed reply {message_id} delivery error: {e}")
+        finally:
+            self._sending -= 1
+
+        self._finish(message_id, update)
+        self._stats[update["status"]] += 1
+        return delivered
+
+    def _claim(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Move a reply pending→sending. Returns the row, or None if it wasn't pending."""
+        result = self.supabase.table(self.TABLE_NAME).update({
+            "status": "sending",
+            "claimed_at": datetime.utcnow().isoformat(),
+        }).eq("id", message_id).eq("status", "pending").execute()
+        return result.data[0] if result.data else None
+
+    def _finish(self, message_id: str, update: Dict[str, Any]):
+        try:
+            self.supabase.table(self.TABLE_NAME).update(update).eq("id", message_id).execute()
+        except Exception as e:
+            logger.error(f"Error marking delayed reply {message_id} {update['status']}: {e}")
+
+    # ------------------------------------------------------------------
+    # Scheduling helpers
+    # ------------------------------------------------------------------
+
+    def _schedule(self, message_id: str, send_at: datetime, nx: bool = False):
+        if self.redis is not None:
+            try:
+                self.redis.redis.zadd(self.DUE_KEY, {message_id: _epoch(send_at)}, nx=nx)
+                return
+            except Exception as e:
+                logger.warning(f"Redis unavailable, using local timer for reply {message_id}: {e}")
+
+        loop = self._loop
+        if loop is None:
+            logger.warning(f"No dispatcher running, reply {message_id} waits for recovery")
+            return
+
+        delay = max(0.0, _epoch(send_at) - time.time())
+
+        def arm():
+            self._timers[message_id] = loop.call_later(
+                delay, lambda: asyncio.ensure_future(self._dispatch(message_id))
+            )
+
+        if _running_loop() is loop:
+            arm()
+        else:
+            loop.call_soon_threadsafe(arm)
+
+    def _unschedule(self, message_ids: List[str]):
+        for message_id in message_ids:
+            timer = self._timers.pop(message_id, None)
+            if timer is not None:
+                timer.cancel()
+        if self.redis is not None:
+            try:
+                self.redis.redis.zrem(self.DUE_KEY, *message_ids)
+            except Exception as e:
+                logger.warning(f"Could not drop superseded replies from the due index: {e}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def in_flight(self) -> int:
+        """Replies queued (across workers when Redis is up) or being sent right now."""
+        waiting = len(self._timers)
+        if self.redis is not None:
+            try:
+                waiting += int(self.redis.redis.zcard(self.DUE_KEY))
+            except Exception:
+                pass
+        return waiting + self._sending
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for /ai/health."""
+        return {
+            **self._stats,
+            "in_flight": self.in_flight(),
+            "sending": self._sending,
+            "dispatcher_running": self._dispatcher is not None and not self._dispatcher.done(),
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch seconds for a naive-UTC or aware datetime."""
+    if value.tzinfo is None:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value.timestamp()
+
+
+def _parse_utc(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = datetime.utcfromtimestamp(parsed.timestamp())
+    return parsed
+
+
+# Singleton instance
+_queue: Optional[DelayedReplyQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_delayed_reply_queue(
+    supabase_client=None,
+    deliver: Optional[Callable[[Dict[str, Any]], Awaitable[bool]]] = None,
+) -> DelayedReplyQueue:
+    """Get the global delayed reply queue."""
+    global _queue
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = DelayedReplyQueue(supabase_client, deliver)
+        else:
+            if supabase_client and not _queue.supabase:
+                _queue.supabase = supabase_client
+            if deliver and not _queue.deliver:
+                _queue.deliver = deliver
+
+    return _queue
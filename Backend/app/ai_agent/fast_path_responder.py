@@ -0,0 +1,297 @@
+"""
+Fast Path Responder - Template replies for routine messages, no LLM call.
+
+Most inbound messages need the LLM. A few don't: "who is this?", "thanks!",
+"email me instead". IntentDetector already classifies those with high
+confidence, and a template answers them as well as the model would - in a
+millisecond instead of a few seconds.
+
+FastPathResponder.respond() returns a reply only when:
+- The primary intent has a route and clears the confidence threshold
+- The message is short and carries nothing else worth reading (no other
+  confident intent, no qualification entities, negative sentiment)
+- The route can fill its template (e.g. a channel acknowledgment was given)
+
+Otherwise it returns None and the caller generates the reply with the LLM.
+Slot picks ("2", "Tuesday works") have no route: confirming a time is left
+to the normal path, which books it through the appointment scheduler.
+
+FastPathStats counts hits per route and misses, and estimates the latency
+saved from a moving average of real LLM call times.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from app.ai_agent.intent_detector import DetectedIntent, Intent
+
+logger = logging.getLogger(__name__)
+
+# Routes
+ROUTE_IDENTITY = "identity"
+ROUTE_ACKNOWLEDGMENT = "acknowledgment"
+ROUTE_CHANNEL_PREFERENCE = "channel_preference"
+ROUTE_OBJECTION = "objection"
+
+# Template per route (channel preference replies with the ack it is given)
+ROUTE_TEMPLATES = {
+    ROUTE_IDENTITY: "identity_intro",
+    ROUTE_ACKNOWLEDGMENT: "ack_short",
+}
+
+INTENT_ROUTES = {
+    Intent.IDENTITY_QUESTION: ROUTE_IDENTITY,
+    Intent.CONFIRMATION_YES: ROUTE_ACKNOWLEDGMENT,
+    Intent.THANKS: ROUTE_ACKNOWLEDGMENT,
+    Intent.CHANNEL_PREFER_SMS: ROUTE_CHANNEL_PREFERENCE,
+    Intent.CHANNEL_PREFER_EMAIL: ROUTE_CHANNEL_PREFERENCE,
+    Intent.CHANNEL_PREFER_CALL: ROUTE_CHANNEL_PREFERENCE,
+    Intent.CHANNEL_REDUCE_SMS: ROUTE_CHANNEL_PREFERENCE,
+    Intent.CHANNEL_REDUCE_EMAIL: ROUTE_CHANNEL_PREFERENCE,
+}
+
+# Secondary intents that don't change what the reply should say
+BENIGN_SECONDARY_INTENTS = {
+    Intent.GREETING,
+    Intent.FAREWELL,
+    Intent.THANKS,
+    Intent.CONFIRMATION_YES,
+    Intent.POSITIVE_INTEREST,
+}
+
+# Entities each route expects; any other entity means there's more to answer
+ROUTE_ENTITIES = {
+    ROUTE_CHANNEL_PREFERENCE: {"channel_preference", "channel_reduction"},
+}
+
+
+@dataclass
+class FastPathReply:
+    """A reply produced without the LLM."""
+    text: str
+    route: str
+    template_id: Optional[str] = None
+    extracted_info: Dict[str, Any] = field(default_factory=dict)
+
+
+class FastPathStats:
+    """
+    Thread-safe fast path counters.
+
+    LLM latency is an exponential moving average of recorded generate calls;
+    latency saved is that average minus the fast path's own time, per hit.
+    """
+
+    EWMA_ALPHA = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters."""
+        with self._lock:
+            self._hits_by_route: Dict[str, int] = {}
+            self._misses_by_reason: Dict[str, int] = {}
+            self._fast_path_ms_total = 0.0
+            self._llm_latency_ms: Optional[float] = None
+            self._llm_calls = 0
+            self._saved_ms = 0.0
+
+    def record_hit(self, route: str, elapsed_ms: float):
+        """Record a reply answered without the LLM."""
+        with self._lock:
+            self._hits_by_route[route] = self._hits_by_route.get(route, 0) + 1
+            self._fast_path_ms_total += elapsed_ms
+            if self._llm_latency_ms is not None:
+                self._saved_ms += max(0.0, self._llm_latency_ms - elapsed_ms)
+
+    def record_miss(self, reason: str):
+        """Record a message that went to the LLM."""
+        with self._lock:
+            self._misses_by_reason[reason] = self._misses_by_reason.get(reason, 0) + 1
+
+    def record_llm_latency(self, elapsed_ms: float):
+        """Record the duration of one LLM generate call."""
+        with self._lock:
+            self._llm_calls += 1
+            if self._llm_latency_ms is None:
+                self._llm_latency_ms = elapsed_ms
+            else:
+                self._llm_latency_ms += self.EWMA_ALPHA * (elapsed_ms - self._llm_latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters for health endpoints and logs."""
+        with self._lock:
+            hits = sum(self._hits_by_route.values())
+            misses = sum(self._misses_by_reason.values())
+            total = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "hits_by_route": dict(self._hits_by_route),
+                "misses_by_reason": dict(self._misses_by_reason),
+                "avg_fast_path_ms": round(self._fast_path_ms_total / hits, 2) if hits else 0.0,
+                "llm_calls": self._llm_calls,
+                "avg_llm_latency_ms": round(self._llm_latency_ms or 0.0, 1),
+                "latency_saved_ms": round(self._saved_ms, 1),
+            }
+
+
+class FastPathResponder:
+    """
+    Answers routine messages from templates when intent confidence is high.
+
+    Usage:
+        responder = FastPathResponder(template_engine, confidence_threshold=0.9)
+        reply = responder.respond(message, detected, {"first_name": "Ann", ...})
+        if reply is None:
+            ...  # generate with the LLM
+    """
+
+    DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+
+    # Longer messages usually say more than the intent captures
+    MAX_MESSAGE_WORDS = 8
+
+    # Other intents at or above this confidence send the message to the LLM
+    SECONDARY_INTENT_FLOOR = 0.6
+
+    def __init__(
+        self,
+        template_engine,
+        confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+        stats: FastPathStats = None,
+    ):
+        """
+        Initialize the responder.
+
+        Args:
+            template_engine: ResponseTemplateEngine used to render replies
+            confidence_threshold: Minimum primary intent confidence
+            stats: Counters to record into (defaults to the global stats)
+        """
+        self.template_engine = template_engine
+        self.confidence_threshold = confidence_threshold
+        self.stats = stats or get_fast_path_stats()
+
+    def respond(
+        self,
+        message: str,
+        detected: DetectedIntent,
+        variables: Dict[str, Any],
+        last_ai_message: str = "",
+        acknowledgment: str = None,
+        lead_id: str = None,
+    ) -> Optional[FastPathReply]:
+        """
+        Build a template reply, or return None to use the LLM.
+
+        Args:
+            message: The incoming message
+            detected: Intent detection result for the message
+            variables: Template variables (first_name, agent_name, brokerage_name)
+            last_ai_message: Our previous message in the conversation
+            acknowledgment: Channel preference acknowledgment, if one was detected
+            lead_id: Lead ID for consistent template variants
+
+        Returns:
+            FastPathReply, or None when the message needs the LLM
+        """
+        started = time.perf_counter()
+        route = INTENT_ROUTES.get(detected.primary_intent)
+
+        miss_reason = self._gate(message, detected, route, last_ai_message)
+        reply = None
+        if miss_reason is None:
+            try:
+                reply = self._build_reply(route, variables, acknowledgment, lead_id)
+            except Exception as e:
+                logger.warning(f"Fast path {route} failed, using LLM: {e}")
+            if reply is None:
+                miss_reason = f"{route}_unfilled"
+
+        if reply is None:
+            self.stats.record_miss(miss_reason)
+            return None
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.record_hit(route, elapsed_ms)
+        logger.info(f"Fast path reply ({route}, {detected.confidence:.2f}) in {elapsed_ms:.1f}ms")
+        return reply
+
+    def _gate(
+        self,
+        message: str,
+        detected: DetectedIntent,
+        route: Optional[str],
+        last_ai_message: str,
+    ) -> Optional[str]:
+        """Reason the message needs the LLM, or None if the fast path may answer."""
+        if route is None:
+            return "no_route"
+        if detected.confidence < self.confidence_threshold:
+            return "low_confidence"
+        if len(message.split()) > self.MAX_MESSAGE_WORDS:
+            return "long_message"
+        if detected.sentiment == "negative":
+            return "negative_sentiment"
+
+        for intent, confidence in detected.secondary_intents:
+            if confidence < self.SECONDARY_INTENT_FLOOR or intent in BENIGN_SECONDARY_INTENTS:
+                continue
+            # "Who is this?" is itself a question
+            if route == ROUTE_IDENTITY and intent == Intent.QUESTION:
+                continue
+            return "mixed_intent"
+
+        expected = ROUTE_ENTITIES.get(route, set())
+        if any(entity.entity_type not in expected for entity in detected.extracted_entities):
+            return "extra_entities"
+
+        if route == ROUTE_ACKNOWLEDGMENT:
+            # A "yes" to our question needs the question followed through
+            if "?" in message or last_ai_message.rstrip().endswith("?"):
+                return "answers_question"
+
+        return None
+
+    def _build_reply(
+        self,
+        route: str,
+        variables: Dict[str, Any],
+        acknowledgment: Optional[str],
+        lead_id: Optional[str],
+    ) -> Optional[FastPathReply]:
+        """Render the route's reply, or None if it can't be filled."""
+        if route == ROUTE_CHANNEL_PREFERENCE:
+            if not acknowledgment:
+                return None
+            return FastPathReply(text=acknowledgment, route=route)
+
+        template_id = ROUTE_TEMPLATES[route]
+        text = self.template_engine.get_message(template_id, variables, lead_id=lead_id)
+        if not text:
+            return None
+        return FastPathReply(text=text, route=route, template_id=template_id)
+
+
+# Global stats instance
+_fast_path_stats: Optional[FastPathStats] = None
+_fast_path_stats_lock = threading.Lock()
+
+
+def get_fast_path_stats() -> FastPathStats:
+    """Get the global fast path stats."""
+    global _fast_path_stats
+
+    if _fast_path_stats is None:
+        with _fast_path_stats_lock:
+            if _fast_path_stats is None:
+                _fast_path_stats = FastPathStats()
+
+    return _fast_path_stats
@@ -16,10 +16,8 @@ Integrates with Celery for scheduled task execution and respects:
 """
 
 import logging
-import os
 import re
 import json
-import aiohttp
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, time
 from typing import Optional, Dict, Any, List, Tuple
@@ -32,6 +30,15 @@ except ImportError:
     from backports.zoneinfo import ZoneInfo
 import pytz
 
+from app.ai_agent.bulk_generation import (
+    BulkGenerationEngine,
+    GenerationRequest,
+    LLMError,
+    LLMSession,
+)
+from app.ai_agent.conversation_history_cache import get_conversation_history_cache
+from app.ai_agent.settings_cache import get_settings_cache
+
 # Import source name mapping from initial outreach generator for consistent naming
 try:
     from app.ai_agent.initial_outreach_generator import SOURCE_NAME_MAP
@@ -48,6 +55,10 @@ TCPA_QUIET_END_HOUR = 8     # 8 AM - resume sending
 TCPA_SAFE_START_HOUR = 9    # 9 AM - preferred start (1 hour buffer)
 DEFAULT_TIMEZONE = "America/New_York"
 
+# AI follow-up generation settings
+FOLLOWUP_MAX_TOKENS = 500
+FOLLOWUP_TEMPERATURE = 0.7
+
 
 def get_next_valid_send_time(
     intended_time: datetime,
@@ -1701,6 +1712,108 @@ class FollowUpManager:
             logger.error(f"Error getting pending follow-ups: {e}")
             return []
 
+    # Sequence step -> day of the Day 0-7 sequence
+    SEQUENCE_DAY_BY_STEP = {
+        0: 0, 1: 0, 2: 0, 3: 0, 4: 0,  # Day 0 steps
+        5: 1, 6: 1, 7: 1,  # Day 1 steps
+        8: 2, 9: 2,  # Day 2 steps
+        10: 3,  # Day 3
+        11: 4,  # Day 4
+        12: 5, 13: 5,  # Day 5 steps
+        14: 6,  # Day 6
+        15: 7, 16: 7,  # Day 7 steps
+    }
+
+    def _sequence_day(self, sequence_step: int) -> int:
+        """Approximate day of the sequence for a step."""
+        return self.SEQUENCE_DAY_BY_STEP.get(sequence_step, sequence_step // 2)
+
+    def _load_person_data(self, fub_person_id: int) -> Dict[str, Any]:
+        """FUB-like person data from the lead_profiles cache (minimal fallback if missing)."""
+        try:
+            person_result = self.supabase.table("lead_profiles").select("*").eq(
+                "fub_person_id", fub_person_id
+            ).single().execute()
+
+            if person_result.data:
+                # Convert to FUB-like format
+                profile = person_result.data
+                return {
+                    "firstName": profile.get("first_name", "there"),
+                    "lastName": profile.get("last_name", ""),
+                    "source": profile.get("source", ""),
+                    "tags": profile.get("tags", []),
+                    "cities": profile.get("preferred_cities", ""),
+                }
+        except Exception as e:
+            logger.warning(f"Could not fetch person data: {e}")
+        return {"firstName": "there"}
+
+    async def pregenerate_followup_messages(
+        self,
+        followups: List[ScheduledFollowUp],
+        engine: BulkGenerationEngine,
+        agent_name: str = "Your Agent",
+        agent_phone: str = "",
+        brokerage_name: str = "",
+        previous_messages_by_person: Dict[int, List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate AI messages for many follow-ups in one bulk run.
+
+        Only steps that use AI are generated. Results are keyed by follow-up
+        ID; with a checkpoint_path on the engine they are also written to that
+        file, so sending can happen later: pass result.text as
+        process_scheduled_followup(pregenerated_text=...).
+
+        Args:
+            followups: Follow-ups to generate (e.g. from get_pending_followups)
+            engine: BulkGenerationEngine (shared session, worker pool, checkpoint)
+            agent_name: Agent's name for signing messages
+            agent_phone: Agent's phone number
+            brokerage_name: Brokerage name for email signature
+            previous_messages_by_person: Previous messages per FUB person ID
+
+        Returns:
+            Dict of follow-up ID -> GenerationResult
+        """
+        previous_messages_by_person = previous_messages_by_person or {}
+        person_data_by_id: Dict[int, Dict[str, Any]] = {}
+        requests = []
+
+        for followup in followups:
+            message_type = MessageType(followup.message_type)
+            if not self.should_use_ai_for_step(message_type):
+                continue
+
+            pid = followup.fub_person_id
+            if pid not in person_data_by_id:
+                person_data_by_id[pid] = self._load_person_data(pid) if self.supabase else {"firstName": "there"}
+            person_data = person_data_by_id[pid]
+
+            system_prompt, user_prompt = build_followup_prompts(
+                person_data=person_data,
+                message_type=message_type,
+                channel=followup.channel,
+                agent_name=agent_name,
+                agent_phone=agent_phone,
+                brokerage_name=brokerage_name,
+                previous_messages=previous_messages_by_person.get(pid),
+                sequence_day=self._sequence_day(followup.sequence_step),
+                lead_has_phone=bool(person_data.get("phones")),
+            )
+            requests.append(GenerationRequest(
+                key=str(followup.id),
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                max_tokens=FOLLOWUP_MAX_TOKENS,
+                temperature=FOLLOWUP_TEMPERATURE,
+            ))
+
+        if not requests:
+            return {}
+        return await engine.run(requests)
+
     async def process_scheduled_followup(
         self,
         followup_id: str,
@@ -1710,6 +1823,7 @@ class FollowUpManager:
         agent_phone: str = "",
         brokerage_name: str = "",
         previous_messages: List[Dict[str, Any]] = None,
+        pregenerated_text: str = None,
     ) -> Dict[str, Any]:
         """
         Execute a scheduled follow-up.
@@ -1725,6 +1839,8 @@ class FollowUpManager:
             agent_phone: Agent's phone number
             brokerage_name: Brokerage name for email signature
             previous_messages: List of previous messages sent (for AI context)
+            pregenerated_text: Model output from an offline batch
+                (pregenerate_followup_messages); skips the LLM call
 
         Returns:
             Dict with execution result including generated message
@@ -1767,8 +1883,10 @@ class FollowUpManager:
                 if stage_name:
                     # Load excluded stages from settings
                     org_id = followup_data.get('organization_id')
-                    settings_result = self.supabase.table('ai_agent_settings').select('excluded_stages').limit(1).execute()
-                    excluded_stages = settings_result.data[0].get('excluded_stages', []) if settings_result.data else []
+                    settings_row, _ = get_settings_cache(self.supabase).get_row(
+                        organization_id=org_id, supabase_client=self.supabase,
+                    )
+                    excluded_stages = (settings_row or {}).get('excluded_stages') or []
                     from app.ai_agent.compliance_checker import ComplianceChecker
                     stage_checker = ComplianceChecker()
                     is_eligible, _, reason = stage_checker.check_stage_eligibility(stage_name, excluded_stages)
@@ -1852,18 +1970,7 @@ class FollowUpManager:
                 logger.warning(f"Outbound cooldown check failed for {fub_person_id}: {cooldown_err}")
 
             # Calculate which day of the sequence this is
-            # Based on sequence step, approximate the day
-            day_mapping = {
-                0: 0, 1: 0, 2: 0, 3: 0, 4: 0,  # Day 0 steps
-                5: 1, 6: 1, 7: 1,  # Day 1 steps
-                8: 2, 9: 2,  # Day 2 steps
-                10: 3,  # Day 3
-                11: 4,  # Day 4
-                12: 5, 13: 5,  # Day 5 steps
-                14: 6,  # Day 6
-                15: 7, 16: 7,  # Day 7 steps
-            }
-            sequence_day = day_mapping.get(sequence_step, sequence_step // 2)
+            sequence_day = self._sequence_day(sequence_step)
 
             # ================================================================
             # AI GENERATION: Check if this message type should use AI
@@ -1893,45 +2000,28 @@ class FollowUpManager:
 
                 # If person_data not provided, try to fetch from FUB
                 if not person_data:
-                    try:
-                        # Try to get from database cache first
-                        person_result = self.supabase.table("lead_profiles").select("*").eq(
-                            "fub_person_id", fub_person_id
-                        ).single().execute()
-
-                        if person_result.data:
-                            # Convert to FUB-like format
-                            profile = person_result.data
-                            person_data = {
-                                "firstName": profile.get("first_name", "there"),
-                                "lastName": profile.get("last_name", ""),
-                                "source": profile.get("source", ""),
-                                "tags": profile.get("tags", []),
-                                "cities": profile.get("preferred_cities", ""),
-                            }
-                        else:
-                            # Minimal fallback
-                            person_data = {"firstName": "there"}
-                    except Exception as e:
-                        logger.warning(f"Could not fetch person data: {e}")
-                        person_data = {"firstName": "there"}
+                    person_data = self._load_person_data(fub_person_id)
 
                 # Detect if lead has a phone (for email-only AI prompt awareness)
                 lead_phones = (person_data or {}).get('phones', [])
                 has_phone = bool(lead_phones)
 
-                # Generate AI message
-                ai_result = await generate_followup_message(
-                    person_data=person_data,
-                    message_type=message_type,
-                    channel=channel,
-                    agent_name=agent_name,
-                    agent_phone=agent_phone,
-                    brokerage_name=brokerage_name,
-                    previous_messages=previous_messages,
-                    sequence_day=sequence_day,
-                    lead_has_phone=has_phone,
-                )
+                if pregenerated_text:
+                    # Generated ahead of time by pregenerate_followup_messages()
+                    ai_result = parse_followup_text(pregenerated_text, channel)
+                else:
+                    # Generate AI message
+                    ai_result = await generate_followup_message(
+                        person_data=person_data,
+                        message_type=message_type,
+                        channel=channel,
+                        agent_name=agent_name,
+                        agent_phone=agent_phone,
+                        brokerage_name=brokerage_name,
+                        previous_messages=previous_messages,
+                        sequence_day=sequence_day,
+                        lead_has_phone=has_phone,
+                    )
 
                 message_content = ai_result.get("content", "")
                 message_subject = ai_result.get("subject", "Following up")
@@ -2100,13 +2190,15 @@ class FollowUpManager:
                 # Log to ai_message_log so future follow-ups know what was already said
                 try:
                     import uuid as _uuid
-                    self.supabase.table('ai_message_log').insert({
+                    log_row = {
                         'id': str(_uuid.uuid4()),
                         'fub_person_id': fub_person_id,
                         'direction': 'outbound',
                         'channel': channel,
                         'message_content': message_content,
-                    }).execute()
+                    }
+                    self.supabase.table('ai_message_log').insert(log_row).execute()
+                    get_conversation_history_cache(self.supabase).append(log_row)
                 except Exception as log_err:
                     logger.warning(f"Failed to log followup to ai_message_log: {log_err}")
 
@@ -2305,7 +2397,7 @@ def detect_lead_type(tags: List[str]) -> str:
     return "unknown"
 
 
-async def generate_followup_message(
+def build_followup_prompts(
     person_data: Dict[str, Any],
     message_type: MessageType,
     channel: str,
@@ -2316,33 +2408,14 @@ async def generate_followup_message(
     sequence_day: int = 0,
     conversation_summary: Dict[str, Any] = None,
     lead_has_phone: bool = True,
-) -> Dict[str, Any]:
+) -> Tuple[str, str]:
     """
-    Generate an AI-powered follow-up message with full lead context.
+    Build the system and user prompts for a follow-up message.
 
-    This function provides the same quality and context-awareness as
-    initial_outreach_generator.py, ensuring consistent messaging throughout
-    the follow-up sequence.
-
-    Args:
-        person_data: FUB person data with lead details
-        message_type: The type of follow-up message to generate
-        channel: "sms" or "email"
-        agent_name: Agent's name for signing
-        agent_phone: Agent's phone number
-        brokerage_name: Brokerage name for email signature
-        previous_messages: List of previous messages sent (for context)
-        sequence_day: Which day of the sequence (0-7)
-        conversation_summary: Optional dict with conversation context for smart re-engagement:
-            - last_topic: What we were discussing
-            - answered_questions: Questions the lead already answered
-            - open_questions: Questions we still need answers to
-            - objections: Any objections the lead raised
-            - score: Lead qualification score
-            - state: Conversation state (qualifying, scheduling, etc.)
+    Takes the same arguments as generate_followup_message().
 
     Returns:
-        Dict with 'content' (SMS text or email body) and optionally 'subject' (for email)
+        Tuple of (system_prompt, user_prompt)
     """
     # Extract lead details
     first_name = person_data.get('firstName', 'there')
@@ -2502,90 +2575,110 @@ Respond in this JSON format:
     "body": "Short email body in plain text. 2-3 paragraphs max. Sign with {agent_name}, {brokerage_name}.{' Include phone: ' + agent_phone if agent_phone else ' Do NOT include any phone number - you do not have one.'}"
 }}"""
 
-    # Get API key
-    openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-    anthropic_key = os.environ.get('ANTHROPIC_API_KEY')
+    return system_prompt, user_prompt
+
+
+def parse_followup_text(text: str, channel: str) -> Dict[str, Any]:
+    """Turn the model's reply into a follow-up result ('content', plus 'subject' for email)."""
+    if channel == "email":
+        try:
+            # Try to extract JSON
+            json_match = re.search(r'\{[^{}]*\}', text, re.DOTALL)
+            if json_match:
+                result = json.loads(json_match.group())
+                return {
+                    "subject": result.get('subject', 'Following up'),
+                    "content": result.get('body', text),
+                    "ai_used": True,
+                }
+        except json.JSONDecodeError:
+            pass
+        # Fallback: use raw text
+        return {"subject": "Following up", "content": text, "ai_used": True}
+    # SMS: just return the text
+    return {"content": text, "ai_used": True}
+
+
+async def generate_followup_message(
+    person_data: Dict[str, Any],
+    message_type: MessageType,
+    channel: str,
+    agent_name: str,
+    agent_phone: str,
+    brokerage_name: str,
+    previous_messages: List[Dict[str, Any]] = None,
+    sequence_day: int = 0,
+    conversation_summary: Dict[str, Any] = None,
+    lead_has_phone: bool = True,
+    llm_session: Optional[LLMSession] = None,
+) -> Dict[str, Any]:
+    """
+    Generate an AI-powered follow-up message with full lead context.
+
+    This function provides the same quality and context-awareness as
+    initial_outreach_generator.py, ensuring consistent messaging throughout
+    the follow-up sequence.
 
-    if not openrouter_key and not anthropic_key:
+    Args:
+        person_data: FUB person data with lead details
+        message_type: The type of follow-up message to generate
+        channel: "sms" or "email"
+        agent_name: Agent's name for signing
+        agent_phone: Agent's phone number
+        brokerage_name: Brokerage name for email signature
+        previous_messages: List of previous messages sent (for context)
+        sequence_day: Which day of the sequence (0-7)
+        conversation_summary: Optional dict with conversation context for smart re-engagement:
+            - last_topic: What we were discussing
+            - answered_questions: Questions the lead already answered
+            - open_questions: Questions we still need answers to
+            - objections: Any objections the lead raised
+            - score: Lead qualification score
+            - state: Conversation state (qualifying, scheduling, etc.)
+        lead_has_phone: False for email-only leads (no phone CTAs)
+        llm_session: Shared LLMSession (e.g. from a bulk run); a one-off
+            session is opened if not given
+
+    Returns:
+        Dict with 'content' (SMS text or email body) and optionally 'subject' (for email)
+    """
+    system_prompt, user_prompt = build_followup_prompts(
+        person_data=person_data,
+        message_type=message_type,
+        channel=channel,
+        agent_name=agent_name,
+        agent_phone=agent_phone,
+        brokerage_name=brokerage_name,
+        previous_messages=previous_messages,
+        sequence_day=sequence_day,
+        conversation_summary=conversation_summary,
+        lead_has_phone=lead_has_phone,
+    )
+
+    own_session = llm_session is None
+    llm = llm_session or LLMSession.from_env(timeout_seconds=30)
+    if llm is None:
         logger.warning("No AI API key available, using template fallback")
         return {"content": f"[AI generation unavailable]", "subject": "Following up", "ai_used": False}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            # Use OpenRouter if available, else Anthropic
-            if openrouter_key:
-                api_url = "https://openrouter.ai/api/v1/chat/completions"
-                headers = {
-                    "Authorization": f"Bearer {openrouter_key}",
-                    "Content-Type": "application/json",
-                }
-                payload = {
-                    "model": "anthropic/claude-sonnet-4",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    "max_tokens": 500,
-                    "temperature": 0.7,
-                }
-            else:
-                api_url = "https://api.anthropic.com/v1/messages"
-                headers = {
-                    "x-api-key": anthropic_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                }
-                payload = {
-                    "model": "claude-sonnet-4-20250514",
-                    "max_tokens": 500,
-                    "system": system_prompt,
-                    "messages": [
-                        {"role": "user", "content": user_prompt},
-                    ],
-                }
-
-            async with session.post(
-                api_url,
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"AI API error: {response.status} - {error_text}")
-                    return {"content": f"[API error: {response.status}]", "subject": "Following up", "ai_used": False}
-
-                data = await response.json()
-
-                # Extract text based on API
-                if openrouter_key:
-                    text = data['choices'][0]['message']['content'].strip()
-                else:
-                    text = data['content'][0]['text'].strip()
-
-                # Parse response based on channel
-                if channel == "email":
-                    try:
-                        # Try to extract JSON
-                        json_match = re.search(r'\{[^{}]*\}', text, re.DOTALL)
-                        if json_match:
-                            result = json.loads(json_match.group())
-                            return {
-                                "subject": result.get('subject', 'Following up'),
-                                "content": result.get('body', text),
-                                "ai_used": True,
-                            }
-                    except json.JSONDecodeError:
-                        pass
-                    # Fallback: use raw text
-                    return {"subject": "Following up", "content": text, "ai_used": True}
-                else:
-                    # SMS: just return the text
-                    return {"content": text, "ai_used": True}
+        text, _, _ = await llm.complete(
+            system_prompt,
+            user_prompt,
+            max_tokens=FOLLOWUP_MAX_TOKENS,
+            temperature=FOLLOWUP_TEMPERATURE,
+        )
+        return parse_followup_text(text, channel)
 
+    except LLMError as e:
+        logger.error(f"AI API error: {e}")
+        return {"content": f"[API error: {e.status}]", "subject": "Following up", "ai_used": False}
     except Exception as e:
         logger.error(f"AI generation failed: {e}")
         return {"content": f"[AI error: {str(e)}]", "subject": "Following up", "ai_used": False}
+    finally:
+        if own_session:
+            await llm.close()
 
 
 # Convenience function for getting a manager instance
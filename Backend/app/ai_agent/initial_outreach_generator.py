@@ -27,8 +27,14 @@ except ImportError:
     # Allow running without lead_context_analyzer for backwards compat
     HistoricalContext = None
 
+from app.ai_agent.bulk_generation import BulkGenerationEngine, GenerationRequest, LLMSession
+
 logger = logging.getLogger(__name__)
 
+# AI outreach generation settings
+OUTREACH_MAX_TOKENS = 1000
+OUTREACH_TEMPERATURE = 0.7
+
 
 # Source name mapping - FUB source names to friendly display names
 SOURCE_NAME_MAP = {
@@ -462,6 +468,7 @@ ABSOLUTE DON'TS WITH HISTORICAL CONTEXT:
         brokerage_name: str = "",
         api_key: str = None,
         team_members: str = "",
+        llm_session: Optional[LLMSession] = None,
     ):
         self.agent_name = agent_name
         self.agent_email = agent_email
@@ -469,6 +476,8 @@ ABSOLUTE DON'TS WITH HISTORICAL CONTEXT:
         self.brokerage_name = brokerage_name
         self.api_key = api_key or os.environ.get('ANTHROPIC_API_KEY')
         self.team_members = team_members
+        # Shared pooled session (bulk runs); otherwise one per call
+        self.llm_session = llm_session
 
     async def generate_outreach(
         self,
@@ -493,29 +502,82 @@ ABSOLUTE DON'TS WITH HISTORICAL CONTEXT:
             sms, email_subject, email_body, model, tokens = await self._call_ai(
                 context_prompt, lead_context
             )
-
-            # Generate plain text email from HTML
-            email_text = self._html_to_text(email_body)
-
-            return InitialOutreach(
-                sms_message=sms,
-                email_subject=email_subject,
-                email_body=email_body,
-                email_text=email_text,
-                context_used={
-                    "source": lead_context.source,
-                    "location": lead_context.get_location_str(),
-                    "timeline": lead_context.timeline,
-                    "price_range": lead_context.get_price_str(),
-                },
-                model_used=model,
-                tokens_used=tokens,
-            )
+            return self._build_outreach(lead_context, sms, email_subject, email_body, model, tokens)
 
         except Exception as e:
             logger.error(f"AI generation failed, using smart fallback: {e}")
             return self._generate_smart_fallback(lead_context)
 
+    async def generate_outreach_batch(
+        self,
+        leads: Dict[str, Tuple[LeadContext, Optional['HistoricalContext']]],
+        engine: BulkGenerationEngine,
+    ) -> Dict[str, InitialOutreach]:
+        """
+        Generate outreach for many leads in one bulk run.
+
+        Every lead shares SYSTEM_PROMPT, so after the first call the rest hit
+        the provider's prompt cache. Leads whose generation fails get the
+        smart fallback, as in generate_outreach().
+
+        Args:
+            leads: Dict of key (e.g. FUB person ID) -> (lead context, historical context)
+            engine: BulkGenerationEngine (shared session, worker pool, checkpoint)
+
+        Returns:
+            Dict of key -> InitialOutreach
+        """
+        requests = [
+            GenerationRequest(
+                key=str(key),
+                system_prompt=self.SYSTEM_PROMPT,
+                user_prompt=self._build_user_prompt(self._build_context_prompt(ctx, hist), ctx),
+                max_tokens=OUTREACH_MAX_TOKENS,
+                temperature=OUTREACH_TEMPERATURE,
+            )
+            for key, (ctx, hist) in leads.items()
+        ]
+        results = await engine.run(requests)
+
+        outreach = {}
+        for key, (ctx, _) in leads.items():
+            result = results.get(str(key))
+            try:
+                if result is None or not result.ok:
+                    raise ValueError(result.error if result else "no result")
+                sms, email_subject, email_body = self._parse_outreach_json(result.text)
+                outreach[key] = self._build_outreach(ctx, sms, email_subject, email_body, result.model, result.tokens)
+            except Exception as e:
+                logger.error(f"AI generation failed for {key}, using smart fallback: {e}")
+                outreach[key] = self._generate_smart_fallback(ctx)
+        return outreach
+
+    def _build_outreach(
+        self,
+        lead_context: LeadContext,
+        sms: str,
+        email_subject: str,
+        email_body: str,
+        model: str,
+        tokens: int,
+    ) -> InitialOutreach:
+        """InitialOutreach from generated content."""
+        return InitialOutreach(
+            sms_message=sms,
+            email_subject=email_subject,
+            email_body=email_body,
+            # Generate plain text email from HTML
+            email_text=self._html_to_text(email_body),
+            context_used={
+                "source": lead_context.source,
+                "location": lead_context.get_location_str(),
+                "timeline": lead_context.timeline,
+                "price_range": lead_context.get_price_str(),
+            },
+            model_used=model,
+            tokens_used=tokens,
+        )
+
     def _build_context_prompt(self, ctx: LeadContext, hist: Optional['HistoricalContext'] = None) -> str:
         """Build the context section of the prompt with optional historical context."""
         parts = []
@@ -617,17 +679,10 @@ ABSOLUTE DON'TS WITH HISTORICAL CONTEXT:
 
         return "\n".join(parts)
 
-    async def _call_ai(
-        self,
-        context_prompt: str,
-        lead_context: LeadContext,
-    ) -> Tuple[str, str, str, str, int]:
-        """Call AI API to generate messages. Supports Anthropic or OpenRouter."""
-        import json
-        import re
-
+    def _build_user_prompt(self, context_prompt: str, lead_context: LeadContext) -> str:
+        """User prompt asking for the SMS + email JSON."""
         friendly_source = lead_context.get_friendly_source()
-        user_prompt = f"""Based on this lead information, generate a world-class initial outreach:
+        return f"""Based on this lead information, generate a world-class initial outreach:
 
 1. SMS: Warm, substantive, ends with easy question
 2. Email subject: Personal, specific to them, not generic
@@ -664,6 +719,40 @@ KEY DETAILS TO REFERENCE:
 
 IMPORTANT: The email_body MUST be a complete email with greeting, body paragraphs, sign-off, and PS line. Do not generate a partial email!"""
 
+    def _parse_outreach_json(self, text: str) -> Tuple[str, str, str]:
+        """(sms, email_subject, email_body) from the model's JSON reply."""
+        import json
+        import re
+
+        # Extract JSON from response (handle markdown code blocks)
+        json_match = re.search(r'\{[^{}]*\}', text, re.DOTALL)
+        if not json_match:
+            raise ValueError(f"Could not parse JSON from response: {text}")
+        data = json.loads(json_match.group())
+        return (
+            data.get('sms', ''),
+            data.get('email_subject', ''),
+            data.get('email_body', ''),
+        )
+
+    async def _call_ai(
+        self,
+        context_prompt: str,
+        lead_context: LeadContext,
+    ) -> Tuple[str, str, str, str, int]:
+        """Call AI API to generate messages. Supports Anthropic or OpenRouter."""
+        user_prompt = self._build_user_prompt(context_prompt, lead_context)
+
+        if self.llm_session:
+            text, model, tokens = await self.llm_session.complete(
+                self.SYSTEM_PROMPT,
+                user_prompt,
+                max_tokens=OUTREACH_MAX_TOKENS,
+                temperature=OUTREACH_TEMPERATURE,
+                cache_prefix=True,
+            )
+            return (*self._parse_outreach_json(text), model, tokens)
+
         # Try OpenRouter first (if available), then Anthropic
         openrouter_key = os.environ.get('OPENROUTER_API_KEY')
         anthropic_key = self.api_key or os.environ.get('ANTHROPIC_API_KEY')
@@ -62,6 +62,7 @@ class Intent(Enum):
     POSITIVE_INTEREST = "positive_interest"         # Shows interest
     NEGATIVE_INTEREST = "negative_interest"         # Shows disinterest
     QUESTION = "question"                           # Asking a question
+    IDENTITY_QUESTION = "identity_question"         # "Who is this?"
     CONFIRMATION_YES = "confirmation_yes"           # Affirmative response
     CONFIRMATION_NO = "confirmation_no"             # Negative response
 
@@ -249,6 +250,8 @@ class PatternMatcher:
              Intent.FAREWELL, 0.85, None),
 
             # Thanks
+            (r'^((ok(ay)?|great|perfect|awesome),?\s+)?(thanks|thank you|thx|ty)( so much)?[\s!.,]*$',
+             Intent.THANKS, 0.9, None),
             (r'\b(thank(s| you)|appreciate|grateful)\b', Intent.THANKS, 0.85, None),
 
             # Confirmation - Yes
@@ -410,6 +413,10 @@ class PatternMatcher:
             (r'\b(not interested|don\'?t (want|like|need)|pass|no thanks)\b',
              Intent.NEGATIVE_INTEREST, 0.85, None),
 
+            # Identity question ("who is this?")
+            (r'^(who(\'?s| is) (this|dis)|who are (you|u)|how did you get (my|this) (number|info|email))\b',
+             Intent.IDENTITY_QUESTION, 0.9, None),
+
             # Question detection
             (r'\?$', Intent.QUESTION, 0.6, None),
             (r'^(what|where|when|why|how|who|which|can|could|would|is|are|do|does)\b',
@@ -14,12 +14,31 @@ Update Strategy:
 - peopleUpdated → Refresh person data only
 - eventsCreated → Add new event to cache
 - Full refresh after 24 hours or on-demand
+
+Storage:
+- One ai_lead_profile_sections row per (lead, section): person, texts,
+  emails, calls, notes, events, tasks
+- Appends run server-side (append_lead_profile_section) so a webhook
+  never rewrites the whole profile and concurrent appends can't clobber
+  each other
+- Readers can fetch only the sections they need (get_sections)
+
+Refresh:
+- Single-flight per (org, person): concurrent misses share one FUB fetch
+  in-process, and a Redis lock stops other workers fetching the same lead
+- Stale-while-revalidate: a stale profile is served immediately while one
+  background refresh runs
+- Leads with recent activity are re-warmed before their TTL expires
+  (refresh_due_profiles, run periodically by the scheduler)
 """
 
+import asyncio
 import logging
 import json
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Iterable
 from dataclasses import dataclass, asdict
 
 logger = logging.getLogger(__name__)
@@ -27,6 +46,28 @@ logger = logging.getLogger(__name__)
 # Cache TTL - full refresh after this time
 CACHE_TTL_HOURS = 24
 
+# Single-flight refresh lock (cross-process)
+REFRESH_LOCK_SECONDS = 60
+# How long a miss waits for another worker's refresh before fetching itself
+REFRESH_WAIT_SECONDS = 10
+REFRESH_POLL_SECONDS = 0.25
+
+# Proactive refresh: re-warm active leads this long before the TTL runs out
+PROACTIVE_REFRESH_AHEAD_HOURS = 2
+# Leads count as active for this long after their last cache access/update
+ACTIVITY_WINDOW_HOURS = 24
+
+# Section name -> (CachedLeadProfile field, max items kept; None for the person object)
+PROFILE_SECTIONS = {
+    "person": ("person_data", None),
+    "texts": ("text_messages", 50),
+    "emails": ("emails", 20),
+    "calls": ("calls", 20),
+    "notes": ("notes", 30),
+    "events": ("events", 30),
+    "tasks": ("tasks", 30),
+}
+
 
 @dataclass
 class CachedLeadProfile:
@@ -52,7 +93,7 @@ class CachedLeadProfile:
     last_updated_at: str
     update_count: int = 0
 
-    def is_stale(self, ttl_hours: int = CACHE_TTL_HOURS) -> bool:
+    def is_stale(self, ttl_hours: float = CACHE_TTL_HOURS) -> bool:
         """Check if cache is stale and needs full refresh."""
         try:
             cached_dt = datetime.fromisoformat(self.cached_at.replace('Z', '+00:00'))
@@ -60,6 +101,16 @@ class CachedLeadProfile:
         except:
             return True
 
+    def is_fresher_than(self, started_at: float) -> bool:
+        """Check if the profile was fully refreshed after a time.time() timestamp."""
+        try:
+            cached_dt = datetime.fromisoformat(self.cached_at.replace('Z', '+00:00'))
+            if cached_dt.tzinfo is None:
+                cached_dt = cached_dt.replace(tzinfo=timezone.utc)
+            return cached_dt.timestamp() >= started_at
+        except (AttributeError, ValueError):
+            return False
+
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
@@ -98,17 +149,33 @@ class LeadProfileCacheService:
         await cache.update_person_data(person_id, person_data)
     """
 
-    TABLE_NAME = "ai_lead_profile_cache"
+    TABLE_NAME = "ai_lead_profile_sections"
+    APPEND_FUNCTION = "append_lead_profile_section"
+
+    LOCK_PREFIX = "ai:profile:refresh_lock"
+    ACTIVE_KEY = "ai:profile:active"
 
     def __init__(self, supabase_client=None, fub_client=None):
         self.supabase = supabase_client
         self.fub = fub_client
 
+        # (organization_id, fub_person_id) -> in-flight refresh task
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._stats = {"hits": 0, "stale_served": 0, "refreshes": 0, "collapsed": 0, "peer_waits": 0}
+
+        self.redis = None
+        try:
+            from app.service.redis_service import RedisServiceSingleton
+            self.redis = RedisServiceSingleton.get_instance()
+        except Exception as e:
+            logger.warning(f"Redis not available, profile refresh is single-flight per process only: {e}")
+
     async def get_profile(
         self,
         fub_person_id: int,
         organization_id: str,
         force_refresh: bool = False,
+        allow_stale: bool = True,
     ) -> Optional[CachedLeadProfile]:
         """
         Get cached lead profile, fetching fresh data if needed.
@@ -117,48 +184,320 @@ class LeadProfileCacheService:
             fub_person_id: FUB person ID
             organization_id: Organization ID
             force_refresh: Force a full refresh from FUB
+            allow_stale: Serve a stale profile while it refreshes in the background
 
         Returns:
             Cached lead profile, or None if not available
         """
+        self.note_activity(fub_person_id, organization_id)
+
         # Try to get from cache first
         if not force_refresh:
             cached = await self._get_from_cache(fub_person_id, organization_id)
             if cached and not cached.is_stale():
                 logger.debug(f"Cache hit for person {fub_person_id}")
+                self._stats["hits"] += 1
                 return cached
 
-        # Cache miss or stale - fetch fresh from FUB
-        logger.info(f"Fetching fresh profile for person {fub_person_id}")
-        profile = await self._fetch_from_fub(fub_person_id, organization_id)
+            if cached and allow_stale:
+                # Serve stale now, refresh once in the background
+                logger.debug(f"Serving stale profile for person {fub_person_id} while refreshing")
+                self._stats["stale_served"] += 1
+                self._start_refresh(fub_person_id, organization_id, wait_for_peer=False)
+                return cached
 
-        if profile:
-            await self._save_to_cache(profile)
+        # Cache miss (or forced) - fetch fresh from FUB, collapsed per lead
+        return await self.refresh_profile(fub_person_id, organization_id)
 
-        return profile
+    # ========================================
+    # SINGLE-FLIGHT REFRESH
+    # ========================================
 
-    async def _get_from_cache(
+    async def refresh_profile(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+    ) -> Optional[CachedLeadProfile]:
+        """
+        Fully refresh a profile from FUB, collapsing concurrent requests.
+
+        Callers in this process share one in-flight fetch; if another worker
+        holds the refresh lock, waits for its result instead of fetching.
+        """
+        task = self._start_refresh(fub_person_id, organization_id, wait_for_peer=True)
+        # Shield so one cancelled waiter doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _start_refresh(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        wait_for_peer: bool,
+    ) -> asyncio.Task:
+        """Return the in-flight refresh task for a lead, starting one if needed."""
+        key = (organization_id, fub_person_id)
+        loop = asyncio.get_running_loop()
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self._stats["collapsed"] += 1
+            return task
+
+        task = loop.create_task(self._refresh_once(fub_person_id, organization_id, wait_for_peer))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        return task
+
+    async def _refresh_once(
         self,
         fub_person_id: int,
         organization_id: str,
+        wait_for_peer: bool,
     ) -> Optional[CachedLeadProfile]:
-        """Get profile from cache."""
+        """Fetch and save one profile under the cross-process refresh lock."""
+        lock_key = f"{self.LOCK_PREFIX}:{organization_id}:{fub_person_id}"
+        token = uuid.uuid4().hex
+        started_at = time.time()
+
+        acquired = self._acquire_lock(lock_key, token)
+        if not acquired:
+            if not wait_for_peer:
+                # Background refresh - the other worker is already on it
+                return None
+            profile = await self._wait_for_peer_refresh(fub_person_id, organization_id, lock_key, started_at)
+            if profile:
+                return profile
+            logger.info(f"Refresh lock for person {fub_person_id} not released in time, fetching directly")
+
+        try:
+            logger.info(f"Fetching fresh profile for person {fub_person_id}")
+            self._stats["refreshes"] += 1
+            profile = await self._fetch_from_fub(fub_person_id, organization_id)
+            if profile:
+                await self._save_to_cache(profile)
+            return profile
+        finally:
+            if acquired:
+                self._release_lock(lock_key, token)
+
+    async def _wait_for_peer_refresh(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        lock_key: str,
+        started_at: float,
+    ) -> Optional[CachedLeadProfile]:
+        """Poll the cache while another worker holds the refresh lock."""
+        self._stats["peer_waits"] += 1
+        deadline = time.monotonic() + REFRESH_WAIT_SECONDS
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(REFRESH_POLL_SECONDS)
+            lock_held = self._lock_held(lock_key)
+
+            cached = await self._get_from_cache(fub_person_id, organization_id)
+            if cached and cached.is_fresher_than(started_at):
+                return cached
+            if not lock_held:
+                # Peer finished (or failed) without a fresher profile
+                return None
+
+        return None
+
+    def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        """Take the refresh lock. Without Redis every worker refreshes on its own."""
+        if self.redis is None:
+            return True
+        try:
+            return bool(self.redis.redis.set(lock_key, token, nx=True, ex=REFRESH_LOCK_SECONDS))
+        except Exception as e:
+            logger.debug(f"Refresh lock unavailable ({e}), refreshing without it")
+            return True
+
+    def _lock_held(self, lock_key: str) -> bool:
+        try:
+            return bool(self.redis.redis.exists(lock_key))
+        except Exception:
+            return False
+
+    def _release_lock(self, lock_key: str, token: str) -> None:
+        if self.redis is None:
+            return
+        try:
+            # Only release our own lock (it may have expired and been retaken)
+            if self.redis.redis.get(lock_key) == token:
+                self.redis.redis.delete(lock_key)
+        except Exception as e:
+            logger.debug(f"Refresh lock release failed: {e}")
+
+    # ========================================
+    # PROACTIVE REFRESH
+    # ========================================
+
+    def note_activity(self, fub_person_id: int, organization_id: str) -> None:
+        """Mark a lead as active so refresh_due_profiles keeps its profile warm."""
+        if self.redis is None:
+            return
+        try:
+            self.redis.redis.zadd(self.ACTIVE_KEY, {f"{organization_id}:{fub_person_id}": time.time()})
+        except Exception as e:
+            logger.debug(f"Could not record profile activity for person {fub_person_id}: {e}")
+
+    async def refresh_due_profiles(self, limit: int = 50) -> Dict[str, int]:
+        """
+        Re-warm cached profiles of recently active leads before they go stale.
+
+        A lead is due when its last full refresh is older than
+        CACHE_TTL_HOURS - PROACTIVE_REFRESH_AHEAD_HOURS. Refreshes go
+        through the same single-flight lock as on-demand misses.
+
+        Returns:
+            Counts of active leads, due profiles and completed refreshes
+        """
+        stats = {"active": 0, "due": 0, "refreshed": 0}
+        if self.redis is None or not self.supabase:
+            return stats
+
+        now = time.time()
+        cutoff = now - ACTIVITY_WINDOW_HOURS * 3600
+        try:
+            self.redis.redis.zremrangebyscore(self.ACTIVE_KEY, 0, cutoff)
+            members = self.redis.redis.zrangebyscore(self.ACTIVE_KEY, cutoff, now)
+        except Exception as e:
+            logger.warning(f"Could not read active profile set: {e}")
+            return stats
+
+        by_org: Dict[str, List[int]] = {}
+        for member in members:
+            org_id, _, person_id = member.rpartition(":")
+            if org_id and person_id.isdigit():
+                by_org.setdefault(org_id, []).append(int(person_id))
+        stats["active"] = sum(len(ids) for ids in by_org.values())
+
+        due = []
+        for org_id, person_ids in by_org.items():
+            for person_id in await self._find_due(org_id, person_ids):
+                due.append((person_id, org_id))
+        stats["due"] = len(due)
+
+        for person_id, org_id in due[:limit]:
+            if await self.refresh_profile(person_id, org_id):
+                stats["refreshed"] += 1
+
+        return stats
+
+    async def _find_due(self, organization_id: str, person_ids: List[int]) -> List[int]:
+        """Cached leads whose last full refresh is within the proactive window of expiring."""
+        due_hours = CACHE_TTL_HOURS - PROACTIVE_REFRESH_AHEAD_HOURS
+        due = []
+        for start in range(0, len(person_ids), 500):
+            chunk = person_ids[start:start + 500]
+            try:
+                result = self.supabase.table(self.TABLE_NAME).select(
+                    "fub_person_id, cached_at"
+                ).eq(
+                    "organization_id", organization_id
+                ).eq(
+                    "section", "person"
+                ).in_("fub_person_id", chunk).execute()
+            except Exception as e:
+                logger.warning(f"Could not check profile freshness: {e}")
+                continue
+
+            for row in result.data or []:
+                probe = CachedLeadProfile.from_dict({
+                    "fub_person_id": row["fub_person_id"],
+                    "organization_id": organization_id,
+                    "cached_at": row.get("cached_at"),
+                })
+                if probe.is_stale(ttl_hours=due_hours):
+                    due.append(row["fub_person_id"])
+        return due
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit / refresh counters for health reporting."""
+        return {**self._stats, "in_flight": len(self._inflight)}
+
+    async def get_sections(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        sections: Iterable[str],
+    ) -> Dict[str, Any]:
+        """
+        Read only the given sections of a cached profile.
+
+        Does not refresh from FUB - sections that aren't cached are simply
+        missing from the result.
+
+        Args:
+            fub_person_id: FUB person ID
+            organization_id: Organization ID
+            sections: Section names (see PROFILE_SECTIONS)
+
+        Returns:
+            Dict of section name -> data (person dict or list, most recent first)
+        """
+        rows = await self._read_sections(fub_person_id, organization_id, list(sections))
+        return {row["section"]: row.get("data") for row in rows}
+
+    async def _read_sections(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        sections: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch section rows (all sections when none are given)."""
         if not self.supabase:
-            return None
+            return []
+
+        unknown = [name for name in sections or [] if name not in PROFILE_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown profile sections: {unknown}")
 
         try:
-            result = self.supabase.table(self.TABLE_NAME).select("*").eq(
+            query = self.supabase.table(self.TABLE_NAME).select("*").eq(
                 "fub_person_id", fub_person_id
             ).eq(
                 "organization_id", organization_id
-            ).limit(1).execute()
-
-            if result.data:
-                return CachedLeadProfile.from_dict(result.data[0])
+            )
+            if sections:
+                query = query.in_("section", sections)
+            result = query.execute()
+            return result.data or []
         except Exception as e:
             logger.warning(f"Cache read failed: {e}")
+            return []
 
-        return None
+    async def _get_from_cache(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+    ) -> Optional[CachedLeadProfile]:
+        """Get profile from cache (None unless the person section is cached)."""
+        rows = {
+            row["section"]: row
+            for row in await self._read_sections(fub_person_id, organization_id)
+        }
+        person = rows.get("person")
+        if not person:
+            return None
+
+        data = {
+            "fub_person_id": fub_person_id,
+            "organization_id": organization_id,
+            "cached_at": person.get("cached_at"),
+            "last_updated_at": max(
+                (row.get("last_updated_at") or "" for row in rows.values()),
+                default="",
+            ) or person.get("cached_at"),
+            "update_count": sum(row.get("update_count") or 0 for row in rows.values()),
+        }
+        for section, (field_name, _) in PROFILE_SECTIONS.items():
+            if section in rows:
+                data[field_name] = rows[section].get("data")
+
+        return CachedLeadProfile.from_dict(data)
 
     async def _fetch_from_fub(
         self,
@@ -170,7 +509,8 @@ class LeadProfileCacheService:
             return None
 
         try:
-            context = self.fub.get_complete_lead_context(fub_person_id)
+            # Seven sequential FUB calls - keep them off the event loop
+            context = await asyncio.to_thread(self.fub.get_complete_lead_context, fub_person_id)
 
             now = datetime.utcnow().isoformat()
             return CachedLeadProfile(
@@ -192,17 +532,29 @@ class LeadProfileCacheService:
             return None
 
     async def _save_to_cache(self, profile: CachedLeadProfile) -> bool:
-        """Save profile to cache (upsert)."""
+        """Write every section of a freshly fetched profile (single upsert)."""
         if not self.supabase:
             return False
 
         try:
-            data = profile.to_dict()
+            rows = []
+            for section, (field_name, max_items) in PROFILE_SECTIONS.items():
+                data = getattr(profile, field_name)
+                if max_items is not None:
+                    data = (data or [])[:max_items]
+                rows.append({
+                    "fub_person_id": profile.fub_person_id,
+                    "organization_id": profile.organization_id,
+                    "section": section,
+                    "data": data if data is not None else {},
+                    "cached_at": profile.cached_at,
+                    "last_updated_at": profile.last_updated_at,
+                    "update_count": 0,
+                })
 
-            # Try to update existing
             result = self.supabase.table(self.TABLE_NAME).upsert(
-                data,
-                on_conflict="fub_person_id,organization_id"
+                rows,
+                on_conflict="fub_person_id,organization_id,section"
             ).execute()
 
             return bool(result.data)
@@ -214,6 +566,38 @@ class LeadProfileCacheService:
     # INCREMENTAL UPDATE METHODS
     # ========================================
 
+    async def _append(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        section: str,
+        item: Dict[str, Any],
+    ) -> bool:
+        """
+        Prepend an item to a list section and cap it, server-side.
+
+        Returns False if the section isn't cached - it will be fetched
+        fresh on the next get_profile.
+        """
+        if not self.supabase:
+            return False
+
+        _, max_items = PROFILE_SECTIONS[section]
+        try:
+            result = self.supabase.rpc(self.APPEND_FUNCTION, {
+                "p_fub_person_id": fub_person_id,
+                "p_organization_id": organization_id,
+                "p_section": section,
+                "p_item": item,
+                "p_max_items": max_items,
+            }).execute()
+            if result.data:
+                self.note_activity(fub_person_id, organization_id)
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Cache append to {section} failed for person {fub_person_id}: {e}")
+            return False
+
     async def add_text_message(
         self,
         fub_person_id: int,
@@ -224,22 +608,7 @@ class LeadProfileCacheService:
         Add a new text message to cached profile.
         Called when textMessagesCreated webhook fires.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
-            # No cache - will fetch fresh on next get_profile
-            return False
-
-        # Add message to list
-        cached.text_messages.insert(0, message_data)  # Most recent first
-
-        # Keep only last 50 messages
-        cached.text_messages = cached.text_messages[:50]
-
-        # Update metadata
-        cached.last_updated_at = datetime.utcnow().isoformat()
-        cached.update_count += 1
-
-        return await self._save_to_cache(cached)
+        return await self._append(fub_person_id, organization_id, "texts", message_data)
 
     async def add_email(
         self,
@@ -251,16 +620,7 @@ class LeadProfileCacheService:
         Add a new email to cached profile.
         Called when emailsCreated webhook fires.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
-            return False
-
-        cached.emails.insert(0, email_data)
-        cached.emails = cached.emails[:20]
-        cached.last_updated_at = datetime.utcnow().isoformat()
-        cached.update_count += 1
-
-        return await self._save_to_cache(cached)
+        return await self._append(fub_person_id, organization_id, "emails", email_data)
 
     async def add_note(
         self,
@@ -272,16 +632,7 @@ class LeadProfileCacheService:
         Add a new note to cached profile.
         Called when notesCreated webhook fires.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
-            return False
-
-        cached.notes.insert(0, note_data)
-        cached.notes = cached.notes[:30]
-        cached.last_updated_at = datetime.utcnow().isoformat()
-        cached.update_count += 1
-
-        return await self._save_to_cache(cached)
+        return await self._append(fub_person_id, organization_id, "notes", note_data)
 
     async def add_event(
         self,
@@ -293,16 +644,7 @@ class LeadProfileCacheService:
         Add a new event to cached profile.
         Called when eventsCreated webhook fires.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
-            return False
-
-        cached.events.insert(0, event_data)
-        cached.events = cached.events[:30]
-        cached.last_updated_at = datetime.utcnow().isoformat()
-        cached.update_count += 1
-
-        return await self._save_to_cache(cached)
+        return await self._append(fub_person_id, organization_id, "events", event_data)
 
     async def add_call(
         self,
@@ -314,16 +656,7 @@ class LeadProfileCacheService:
         Add a new call to cached profile.
         Called when callsCreated webhook fires.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
-            return False
-
-        cached.calls.insert(0, call_data)
-        cached.calls = cached.calls[:20]
-        cached.last_updated_at = datetime.utcnow().isoformat()
-        cached.update_count += 1
-
-        return await self._save_to_cache(cached)
+        return await self._append(fub_person_id, organization_id, "calls", call_data)
 
     async def update_person_data(
         self,
@@ -337,25 +670,38 @@ class LeadProfileCacheService:
 
         If person_data is None, fetches fresh from FUB.
         """
-        cached = await self._get_from_cache(fub_person_id, organization_id)
-        if not cached:
+        if not self.supabase:
             return False
 
-        # Fetch fresh person data if not provided
-        if person_data is None and self.fub:
+        # Only fetch from FUB for leads that are actually cached
+        if person_data is None:
+            if not self.fub or not await self._read_sections(fub_person_id, organization_id, ["person"]):
+                return False
             try:
                 person_data = self.fub.get_person(str(fub_person_id), include_all_fields=True)
             except Exception as e:
                 logger.error(f"Failed to fetch person data: {e}")
                 return False
 
-        if person_data:
-            cached.person_data = person_data
-            cached.last_updated_at = datetime.utcnow().isoformat()
-            cached.update_count += 1
-            return await self._save_to_cache(cached)
+        if not person_data:
+            return False
 
-        return False
+        try:
+            # Plain UPDATE - a lead that isn't cached stays uncached
+            result = self.supabase.table(self.TABLE_NAME).update({
+                "data": person_data,
+                "last_updated_at": datetime.utcnow().isoformat(),
+            }).eq(
+                "fub_person_id", fub_person_id
+            ).eq(
+                "organization_id", organization_id
+            ).eq(
+                "section", "person"
+            ).execute()
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Cache person update failed: {e}")
+            return False
 
     async def invalidate_cache(
         self,
@@ -28,7 +28,7 @@ WHY "NEXT BEST ACTION"?
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 from enum import Enum
 
 from app.database.supabase_client import SupabaseClientSingleton
@@ -40,9 +40,22 @@ from app.ai_agent.followup_manager import (
     get_followup_manager,
     is_within_tcpa_hours,
 )
+from app.utils.prefetch_graph import PrefetchGraph
 
 logger = logging.getLogger(__name__)
 
+# Shard key the scan fan-out uses for leads that belong to no organization
+UNASSIGNED_ORGANIZATION = "unassigned"
+
+
+def _filter_organization(query, organization_id: Optional[str]):
+    """Scope a query to one organization, to rows with none, or not at all."""
+    if organization_id == UNASSIGNED_ORGANIZATION:
+        return query.is_("organization_id", "null")
+    if organization_id:
+        return query.eq("organization_id", organization_id)
+    return query
+
 
 class ActionType(Enum):
     """Types of actions the engine can recommend."""
@@ -98,6 +111,8 @@ class NextBestActionEngine:
     DEFAULT_BATCH_SIZE = 50
     MAX_ACTIONS_PER_RUN = 100
 
+    DEFAULT_TIMEZONE = "America/New_York"
+
     def __init__(
         self,
         supabase_client=None,
@@ -115,56 +130,73 @@ class NextBestActionEngine:
         self.prioritizer = get_lead_prioritizer()
         self.followup_manager = get_followup_manager(supabase_client=self.supabase)
 
+    def get_org_timezone(self, organization_id: str = None) -> str:
+        """Timezone configured for an organization (TCPA hours are local to it)."""
+        if organization_id == UNASSIGNED_ORGANIZATION:
+            return self.DEFAULT_TIMEZONE
+        try:
+            query = self.supabase.table("ai_agent_settings").select("timezone")
+            if organization_id:
+                query = query.eq("organization_id", organization_id)
+            tz_result = query.limit(1).execute()
+            return (tz_result.data[0].get("timezone") if tz_result.data else None) or self.DEFAULT_TIMEZONE
+        except Exception:
+            return self.DEFAULT_TIMEZONE
+
     async def scan_and_recommend(
         self,
         organization_id: str = None,
         batch_size: int = DEFAULT_BATCH_SIZE,
+        timezone: str = None,
     ) -> List[RecommendedAction]:
         """
         Scan leads and recommend actions for each.
 
-        This is the main entry point for the scheduled task.
+        This is the main entry point for the scheduled task. The five
+        sub-scans are independent queries, so they run concurrently.
 
         Args:
             organization_id: Filter by organization (optional for now)
             batch_size: Number of leads to process
+            timezone: The organization's timezone, if the caller already has it
 
         Returns:
             List of recommended actions, sorted by priority
         """
-        logger.info(f"Starting Next Best Action scan (batch_size={batch_size})")
+        logger.info(f"Starting Next Best Action scan (org={organization_id}, batch_size={batch_size})")
+
+        # TCPA hours are evaluated in the organization's own timezone
+        timezone = timezone or self.get_org_timezone(organization_id)
+        self._org_timezone = timezone
+        logger.info(f"Using timezone {timezone} for TCPA compliance")
+
+        sub_limit = batch_size // 3
+        scans = {
+            # 1. New leads needing first contact
+            "new_leads": lambda: self._check_new_leads(organization_id, sub_limit, timezone),
+            # 2. Leads that went silent (need follow-up)
+            "silent_leads": lambda: self._check_silent_leads(organization_id, sub_limit, timezone),
+            # 3. Dormant leads (re-engagement candidates)
+            "dormant_leads": lambda: self._check_dormant_leads(organization_id, sub_limit, timezone),
+            # 4. Pending follow-ups due for execution
+            "pending_followups": lambda: self._check_pending_followups(organization_id),
+            # 5. Stale handoffs (human agent didn't follow up)
+            "stale_handoffs": lambda: self._check_stale_handoffs(organization_id),
+        }
 
-        # Load the user's configured timezone for TCPA compliance
-        try:
-            tz_result = self.supabase.table("ai_agent_settings").select(
-                "timezone"
-            ).limit(1).execute()
-            self._org_timezone = (tz_result.data[0].get("timezone") if tz_result.data else None) or "America/New_York"
-        except Exception:
-            self._org_timezone = "America/New_York"
-        logger.info(f"Using timezone {self._org_timezone} for TCPA compliance")
+        # The sub-scans use the synchronous Supabase client, so each runs in a worker thread
+        graph = PrefetchGraph("nba_scan")
+        for name, scan in scans.items():
+            graph.add(name, scan, blocking=True)
+        graph.start()
 
         recommendations = []
-
-        # 1. Check for new leads needing first contact
-        new_lead_actions = await self._check_new_leads(organization_id, batch_size // 3)
-        recommendations.extend(new_lead_actions)
-
-        # 2. Check for leads that went silent (need follow-up)
-        silent_lead_actions = await self._check_silent_leads(organization_id, batch_size // 3)
-        recommendations.extend(silent_lead_actions)
-
-        # 3. Check for dormant leads (re-engagement candidates)
-        dormant_lead_actions = await self._check_dormant_leads(organization_id, batch_size // 3)
-        recommendations.extend(dormant_lead_actions)
-
-        # 4. Check pending follow-ups due for execution
-        followup_actions = await self._check_pending_followups(organization_id)
-        recommendations.extend(followup_actions)
-
-        # 5. Check for stale handoffs (human agent didn't follow up)
-        stale_handoff_actions = await self._check_stale_handoffs(organization_id)
-        recommendations.extend(stale_handoff_actions)
+        for name in scans:
+            try:
+                recommendations.extend(await graph.get(name))
+            except Exception as e:
+                logger.error(f"NBA sub-scan {name} failed: {e}")
+        logger.debug(graph.summary())
 
         # Sort by priority score (highest first)
         recommendations.sort(key=lambda x: x.priority_score, reverse=True)
@@ -181,6 +213,7 @@ class NextBestActionEngine:
         self,
         organization_id: str,
         limit: int,
+        timezone: str = DEFAULT_TIMEZONE,
     ) -> List[RecommendedAction]:
         """
         Find new leads that haven't received first contact.
@@ -204,17 +237,15 @@ class NextBestActionEngine:
                 "first_ai_contact_at", "null"
             ).limit(limit)
 
-            if organization_id:
-                query = query.eq("organization_id", organization_id)
-
+            query = _filter_organization(query, organization_id)
             result = query.execute()
 
+            # Check if within TCPA hours (use org's configured timezone)
+            is_allowed, next_allowed = is_within_tcpa_hours(timezone=timezone)
+
             for lead in result.data or []:
                 fub_person_id = lead.get("fub_person_id")
 
-                # Check if within TCPA hours (use org's configured timezone)
-                is_allowed, next_allowed = is_within_tcpa_hours(timezone=self._org_timezone)
-
                 # Determine action based on contact info
                 has_phone = bool(lead.get("phone"))
                 has_email = bool(lead.get("email"))
@@ -256,6 +287,7 @@ class NextBestActionEngine:
         self,
         organization_id: str,
         limit: int,
+        timezone: str = DEFAULT_TIMEZONE,
     ) -> List[RecommendedAction]:
         """
         Find leads that received messages but haven't responded.
@@ -291,12 +323,17 @@ class NextBestActionEngine:
                 "is_active", True
             ).limit(limit)
 
-            if organization_id:
-                query = query.eq("organization_id", organization_id)
-
+            query = _filter_organization(query, organization_id)
             result = query.execute()
+            conversations = result.data or []
+
+            # One lookup for the whole batch instead of one per lead
+            pending = self._pending_followup_person_ids(c.get("fub_person_id") for c in conversations)
 
-            for conv in result.data or []:
+            # Check TCPA hours (use org's configured timezone)
+            is_allowed, next_allowed = is_within_tcpa_hours(timezone=timezone)
+
+            for conv in conversations:
                 fub_person_id = conv.get("fub_person_id")
 
                 # Check if they ever responded
@@ -316,17 +353,13 @@ class NextBestActionEngine:
                         continue  # They responded after our last message - not silent
 
                 # Check if there's already a pending follow-up
-                has_pending = await self._has_pending_followup(fub_person_id)
-                if has_pending:
+                if fub_person_id in pending:
                     continue
 
                 # Determine priority based on lead score and time silent
                 lead_score = conv.get("lead_score", 50)
                 priority = lead_score  # Use lead score as base priority
 
-                # Check TCPA hours (use org's configured timezone)
-                is_allowed, next_allowed = is_within_tcpa_hours(timezone=self._org_timezone)
-
                 # ============================================================
                 # SMART RE-ENGAGEMENT: Choose trigger based on conversation state
                 # ============================================================
@@ -393,6 +426,7 @@ class NextBestActionEngine:
         self,
         organization_id: str,
         limit: int,
+        timezone: str = DEFAULT_TIMEZONE,
     ) -> List[RecommendedAction]:
         """
         Find dormant leads for re-engagement.
@@ -418,17 +452,21 @@ class NextBestActionEngine:
                 "stage", "Trash"
             ).limit(limit)
 
-            if organization_id:
-                query = query.eq("organization_id", organization_id)
-
+            query = _filter_organization(query, organization_id)
             result = query.execute()
+            leads = result.data or []
 
-            for lead in result.data or []:
+            # One lookup for the whole batch instead of one per lead
+            pending = self._pending_followup_person_ids(lead.get("fub_person_id") for lead in leads)
+
+            # Check TCPA hours (use org's configured timezone)
+            is_allowed, next_allowed = is_within_tcpa_hours(timezone=timezone)
+
+            for lead in leads:
                 fub_person_id = lead.get("fub_person_id")
 
                 # Check if there's already a pending follow-up
-                has_pending = await self._has_pending_followup(fub_person_id)
-                if has_pending:
+                if fub_person_id in pending:
                     continue
 
                 # Calculate days since last contact
@@ -452,9 +490,6 @@ class NextBestActionEngine:
                     action_type = ActionType.REENGAGEMENT_SMS
                     reason = f"Re-engagement needed - {days_dormant} days dormant"
 
-                # Check TCPA hours (use org's configured timezone)
-                is_allowed, next_allowed = is_within_tcpa_hours(timezone=self._org_timezone)
-
                 actions.append(RecommendedAction(
                     fub_person_id=fub_person_id,
                     action_type=action_type,
@@ -486,10 +521,13 @@ class NextBestActionEngine:
         try:
             # Get follow-ups due now
             due_before = datetime.utcnow()
+            unassigned = organization_id == UNASSIGNED_ORGANIZATION
             pending = await self.followup_manager.get_pending_followups(
-                organization_id=organization_id,
+                organization_id=None if unassigned else organization_id,
                 due_before=due_before,
             )
+            if unassigned:
+                pending = [f for f in pending if not f.organization_id]
 
             # Only allow ONE followup per lead per scan cycle to prevent
             # sending multiple messages within the same 15-min window
@@ -531,18 +569,25 @@ class NextBestActionEngine:
 
     async def _has_pending_followup(self, fub_person_id: int) -> bool:
         """Check if lead has pending follow-ups."""
+        return fub_person_id in self._pending_followup_person_ids([fub_person_id])
+
+    def _pending_followup_person_ids(self, fub_person_ids: Iterable[int]) -> Set[int]:
+        """Which of these leads already have a pending follow-up (one query per batch)."""
+        person_ids = list({pid for pid in fub_person_ids if pid is not None})
+        if not person_ids:
+            return set()
         try:
             result = self.supabase.table("ai_scheduled_followups").select(
-                "id"
-            ).eq(
-                "fub_person_id", fub_person_id
+                "fub_person_id"
+            ).in_(
+                "fub_person_id", person_ids
             ).eq(
                 "status", "pending"
-            ).limit(1).execute()
+            ).execute()
 
-            return bool(result.data)
+            return {row["fub_person_id"] for row in result.data or []}
         except Exception:
-            return False
+            return set()
 
     async def _check_stale_handoffs(
         self,
@@ -574,9 +619,7 @@ class NextBestActionEngine:
                 "updated_at", threshold.isoformat()
             ).limit(20)
 
-            if organization_id:
-                query = query.eq("organization_id", organization_id)
-
+            query = _filter_organization(query, organization_id)
             result = query.execute()
 
             for conv in (result.data or []):
@@ -630,6 +673,7 @@ class NextBestActionEngine:
         self,
         action: RecommendedAction,
         agent_service=None,
+        timezone: str = None,
     ) -> Dict[str, Any]:
         """
         Execute a recommended action.
@@ -637,6 +681,7 @@ class NextBestActionEngine:
         Args:
             action: The action to execute
             agent_service: AIAgentService for generating responses
+            timezone: The lead's organization timezone (defaults to the last scan's)
 
         Returns:
             Result of the action execution
@@ -646,7 +691,7 @@ class NextBestActionEngine:
         )
 
         # Check TCPA compliance before executing (use org's configured timezone)
-        org_tz = getattr(self, '_org_timezone', 'America/New_York')
+        org_tz = timezone or getattr(self, '_org_timezone', self.DEFAULT_TIMEZONE)
         is_allowed, next_allowed = is_within_tcpa_hours(timezone=org_tz)
         if not is_allowed and action.action_type in (
             ActionType.FIRST_CONTACT_SMS,
@@ -830,10 +875,40 @@ def get_nba_engine() -> NextBestActionEngine:
     return _nba_engine
 
 
+SMS_ACTION_TYPES = (
+    ActionType.FIRST_CONTACT_SMS,
+    ActionType.FOLLOWUP_SMS,
+    ActionType.REENGAGEMENT_SMS,
+)
+
+
+async def _preflight_sms_compliance(
+    engine: NextBestActionEngine,
+    recommendations: List[RecommendedAction],
+    organization_id: Optional[str],
+    timezone: Optional[str] = None,
+) -> Dict[int, Any]:
+    """Batch compliance check (opt-out, DNC, rate limit) for every SMS action in a scan."""
+    person_ids = [a.fub_person_id for a in recommendations if a.action_type in SMS_ACTION_TYPES]
+    if not person_ids:
+        return {}
+
+    try:
+        from app.ai_agent.compliance_checker import ComplianceChecker
+        checker = ComplianceChecker(supabase_client=engine.supabase)
+        org_tz = timezone or getattr(engine, '_org_timezone', None)
+        timezones = {pid: org_tz for pid in person_ids} if org_tz else None
+        return await checker.check_sms_compliance_batch(person_ids, organization_id, timezones)
+    except Exception as e:
+        logger.warning(f"SMS compliance pre-flight failed, deferring to per-send checks: {e}")
+        return {}
+
+
 async def run_nba_scan(
     organization_id: str = None,
     execute: bool = True,
     batch_size: int = 50,
+    timezone: str = None,
 ) -> Dict[str, Any]:
     """
     Run a Next Best Action scan and optionally execute actions.
@@ -844,24 +919,43 @@ async def run_nba_scan(
         organization_id: Filter by organization
         execute: Whether to execute recommended actions
         batch_size: Number of leads to process
+        timezone: The organization's timezone (looked up if not given)
 
     Returns:
         Summary of scan results and executed actions
     """
     engine = get_nba_engine()
+    timezone = timezone or engine.get_org_timezone(organization_id)
 
     # Get recommendations
     recommendations = await engine.scan_and_recommend(
         organization_id=organization_id,
         batch_size=batch_size,
+        timezone=timezone,
     )
 
     executed = []
     skipped = []
 
     if execute:
+        compliance = await _preflight_sms_compliance(
+            engine,
+            recommendations,
+            None if organization_id == UNASSIGNED_ORGANIZATION else organization_id,
+            timezone,
+        )
+
         login_broken = False
         for action in recommendations:
+            check = compliance.get(action.fub_person_id)
+            if check and not check.can_send and action.action_type in SMS_ACTION_TYPES:
+                skipped.append({
+                    "fub_person_id": action.fub_person_id,
+                    "action": action.action_type.value,
+                    "reason": check.reason,
+                })
+                continue
+
             # Skip remaining follow-ups if browser login is broken
             if login_broken and action.action_type.value in ("followup_sms", "followup_email"):
                 skipped.append({
@@ -871,7 +965,7 @@ async def run_nba_scan(
                 })
                 continue
 
-            result = await engine.execute_action(action)
+            result = await engine.execute_action(action, timezone=timezone)
             if result.get("success"):
                 executed.append({
                     "fub_person_id": action.fub_person_id,
@@ -892,6 +986,8 @@ async def run_nba_scan(
 
     return {
         "scan_time": datetime.utcnow().isoformat(),
+        "organization_id": organization_id,
+        "timezone": timezone,
         "recommendations_count": len(recommendations),
         "executed_count": len(executed),
         "skipped_count": len(skipped),
@@ -17,13 +17,33 @@ This is the main entry point for triggering proactive AI outreach.
 
 import logging
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from uuid import uuid4
 
+from app.ai_agent.bulk_generation import BulkGenerationEngine, run_bounded
+from app.ai_agent.conversation_history_cache import get_conversation_history_cache
+from app.ai_agent.settings_cache import get_settings_cache, SOURCE_ANY
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PreparedOutreach:
+    """A lead that passed steps 0-3 and is ready for message generation."""
+    fub_person_id: int
+    organization_id: str
+    trigger_reason: str
+    enable_type: str
+    person_data: Dict[str, Any]
+    settings: Dict[str, Any]
+    historical_context: Any
+    lead_context: Any
+    generator: Any
+    generator_key: tuple
+
+
 class ProactiveOutreachOrchestrator:
     """Orchestrates complete proactive outreach workflow."""
 
@@ -34,6 +54,7 @@ class ProactiveOutreachOrchestrator:
         sms_service,
         compliance_checker,
         email_service=None,
+        llm_session=None,
     ):
         """
         Initialize orchestrator.
@@ -44,12 +65,14 @@ class ProactiveOutreachOrchestrator:
             sms_service: SMS sending service (FUBSMSService)
             compliance_checker: Compliance checker service
             email_service: Optional email service (PlaywrightEmailService)
+            llm_session: Optional shared LLMSession for message generation (bulk runs)
         """
         self.supabase = supabase_client
         self.fub_client = fub_client
         self.sms_service = sms_service
         self.compliance = compliance_checker
         self.email_service = email_service
+        self.llm_session = llm_session
 
     async def trigger_proactive_outreach(
         self,
@@ -72,6 +95,113 @@ class ProactiveOutreachOrchestrator:
         Returns:
             Dict with success status, actions taken, and any errors
         """
+        prepared, result = await self._prepare_outreach(
+            fub_person_id, organization_id, user_id, trigger_reason, enable_type,
+        )
+        if prepared is None:
+            return result
+
+        try:
+            # Step 4: Generate personalized messages
+            outreach = await prepared.generator.generate_outreach(
+                lead_context=prepared.lead_context,
+                historical_context=prepared.historical_context,
+            )
+        except Exception as e:
+            logger.error(f"❌ Proactive outreach failed for lead {fub_person_id}: {e}", exc_info=True)
+            result["errors"].append(f"Unexpected error: {str(e)}")
+            return result
+
+        return await self._deliver_outreach(prepared, outreach, result)
+
+    async def trigger_proactive_outreach_batch(
+        self,
+        leads: List[Dict[str, Any]],
+        engine: BulkGenerationEngine,
+        trigger_reason: str = "backfill",
+        enable_type: str = "manual",
+        concurrency: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Trigger proactive outreach for many leads, generating in one bulk run.
+
+        Leads are prepared (FUB fetch, settings, history) a few at a time,
+        every message is generated through the engine, then the messages are
+        sent. With a checkpoint on the engine, a rerun after a crash reuses the
+        messages already generated instead of paying for them again.
+
+        Args:
+            leads: Dicts with fub_person_id, organization_id and user_id
+            engine: BulkGenerationEngine (shared session, worker pool, checkpoint)
+            trigger_reason: Why outreach triggered
+            enable_type: 'auto' or 'manual'
+            concurrency: Leads prepared / sent at once
+
+        Returns:
+            One result dict per lead, in the order of leads
+        """
+        prepared_outcomes = await run_bounded(
+            leads,
+            lambda lead: self._prepare_outreach(
+                int(lead['fub_person_id']),
+                lead['organization_id'],
+                lead['user_id'],
+                trigger_reason,
+                enable_type,
+            ),
+            concurrency,
+        )
+
+        results: List[Dict[str, Any]] = []
+        ready = []
+        # Generators with the same agent settings build the same prompts,
+        # so their leads go to the engine together
+        groups: Dict[tuple, List[PreparedOutreach]] = {}
+        for outcome in prepared_outcomes:
+            if isinstance(outcome, Exception):
+                results.append({"success": False, "actions_taken": [], "errors": [f"Unexpected error: {outcome}"]})
+                continue
+            prepared, result = outcome
+            results.append(result)
+            if prepared is None:
+                continue
+            ready.append((prepared, result))
+            groups.setdefault(prepared.generator_key, []).append(prepared)
+
+        outreach_by_person = {}
+        for group in groups.values():
+            generated = await group[0].generator.generate_outreach_batch(
+                {
+                    str(p.fub_person_id): (p.lead_context, p.historical_context)
+                    for p in group
+                },
+                engine,
+            )
+            outreach_by_person.update(generated)
+
+        await run_bounded(
+            ready,
+            lambda item: self._deliver_outreach(
+                item[0], outreach_by_person[str(item[0].fub_person_id)], item[1],
+            ),
+            concurrency,
+        )
+        return results
+
+    async def _prepare_outreach(
+        self,
+        fub_person_id: int,
+        organization_id: str,
+        user_id: str,
+        trigger_reason: str,
+        enable_type: str,
+    ) -> Tuple[Optional['PreparedOutreach'], Dict[str, Any]]:
+        """
+        Steps 0-3: dedup, fetch lead, settings, stage eligibility, history.
+
+        Returns:
+            (PreparedOutreach, result) - PreparedOutreach is None if outreach stops here
+        """
         result = {
             "success": False,
             "actions_taken": [],
@@ -94,7 +224,7 @@ class ProactiveOutreachOrchestrator:
                     if metadata.get('outreach_sent'):
                         logger.info(f"⏭️ Lead {fub_person_id} already received proactive outreach on {metadata.get('sent_at', 'unknown')} - skipping")
                         result["errors"].append("Proactive outreach already sent to this lead")
-                        return result
+                        return None, result
             except Exception as dedup_err:
                 # If no conversation exists yet, that's fine - proceed
                 logger.debug(f"Outreach dedup check: {dedup_err}")
@@ -103,13 +233,13 @@ class ProactiveOutreachOrchestrator:
             person_data = await self._fetch_and_validate_lead(fub_person_id)
             if not person_data:
                 result["errors"].append("Could not fetch lead data from FUB")
-                return result
+                return None, result
 
             # Step 2: Get organization settings
             settings = await self._get_organization_settings(organization_id, user_id)
             if not settings:
                 result["errors"].append("Could not load organization settings")
-                return result
+                return None, result
 
             # Step 2b: Check stage eligibility (blocks Sphere, Past Client, Active Client, etc.)
             stage_name = person_data.get('stageName', '') or person_data.get('stage', '')
@@ -121,7 +251,7 @@ class ProactiveOutreachOrchestrator:
                 if not is_eligible:
                     logger.info(f"⛔ Lead {fub_person_id} stage '{stage_name}' excluded: {stage_reason}")
                     result["errors"].append(f"Stage '{stage_name}' excluded from AI outreach")
-                    return result
+                    return None, result
 
             # Step 3: Analyze lead history
             from app.ai_agent.lead_context_analyzer import LeadContextAnalyzer
@@ -135,25 +265,51 @@ class ProactiveOutreachOrchestrator:
             result["lead_stage"] = historical_context.lead_stage.stage
             logger.info(f"📊 Lead classified as: {historical_context.lead_stage.stage} - {historical_context.lead_stage.reasoning}")
 
-            # Step 4: Generate personalized messages
-            from app.ai_agent.initial_outreach_generator import InitialOutreachGenerator, LeadContext
+            from app.ai_agent.initial_outreach_generator import InitialOutreachGenerator
 
             # Build LeadContext from person_data
             lead_context = self._build_lead_context(person_data, settings)
 
-            generator = InitialOutreachGenerator(
+            generator_settings = dict(
                 agent_name=settings.get('agent_name', 'Sarah'),
                 agent_email=settings.get('agent_email', ''),
                 agent_phone=settings.get('agent_phone', ''),
                 brokerage_name=settings.get('brokerage_name', 'our team'),
                 team_members=settings.get('team_members', ''),
             )
+            generator = InitialOutreachGenerator(**generator_settings, llm_session=self.llm_session)
 
-            outreach = await generator.generate_outreach(
-                lead_context=lead_context,
+            return PreparedOutreach(
+                fub_person_id=fub_person_id,
+                organization_id=organization_id,
+                trigger_reason=trigger_reason,
+                enable_type=enable_type,
+                person_data=person_data,
+                settings=settings,
                 historical_context=historical_context,
-            )
+                lead_context=lead_context,
+                generator=generator,
+                generator_key=tuple(sorted(generator_settings.items())),
+            ), result
+
+        except Exception as e:
+            logger.error(f"❌ Proactive outreach failed for lead {fub_person_id}: {e}", exc_info=True)
+            result["errors"].append(f"Unexpected error: {str(e)}")
+            return None, result
 
+    async def _deliver_outreach(
+        self,
+        prepared: 'PreparedOutreach',
+        outreach,
+        result: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Steps 5-8: compliance, send/queue, conversation metadata, event log."""
+        fub_person_id = prepared.fub_person_id
+        person_data = prepared.person_data
+        settings = prepared.settings
+        historical_context = prepared.historical_context
+
+        try:
             result["messages"] = {
                 "sms_preview": outreach.sms_message[:100] + "..." if len(outreach.sms_message) > 100 else outreach.sms_message,
                 "email_subject": outreach.email_subject,
@@ -195,9 +351,9 @@ class ProactiveOutreachOrchestrator:
             # Step 8: Log proactive outreach event
             await self._log_proactive_outreach(
                 fub_person_id=fub_person_id,
-                organization_id=organization_id,
-                trigger_reason=trigger_reason,
-                enable_type=enable_type,
+                organization_id=prepared.organization_id,
+                trigger_reason=prepared.trigger_reason,
+                enable_type=prepared.enable_type,
                 historical_context=historical_context,
                 outreach=outreach,
                 send_result=send_result,
@@ -260,24 +416,12 @@ class ProactiveOutreachOrchestrator:
     async def _get_organization_settings(self, organization_id: str, user_id: str) -> Optional[Dict]:
         """Get AI agent settings for organization/user."""
         try:
-            # Try user-specific settings first
-            result = self.supabase.table('ai_agent_settings').select('*').eq(
-                'user_id', user_id
-            ).limit(1).execute()
-
-            if result.data:
-                settings = result.data[0]
-                settings['organization_id'] = organization_id
-                settings['user_id'] = user_id
-                return settings
-
-            # Fallback to org settings
-            result = self.supabase.table('ai_agent_settings').select('*').eq(
-                'organization_id', organization_id
-            ).limit(1).execute()
+            # User-specific settings first, then org settings (shared cache)
+            settings, source = get_settings_cache(self.supabase).get_row(
+                user_id, organization_id, supabase_client=self.supabase,
+            )
 
-            if result.data:
-                settings = result.data[0]
+            if settings and (source != SOURCE_ANY or settings.get('organization_id') == organization_id):
                 settings['organization_id'] = organization_id
                 settings['user_id'] = user_id
                 return settings
@@ -453,13 +597,15 @@ class ProactiveOutreachOrchestrator:
 
                         # Log message to ai_message_log for conversation tracking
                         try:
-                            self.supabase.table('ai_message_log').insert({
+                            log_row = {
                                 'id': str(uuid4()),
                                 'fub_person_id': fub_person_id,
                                 'direction': 'outbound',
                                 'channel': 'sms',
                                 'message_content': outreach.sms_message,
-                            }).execute()
+                            }
+                            self.supabase.table('ai_message_log').insert(log_row).execute()
+                            get_conversation_history_cache(self.supabase).append(log_row)
                             logger.info(f"✅ Message logged to ai_message_log")
                         except Exception as log_error:
                             logger.error(f"Failed to log message to ai_message_log: {log_error}")
@@ -514,13 +660,15 @@ class ProactiveOutreachOrchestrator:
 
                         # Log email to ai_message_log
                         try:
-                            self.supabase.table('ai_message_log').insert({
+                            log_row = {
                                 'id': str(uuid4()),
                                 'fub_person_id': fub_person_id,
                                 'direction': 'outbound',
                                 'channel': 'email',
                                 'message_content': outreach.email_body,
-                            }).execute()
+                            }
+                            self.supabase.table('ai_message_log').insert(log_row).execute()
+                            get_conversation_history_cache(self.supabase).append(log_row)
                         except Exception as log_error:
                             logger.error(f"Failed to log email to ai_message_log: {log_error}")
                     else:
@@ -659,6 +807,7 @@ async def trigger_proactive_outreach(
     trigger_reason: str = "ai_enabled",
     enable_type: str = "manual",
     supabase_client=None,
+    llm_session=None,
 ):
     """
     Convenience function to trigger proactive outreach from ANY enable path.
@@ -673,21 +822,13 @@ async def trigger_proactive_outreach(
         trigger_reason: Why outreach is being triggered
         enable_type: 'auto' or 'manual'
         supabase_client: Optional - will create one if not provided
+        llm_session: Optional shared LLMSession
     """
     try:
         from app.database.supabase_client import SupabaseClientSingleton
-        from app.database.fub_api_client import FUBApiClient
-        from app.ai_agent.compliance_checker import ComplianceChecker
 
         supabase = supabase_client or SupabaseClientSingleton.get_instance()
-        fub_client = FUBApiClient()
-
-        orchestrator = ProactiveOutreachOrchestrator(
-            supabase_client=supabase,
-            fub_client=fub_client,
-            sms_service=None,  # Not used - we use Playwright directly now
-            compliance_checker=ComplianceChecker(supabase_client=supabase),
-        )
+        orchestrator = _build_orchestrator(supabase, llm_session)
 
         result = await orchestrator.trigger_proactive_outreach(
             fub_person_id=fub_person_id,
@@ -697,80 +838,148 @@ async def trigger_proactive_outreach(
             enable_type=enable_type,
         )
 
-        if result["success"]:
-            logger.info(f"Proactive outreach triggered for lead {fub_person_id}: {', '.join(result['actions_taken'])}")
+        await _schedule_followup_sequence(supabase, fub_person_id, organization_id, result)
+        return result
 
-            # ================================================================
-            # SCHEDULE FOLLOW-UP SEQUENCE (Day 0-7 intensive + 12-month nurture)
-            # The initial SMS/email was already sent above. Now schedule the
-            # remaining follow-up steps so the AI continues to engage the lead.
-            # ================================================================
-            try:
-                from app.ai_agent.followup_manager import get_followup_manager, FollowUpTrigger
+    except Exception as e:
+        logger.error(f"Failed to trigger proactive outreach for lead {fub_person_id}: {e}", exc_info=True)
+        return {"success": False, "errors": [str(e)]}
 
-                followup_manager = get_followup_manager(supabase)
 
-                # Use timezone from the orchestrator result (already fetched from settings)
-                lead_timezone = result.get("lead_timezone", "America/Denver")
+async def trigger_proactive_outreach_batch(
+    leads: List[Dict[str, Any]],
+    trigger_reason: str = "backfill",
+    enable_type: str = "manual",
+    concurrency: int = 3,
+    checkpoint_path: Optional[str] = None,
+    supabase_client=None,
+) -> List[Dict[str, Any]]:
+    """
+    Trigger proactive outreach (and follow-up sequences) for many leads.
 
-                # Detect email-only leads and adapt channel strategy
-                is_email_only = result.get("_is_email_only", False)
-                preferred_ch = "email" if is_email_only else "sms"
+    Messages are generated in one BulkGenerationEngine run. Pass the same
+    checkpoint_path when rerunning an interrupted backfill so messages that
+    were already generated are reused.
 
-                sequence_result = await followup_manager.schedule_followup_sequence(
-                    fub_person_id=fub_person_id,
-                    organization_id=organization_id,
-                    trigger=FollowUpTrigger.NEW_LEAD,
-                    start_delay_hours=0,
-                    preferred_channel=preferred_ch,
-                    lead_timezone=lead_timezone,
-                    email_only=is_email_only,
-                )
+    Args:
+        leads: Dicts with fub_person_id, organization_id and user_id
+        trigger_reason: Why outreach is being triggered
+        enable_type: 'auto' or 'manual'
+        concurrency: Leads prepared / sent and LLM calls in flight at once
+        checkpoint_path: Optional JSONL checkpoint for generated messages
+        supabase_client: Optional - will create one if not provided
 
-                # If dedup detected a fresh sequence, skip post-processing
-                if sequence_result.get("dedup_skipped"):
-                    logger.info(
-                        f"Follow-up sequence already exists for lead {fub_person_id} "
-                        f"({sequence_result.get('reason', 'dedup')}), skipping duplicate creation"
-                    )
-                    result["followups_scheduled"] = 0
-                    result["dedup_skipped"] = True
-                else:
-                    total_scheduled = sequence_result.get("total_scheduled", 0)
-                    nurture_scheduled = sequence_result.get("nurture_scheduled", 0)
-
-                    # Mark initial outreach steps as already sent
-                    # For SMS leads: first_contact SMS + email_welcome already sent by orchestrator
-                    # For email-only: email_welcome + first_contact (converted to email) already sent
-                    initial_types = ("first_contact", "email_welcome")
-                    steps_marked = 0
-                    for fu in sequence_result.get("followups", []):
-                        msg_type = fu.get("message_type", "")
-                        if msg_type in initial_types:
-                            try:
-                                supabase.table("ai_scheduled_followups").update({
-                                    "status": "sent",
-                                }).eq("id", fu["id"]).execute()
-                                steps_marked += 1
-                            except Exception:
-                                pass
-
-                    logger.info(
-                        f"📅 Follow-up sequence scheduled for lead {fub_person_id}: "
-                        f"{total_scheduled} follow-ups + {nurture_scheduled} nurture "
-                        f"({steps_marked} initial steps marked as sent)"
-                    )
-                    result["followup_sequence_id"] = sequence_result.get("sequence_id")
-                    result["followups_scheduled"] = total_scheduled
+    Returns:
+        One result dict per lead, in the order of leads
+    """
+    from app.ai_agent.bulk_generation import LLMSession
+    from app.database.supabase_client import SupabaseClientSingleton
 
-            except Exception as followup_err:
-                logger.error(f"Failed to schedule follow-up sequence for lead {fub_person_id}: {followup_err}", exc_info=True)
-                # Don't fail the whole outreach just because follow-up scheduling failed
-        else:
-            logger.warning(f"Proactive outreach issues for lead {fub_person_id}: {', '.join(result.get('errors', []))}")
+    supabase = supabase_client or SupabaseClientSingleton.get_instance()
+    llm = LLMSession.from_env(max_connections=concurrency)
+    try:
+        orchestrator = _build_orchestrator(supabase, llm)
+        engine = BulkGenerationEngine(llm, concurrency=concurrency, checkpoint_path=checkpoint_path)
+        results = await orchestrator.trigger_proactive_outreach_batch(
+            leads,
+            engine,
+            trigger_reason=trigger_reason,
+            enable_type=enable_type,
+            concurrency=concurrency,
+        )
+    finally:
+        if llm:
+            await llm.close()
+
+    for lead, result in zip(leads, results):
+        await _schedule_followup_sequence(supabase, int(lead['fub_person_id']), lead['organization_id'], result)
+    return results
+
+
+def _build_orchestrator(supabase, llm_session=None) -> ProactiveOutreachOrchestrator:
+    """Orchestrator with the FUB client and compliance checker every enable path uses."""
+    from app.database.fub_api_client import FUBApiClient
+    from app.ai_agent.compliance_checker import ComplianceChecker
+
+    return ProactiveOutreachOrchestrator(
+        supabase_client=supabase,
+        fub_client=FUBApiClient(),
+        sms_service=None,  # Not used - we use Playwright directly now
+        compliance_checker=ComplianceChecker(supabase_client=supabase),
+        llm_session=llm_session,
+    )
+
+
+async def _schedule_followup_sequence(supabase, fub_person_id: int, organization_id: str, result: Dict[str, Any]):
+    """Schedule the follow-up sequence after a successful outreach (updates result in place)."""
+    if result["success"]:
+        logger.info(f"Proactive outreach triggered for lead {fub_person_id}: {', '.join(result['actions_taken'])}")
+
+        # ================================================================
+        # SCHEDULE FOLLOW-UP SEQUENCE (Day 0-7 intensive + 12-month nurture)
+        # The initial SMS/email was already sent by the orchestrator. Now schedule the
+        # remaining follow-up steps so the AI continues to engage the lead.
+        # ================================================================
+        try:
+            from app.ai_agent.followup_manager import get_followup_manager, FollowUpTrigger
 
-        return result
+            followup_manager = get_followup_manager(supabase)
 
-    except Exception as e:
-        logger.error(f"Failed to trigger proactive outreach for lead {fub_person_id}: {e}", exc_info=True)
-        return {"success": False, "errors": [str(e)]}
+            # Use timezone from the orchestrator result (already fetched from settings)
+            lead_timezone = result.get("lead_timezone", "America/Denver")
+
+            # Detect email-only leads and adapt channel strategy
+            is_email_only = result.get("_is_email_only", False)
+            preferred_ch = "email" if is_email_only else "sms"
+
+            sequence_result = await followup_manager.schedule_followup_sequence(
+                fub_person_id=fub_person_id,
+                organization_id=organization_id,
+                trigger=FollowUpTrigger.NEW_LEAD,
+                start_delay_hours=0,
+                preferred_channel=preferred_ch,
+                lead_timezone=lead_timezone,
+                email_only=is_email_only,
+            )
+
+            # If dedup detected a fresh sequence, skip post-processing
+            if sequence_result.get("dedup_skipped"):
+                logger.info(
+                    f"Follow-up sequence already exists for lead {fub_person_id} "
+                    f"({sequence_result.get('reason', 'dedup')}), skipping duplicate creation"
+                )
+                result["followups_scheduled"] = 0
+                result["dedup_skipped"] = True
+            else:
+                total_scheduled = sequence_result.get("total_scheduled", 0)
+                nurture_scheduled = sequence_result.get("nurture_scheduled", 0)
+
+                # Mark initial outreach steps as already sent
+                # For SMS leads: first_contact SMS + email_welcome already sent by orchestrator
+                # For email-only: email_welcome + first_contact (converted to email) already sent
+                initial_types = ("first_contact", "email_welcome")
+                steps_marked = 0
+                for fu in sequence_result.get("followups", []):
+                    msg_type = fu.get("message_type", "")
+                    if msg_type in initial_types:
+                        try:
+                            supabase.table("ai_scheduled_followups").update({
+                                "status": "sent",
+                            }).eq("id", fu["id"]).execute()
+                            steps_marked += 1
+                        except Exception:
+                            pass
+
+                logger.info(
+                    f"📅 Follow-up sequence scheduled for lead {fub_person_id}: "
+                    f"{total_scheduled} follow-ups + {nurture_scheduled} nurture "
+                    f"({steps_marked} initial steps marked as sent)"
+                )
+                result["followup_sequence_id"] = sequence_result.get("sequence_id")
+                result["followups_scheduled"] = total_scheduled
+
+        except Exception as followup_err:
+            logger.error(f"Failed to schedule follow-up sequence for lead {fub_person_id}: {followup_err}", exc_info=True)
+            # Don't fail the whole outreach just because follow-up scheduling failed
+    else:
+        logger.warning(f"Proactive outreach issues for lead {fub_person_id}: {', '.join(result.get('errors', []))}")
@@ -8,7 +8,7 @@ Manages re-engagement campaigns that reach out to dormant leads in bulk:
 - New listings announcements
 
 Key features:
-- Daily send limits to avoid overwhelming recipients
+- Daily send limits to avoid overwhelming recipients (sent by CampaignSendEngine)
 - Priority-based lead selection
 - Automatic cancellation when leads respond
 - Campaign analytics and tracking
@@ -24,6 +24,7 @@ import uuid
 from app.database.supabase_client import SupabaseClientSingleton
 from app.ai_agent.lead_prioritizer import get_lead_prioritizer, LeadPrioritizer
 from app.ai_agent.followup_manager import get_next_valid_send_time
+from app.ai_agent.settings_cache import get_settings_cache, SOURCE_ANY
 
 logger = logging.getLogger(__name__)
 
@@ -157,7 +158,13 @@ class ReengagementCampaignManager:
             supabase_client: Optional Supabase client
         """
         self.supabase = supabase_client or SupabaseClientSingleton.get_instance()
-        self.prioritizer = get_lead_prioritizer()
+        self._prioritizer: Optional[LeadPrioritizer] = None
+
+    @property
+    def prioritizer(self) -> LeadPrioritizer:
+        if self._prioritizer is None:
+            self._prioritizer = get_lead_prioritizer()
+        return self._prioritizer
 
     async def create_campaign(
         self,
@@ -252,7 +259,9 @@ class ReengagementCampaignManager:
             raise
 
         # Add leads to campaign with batch assignments
-        await self._assign_leads_to_batches(campaign_id, leads, daily_limit)
+        await self._assign_leads_to_batches(
+            campaign_id, leads, daily_limit, recipient_timezone=self._get_org_timezone(organization_id),
+        )
 
         campaign = Campaign(
             id=campaign_id,
@@ -289,8 +298,15 @@ class ReengagementCampaignManager:
         campaign_id: str,
         leads: List[Dict[str, Any]],
         daily_limit: int,
+        recipient_timezone: Optional[str] = None,
     ):
-        """Assign leads to daily batches for sending."""
+        """
+        Assign leads to daily batches for sending.
+
+        Timezone, first name and phone are copied onto each row so the send
+        engine can pace and deliver without looking the lead up again. Leads
+        carry no timezone of their own, so every row gets the organization's.
+        """
         batch_data = []
 
         for i, lead in enumerate(leads):
@@ -301,6 +317,9 @@ class ReengagementCampaignManager:
                 "status": "pending",
                 "priority_score": lead.get("priority_score", 0),
                 "scheduled_batch": batch_num,
+                "recipient_timezone": recipient_timezone,
+                "first_name": lead.get("first_name"),
+                "phone_number": lead.get("phone"),
                 "created_at": datetime.utcnow().isoformat(),
             })
 
@@ -312,6 +331,19 @@ class ReengagementCampaignManager:
             except Exception as e:
                 logger.error(f"Error inserting campaign leads: {e}")
 
+    def _get_org_timezone(self, organization_id: str) -> Optional[str]:
+        """Timezone from the organization's AI agent settings, if configured."""
+        try:
+            row, source = get_settings_cache(self.supabase).get_row(
+                organization_id=organization_id, supabase_client=self.supabase,
+            )
+        except Exception as e:
+            logger.warning(f"Could not load timezone for org {organization_id}: {e}")
+            return None
+        if not row or source == SOURCE_ANY:
+            return None
+        return row.get("timezone")
+
     def _apply_filters(
         self,
         leads: List[Dict[str, Any]],
@@ -526,16 +558,69 @@ class ReengagementCampaignManager:
         fub_person_id: int,
     ) -> bool:
         """Mark a campaign lead as sent."""
+        return await self.mark_leads_sent(campaign_id, [fub_person_id]) > 0
+
+    async def mark_leads_sent(
+        self,
+        campaign_id: str,
+        person_ids: List[int],
+    ) -> int:
+        """
+        Mark a batch of campaign leads as sent with one update.
+
+        Only pending/sending leads are updated, so a lead that already
+        responded keeps that status.
+
+        Returns number of leads updated.
+        """
+        if not person_ids:
+            return 0
         try:
-            self.supabase.table("ai_campaign_leads").update({
+            result = self.supabase.table("ai_campaign_leads").update({
                 "status": "sent",
                 "sent_at": datetime.utcnow().isoformat(),
-            }).eq("campaign_id", campaign_id).eq("fub_person_id", fub_person_id).execute()
+            }).eq("campaign_id", campaign_id).in_(
+                "fub_person_id", person_ids
+            ).in_("status", ["pending", "sending"]).execute()
 
-            return True
+            return len(result.data) if result.data else 0
         except Exception as e:
-            logger.error(f"Error marking lead sent: {e}")
-            return False
+            logger.error(f"Error marking {len(person_ids)} leads sent: {e}")
+            return 0
+
+    async def mark_leads_failed(
+        self,
+        campaign_id: str,
+        errors: Dict[int, str],
+        status: str = "failed",
+    ) -> int:
+        """
+        Mark campaign leads failed (or skipped), one update per distinct error.
+
+        Args:
+            campaign_id: Campaign ID
+            errors: fub_person_id -> error message
+            status: "failed" or "skipped"
+
+        Returns number of leads updated.
+        """
+        by_error: Dict[str, List[int]] = {}
+        for person_id, error in errors.items():
+            by_error.setdefault(error, []).append(person_id)
+
+        updated = 0
+        for error, person_ids in by_error.items():
+            try:
+                result = self.supabase.table("ai_campaign_leads").update({
+                    "status": status,
+                    "error_message": error,
+                }).eq("campaign_id", campaign_id).in_(
+                    "fub_person_id", person_ids
+                ).in_("status", ["pending", "sending"]).execute()
+                updated += len(result.data) if result.data else 0
+            except Exception as e:
+                logger.error(f"Error marking {len(person_ids)} leads {status}: {e}")
+        return updated
 
     async def mark_lead_responded(
         self,
@@ -546,15 +631,28 @@ class ReengagementCampaignManager:
 
         Returns number of campaigns updated.
         """
+        return await self.mark_leads_responded([fub_person_id])
+
+    async def mark_leads_responded(
+        self,
+        person_ids: List[int],
+    ) -> int:
+        """
+        Mark a batch of leads as responded across all active campaigns.
+
+        Returns number of campaign leads updated.
+        """
+        if not person_ids:
+            return 0
         try:
             result = self.supabase.table("ai_campaign_leads").update({
                 "status": "responded",
                 "responded_at": datetime.utcnow().isoformat(),
-            }).eq("fub_person_id", fub_person_id).eq("status", "sent").execute()
+            }).in_("fub_person_id", person_ids).eq("status", "sent").execute()
 
             return len(result.data) if result.data else 0
         except Exception as e:
-            logger.error(f"Error marking lead responded: {e}")
+            logger.error(f"Error marking leads responded: {e}")
             return 0
 
     async def get_campaign_analytics(
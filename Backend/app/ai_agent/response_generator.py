@@ -28,6 +28,15 @@ from enum import Enum
 from datetime import datetime
 import hashlib
 
+from app.ai_agent.context_budget import (
+    BudgetReport,
+    ContextSection,
+    RollingSummary,
+    estimate_tokens,
+    fit_sections,
+)
+from app.utils.tracing import start_span, traced
+
 logger = logging.getLogger(__name__)
 
 # Import source name mapping for consistent display across all communications
@@ -587,6 +596,7 @@ class GeneratedResponse:
     detected_sentiment: Optional[str] = None
     confidence: float = 0.0
     tokens_used: int = 0
+    prompt_tokens: int = 0  # Estimated size of the prompt sent
     response_time_ms: int = 0
     model_used: str = ""
     quality: ResponseQuality = ResponseQuality.GOOD
@@ -604,6 +614,7 @@ class GeneratedResponse:
             "sentiment": self.detected_sentiment,
             "confidence": self.confidence,
             "tokens_used": self.tokens_used,
+            "prompt_tokens": self.prompt_tokens,
             "response_time_ms": self.response_time_ms,
             "model_used": self.model_used,
             "quality": self.quality.value,
@@ -795,6 +806,15 @@ class LeadProfile:
         Includes email and phone so the AI can reference them when needed
         (e.g., lead asks "send me an email" - AI should already know it).
         """
+        return "\n\n".join(text for _, text in self.to_context_sections())
+
+    def to_context_sections(self) -> List[Tuple[str, str]]:
+        """
+        Profile context as (name, text) sections, in prompt order.
+
+        The response generator budgets these individually, dropping the least
+        important ones first when a prompt runs long.
+        """
         sections = []
 
         # === IDENTITY SECTION ===
@@ -803,7 +823,7 @@ class LeadProfile:
             identity_parts.append(f"Email: {self.email}")
         if self.phone:
             identity_parts.append(f"Phone: {self.phone}")
-        sections.append("LEAD IDENTITY:\n" + "\n".join(f"  - {p}" for p in identity_parts))
+        sections.append(("identity", "LEAD IDENTITY:\n" + "\n".join(f"  - {p}" for p in identity_parts)))
 
         # === SCORE & STATUS SECTION ===
         status_parts = [
@@ -817,7 +837,7 @@ class LeadProfile:
             status_parts.append(f"Assigned to: {self.assigned_agent}")
         if self.tags:
             status_parts.append(f"Tags: {', '.join(self.tags[:5])}")
-        sections.append("STATUS:\n" + "\n".join(f"  - {p}" for p in status_parts))
+        sections.append(("status", "STATUS:\n" + "\n".join(f"  - {p}" for p in status_parts)))
 
         # === SOURCE SECTION ===
         if self.source or self.source_url:
@@ -835,7 +855,7 @@ class LeadProfile:
                 source_parts.append(f"Interested in: {self.interested_property_address}")
                 if self.interested_property_price:
                     source_parts.append(f"Property price: ${self.interested_property_price:,}")
-            sections.append("WHERE THEY CAME FROM:\n" + "\n".join(f"  - {p}" for p in source_parts))
+            sections.append(("source", "WHERE THEY CAME FROM:\n" + "\n".join(f"  - {p}" for p in source_parts)))
 
         # === PROPERTY SEARCH SECTION ===
         search_parts = []
@@ -864,7 +884,7 @@ class LeadProfile:
         if self.deal_breakers:
             search_parts.append(f"Deal-breakers: {', '.join(self.deal_breakers[:3])}")
         if search_parts:
-            sections.append("PROPERTY SEARCH:\n" + "\n".join(f"  - {p}" for p in search_parts))
+            sections.append(("property_search", "PROPERTY SEARCH:\n" + "\n".join(f"  - {p}" for p in search_parts)))
 
         # === TIMELINE & MOTIVATION SECTION ===
         timeline_parts = []
@@ -888,16 +908,16 @@ class LeadProfile:
         if self.lease_end_date:
             timeline_parts.append(f"Lease ends: {self.lease_end_date}")
         if timeline_parts:
-            sections.append("TIMELINE & MOTIVATION:\n" + "\n".join(f"  - {p}" for p in timeline_parts))
+            sections.append(("timeline", "TIMELINE & MOTIVATION:\n" + "\n".join(f"  - {p}" for p in timeline_parts)))
 
         # === LEAD FRESHNESS (critical for tone) ===
         if self.days_since_created is not None and self.days_since_created <= 1:
-            sections.append("""*** BRAND NEW LEAD (just came in today!) ***
+            sections.append(("freshness", """*** BRAND NEW LEAD (just came in today!) ***
 - This lead JUST signed up - they're expecting quick contact
 - Be warm and reference how you got their info (the source)
-- If someone else on your team already called/emailed, mention you're following up""")
+- If someone else on your team already called/emailed, mention you're following up"""))
         elif self.days_since_created is not None and self.days_since_created <= 7:
-            sections.append(f"RECENT LEAD: Came in {self.days_since_created} days ago - still fresh")
+            sections.append(("freshness", f"RECENT LEAD: Came in {self.days_since_created} days ago - still fresh"))
 
         # === CONTACT HISTORY (what's already happened) ===
         contact_parts = []
@@ -912,11 +932,11 @@ class LeadProfile:
         if not contact_parts and self.is_first_contact:
             contact_parts.append("NO CONTACT YET - this is the first outreach!")
         if contact_parts:
-            sections.append("CONTACT HISTORY:\n" + "\n".join(f"  - {p}" for p in contact_parts))
+            sections.append(("contact_history", "CONTACT HISTORY:\n" + "\n".join(f"  - {p}" for p in contact_parts)))
 
         # === CALL SUMMARIES (what was discussed on calls) ===
         if self.call_summaries:
-            sections.append("CALL SUMMARIES (what was discussed):\n" + "\n".join(f"  - {s}" for s in self.call_summaries[:3]))
+            sections.append(("call_summaries", "CALL SUMMARIES (what was discussed):\n" + "\n".join(f"  - {s}" for s in self.call_summaries[:3])))
 
         # === ENGAGEMENT HISTORY SECTION ===
         engagement_parts = []
@@ -933,7 +953,7 @@ class LeadProfile:
         if self.days_since_created and self.days_since_created > 7:
             engagement_parts.append(f"Lead age: {self.days_since_created} days")
         if engagement_parts:
-            sections.append("ENGAGEMENT:\n" + "\n".join(f"  - {p}" for p in engagement_parts))
+            sections.append(("engagement", "ENGAGEMENT:\n" + "\n".join(f"  - {p}" for p in engagement_parts)))
 
         # === PROPERTY INQUIRY DETAILS (from referral source) ===
         if self.property_inquiry_source or self.property_inquiry_description:
@@ -952,7 +972,7 @@ class LeadProfile:
                 # Only show raw description if we didn't parse specific fields
                 inquiry_parts.append(f"Details: {self.property_inquiry_description}")
             if inquiry_parts:
-                sections.append("REFERRAL INQUIRY DETAILS:\n" + "\n".join(f"  - {p}" for p in inquiry_parts))
+                sections.append(("referral_inquiry", "REFERRAL INQUIRY DETAILS:\n" + "\n".join(f"  - {p}" for p in inquiry_parts)))
 
         # === COMMUNICATION STATUS ===
         comm_status_parts = []
@@ -969,12 +989,12 @@ class LeadProfile:
         if self.actual_messages_received:
             comm_status_parts.append(f"Texts received from lead: {len(self.actual_messages_received)}")
         if comm_status_parts:
-            sections.append("COMMUNICATION STATUS:\n" + "\n".join(f"  - {p}" for p in comm_status_parts))
+            sections.append(("communication_status", "COMMUNICATION STATUS:\n" + "\n".join(f"  - {p}" for p in comm_status_parts)))
 
         # === OBJECTIONS & CONCERNS ===
         if self.previous_objections:
             objection_str = ", ".join(self.previous_objections[:3])
-            sections.append(f"PREVIOUS OBJECTIONS:\n  - {objection_str}\n  (Be mindful of these concerns!)")
+            sections.append(("objections", f"PREVIOUS OBJECTIONS:\n  - {objection_str}\n  (Be mindful of these concerns!)"))
 
         # === HOUSEHOLD INFO ===
         household_parts = []
@@ -987,7 +1007,7 @@ class LeadProfile:
         elif self.has_pets:
             household_parts.append("Has pets: Yes")
         if household_parts:
-            sections.append("HOUSEHOLD:\n" + "\n".join(f"  - {p}" for p in household_parts))
+            sections.append(("household", "HOUSEHOLD:\n" + "\n".join(f"  - {p}" for p in household_parts)))
 
         # === COMMUNICATION PREFERENCES ===
         comm_parts = []
@@ -998,14 +1018,14 @@ class LeadProfile:
         if self.timezone:
             comm_parts.append(f"Timezone: {self.timezone}")
         if comm_parts:
-            sections.append("COMMUNICATION PREFS:\n" + "\n".join(f"  - {p}" for p in comm_parts))
+            sections.append(("communication_prefs", "COMMUNICATION PREFS:\n" + "\n".join(f"  - {p}" for p in comm_parts)))
 
         # === IMPORTANT NOTES ===
         if self.important_notes or self.agent_notes_summary:
             notes_content = self.agent_notes_summary or "\n".join(self.important_notes[:3])
-            sections.append(f"IMPORTANT NOTES:\n  {notes_content}")
+            sections.append(("notes", f"IMPORTANT NOTES:\n  {notes_content}"))
 
-        return "\n\n".join(sections)
+        return sections
 
     @classmethod
     def from_fub_data(cls, fub_person: Dict[str, Any], additional_data: Dict[str, Any] = None) -> "LeadProfile":
@@ -1366,6 +1386,40 @@ class AIResponseGenerator:
     # Why 30? Gives AI full conversation context for complex multi-turn discussions
     # Cost: Only ~1-2k extra tokens (~$0.003 more per request) - worth it for quality!
 
+    # Prompt token budget (estimated, system prompt + messages). Older history
+    # and lower-priority context sections are trimmed to fit; turns that drop
+    # out of the verbatim history live on in the rolling summary.
+    PROMPT_TOKEN_BUDGET = 6000
+    HISTORY_TOKEN_BUDGET = 2000  # Verbatim history share of the budget
+    MIN_VERBATIM_MESSAGES = 6  # Always sent verbatim, whatever the budget
+    MESSAGE_TOKEN_OVERHEAD = 8  # Role/JSON wrapping per message
+
+    # Context sections in keep order when trimming (lower is kept first)
+    CONTEXT_SECTION_PRIORITIES = {
+        "known_info": 0,
+        "state": 0,
+        "lead": 0,
+        "identity": 1,
+        "qualification": 1,
+        "property_search": 1,
+        "timeline": 1,
+        "status": 2,
+        "freshness": 2,
+        "conversation_intelligence": 2,
+        "source": 3,
+        "source_strategy": 3,
+        "communication_status": 3,
+        "objections": 3,
+        "referral_inquiry": 3,
+        "contact_history": 4,
+        "call_summaries": 4,
+        "notes": 4,
+        "engagement": 5,
+        "hints": 5,
+        "household": 6,
+        "communication_prefs": 6,
+    }
+
     # Retry configuration
     MAX_RETRIES = 3
     BASE_RETRY_DELAY = 1.0  # seconds
@@ -1830,6 +1884,8 @@ WHEN THEY AGREE:
         self._openrouter_client = None
         self._total_tokens_used = 0
         self._request_count = 0
+        self._prompt_tokens_total = 0
+        self._prompt_count = 0
         self._last_request_time = 0.0  # For rate limit avoidance
 
         if self.use_openrouter:
@@ -2313,6 +2369,7 @@ DISCOVERY STRATEGY:
                 raise
         return self._client
 
+    @traced("response_generation")
     async def generate_response(
         self,
         incoming_message: str,
@@ -2321,6 +2378,7 @@ DISCOVERY STRATEGY:
         current_state: str,
         qualification_data: Dict[str, Any] = None,
         lead_profile: Optional[LeadProfile] = None,
+        rolling_summary: Optional[RollingSummary] = None,
     ) -> GeneratedResponse:
         """
         Generate an AI response to a lead's message.
@@ -2332,6 +2390,8 @@ DISCOVERY STRATEGY:
             current_state: Current conversation state
             qualification_data: Data collected during qualification
             lead_profile: Optional rich LeadProfile for enhanced context
+            rolling_summary: The conversation's persisted summary of older turns;
+                updated in place with any turns leaving the verbatim history
 
         Returns:
             GeneratedResponse with all details
@@ -2367,20 +2427,25 @@ DISCOVERY STRATEGY:
                 incoming_message = followup_instructions
                 warnings.append(f"Generating follow-up message: {followup_type}")
 
-            # Build the prompt with rich context
-            system_prompt = self._build_system_prompt(
+            # Build conversation messages for context (history within its budget)
+            messages = self._build_messages(
+                incoming_message=incoming_message,
+                conversation_history=conversation_history,
+                rolling_summary=rolling_summary,
+                token_budget=self.HISTORY_TOKEN_BUDGET,
+            )
+            message_tokens = self._estimate_message_tokens(messages)
+
+            # Build the prompt with rich context in whatever budget is left
+            system_prompt, context_report = self._build_budgeted_system_prompt(
                 lead_context=lead_context,
                 current_state=current_state,
                 qualification_data=qualification_data,
                 lead_profile=lead_profile,
                 conversation_history=conversation_history,
+                token_budget=self.PROMPT_TOKEN_BUDGET - message_tokens,
             )
-
-            # Build conversation messages for context
-            messages = self._build_messages(
-                incoming_message=incoming_message,
-                conversation_history=conversation_history,
-            )
+            prompt_tokens = self._record_prompt_tokens(system_prompt, message_tokens, context_report)
 
             # Debug: Log what we're sending to the model
             logger.info(f"[DEBUG] System prompt length: {len(system_prompt)} chars")
@@ -2389,10 +2454,15 @@ DISCOVERY STRATEGY:
                 logger.info(f"[DEBUG] Last message: {messages[-1]}")
 
             # Generate response with retries
-            response, model_used, tokens = await self._generate_with_retry(
-                system_prompt=system_prompt,
-                messages=messages,
-            )
+            with start_span(
+                "llm_generation", prompt_chars=len(system_prompt), prompt_tokens=prompt_tokens
+            ) as llm_span:
+                response, model_used, tokens = await self._generate_with_retry(
+                    system_prompt=system_prompt,
+                    messages=messages,
+                )
+                llm_span.set_attribute("model", model_used or "")
+                llm_span.set_attribute("tokens", tokens or 0)
 
             # Parse and validate response
             parsed = self._parse_response(response)
@@ -2434,6 +2504,7 @@ DISCOVERY STRATEGY:
                 detected_sentiment=parsed.get("sentiment"),
                 confidence=parsed.get("confidence", 0.8),
                 tokens_used=tokens,
+                prompt_tokens=prompt_tokens,
                 response_time_ms=response_time,
                 model_used=model_used,
                 quality=quality,
@@ -2490,6 +2561,7 @@ DISCOVERY STRATEGY:
             messages = self._build_messages(
                 incoming_message=incoming_message,
                 conversation_history=conversation_history,
+                token_budget=self.HISTORY_TOKEN_BUDGET,
             )
 
             # Generate with tool use
@@ -2735,6 +2807,7 @@ Warm, personal tone. Ask for referrals when appropriate. Celebrate their homeown
         qualification_data: Dict[str, Any] = None,
         lead_profile: Optional[LeadProfile] = None,
         conversation_history: List[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
     ) -> str:
         """
         Build comprehensive system prompt with rich lead context.
@@ -2744,6 +2817,31 @@ Warm, personal tone. Ask for referrals when appropriate. Celebrate their homeown
         Includes appointment-focused goal-driven messaging.
         Now includes conversation intelligence to avoid repeating questions.
         """
+        system_prompt, _ = self._build_budgeted_system_prompt(
+            lead_context, current_state, qualification_data, lead_profile,
+            conversation_history, token_budget,
+        )
+        return system_prompt
+
+    def _build_budgeted_system_prompt(
+        self,
+        lead_context: Dict[str, Any],
+        current_state: str,
+        qualification_data: Dict[str, Any] = None,
+        lead_profile: Optional[LeadProfile] = None,
+        conversation_history: List[Dict[str, Any]] = None,
+        token_budget: Optional[int] = None,
+    ) -> Tuple[str, BudgetReport]:
+        """
+        Build the system prompt within a token budget.
+
+        The fixed instructions are always sent. Lead context, known info and
+        source strategy are fitted into what's left of token_budget by
+        priority (CONTEXT_SECTION_PRIORITIES); None keeps everything.
+
+        Returns:
+            Tuple of (system prompt, report of kept/dropped sections)
+        """
         personality_prompt = self.PERSONALITY_PROMPTS.get(
             self.personality,
             self.PERSONALITY_PROMPTS["friendly_casual"]
@@ -2753,11 +2851,12 @@ Warm, personal tone. Ask for referrals when appropriate. Celebrate their homeown
 
         # Use rich lead profile if available, otherwise fall back to basic context
         if lead_profile:
-            context_section = self._build_rich_context(
+            context_sections = self._rich_context_sections(
                 lead_profile, current_state, qualification_data, conversation_history
             )
         else:
-            context_section = self._build_basic_context(lead_context, current_state, qualification_data)
+            basic_context = self._build_basic_context(lead_context, current_state, qualification_data)
+            context_sections = [ContextSection("lead", basic_context.strip(), required=True)]
 
         # Get effective agent name (either branded name or assigned agent's first name)
         effective_name = self._get_effective_agent_name(lead_profile)
@@ -2784,8 +2883,51 @@ SOURCE STRATEGY ({friendly_source}):
 - Opener hint: {strategy['opener_hint']}
 """
 
-        # Build the complete prompt with appointment focus
         team_context = f" You work alongside {self.team_members}." if self.team_members else ""
+        prompt_parts = dict(
+            effective_name=effective_name,
+            team_context=team_context,
+            personality_prompt=personality_prompt,
+            goal_section=goal_section,
+            state_guidance=state_guidance,
+        )
+
+        priority = self.CONTEXT_SECTION_PRIORITIES
+        candidates = [
+            ContextSection("known_info", known_info_section, priority["known_info"]),
+            ContextSection("source_strategy", source_strategy_section, priority["source_strategy"]),
+        ] + context_sections
+
+        section_budget = None
+        if token_budget is not None:
+            core_prompt = self._render_system_prompt(
+                known_info_section="", source_strategy_section="", context_section="", **prompt_parts
+            )
+            section_budget = max(0, token_budget - estimate_tokens(core_prompt))
+        kept, report = fit_sections(candidates, section_budget)
+
+        kept_text = {section.name: section.text for section in kept}
+        system_prompt = self._render_system_prompt(
+            known_info_section=kept_text.pop("known_info", ""),
+            source_strategy_section=kept_text.pop("source_strategy", ""),
+            context_section="\n\n".join(kept_text.values()),
+            **prompt_parts,
+        )
+        return system_prompt, report
+
+    def _render_system_prompt(
+        self,
+        effective_name: str,
+        team_context: str,
+        personality_prompt: str,
+        goal_section: str,
+        known_info_section: str,
+        source_strategy_section: str,
+        context_section: str,
+        state_guidance: str,
+    ) -> str:
+        """Fill the system prompt template."""
+        # Build the complete prompt with appointment focus
         return f"""You are {effective_name}, a real estate assistant with {self.brokerage_name}.{team_context}
 
 YOUR IDENTITY - READ THIS FIRST:
@@ -2885,34 +3027,54 @@ You must respond with ONLY valid JSON (no markdown, no code blocks, no explanati
         This provides the LLM with comprehensive information for personalized responses.
         Now includes conversation history intelligence to avoid repeating questions.
         """
-        sections = []
+        sections = self._rich_context_sections(
+            profile, current_state, qualification_data, conversation_history
+        )
+        return "\n\n".join(section.text for section in sections)
 
-        # Start with the profile's built-in context
-        sections.append(profile.to_context_string())
+    def _rich_context_sections(
+        self,
+        profile: LeadProfile,
+        current_state: str,
+        qualification_data: Dict[str, Any] = None,
+        conversation_history: List[Dict[str, Any]] = None,
+    ) -> List[ContextSection]:
+        """Rich lead context as prioritized sections (see _build_rich_context)."""
+        priority = self.CONTEXT_SECTION_PRIORITIES
+        sections = [
+            ContextSection(name, text, priority.get(name, 5))
+            for name, text in profile.to_context_sections()
+        ]
 
         # Add conversation state context
-        sections.append(f"\nCURRENT CONVERSATION STATE: {current_state}")
+        sections.append(ContextSection("state", f"CURRENT CONVERSATION STATE: {current_state}", priority["state"]))
 
         # Add qualification progress if available
         if qualification_data:
             qual_summary = self._build_qualification_summary(qualification_data)
             if qual_summary:
-                sections.append(qual_summary)
+                sections.append(ContextSection("qualification", qual_summary.strip(), priority["qualification"]))
 
-        # NEW: Add conversation history intelligence
+        # Add conversation history intelligence
         if conversation_history:
             conv_intelligence = self._build_conversation_intelligence_section(
                 conversation_history, profile
             )
             if conv_intelligence:
-                sections.append("\n" + conv_intelligence)
+                sections.append(ContextSection(
+                    "conversation_intelligence", conv_intelligence, priority["conversation_intelligence"]
+                ))
 
         # Add strategic hints based on profile
         hints = self._generate_conversation_hints(profile, current_state)
         if hints:
-            sections.append("\nCONVERSATION STRATEGY HINTS:\n" + "\n".join(f"  - {h}" for h in hints))
+            sections.append(ContextSection(
+                "hints",
+                "CONVERSATION STRATEGY HINTS:\n" + "\n".join(f"  - {h}" for h in hints),
+                priority["hints"],
+            ))
 
-        return "\n".join(sections)
+        return sections
 
     def _build_basic_context(
         self,
@@ -3237,38 +3399,34 @@ LEAD INFORMATION:
         self,
         incoming_message: str,
         conversation_history: List[Dict[str, Any]],
+        rolling_summary: Optional[RollingSummary] = None,
+        token_budget: Optional[int] = None,
     ) -> List[Dict[str, str]]:
         """
         Build message list for API call with INTELLIGENT context management.
 
-        For conversations with 30+ messages:
-        - Last 20: Full context (recent conversation)
-        - 10-20: Compressed summaries (mid-conversation)
-        - Older: Key facts only (early conversation)
+        - Recent messages go verbatim: up to MAX_CONTEXT_MESSAGES, fewer if
+          they exceed token_budget (never fewer than MIN_VERBATIM_MESSAGES)
+        - Older messages are represented by the rolling summary. Each turn
+          only folds in messages that newly left the verbatim window; pass the
+          conversation's persisted summary so earlier turns aren't re-read.
 
         This maintains full context while controlling token usage.
         """
         messages = []
 
-        total_messages = len(conversation_history)
-
-        if total_messages <= self.MAX_CONTEXT_MESSAGES:
-            # Short conversation - include all messages verbatim
-            history = conversation_history
-        else:
-            # Long conversation - use intelligent compression
-            # Take last MAX_CONTEXT_MESSAGES, but compress older ones
-            history = conversation_history[-self.MAX_CONTEXT_MESSAGES:]
-
-            # For very long conversations (40+ messages), add a summary of early conversation
-            if total_messages > 40:
-                early_messages = conversation_history[:10]  # First 10 messages
-                summary = self._compress_early_messages(early_messages)
-                if summary:
-                    messages.append({
-                        "role": "user",
-                        "content": f"[CONVERSATION SUMMARY - Early messages]: {summary}"
-                    })
+        history = conversation_history[-self.MAX_CONTEXT_MESSAGES:]
+        if token_budget is not None:
+            history = self._fit_history(history, token_budget - estimate_tokens(incoming_message))
+
+        older = conversation_history[:len(conversation_history) - len(history)]
+        if older:
+            summary = rolling_summary if rolling_summary is not None else RollingSummary()
+            summary.fold(older)
+            messages.append({
+                "role": "user",
+                "content": f"[CONVERSATION SUMMARY - Early messages]: {summary.to_text()}"
+            })
 
         # Add conversation history
         for msg in history:
@@ -3296,35 +3454,44 @@ LEAD INFORMATION:
 
         return messages
 
-    def _compress_early_messages(self, early_messages: List[Dict[str, Any]]) -> str:
-        """
-        Compress early conversation messages into a brief summary.
+    def _fit_history(self, history: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+        """Most recent messages that fit in token_budget (at least MIN_VERBATIM_MESSAGES)."""
+        used = 0
+        keep = 0
+        for msg in reversed(history):
+            cost = estimate_tokens(msg.get("content", "") or "") + self.MESSAGE_TOKEN_OVERHEAD
+            if keep >= self.MIN_VERBATIM_MESSAGES and used + cost > token_budget:
+                break
+            used += cost
+            keep += 1
+        return history[len(history) - keep:]
+
+    def _estimate_message_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Estimated prompt tokens of the message list."""
+        return sum(
+            estimate_tokens(msg["content"]) + self.MESSAGE_TOKEN_OVERHEAD
+            for msg in messages
+        )
 
-        Extracts key facts without full message text.
-        """
-        facts = []
-
-        for msg in early_messages:
-            direction = msg.get("direction")
-            content = msg.get("content", "").lower()
-
-            # Extract key information from early messages
-            if direction == "inbound":
-                # Lead's responses - look for key data points
-                if any(word in content for word in ["$", "k", "thousand"]):
-                    # Budget mentioned
-                    facts.append(f"Lead mentioned budget: {msg.get('content', '')[:50]}")
-                if any(word in content for word in ["month", "year", "soon", "asap"]):
-                    # Timeline mentioned
-                    facts.append(f"Lead mentioned timeline: {msg.get('content', '')[:50]}")
-                if any(word in content for word in ["bedroom", "bath", "garage", "yard"]):
-                    # Property requirements
-                    facts.append(f"Lead mentioned requirements: {msg.get('content', '')[:50]}")
-
-        if not facts:
-            return "Early conversation: Introductions and initial qualification"
-
-        return " | ".join(facts[:5])  # Max 5 facts
+    def _record_prompt_tokens(
+        self,
+        system_prompt: str,
+        message_tokens: int,
+        context_report: BudgetReport,
+    ) -> int:
+        """Log and accumulate the estimated prompt size of one request."""
+        system_tokens = estimate_tokens(system_prompt)
+        prompt_tokens = system_tokens + message_tokens
+        self._prompt_tokens_total += prompt_tokens
+        self._prompt_count += 1
+
+        trimmed = ""
+        if context_report.dropped or context_report.truncated:
+            trimmed = f", dropped {context_report.dropped}, truncated {context_report.truncated}"
+        logger.info(
+            f"Prompt tokens ~{prompt_tokens} (system {system_tokens}, messages {message_tokens}{trimmed})"
+        )
+        return prompt_tokens
 
     async def _throttle_request(self):
         """
@@ -3849,6 +4016,11 @@ Be warm, not guilt-trippy.""",
                 self._total_tokens_used / self._request_count
                 if self._request_count > 0 else 0
             ),
+            "total_prompt_tokens": self._prompt_tokens_total,
+            "avg_prompt_tokens": (
+                self._prompt_tokens_total / self._prompt_count
+                if self._prompt_count > 0 else 0
+            ),
         }
 
 
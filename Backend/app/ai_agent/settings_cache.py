@@ -0,0 +1,358 @@
+"""
+Settings Cache - Shared ai_agent_settings lookup for every worker.
+
+The settings service, the webhook handlers, the proactive outreach
+orchestrator and the follow-up manager each used to query ai_agent_settings
+on their own, and a save only cleared the saving process's cache - other
+workers kept serving the old row for up to five minutes.
+
+Lookup order:
+1. In-process LRU (short TTL, stamped with the settings version)
+2. Redis (keyed by the current settings version)
+3. Database (user row → org row → any row in the org → first row),
+   written back to both tiers
+
+Invalidation:
+- invalidate() bumps the version counter in Redis, so every Redis entry
+  written under the old version becomes unreachable
+- The new version is published on a pub/sub channel; each process's
+  listener drops local entries stamped with an older version
+- The local TTL bounds staleness if a pub/sub message is ever missed
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# In-process tier
+LOCAL_MAX_ENTRIES = 256
+LOCAL_TTL_SECONDS = 60
+
+# Redis tier
+REDIS_TTL_SECONDS = 3600
+
+# Where a resolved row came from
+SOURCE_USER = "user"
+SOURCE_ORG = "org"
+SOURCE_ANY = "any"
+
+
+class SettingsCache:
+    """
+    Three-tier cache for resolved ai_agent_settings rows.
+
+    A lookup for (user_id, organization_id) resolves to the user's row,
+    else the org-level row (user_id null) or any other row in the org, else
+    the first row in the table (single-user setup). Callers get the row and which of those it was, so
+    ones that don't want the single-user fallback can ignore it.
+
+    Usage:
+        cache = get_settings_cache(supabase_client)
+        row, source = cache.get_row(user_id="abc", organization_id="org1")
+
+        # After writing to ai_agent_settings
+        cache.invalidate()
+    """
+
+    KEY_PREFIX = "ai:settings"
+    VERSION_KEY = "ai:settings:version"
+    CHANNEL = "ai:settings:invalidate"
+
+    def __init__(
+        self,
+        supabase_client=None,
+        max_entries: int = LOCAL_MAX_ENTRIES,
+        local_ttl_seconds: int = LOCAL_TTL_SECONDS,
+        redis_ttl_seconds: int = REDIS_TTL_SECONDS,
+    ):
+        self.supabase = supabase_client
+        self.max_entries = max_entries
+        self.local_ttl_seconds = local_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+
+        # key -> (row, source, version, cached_at)
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._listener_started = False
+
+        self._stats = {"local_hits": 0, "redis_hits": 0, "db_loads": 0, "invalidations": 0}
+
+        self.redis = None
+        try:
+            from app.service.redis_service import RedisServiceSingleton
+            self.redis = RedisServiceSingleton.get_instance()
+        except Exception as e:
+            logger.warning(f"Redis not available, settings cache is process-local: {e}")
+
+    @staticmethod
+    def _local_key(user_id: Optional[str], organization_id: Optional[str]) -> str:
+        return f"{user_id or 'none'}:{organization_id or 'none'}"
+
+    def _redis_key(self, version: int, local_key: str) -> str:
+        return f"{self.KEY_PREFIX}:v{version}:{local_key}"
+
+    # ========================================
+    # VERSIONING
+    # ========================================
+
+    def _current_version(self) -> int:
+        """
+        Current settings version.
+
+        Pushed by the listener, and re-read from Redis once per local TTL so
+        a missed pub/sub message can't pin this process to an old version.
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.local_ttl_seconds:
+            return self._version
+
+        self._version_checked_at = now
+        if self.redis is not None:
+            try:
+                self._apply_version(int(self.redis.get(self.VERSION_KEY) or 0))
+            except (redis.RedisError, ValueError) as e:
+                logger.debug(f"Settings version read failed: {e}")
+        if self._version is None:
+            self._version = 0
+        return self._version
+
+    def _apply_version(self, version: int) -> None:
+        """Adopt a newer version and drop local entries stamped before it."""
+        with self._lock:
+            if self._version is not None and version <= self._version:
+                return
+            self._version = version
+            stale = [k for k, entry in self._local.items() if entry[2] < version]
+            for key in stale:
+                del self._local[key]
+
+    # ========================================
+    # READ PATH
+    # ========================================
+
+    def get_row(
+        self,
+        user_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        use_cache: bool = True,
+        supabase_client=None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Get the resolved settings row for a user/organization.
+
+        Returns:
+            (row, source) where source is "user", "org", "any", or None when
+            no row exists. The row is a copy - callers may modify it.
+        """
+        self._ensure_listener()
+        local_key = self._local_key(user_id, organization_id)
+        version = self._current_version()
+
+        if use_cache:
+            with self._lock:
+                entry = self._local.get(local_key)
+                if entry and entry[2] >= version and time.monotonic() - entry[3] < self.local_ttl_seconds:
+                    self._local.move_to_end(local_key)
+                    self._stats["local_hits"] += 1
+                    return _copy(entry[0]), entry[1]
+
+            cached = self._read_redis(version, local_key)
+            if cached is not None:
+                row, source = cached
+                self._stats["redis_hits"] += 1
+                self._store_local(local_key, row, source, version)
+                return _copy(row), source
+
+        row, source = self._load_from_db(user_id, organization_id, supabase_client or self.supabase)
+        self._stats["db_loads"] += 1
+        self._store_local(local_key, row, source, version)
+        self._write_redis(version, local_key, row, source)
+        return _copy(row), source
+
+    def _read_redis(self, version: int, local_key: str) -> Optional[tuple]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._redis_key(version, local_key))
+            if not raw:
+                return None
+            payload = json.loads(raw)
+            return payload.get("row"), payload.get("source")
+        except (redis.RedisError, ValueError, TypeError, AttributeError) as e:
+            logger.debug(f"Settings cache read failed for {local_key}: {e}")
+            return None
+
+    def _write_redis(self, version: int, local_key: str, row, source) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(
+                self._redis_key(version, local_key),
+                json.dumps({"row": row, "source": source}, default=str),
+                ex=self.redis_ttl_seconds,
+            )
+        except redis.RedisError as e:
+            logger.debug(f"Settings cache write failed for {local_key}: {e}")
+
+    def _store_local(self, local_key: str, row, source, version: int) -> None:
+        with self._lock:
+            self._local[local_key] = (row, source, version, time.monotonic())
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _load_from_db(
+        self,
+        user_id: Optional[str],
+        organization_id: Optional[str],
+        supabase_client,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Resolve user row → org row → first row. Errors propagate to the caller."""
+        if not supabase_client:
+            return None, None
+
+        table = "ai_agent_settings"
+
+        if user_id:
+            result = supabase_client.table(table).select("*").eq("user_id", user_id).execute()
+            if result.data:
+                return result.data[0], SOURCE_USER
+
+        if organization_id:
+            # Org-level row (user_id null) preferred; user-scoped rows written
+            # by save_settings still carry the org's agent/brokerage/stages
+            result = supabase_client.table(table).select("*").eq(
+                "organization_id", organization_id
+            ).execute()
+            if result.data:
+                org_rows = [row for row in result.data if not row.get("user_id")]
+                return (org_rows or result.data)[0], SOURCE_ORG
+
+        result = supabase_client.table(table).select("*").limit(1).execute()
+        if result.data:
+            return result.data[0], SOURCE_ANY
+
+        return None, None
+
+    # ========================================
+    # INVALIDATION
+    # ========================================
+
+    def invalidate(self) -> None:
+        """
+        Invalidate cached settings in every process.
+
+        Called after any write to ai_agent_settings. A single write can
+        change the resolution of many keys (org rows back user lookups and
+        the first row backs everyone), so the whole namespace is versioned
+        rather than individual keys.
+        """
+        self._stats["invalidations"] += 1
+
+        if self.redis is None:
+            with self._lock:
+                self._local.clear()
+            return
+
+        try:
+            version = int(self.redis.redis.incr(self.VERSION_KEY))
+        except (redis.RedisError, ValueError) as e:
+            logger.warning(f"Settings version bump failed, clearing local cache only: {e}")
+            with self._lock:
+                self._local.clear()
+            return
+
+        self._apply_version(version)
+
+        try:
+            self.redis.redis.publish(self.CHANNEL, str(version))
+        except redis.RedisError as e:
+            logger.debug(f"Settings invalidation publish failed: {e}")
+
+    def _handle_message(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation published by another process."""
+        if not message or message.get("type") != "message":
+            return
+        try:
+            self._apply_version(int(message.get("data")))
+        except (TypeError, ValueError):
+            # Unknown payload - drop everything to be safe
+            with self._lock:
+                self._local.clear()
+
+    def _ensure_listener(self) -> None:
+        """Start the pub/sub listener thread on first use."""
+        if self._listener_started or self.redis is None:
+            return
+
+        with self._lock:
+            if self._listener_started:
+                return
+            # Set up front so a failed subscribe isn't retried on every
+            # lookup; the local TTL still bounds staleness without it
+            self._listener_started = True
+            try:
+                pubsub = self.redis.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+            except Exception as e:
+                logger.debug(f"Settings invalidation listener unavailable: {e}")
+                return
+
+            threading.Thread(
+                target=self._listen,
+                args=(pubsub,),
+                name="settings-cache-listener",
+                daemon=True,
+            ).start()
+
+    def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                message = pubsub.get_message(timeout=5.0)
+                if message:
+                    self._handle_message(message)
+            except redis.RedisError as e:
+                logger.warning(f"Settings invalidation listener error: {e}")
+                # Anything published while disconnected is lost
+                with self._lock:
+                    self._local.clear()
+                time.sleep(5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for health reporting."""
+        with self._lock:
+            local_entries = len(self._local)
+        return {**self._stats, "local_entries": local_entries, "version": self._version}
+
+
+def _copy(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return copy.deepcopy(row) if row is not None else None
+
+
+# Global instance
+_settings_cache: Optional[SettingsCache] = None
+_settings_cache_lock = threading.Lock()
+
+
+def get_settings_cache(supabase_client=None) -> SettingsCache:
+    """Get the global settings cache."""
+    global _settings_cache
+
+    if _settings_cache is None:
+        with _settings_cache_lock:
+            if _settings_cache is None:
+                _settings_cache = SettingsCache(supabase_client)
+    if supabase_client and not _settings_cache.supabase:
+        _settings_cache.supabase = supabase_client
+
+    return _settings_cache
@@ -11,10 +11,12 @@ This service provides:
 import logging
 from typing import Optional, Dict, Any
 from dataclasses import dataclass, field, asdict
-from datetime import datetime, time
+from datetime import time
 from functools import lru_cache
 import json
 
+from app.ai_agent.settings_cache import get_settings_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -279,24 +281,6 @@ class AIAgentSettingsService:
             supabase_client: Supabase client for database access
         """
         self.supabase = supabase_client
-        self._cache: Dict[str, tuple] = {}  # key -> (settings, timestamp)
-        self._cache_ttl_seconds = 300  # 5 minutes
-
-    def _get_cache_key(
-        self,
-        user_id: Optional[str] = None,
-        organization_id: Optional[str] = None,
-    ) -> str:
-        """Generate cache key for settings lookup."""
-        return f"settings:{user_id or 'none'}:{organization_id or 'none'}"
-
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cached settings are still valid."""
-        if cache_key not in self._cache:
-            return False
-        _, cached_at = self._cache[cache_key]
-        age = (datetime.utcnow() - cached_at).total_seconds()
-        return age < self._cache_ttl_seconds
 
     async def get_settings(
         self,
@@ -320,57 +304,23 @@ class AIAgentSettingsService:
         Returns:
             AIAgentSettings object with the loaded or default settings
         """
-        # Check cache first
-        cache_key = self._get_cache_key(user_id, organization_id)
-        if use_cache and self._is_cache_valid(cache_key):
-            settings, _ = self._cache[cache_key]
-            logger.debug(f"Returning cached settings for {cache_key}")
-            return settings
-
         # No database client - return defaults
         if not self.supabase:
             logger.warning("No Supabase client - returning default settings")
             return AIAgentSettings()
 
         try:
-            settings = None
-
-            # Try to get user-specific settings first
-            if user_id:
-                result = self.supabase.table("ai_agent_settings").select("*").eq(
-                    "user_id", user_id
-                ).execute()
-
-                if result.data:
-                    settings = AIAgentSettings.from_db_row(result.data[0])
-                    logger.info(f"Loaded user settings for user_id={user_id}")
-
-            # Fall back to organization settings
-            if not settings and organization_id:
-                result = self.supabase.table("ai_agent_settings").select("*").eq(
-                    "organization_id", organization_id
-                ).is_("user_id", "null").execute()
-
-                if result.data:
-                    settings = AIAgentSettings.from_db_row(result.data[0])
-                    logger.info(f"Loaded org settings for org_id={organization_id}")
-
-            # Try to get any settings if none found yet (single-user setup)
-            if not settings:
-                result = self.supabase.table("ai_agent_settings").select("*").limit(1).execute()
-                if result.data:
-                    settings = AIAgentSettings.from_db_row(result.data[0])
-                    logger.info("Loaded default settings from first available record")
+            # Shared cache: local LRU → Redis → DB (user → org → first row)
+            row, source = get_settings_cache(self.supabase).get_row(
+                user_id, organization_id, use_cache=use_cache, supabase_client=self.supabase,
+            )
 
-            # Use defaults if no settings found
-            if not settings:
-                logger.info("No settings found - using defaults")
-                settings = AIAgentSettings()
+            if row:
+                logger.debug(f"Loaded {source} settings for user_id={user_id}, org_id={organization_id}")
+                return AIAgentSettings.from_db_row(row)
 
-            # Cache the result
-            self._cache[cache_key] = (settings, datetime.utcnow())
-
-            return settings
+            logger.info("No settings found - using defaults")
+            return AIAgentSettings()
 
         except Exception as e:
             logger.error(f"Error loading settings: {e}", exc_info=True)
@@ -490,9 +440,8 @@ class AIAgentSettingsService:
                 # Insert new
                 result = self.supabase.table("ai_agent_settings").insert(data).execute()
 
-            # Invalidate cache
-            cache_key = self._get_cache_key(user_id, organization_id)
-            self._cache.pop(cache_key, None)
+            # Invalidate cached settings in every worker
+            self.invalidate_cache(user_id, organization_id)
 
             logger.info(f"Saved settings for user={user_id}, org={organization_id}")
             return True
@@ -535,14 +484,15 @@ class AIAgentSettingsService:
         user_id: Optional[str] = None,
         organization_id: Optional[str] = None,
     ):
-        """Invalidate cached settings."""
-        if user_id or organization_id:
-            cache_key = self._get_cache_key(user_id, organization_id)
-            self._cache.pop(cache_key, None)
-        else:
-            # Clear all cache
-            self._cache.clear()
-        logger.debug("Settings cache invalidated")
+        """
+        Invalidate cached settings.
+
+        A single row can back other users' and orgs' lookups (org and
+        single-user fallbacks), so this always invalidates the shared cache
+        as a whole; the IDs are only logged.
+        """
+        get_settings_cache(self.supabase).invalidate()
+        logger.debug(f"Settings cache invalidated (user={user_id}, org={organization_id})")
 
 
 # Singleton instance for global access
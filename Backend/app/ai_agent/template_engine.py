@@ -3,7 +3,8 @@ Response Template Engine - Personalized Message Templates.
 
 Provides:
 1. Pre-written templates for common scenarios (faster than LLM, guaranteed quality)
-2. Variable substitution with lead profile data
+2. Variable substitution with lead profile data (compiled render plans, see
+   template_renderer; render_many for bulk campaigns)
 3. A/B testing variants for optimization with performance tracking
 4. Fallback templates when LLM fails
 5. Conditional content based on lead attributes
@@ -13,13 +14,14 @@ Templates follow the friendly, casual tone and stay under SMS length limits.
 
 import logging
 import random
-import re
 from typing import Optional, Dict, Any, List, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 import uuid
 
+from app.ai_agent.template_renderer import CompiledTemplate
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,6 +85,14 @@ class MessageTemplate:
     max_chars: int = 1000
     tags: List[str] = field(default_factory=list)
 
+    _compiled: Optional[CompiledTemplate] = field(default=None, init=False, repr=False, compare=False)
+
+    def compiled(self) -> CompiledTemplate:
+        """Render plans for all variants (parsed on first use)."""
+        if self._compiled is None:
+            self._compiled = CompiledTemplate(self)
+        return self._compiled
+
     def render(
         self,
         variables: Dict[str, Any],
@@ -98,48 +108,24 @@ class MessageTemplate:
         Returns:
             Rendered message string
         """
-        # Select variant
-        if variant_index is not None and 0 <= variant_index < len(self.variants):
-            template = self.variants[variant_index]
-        else:
-            template = random.choice(self.variants)
-
-        # Substitute variables
-        result = template
-        for var_name in self.variables:
-            placeholder = f"{{{var_name}}}"
-            value = variables.get(var_name, "")
-
-            # Handle special formatting
-            if var_name.endswith("_price") and isinstance(value, (int, float)):
-                value = f"${value:,.0f}"
-            elif var_name == "first_name" and not value:
-                value = "there"
+        return self.compiled().render(variables, variant_index)
 
-            result = result.replace(placeholder, str(value))
-
-        # Handle conditional blocks {?condition:text}
-        result = self._process_conditionals(result, variables)
-
-        # Truncate if too long
-        if len(result) > self.max_chars:
-            result = result[:self.max_chars - 3] + "..."
-
-        return result.strip()
-
-    def _process_conditionals(self, text: str, variables: Dict[str, Any]) -> str:
-        """Process conditional blocks in template."""
-        # Pattern: {?var_name:text to show if truthy}
-        pattern = r'\{\?(\w+):([^}]+)\}'
+    def render_many(
+        self,
+        variable_rows: List[Dict[str, Any]],
+        variant_indexes: List[Optional[int]] = None,
+    ) -> List[str]:
+        """
+        Render one message per row of variables.
 
-        def replace_conditional(match):
-            var_name = match.group(1)
-            conditional_text = match.group(2)
-            if variables.get(var_name):
-                return conditional_text
-            return ""
+        Args:
+            variable_rows: Variables for each message
+            variant_indexes: Variant per row (random where None)
 
-        return re.sub(pattern, replace_conditional, text)
+        Returns:
+            Rendered messages, in row order
+        """
+        return self.compiled().render_many(variable_rows, variant_indexes)
 
 
 class TemplateLibrary:
@@ -151,6 +137,11 @@ class TemplateLibrary:
 
     TEMPLATES: Dict[str, MessageTemplate] = {}
 
+    # Lookup indexes, built with TEMPLATES
+    _BY_CATEGORY: Dict[TemplateCategory, List[MessageTemplate]] = {}
+    _BY_TAG: Dict[str, List[MessageTemplate]] = {}
+    _BY_TEMPERATURE: Dict[LeadTemperature, List[MessageTemplate]] = {}
+
     @classmethod
     def _init_templates(cls):
         """Initialize all templates."""
@@ -192,6 +183,18 @@ class TemplateLibrary:
                 variables=["first_name", "referrer_name"],
             ),
 
+            MessageTemplate(
+                id="identity_intro",
+                category=TemplateCategory.WELCOME,
+                name="Who Is This",
+                variants=[
+                    "Hey {first_name}! It's {agent_name} with {brokerage_name}. You were checking out homes with us, so I wanted to see if I could help. What are you looking for?",
+                    "Hi {first_name}! This is {agent_name} from {brokerage_name} - you reached out about real estate and I'm here to help with your search. Anything I can answer?",
+                ],
+                variables=["first_name", "agent_name", "brokerage_name"],
+                tags=["fast_path"],
+            ),
+
             # ==================== QUALIFICATION TEMPLATES ====================
             MessageTemplate(
                 id="qual_timeline",
@@ -300,6 +303,19 @@ class TemplateLibrary:
                 variables=["appointment_date", "appointment_time", "location"],
             ),
 
+            MessageTemplate(
+                id="ack_short",
+                category=TemplateCategory.CONFIRMATION,
+                name="Short Acknowledgment",
+                variants=[
+                    "Sounds good, {first_name}! Just text me if anything comes up.",
+                    "Anytime, {first_name}! I'm here whenever you need me.",
+                    "You got it, {first_name}! Reach out anytime.",
+                ],
+                variables=["first_name"],
+                tags=["fast_path"],
+            ),
+
             # ==================== FOLLOW-UP TEMPLATES ====================
             MessageTemplate(
                 id="followup_no_response_1",
@@ -408,6 +424,13 @@ class TemplateLibrary:
 
         for template in templates:
             cls.TEMPLATES[template.id] = template
+            # Parse every variant up front so no render pays for it
+            template.compiled()
+            cls._BY_CATEGORY.setdefault(template.category, []).append(template)
+            for tag in template.tags:
+                cls._BY_TAG.setdefault(tag, []).append(template)
+            if template.temperature:
+                cls._BY_TEMPERATURE.setdefault(template.temperature, []).append(template)
 
     @classmethod
     def get_template(cls, template_id: str) -> Optional[MessageTemplate]:
@@ -422,13 +445,13 @@ class TemplateLibrary:
     ) -> List[MessageTemplate]:
         """Get all templates in a category."""
         cls._init_templates()
-        return [t for t in cls.TEMPLATES.values() if t.category == category]
+        return list(cls._BY_CATEGORY.get(category, []))
 
     @classmethod
     def get_templates_by_tag(cls, tag: str) -> List[MessageTemplate]:
         """Get templates with a specific tag."""
         cls._init_templates()
-        return [t for t in cls.TEMPLATES.values() if tag in t.tags]
+        return list(cls._BY_TAG.get(tag, []))
 
     @classmethod
     def get_templates_by_temperature(
@@ -437,7 +460,7 @@ class TemplateLibrary:
     ) -> List[MessageTemplate]:
         """Get templates for a specific lead temperature."""
         cls._init_templates()
-        return [t for t in cls.TEMPLATES.values() if t.temperature == temperature]
+        return list(cls._BY_TEMPERATURE.get(temperature, []))
 
 
 class ResponseTemplateEngine:
@@ -504,6 +527,41 @@ class ResponseTemplateEngine:
 
         return template.render(variables, variant_index)
 
+    def render_many(
+        self,
+        template_id: str,
+        variable_rows: List[Dict[str, Any]],
+        lead_ids: Optional[List[Optional[str]]] = None,
+    ) -> List[str]:
+        """
+        Render a template for many leads at once (bulk campaigns).
+
+        Variants are assigned per lead the same way get_message does, so a
+        lead sees the same variant in both paths. A/B usage is not logged
+        per row; campaign senders record their own send results.
+
+        Args:
+            template_id: Template ID to use
+            variable_rows: Variables for each message
+            lead_ids: Optional lead ID per row for consistent A/B variants
+
+        Returns:
+            Rendered messages in row order ([] if the template is not found)
+        """
+        template = TemplateLibrary.get_template(template_id)
+        if not template:
+            logger.warning(f"Template not found: {template_id}")
+            return []
+
+        variant_indexes = None
+        if lead_ids and len(template.variants) > 1:
+            variant_indexes = [
+                self._get_ab_variant(lead_id, template_id, len(template.variants)) if lead_id else None
+                for lead_id in lead_ids
+            ]
+
+        return template.render_many(variable_rows, variant_indexes)
+
     def get_welcome_message(
         self,
         lead_profile: Dict[str, Any],
@@ -0,0 +1,209 @@
+"""
+Template Renderer - Compiled render plans for message templates.
+
+MessageTemplate.render used to do one str.replace per declared variable and
+then run the conditional regex over the result on every call. Each variant
+is now parsed once into a render plan:
+
+- Literal text runs (adjacent literals merged)
+- Placeholders with their formatter bound at compile time
+- Conditional blocks {?var:text} with their own nested plan
+
+render() walks the plan for one set of variables. render_many() renders a
+whole batch column by column (one pass per plan step over all rows) for
+bulk campaign sends.
+
+Output matches the previous renderer: undeclared placeholders are left as
+is, `*_price` numbers are formatted as dollars, an empty first_name becomes
+"there", and messages are truncated to max_chars and stripped.
+"""
+
+import random
+import re
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Plan step kinds
+LITERAL = 0
+VARIABLE = 1
+CONDITIONAL = 2
+
+# (kind, variable name, payload): payload is the text, the formatter or the nested plan
+Step = Tuple[int, Optional[str], Any]
+
+_TOKEN_PATTERN = re.compile(r'\{\?(\w+):|\{(\w+)\}|\}')
+
+
+def _format_price(value: Any) -> str:
+    if isinstance(value, (int, float)):
+        return f"${value:,.0f}"
+    return str(value)
+
+
+def _format_first_name(value: Any) -> str:
+    return str(value) if value else "there"
+
+
+def formatter_for(var_name: str) -> Callable[[Any], str]:
+    """Formatter applied to a variable's value when it is substituted."""
+    if var_name.endswith("_price"):
+        return _format_price
+    if var_name == "first_name":
+        return _format_first_name
+    return str
+
+
+def _append_literal(steps: List[Step], text: str) -> None:
+    if not text:
+        return
+    if steps and steps[-1][0] == LITERAL:
+        steps[-1] = (LITERAL, None, steps[-1][2] + text)
+    else:
+        steps.append((LITERAL, None, text))
+
+
+def compile_variant(text: str, declared: Sequence[str]) -> List[Step]:
+    """Parse one template variant into a render plan."""
+    declared = set(declared)
+    steps: List[Step] = []
+    # Open conditionals: (variable name, steps outside the block)
+    open_blocks: List[Tuple[str, List[Step]]] = []
+    position = 0
+
+    for match in _TOKEN_PATTERN.finditer(text):
+        _append_literal(steps, text[position:match.start()])
+        position = match.end()
+        condition, placeholder = match.group(1), match.group(2)
+
+        if condition:
+            open_blocks.append((condition, steps))
+            steps = []
+        elif placeholder:
+            if placeholder in declared:
+                steps.append((VARIABLE, placeholder, formatter_for(placeholder)))
+            else:
+                _append_literal(steps, match.group(0))
+        elif open_blocks and steps:
+            condition, outer = open_blocks.pop()
+            outer.append((CONDITIONAL, condition, steps))
+            steps = outer
+        elif open_blocks:
+            # Empty block "{?var:}" is not a conditional
+            condition, outer = open_blocks.pop()
+            _append_literal(outer, f"{{?{condition}:}}")
+            steps = outer
+        else:
+            _append_literal(steps, "}")
+
+    _append_literal(steps, text[position:])
+
+    # Unclosed blocks stay in the text, their placeholders still substituted
+    while open_blocks:
+        condition, outer = open_blocks.pop()
+        _append_literal(outer, f"{{?{condition}:")
+        for step in steps:
+            if step[0] == LITERAL:
+                _append_literal(outer, step[2])
+            else:
+                outer.append(step)
+        steps = outer
+
+    return steps
+
+
+def render_plan(steps: List[Step], variables: Dict[str, Any]) -> str:
+    """Render a plan for one set of variables."""
+    parts = []
+    for kind, name, payload in steps:
+        if kind == LITERAL:
+            parts.append(payload)
+        elif kind == VARIABLE:
+            parts.append(payload(variables.get(name, "")))
+        elif variables.get(name):
+            parts.append(render_plan(payload, variables))
+    return "".join(parts)
+
+
+def render_plan_many(steps: List[Step], rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Render a plan for many rows, one column per plan step."""
+    count = len(rows)
+    if not steps:
+        return [""] * count
+
+    columns = []
+    for kind, name, payload in steps:
+        if kind == LITERAL:
+            columns.append(repeat(payload, count))
+        elif kind == VARIABLE:
+            columns.append([payload(row.get(name, "")) for row in rows])
+        else:
+            column = [""] * count
+            shown = [i for i, row in enumerate(rows) if row.get(name)]
+            if shown:
+                for i, text in zip(shown, render_plan_many(payload, [rows[i] for i in shown])):
+                    column[i] = text
+            columns.append(column)
+
+    return ["".join(parts) for parts in zip(*columns)]
+
+
+class CompiledTemplate:
+    """
+    Render plans for every variant of a MessageTemplate.
+
+    Usage:
+        compiled = CompiledTemplate(template)
+        text = compiled.render({"first_name": "Ann"}, variant_index=0)
+        texts = compiled.render_many(rows)
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.max_chars = template.max_chars
+        self.plans = [compile_variant(variant, template.variables) for variant in template.variants]
+
+    def _finish(self, text: str) -> str:
+        # Truncate if too long
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars - 3] + "..."
+        return text.strip()
+
+    def pick_variant(self, variant_index: int = None) -> int:
+        """Requested variant if valid, otherwise a random one."""
+        if variant_index is not None and 0 <= variant_index < len(self.plans):
+            return variant_index
+        return random.randrange(len(self.plans))
+
+    def render(self, variables: Dict[str, Any], variant_index: int = None) -> str:
+        """Render one message."""
+        plan = self.plans[self.pick_variant(variant_index)]
+        return self._finish(render_plan(plan, variables))
+
+    def render_many(
+        self,
+        variable_rows: Sequence[Dict[str, Any]],
+        variant_indexes: Sequence[Optional[int]] = None,
+    ) -> List[str]:
+        """
+        Render one message per row, in row order.
+
+        Args:
+            variable_rows: Variables for each message
+            variant_indexes: Variant per row (random where None or invalid)
+
+        Returns:
+            Rendered messages
+        """
+        if variant_indexes is None:
+            variant_indexes = [None] * len(variable_rows)
+
+        groups: Dict[int, List[int]] = {}
+        for row_index, variant_index in enumerate(variant_indexes):
+            groups.setdefault(self.pick_variant(variant_index), []).append(row_index)
+
+        results: List[str] = [""] * len(variable_rows)
+        for variant, row_indexes in groups.items():
+            rendered = render_plan_many(self.plans[variant], [variable_rows[i] for i in row_indexes])
+            for row_index, text in zip(row_indexes, rendered):
+                results[row_index] = self._finish(text)
+        return results
@@ -4,7 +4,7 @@ Ported from Leaddata's User model credit methods.
 """
 
 import logging
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 from app.database.supabase_client import SupabaseClientSingleton
@@ -27,6 +27,60 @@ class CreditService:
     TYPE_CRIMINAL = 'criminal'
     TYPE_DNC = 'dnc'
 
+    # Deduction order per credit type: (users column, credit source)
+    BROKER_POOLS = {
+        TYPE_CRIMINAL: [
+            ('trial_criminal_credits', 'trial'),  # Trial first
+            ('plan_criminal_credits', CreditTransaction.SOURCE_BROKER_PLAN),
+            ('bundle_criminal_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
+            ('personal_criminal_credits', CreditTransaction.SOURCE_BROKER_PERSONAL),
+        ],
+        TYPE_DNC: [
+            ('trial_dnc_credits', 'trial'),  # Trial first
+            ('plan_dnc_credits', CreditTransaction.SOURCE_BROKER_PLAN),
+            ('bundle_dnc_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
+        ],
+        TYPE_ENHANCEMENT: [
+            ('trial_enhancement_credits', 'trial'),  # Trial first
+            ('plan_enhancement_credits', CreditTransaction.SOURCE_BROKER_PLAN),
+            ('bundle_enhancement_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
+            ('personal_enhancement_credits', CreditTransaction.SOURCE_BROKER_PERSONAL),
+        ],
+    }
+    AGENT_POOLS = {
+        TYPE_CRIMINAL: [
+            ('trial_criminal_credits', 'trial'),  # Trial first
+            ('bundle_criminal_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
+            ('allocated_criminal_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
+        ],
+        TYPE_DNC: [
+            ('trial_dnc_credits', 'trial'),  # Trial first
+            ('bundle_dnc_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
+            ('allocated_dnc_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
+        ],
+        TYPE_ENHANCEMENT: [
+            ('trial_enhancement_credits', 'trial'),  # Trial first
+            ('bundle_enhancement_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
+            ('allocated_enhancement_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
+        ],
+    }
+    BROKER_SHARED_POOLS = {
+        TYPE_CRIMINAL: [
+            ('plan_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
+            ('bundle_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
+            ('personal_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_PERSONAL),
+        ],
+        TYPE_DNC: [
+            ('plan_dnc_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
+            ('bundle_dnc_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
+        ],
+        TYPE_ENHANCEMENT: [
+            ('plan_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
+            ('bundle_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
+            ('personal_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_PERSONAL),
+        ],
+    }
+
     def __init__(self):
         self.supabase = SupabaseClientSingleton.get_instance()
 
@@ -290,28 +344,7 @@ class CreditService:
         Deduct credits from broker's pools in order: trial -> plan -> bundle -> personal.
         Returns the credit source that was used.
         """
-        pools_order = []
-
-        if credit_type == self.TYPE_CRIMINAL:
-            pools_order = [
-                ('trial_criminal_credits', 'trial'),  # Trial first
-                ('plan_criminal_credits', CreditTransaction.SOURCE_BROKER_PLAN),
-                ('bundle_criminal_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
-                ('personal_criminal_credits', CreditTransaction.SOURCE_BROKER_PERSONAL),
-            ]
-        elif credit_type == self.TYPE_DNC:
-            pools_order = [
-                ('trial_dnc_credits', 'trial'),  # Trial first
-                ('plan_dnc_credits', CreditTransaction.SOURCE_BROKER_PLAN),
-                ('bundle_dnc_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
-            ]
-        else:  # enhancement
-            pools_order = [
-                ('trial_enhancement_credits', 'trial'),  # Trial first
-                ('plan_enhancement_credits', CreditTransaction.SOURCE_BROKER_PLAN),
-                ('bundle_enhancement_credits', CreditTransaction.SOURCE_BROKER_BUNDLE),
-                ('personal_enhancement_credits', CreditTransaction.SOURCE_BROKER_PERSONAL),
-            ]
+        pools_order = self.BROKER_POOLS.get(credit_type, self.BROKER_POOLS[self.TYPE_ENHANCEMENT])
 
         for field, source in pools_order:
             if user_credits.get(field, 0) >= amount:
@@ -333,24 +366,7 @@ class CreditService:
         broker_id = user_credits.get('broker_id')
 
         # Agent pools (trial first, then bundle, then allocated)
-        if credit_type == self.TYPE_CRIMINAL:
-            agent_pools = [
-                ('trial_criminal_credits', 'trial'),  # Trial first
-                ('bundle_criminal_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
-                ('allocated_criminal_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
-            ]
-        elif credit_type == self.TYPE_DNC:
-            agent_pools = [
-                ('trial_dnc_credits', 'trial'),  # Trial first
-                ('bundle_dnc_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
-                ('allocated_dnc_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
-            ]
-        else:  # enhancement
-            agent_pools = [
-                ('trial_enhancement_credits', 'trial'),  # Trial first
-                ('bundle_enhancement_credits', CreditTransaction.SOURCE_AGENT_BUNDLE),
-                ('allocated_enhancement_credits', CreditTransaction.SOURCE_AGENT_ALLOCATED),
-            ]
+        agent_pools = self.AGENT_POOLS.get(credit_type, self.AGENT_POOLS[self.TYPE_ENHANCEMENT])
 
         # Try agent's own pools first
         for field, source in agent_pools:
@@ -365,23 +381,9 @@ class CreditService:
         if broker_id:
             broker_credits = self.get_user_credits(broker_id)
             if broker_credits and broker_credits.get('credit_allocation_type') == 'shared':
-                if credit_type == self.TYPE_CRIMINAL:
-                    broker_pools = [
-                        ('plan_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
-                        ('bundle_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
-                        ('personal_criminal_credits', CreditTransaction.SOURCE_BROKER_SHARED_PERSONAL),
-                    ]
-                elif credit_type == self.TYPE_DNC:
-                    broker_pools = [
-                        ('plan_dnc_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
-                        ('bundle_dnc_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
-                    ]
-                else:  # enhancement
-                    broker_pools = [
-                        ('plan_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_PLAN),
-                        ('bundle_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_BUNDLE),
-                        ('personal_enhancement_credits', CreditTransaction.SOURCE_BROKER_SHARED_PERSONAL),
-                    ]
+                broker_pools = self.BROKER_SHARED_POOLS.get(
+                    credit_type, self.BROKER_SHARED_POOLS[self.TYPE_ENHANCEMENT]
+                )
 
                 for field, source in broker_pools:
                     if broker_credits.get(field, 0) >= amount:
@@ -393,6 +395,144 @@ class CreditService:
 
         return None, None
 
+    # =========================================================================
+    # Batch Reservations (bulk jobs)
+    # =========================================================================
+
+    def reserve_credits(self, user_id: str, credit_type: str, amount: int) -> Dict[str, Any]:
+        """
+        Reserve up to `amount` credits in one atomic step per pool owner.
+
+        Credits are taken in the usual pool order (the user's own pools, then
+        the broker's shared pool) by the reserve_credit_pools function, which
+        locks the users row so concurrent searches can't spend the same
+        credits. Unused credits go back with settle_reservation().
+
+        Returns:
+            Reservation dict: user_id, credit_type, reserved, used, and pools
+            (what was taken from which column, in the order it was taken)
+        """
+        reservation = {
+            'user_id': user_id,
+            'credit_type': credit_type,
+            'reserved': 0,
+            'used': 0,
+            'pools': [],
+        }
+        if amount <= 0:
+            return reservation
+
+        try:
+            user_credits = self.get_user_credits(user_id)
+            if not user_credits:
+                return reservation
+
+            if user_credits['user_type'] == 'broker':
+                owners = [(user_id, self.BROKER_POOLS.get(credit_type, self.BROKER_POOLS[self.TYPE_ENHANCEMENT]))]
+            else:
+                owners = [(user_id, self.AGENT_POOLS.get(credit_type, self.AGENT_POOLS[self.TYPE_ENHANCEMENT]))]
+                broker_id = user_credits.get('broker_id')
+                if broker_id:
+                    broker_credits = self.get_user_credits(broker_id)
+                    if broker_credits and broker_credits.get('credit_allocation_type') == 'shared':
+                        owners.append((broker_id, self.BROKER_SHARED_POOLS.get(
+                            credit_type, self.BROKER_SHARED_POOLS[self.TYPE_ENHANCEMENT]
+                        )))
+
+            for owner_id, pools in owners:
+                remaining = amount - reservation['reserved']
+                if remaining <= 0:
+                    break
+                result = self.supabase.rpc('reserve_credit_pools', {
+                    'p_user_id': owner_id,
+                    'p_fields': [field for field, _ in pools],
+                    'p_amount': remaining,
+                }).execute()
+                taken = result.data or {}
+                for field, source in pools:
+                    if taken.get(field):
+                        reservation['pools'].append({
+                            'user_id': owner_id,
+                            'field': field,
+                            'source': source,
+                            'amount': int(taken[field]),
+                        })
+                        reservation['reserved'] += int(taken[field])
+
+            logger.info(f"Reserved {reservation['reserved']}/{amount} {credit_type} credit(s) for user {user_id}")
+
+        except Exception as e:
+            logger.error(f"Error reserving credits: {e}")
+            if reservation['pools']:
+                self._release_pools(reservation['pools'], reservation['reserved'])
+                reservation['pools'] = []
+                reservation['reserved'] = 0
+
+        return reservation
+
+    def settle_reservation(self, reservation: Dict[str, Any],
+                           description: str = None) -> Tuple[int, int]:
+        """
+        Finish a reservation: record the used credits and return the rest.
+
+        Args:
+            reservation: Dict from reserve_credits() with 'used' filled in
+            description: Optional description for the usage transaction
+
+        Returns:
+            Tuple of (credits used, credits released)
+        """
+        used = min(reservation.get('used', 0), reservation.get('reserved', 0))
+        unused = reservation.get('reserved', 0) - used
+
+        try:
+            if unused > 0:
+                self._release_pools(reservation['pools'], unused)
+
+            if used > 0:
+                pools = reservation['pools']
+                shared = [p for p in pools if p['user_id'] != reservation['user_id']]
+                self._record_transaction(
+                    user_id=reservation['user_id'],
+                    broker_id=shared[0]['user_id'] if shared else None,
+                    transaction_type=CreditTransaction.TYPE_USAGE,
+                    credit_type=reservation['credit_type'],
+                    amount=used,
+                    credit_source=pools[0]['source'] if pools else None,
+                    description=description or f"Used {used} {reservation['credit_type']} credit(s)"
+                )
+
+            reservation['reserved'] = used
+            logger.info(
+                f"Settled reservation for user {reservation['user_id']}: "
+                f"{used} used, {unused} released"
+            )
+            return used, unused
+
+        except Exception as e:
+            logger.error(f"Error settling credit reservation: {e}")
+            return used, 0
+
+    def _release_pools(self, pools: List[Dict[str, Any]], amount: int) -> None:
+        """Give `amount` reserved credits back, last-taken pool first."""
+        refunds: Dict[str, Dict[str, int]] = {}
+        remaining = amount
+        for pool in reversed(pools):
+            if remaining <= 0:
+                break
+            give_back = min(pool['amount'], remaining)
+            pool['amount'] -= give_back
+            remaining -= give_back
+            owner = refunds.setdefault(pool['user_id'], {})
+            owner[pool['field']] = owner.get(pool['field'], 0) + give_back
+        pools[:] = [p for p in pools if p['amount'] > 0]
+
+        for owner_id, amounts in refunds.items():
+            self.supabase.rpc('release_credit_pools', {
+                'p_user_id': owner_id,
+                'p_amounts': amounts,
+            }).execute()
+
     def allocate_credits(self, broker_id: str, agent_id: str,
                          enhancement_credits: int = 0,
                          criminal_credits: int = 0,
@@ -3,10 +3,15 @@ Calendar Module for LeadSynergy AI Agent.
 
 Provides calendar integration for appointment scheduling:
 - Google Calendar integration for availability checking and booking
-- Agent availability management
+- Agent availability management (single agent and team-wide)
 - Appointment reminders
 """
 
+from app.calendar.availability import (
+    AvailabilityEngine,
+    FIRST_AVAILABLE,
+    ROUND_ROBIN,
+)
 from app.calendar.google_calendar import (
     GoogleCalendarService,
     GoogleCalendarServiceSingleton,
@@ -14,6 +19,9 @@ from app.calendar.google_calendar import (
 )
 
 __all__ = [
+    'AvailabilityEngine',
+    'FIRST_AVAILABLE',
+    'ROUND_ROBIN',
     'GoogleCalendarService',
     'GoogleCalendarServiceSingleton',
     'TimeSlot',
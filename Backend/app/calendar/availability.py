@@ -0,0 +1,471 @@
+"""
+Availability Engine - Free slot computation for appointment scheduling.
+
+Every scheduling offer used to call the Google free/busy API, re-read
+agent_availability and then test each candidate slot against every busy
+interval. The engine instead:
+
+- Normalizes and merges busy intervals once, then sweeps them in a single
+  pass against the working-hour windows (sorted slots, sorted busy times)
+- Answers team-wide queries across many agents with one free/busy call
+  (first-available or round-robin agent assignment)
+- Caches free/busy results and working hours in Redis with short TTLs;
+  create/cancel/update of an appointment invalidates the calendar's entry
+
+The calendar is any object with an async
+`get_busy_times_batch(calendar_ids, start, end)` returning
+{calendar_id: [(start, end), ...]}. GoogleCalendarService implements it; a
+local stub works the same way in tests.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time as time_module
+from datetime import datetime, timedelta, time
+from typing import Optional, Dict, Any, List, Tuple, Iterable, TYPE_CHECKING
+
+import redis
+
+if TYPE_CHECKING:
+    from app.calendar.google_calendar import TimeSlot
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[datetime, datetime]
+WorkingHours = Dict[int, List[Tuple[time, time]]]
+
+# Free/busy entries are short-lived: bookings made outside LeadSynergy only
+# show up once the entry expires
+BUSY_TTL_SECONDS = 120
+
+# agent_availability rarely changes
+WORKING_HOURS_TTL_SECONDS = 600
+
+# Team assignment modes
+FIRST_AVAILABLE = "first_available"
+ROUND_ROBIN = "round_robin"
+
+DEFAULT_WORKING_START = time(9, 0)
+DEFAULT_WORKING_END = time(17, 0)
+
+
+def default_working_hours() -> WorkingHours:
+    """Mon-Fri 9-5 (day_of_week 0 = Sunday)."""
+    default_hours = [(DEFAULT_WORKING_START, DEFAULT_WORKING_END)]
+    return {i: list(default_hours) if 1 <= i <= 5 else [] for i in range(7)}
+
+
+def _naive(value: datetime) -> datetime:
+    # Slots are generated as naive datetimes; busy times from Google carry tzinfo
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and merge the overlapping/adjacent ones (naive datetimes)."""
+    normalized = sorted(
+        (start, end) for start, end in ((_naive(s), _naive(e)) for s, e in intervals)
+        if end > start
+    )
+
+    merged: List[Interval] = []
+    for start, end in normalized:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def working_windows(
+    start_date: datetime,
+    end_date: datetime,
+    availability: WorkingHours,
+    working_hours: Tuple[time, time] = None,
+) -> List[Interval]:
+    """Working-hour windows for every day in the range, sorted and merged."""
+    windows = []
+    current_date = start_date.date()
+    while current_date <= end_date.date():
+        # Convert to our format (0=Sunday)
+        day_of_week = (current_date.weekday() + 1) % 7
+        day_hours = [working_hours] if working_hours else availability.get(day_of_week, [])
+        for work_start, work_end in day_hours:
+            windows.append((
+                datetime.combine(current_date, work_start),
+                datetime.combine(current_date, work_end),
+            ))
+        current_date += timedelta(days=1)
+    return merge_intervals(windows)
+
+
+def sweep_slots(
+    windows: List[Interval],
+    busy: List[Interval],
+    duration_minutes: int,
+    not_before: datetime = None,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Free slots of `duration_minutes` on each window's grid, in one pass.
+
+    `windows` and `busy` must be sorted and merged (see merge_intervals).
+    A slot overlapping a busy interval jumps straight to the first grid
+    point after it, so cost grows with free slots + busy intervals rather
+    than slots x busy intervals.
+    """
+    step = timedelta(minutes=duration_minutes)
+    not_before = not_before or datetime.now()
+    slots = []
+    i = 0
+
+    for window_start, window_end in windows:
+        if window_end <= not_before:
+            continue
+
+        slot_start = window_start
+        while slot_start + step <= window_end:
+            slot_end = slot_start + step
+
+            while i < len(busy) and busy[i][1] <= slot_start:
+                i += 1
+
+            if i < len(busy) and busy[i][0] < slot_end:
+                # Skip to the first grid point at or after the busy interval ends
+                steps = -(-(busy[i][1] - window_start) // step)
+                slot_start = window_start + steps * step
+                continue
+
+            # Only include future slots
+            if slot_start > not_before:
+                slots.append((slot_start, slot_end))
+            slot_start = slot_end
+
+    return slots
+
+
+class AvailabilityEngine:
+    """
+    Computes free appointment slots for one agent or a team.
+
+    Usage:
+        engine = AvailabilityEngine(calendar_source=calendar_service)
+
+        slots = await engine.get_available_slots(agent_user_id, supabase_client=supabase)
+        team = await engine.get_team_slots(["u1", "u2"], mode=ROUND_ROBIN, supabase_client=supabase)
+
+        # After booking or cancelling on a calendar
+        engine.invalidate_calendar(calendar_id)
+    """
+
+    BUSY_KEY_PREFIX = "calendar:busy"
+    HOURS_KEY_PREFIX = "calendar:hours"
+    ROTATION_KEY_PREFIX = "calendar:rr"
+
+    def __init__(
+        self,
+        calendar_source,
+        default_calendar_id: str = "primary",
+        busy_ttl: int = BUSY_TTL_SECONDS,
+        working_hours_ttl: int = WORKING_HOURS_TTL_SECONDS,
+    ):
+        self.source = calendar_source
+        self.default_calendar_id = default_calendar_id
+        self.busy_ttl = busy_ttl
+        self.working_hours_ttl = working_hours_ttl
+        self.redis = None
+        self._rotation = {}
+        self._rotation_lock = threading.Lock()
+        self._stats = {'busy_hits': 0, 'busy_misses': 0, 'hours_hits': 0, 'hours_misses': 0}
+
+        try:
+            from app.service.redis_service import RedisServiceSingleton
+            self.redis = RedisServiceSingleton.get_instance()
+        except Exception as e:
+            logger.warning(f"Redis not available, availability cache disabled: {e}")
+
+    # ========================================
+    # QUERIES
+    # ========================================
+
+    async def get_available_slots(
+        self,
+        agent_user_id: str,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        duration_minutes: int = 30,
+        working_hours: Tuple[time, time] = None,
+        supabase_client=None,
+        calendar_id: str = None,
+    ) -> List["TimeSlot"]:
+        """Free slots for one agent, earliest first."""
+        from app.calendar.google_calendar import TimeSlot
+
+        start_date, end_date = self._date_range(start_date, end_date)
+        calendar_id = calendar_id or self.default_calendar_id
+
+        hours = self.get_working_hours([agent_user_id], supabase_client)[agent_user_id]
+        busy = (await self.get_busy_times([calendar_id], start_date, end_date))[calendar_id]
+
+        windows = working_windows(start_date, end_date, hours, working_hours)
+        return [
+            TimeSlot(start=start, end=end, duration_minutes=duration_minutes)
+            for start, end in sweep_slots(windows, busy, duration_minutes)
+        ]
+
+    async def get_team_slots(
+        self,
+        agent_user_ids: List[str],
+        start_date: datetime = None,
+        end_date: datetime = None,
+        duration_minutes: int = 30,
+        mode: str = FIRST_AVAILABLE,
+        calendar_ids: Dict[str, str] = None,
+        working_hours: Tuple[time, time] = None,
+        supabase_client=None,
+    ) -> List["TimeSlot"]:
+        """
+        Free slots across a team, one agent per start time, earliest first.
+
+        Modes:
+            first_available: the first free agent in `agent_user_ids` order
+            round_robin: the first free agent starting from a rotating
+                position, so consecutive offers start with the next agent
+        """
+        from app.calendar.google_calendar import TimeSlot
+
+        agents = list(dict.fromkeys(agent_user_ids))
+        if not agents:
+            return []
+
+        start_date, end_date = self._date_range(start_date, end_date)
+        calendar_ids = calendar_ids or {}
+        agent_calendars = {agent: calendar_ids.get(agent, self.default_calendar_id) for agent in agents}
+
+        hours = self.get_working_hours(agents, supabase_client)
+        busy = await self.get_busy_times(sorted(set(agent_calendars.values())), start_date, end_date)
+
+        if mode == ROUND_ROBIN:
+            offset = self._next_rotation(agents) % len(agents)
+            agents = agents[offset:] + agents[:offset]
+
+        per_agent = []
+        for rank, agent in enumerate(agents):
+            windows = working_windows(start_date, end_date, hours[agent], working_hours)
+            free = sweep_slots(windows, busy[agent_calendars[agent]], duration_minutes)
+            per_agent.append([(start, rank, end, agent) for start, end in free])
+
+        slots = []
+        last_start = None
+        for start, _, end, agent in heapq.merge(*per_agent):
+            if start == last_start:
+                continue
+            last_start = start
+            slots.append(TimeSlot(start=start, end=end, duration_minutes=duration_minutes, agent_user_id=agent))
+        return slots
+
+    @staticmethod
+    def _date_range(start_date: datetime = None, end_date: datetime = None) -> Tuple[datetime, datetime]:
+        # Default to next 7 days starting tomorrow
+        if not start_date:
+            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        if not end_date:
+            end_date = start_date + timedelta(days=7)
+        return start_date, end_date
+
+    def _next_rotation(self, agents: List[str]) -> int:
+        """Advance the team's round-robin position (shared across workers via Redis)."""
+        team = hashlib.md5(",".join(sorted(agents)).encode()).hexdigest()[:16]
+        if self.redis is not None:
+            try:
+                return int(self.redis.redis.incr(f"{self.ROTATION_KEY_PREFIX}:{team}")) - 1
+            except redis.RedisError as e:
+                logger.debug(f"Round-robin counter unavailable: {e}")
+
+        with self._rotation_lock:
+            position = self._rotation.get(team, 0)
+            self._rotation[team] = position + 1
+        return position
+
+    # ========================================
+    # FREE/BUSY (cached)
+    # ========================================
+
+    async def get_busy_times(
+        self,
+        calendar_ids: List[str],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict[str, List[Interval]]:
+        """Merged busy intervals per calendar; only uncached calendars hit the API."""
+        range_field = f"{start_date.isoformat()}|{end_date.isoformat()}"
+        busy: Dict[str, List[Interval]] = {}
+        missing = []
+
+        for calendar_id in calendar_ids:
+            cached = self._read_busy(calendar_id, range_field)
+            if cached is None:
+                missing.append(calendar_id)
+            else:
+                busy[calendar_id] = cached
+
+        self._stats['busy_hits'] += len(busy)
+        self._stats['busy_misses'] += len(missing)
+
+        if missing:
+            try:
+                fetched = await self.source.get_busy_times_batch(missing, start_date, end_date) or {}
+            except Exception as e:
+                logger.error(f"Error fetching busy times: {e}")
+                fetched = {}
+
+            for calendar_id in missing:
+                if calendar_id in fetched:
+                    busy[calendar_id] = merge_intervals(fetched[calendar_id])
+                    self._write_busy(calendar_id, range_field, busy[calendar_id])
+                else:
+                    # Not cached: the next offer retries the calendar
+                    busy[calendar_id] = []
+
+        return busy
+
+    def _busy_key(self, calendar_id: str) -> str:
+        return f"{self.BUSY_KEY_PREFIX}:{calendar_id}"
+
+    def _read_busy(self, calendar_id: str, range_field: str) -> Optional[List[Interval]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.redis.hget(self._busy_key(calendar_id), range_field)
+            if not raw:
+                return None
+            entry = json.loads(raw)
+            if time_module.time() - entry["fetched_at"] > self.busy_ttl:
+                return None
+            return [
+                (datetime.fromisoformat(start), datetime.fromisoformat(end))
+                for start, end in entry["busy"]
+            ]
+        except (redis.RedisError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Free/busy cache read failed for {calendar_id}: {e}")
+            return None
+
+    def _write_busy(self, calendar_id: str, range_field: str, busy: List[Interval]) -> None:
+        if self.redis is None:
+            return
+        entry = {
+            "fetched_at": time_module.time(),
+            "busy": [[start.isoformat(), end.isoformat()] for start, end in busy],
+        }
+        key = self._busy_key(calendar_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(key, range_field, json.dumps(entry))
+            pipe.expire(key, self.busy_ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Free/busy cache write failed for {calendar_id}: {e}")
+
+    def invalidate_calendar(self, calendar_id: str = None) -> None:
+        """Drop cached free/busy for a calendar (after a booking change)."""
+        if self.redis is None:
+            return
+        try:
+            self.redis.redis.delete(self._busy_key(calendar_id or self.default_calendar_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate free/busy cache for {calendar_id}: {e}")
+
+    # ========================================
+    # WORKING HOURS (cached)
+    # ========================================
+
+    def get_working_hours(self, user_ids: List[str], supabase_client=None) -> Dict[str, WorkingHours]:
+        """Working hours per agent from agent_availability, in one query for all misses."""
+        if not supabase_client:
+            return {user_id: default_working_hours() for user_id in user_ids}
+
+        hours: Dict[str, WorkingHours] = {}
+        missing = []
+        for user_id in user_ids:
+            cached = self._read_hours(user_id)
+            if cached is None:
+                missing.append(user_id)
+            else:
+                hours[user_id] = cached
+
+        self._stats['hours_hits'] += len(hours)
+        self._stats['hours_misses'] += len(missing)
+        if not missing:
+            return hours
+
+        try:
+            result = supabase_client.table("agent_availability").select(
+                "user_id, day_of_week, start_time, end_time"
+            ).in_(
+                "user_id", missing
+            ).eq(
+                "is_available", True
+            ).execute()
+
+            loaded = {user_id: {i: [] for i in range(7)} for user_id in missing}
+            for row in result.data or []:
+                loaded[row["user_id"]][row["day_of_week"]].append((
+                    time.fromisoformat(row["start_time"]),
+                    time.fromisoformat(row["end_time"]),
+                ))
+
+            for user_id, availability in loaded.items():
+                self._write_hours(user_id, availability)
+            hours.update(loaded)
+
+        except Exception as e:
+            logger.error(f"Error fetching agent availability: {e}")
+            for user_id in missing:
+                hours[user_id] = default_working_hours()
+
+        return hours
+
+    def _hours_key(self, user_id: str) -> str:
+        return f"{self.HOURS_KEY_PREFIX}:{user_id}"
+
+    def _read_hours(self, user_id: str) -> Optional[WorkingHours]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.redis.get(self._hours_key(user_id))
+            if not raw:
+                return None
+            return {
+                int(day): [(time.fromisoformat(start), time.fromisoformat(end)) for start, end in windows]
+                for day, windows in json.loads(raw).items()
+            }
+        except (redis.RedisError, ValueError, TypeError) as e:
+            logger.debug(f"Working hours cache read failed for {user_id}: {e}")
+            return None
+
+    def _write_hours(self, user_id: str, availability: WorkingHours) -> None:
+        if self.redis is None:
+            return
+        payload = {
+            day: [[start.isoformat(), end.isoformat()] for start, end in windows]
+            for day, windows in availability.items()
+        }
+        try:
+            self.redis.redis.set(self._hours_key(user_id), json.dumps(payload), ex=self.working_hours_ttl)
+        except redis.RedisError as e:
+            logger.debug(f"Working hours cache write failed for {user_id}: {e}")
+
+    def invalidate_working_hours(self, user_id: str) -> None:
+        """Drop cached working hours for an agent (after agent_availability changes)."""
+        if self.redis is None:
+            return
+        try:
+            self.redis.redis.delete(self._hours_key(user_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate working hours for {user_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters for this process."""
+        return dict(self._stats)
@@ -4,7 +4,7 @@ Google Calendar Service - Calendar integration for appointment scheduling.
 Provides:
 - Availability checking based on agent's Google Calendar
 - Appointment booking with calendar event creation
-- Time slot generation for scheduling UI
+- Time slot generation for scheduling UI (see app.calendar.availability)
 - Appointment reminders and confirmations
 
 Requires Google Calendar API credentials configured in environment.
@@ -17,6 +17,14 @@ from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 import json
 
+from app.calendar.availability import (
+    AvailabilityEngine,
+    FIRST_AVAILABLE,
+    merge_intervals,
+    sweep_slots,
+    working_windows,
+)
+
 logger = logging.getLogger(__name__)
 
 # Google Calendar imports - optional dependency
@@ -37,14 +45,18 @@ class TimeSlot:
     start: datetime
     end: datetime
     duration_minutes: int
+    agent_user_id: Optional[str] = None  # Set on team-wide queries
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "start": self.start.isoformat(),
             "end": self.end.isoformat(),
             "duration_minutes": self.duration_minutes,
             "display": self.start.strftime("%A, %B %d at %I:%M %p"),
         }
+        if self.agent_user_id:
+            data["agent_user_id"] = self.agent_user_id
+        return data
 
     def __str__(self) -> str:
         return self.start.strftime("%A, %B %d at %I:%M %p")
@@ -87,10 +99,18 @@ class GoogleCalendarService:
         self.use_service_account = service_account
         self.service = None
         self._initialized = False
+        self._availability: Optional[AvailabilityEngine] = None
 
         if not GOOGLE_CALENDAR_AVAILABLE:
             logger.warning("Google Calendar API not available")
 
+    @property
+    def availability(self) -> AvailabilityEngine:
+        """Availability engine backed by this calendar (created on first use)."""
+        if self._availability is None:
+            self._availability = AvailabilityEngine(calendar_source=self, default_calendar_id=self.calendar_id)
+        return self._availability
+
     def _initialize(self) -> bool:
         """Initialize Google Calendar API service."""
         if self._initialized:
@@ -147,32 +167,50 @@ class GoogleCalendarService:
         Returns:
             List of available TimeSlot objects
         """
-        duration = duration_minutes or self.DEFAULT_DURATION_MINUTES
-
-        # Default to next 7 days starting tomorrow
-        if not start_date:
-            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        if not end_date:
-            end_date = start_date + timedelta(days=7)
+        return await self.availability.get_available_slots(
+            agent_user_id=agent_user_id,
+            start_date=start_date,
+            end_date=end_date,
+            duration_minutes=duration_minutes or self.DEFAULT_DURATION_MINUTES,
+            working_hours=working_hours,
+            supabase_client=supabase_client,
+        )
 
-        # Get agent's availability settings
-        availability_settings = await self._get_agent_availability(agent_user_id, supabase_client)
+    async def get_team_slots(
+        self,
+        agent_user_ids: List[str],
+        start_date: datetime = None,
+        end_date: datetime = None,
+        duration_minutes: int = None,
+        mode: str = FIRST_AVAILABLE,
+        calendar_ids: Dict[str, str] = None,
+        supabase_client=None,
+    ) -> List[TimeSlot]:
+        """
+        Get available time slots across a team of agents.
 
-        # Get busy times from Google Calendar
-        busy_times = await self._get_busy_times(start_date, end_date)
+        Args:
+            agent_user_ids: LeadSynergy user IDs of the agents
+            start_date: Start of date range to check (default: tomorrow)
+            end_date: End of date range (default: 7 days from start)
+            duration_minutes: Appointment duration (default: 30)
+            mode: "first_available" or "round_robin"
+            calendar_ids: Optional {agent_user_id: calendar_id} (default: this calendar)
+            supabase_client: Database client for agent availability
 
-        # Generate slots based on availability minus busy times
-        slots = self._generate_available_slots(
+        Returns:
+            List of TimeSlot objects with agent_user_id set
+        """
+        return await self.availability.get_team_slots(
+            agent_user_ids,
             start_date=start_date,
             end_date=end_date,
-            duration_minutes=duration,
-            busy_times=busy_times,
-            availability_settings=availability_settings,
-            working_hours=working_hours,
+            duration_minutes=duration_minutes or self.DEFAULT_DURATION_MINUTES,
+            mode=mode,
+            calendar_ids=calendar_ids,
+            supabase_client=supabase_client,
         )
 
-        return slots
-
     async def _get_agent_availability(
         self,
         user_id: str,
@@ -184,41 +222,7 @@ class GoogleCalendarService:
         Returns:
             Dict mapping day_of_week (0-6) to list of (start, end) time tuples
         """
-        if not supabase_client:
-            # Return default availability (Mon-Fri 9-5)
-            default_hours = [(self.DEFAULT_WORKING_START, self.DEFAULT_WORKING_END)]
-            return {
-                0: [],  # Sunday
-                1: default_hours,  # Monday
-                2: default_hours,  # Tuesday
-                3: default_hours,  # Wednesday
-                4: default_hours,  # Thursday
-                5: default_hours,  # Friday
-                6: [],  # Saturday
-            }
-
-        try:
-            result = supabase_client.table("agent_availability").select("*").eq(
-                "user_id", user_id
-            ).eq(
-                "is_available", True
-            ).execute()
-
-            availability = {i: [] for i in range(7)}
-
-            for row in result.data:
-                day = row["day_of_week"]
-                start = time.fromisoformat(row["start_time"])
-                end = time.fromisoformat(row["end_time"])
-                availability[day].append((start, end))
-
-            return availability
-
-        except Exception as e:
-            logger.error(f"Error fetching agent availability: {e}")
-            # Return default
-            default_hours = [(self.DEFAULT_WORKING_START, self.DEFAULT_WORKING_END)]
-            return {i: default_hours if 1 <= i <= 5 else [] for i in range(7)}
+        return self.availability.get_working_hours([user_id], supabase_client)[user_id]
 
     async def _get_busy_times(
         self,
@@ -226,31 +230,54 @@ class GoogleCalendarService:
         end_date: datetime,
     ) -> List[Tuple[datetime, datetime]]:
         """Get busy times from Google Calendar."""
+        busy = await self.get_busy_times_batch([self.calendar_id], start_date, end_date)
+        return busy.get(self.calendar_id, [])
+
+    async def get_busy_times_batch(
+        self,
+        calendar_ids: List[str],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """
+        Get busy times for several calendars with one free/busy query.
+
+        Calendars that could not be read are left out of the result (rather
+        than reported as free) so they are not cached as empty.
+        """
         if not self._initialize():
-            return []
+            return {}
 
         try:
             # Query free/busy info
             body = {
                 "timeMin": start_date.isoformat() + 'Z',
                 "timeMax": end_date.isoformat() + 'Z',
-                "items": [{"id": self.calendar_id}]
+                "items": [{"id": calendar_id} for calendar_id in calendar_ids]
             }
 
             result = self.service.freebusy().query(body=body).execute()
-            busy = result.get('calendars', {}).get(self.calendar_id, {}).get('busy', [])
-
-            busy_times = []
-            for period in busy:
-                start = datetime.fromisoformat(period['start'].replace('Z', '+00:00'))
-                end = datetime.fromisoformat(period['end'].replace('Z', '+00:00'))
-                busy_times.append((start, end))
+            calendars = result.get('calendars', {})
+
+            busy_times = {}
+            for calendar_id in calendar_ids:
+                calendar = calendars.get(calendar_id, {})
+                if calendar.get('errors'):
+                    logger.warning(f"Free/busy unavailable for {calendar_id}: {calendar['errors']}")
+                    continue
+                busy_times[calendar_id] = [
+                    (
+                        datetime.fromisoformat(period['start'].replace('Z', '+00:00')),
+                        datetime.fromisoformat(period['end'].replace('Z', '+00:00')),
+                    )
+                    for period in calendar.get('busy', [])
+                ]
 
             return busy_times
 
         except Exception as e:
             logger.error(f"Error fetching busy times: {e}")
-            return []
+            return {}
 
     def _generate_available_slots(
         self,
@@ -262,60 +289,11 @@ class GoogleCalendarService:
         working_hours: Tuple[time, time] = None,
     ) -> List[TimeSlot]:
         """Generate available slots based on constraints."""
-        slots = []
-        slot_duration = timedelta(minutes=duration_minutes)
-
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-
-        while current_date <= end_date_only:
-            day_of_week = current_date.weekday()
-            # Convert to our format (0=Sunday)
-            day_of_week = (day_of_week + 1) % 7
-
-            # Get working hours for this day
-            day_hours = availability_settings.get(day_of_week, [])
-            if working_hours:
-                day_hours = [working_hours]
-
-            for work_start, work_end in day_hours:
-                # Start at beginning of work hours
-                slot_start = datetime.combine(current_date, work_start)
-
-                # Generate slots until end of work hours
-                while slot_start.time() < work_end:
-                    slot_end = slot_start + slot_duration
-
-                    # Check if slot end exceeds work hours
-                    if slot_end.time() > work_end:
-                        break
-
-                    # Check if slot overlaps with any busy time
-                    is_busy = False
-                    for busy_start, busy_end in busy_times:
-                        # Remove timezone info for comparison if needed
-                        busy_start_naive = busy_start.replace(tzinfo=None) if busy_start.tzinfo else busy_start
-                        busy_end_naive = busy_end.replace(tzinfo=None) if busy_end.tzinfo else busy_end
-
-                        if not (slot_end <= busy_start_naive or slot_start >= busy_end_naive):
-                            is_busy = True
-                            break
-
-                    if not is_busy:
-                        # Only include future slots
-                        if slot_start > datetime.now():
-                            slots.append(TimeSlot(
-                                start=slot_start,
-                                end=slot_end,
-                                duration_minutes=duration_minutes,
-                            ))
-
-                    # Move to next slot
-                    slot_start = slot_start + slot_duration
-
-            current_date += timedelta(days=1)
-
-        return slots
+        windows = working_windows(start_date, end_date, availability_settings, working_hours)
+        return [
+            TimeSlot(start=slot_start, end=slot_end, duration_minutes=duration_minutes)
+            for slot_start, slot_end in sweep_slots(windows, merge_intervals(busy_times), duration_minutes)
+        ]
 
     async def create_appointment(
         self,
@@ -380,6 +358,7 @@ class GoogleCalendarService:
             ).execute()
 
             logger.info(f"Calendar event created: {result.get('id')}")
+            self.availability.invalidate_calendar(self.calendar_id)
 
             return {
                 "success": True,
@@ -432,6 +411,7 @@ class GoogleCalendarService:
             ).execute()
 
             logger.info(f"Calendar event cancelled: {event_id}")
+            self.availability.invalidate_calendar(self.calendar_id)
             return {"success": True}
 
         except HttpError as e:
@@ -497,6 +477,7 @@ class GoogleCalendarService:
             ).execute()
 
             logger.info(f"Calendar event updated: {event_id}")
+            self.availability.invalidate_calendar(self.calendar_id)
             return {
                 "success": True,
                 "event_id": result.get('id'),
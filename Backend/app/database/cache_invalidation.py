@@ -0,0 +1,347 @@
+"""
+Cache Invalidation - Keep the Redis lead/note caches in step with Postgres.
+
+Triggers on leads and lead_notes (migrations/add_cache_invalidation_notify.sql)
+NOTIFY every change on the `cache_invalidation` channel. This listener holds
+a LISTEN connection, drains notifications in batches, and hands them to the
+caches, which refresh entries they hold (from the row in the payload) or evict
+them (deletes, key changes, rows too large for a payload). Rows that aren't
+cached are ignored, so nothing is re-read from the database.
+
+While the listener is running it keeps a heartbeat in Redis. Cache reads skip
+their time-based DB verification as long as the heartbeat is fresh and fall
+back to it when the feed is down. On startup and after a reconnect, rows
+changed while the feed was down are evicted from the caches (see _catch_up).
+
+Run it as its own process (Procfile `cache-listener`):
+    python -m app.database.cache_invalidation
+
+The connection needs a direct or session-mode Postgres URL
+(CACHE_INVALIDATION_DSN, SUPABASE_DIRECT_URL or DATABASE_URL); LISTEN does
+not work through a transaction-mode pooler. A local Postgres works as well.
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache_invalidation'
+HEARTBEAT_KEY = 'cache:cdc:heartbeat'
+STATS_KEY = 'cache:cdc:stats'
+LAST_SEEN_KEY = 'cache:cdc:last_seen'  # no TTL: where catch-up starts after downtime
+HEARTBEAT_INTERVAL_SECONDS = 5
+HEARTBEAT_TTL_SECONDS = 30
+CATCH_UP_MARGIN_SECONDS = 60
+# Catch-up window when the listener has never run (the old verification window)
+DEFAULT_CATCH_UP_SECONDS = 4 * 3600
+
+# table -> key column (as in the triggers)
+TABLE_KEYS = {
+    'leads': 'fub_person_id',
+    'lead_notes': 'note_id',
+}
+
+_feed_check: Dict[str, Any] = {'active': False, 'checked_at': 0.0}
+_feed_check_lock = threading.Lock()
+FEED_CHECK_SECONDS = 5
+
+
+def invalidation_feed_active(redis_client) -> bool:
+    """
+    Whether the change feed is live, so cached entries need no time-based
+    verification. Memoized per process for a few seconds to stay off the
+    hot read path.
+    """
+    now = time.monotonic()
+    if now - _feed_check['checked_at'] < FEED_CHECK_SECONDS:
+        return _feed_check['active']
+    with _feed_check_lock:
+        if now - _feed_check['checked_at'] >= FEED_CHECK_SECONDS:
+            try:
+                heartbeat = redis_client.get(HEARTBEAT_KEY) if redis_client is not None else None
+                _feed_check['active'] = bool(heartbeat) and time.time() - float(heartbeat) < HEARTBEAT_TTL_SECONDS
+            except Exception as e:
+                logger.debug(f"Could not read cache invalidation heartbeat: {e}")
+                _feed_check['active'] = False
+            _feed_check['checked_at'] = now
+    return _feed_check['active']
+
+
+def parse_notification(payload: str) -> Optional[Dict[str, Any]]:
+    """Parse a trigger payload into a change dict (table, op, key, old_key, row, ts)."""
+    try:
+        change = json.loads(payload)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed cache invalidation payload: {str(payload)[:200]}")
+        return None
+    if change.get('table') not in TABLE_KEYS or change.get('key') in (None, ''):
+        return None
+    change['key'] = str(change['key'])
+    if change.get('old_key') is not None:
+        change['old_key'] = str(change['old_key'])
+    return change
+
+
+def coalesce(changes: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group a batch by table, keeping only the last change per key.
+
+    A key change (old_key != key) is kept as its own eviction of the old key.
+    """
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for change in changes:
+        old_key = change.get('old_key')
+        if old_key and old_key != change['key']:
+            latest[(change['table'], old_key)] = {
+                'table': change['table'], 'op': 'DELETE', 'key': old_key, 'ts': change.get('ts'),
+            }
+        latest.pop((change['table'], change['key']), None)  # keep arrival order
+        latest[(change['table'], change['key'])] = change
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLE_KEYS}
+    for (table, _), change in latest.items():
+        grouped[table].append(change)
+    return grouped
+
+
+class CacheInvalidationListener:
+    """LISTENs for row changes and applies them to the lead/note caches."""
+
+    MAX_BATCH = 500
+    LAG_WINDOW = 1000  # lag samples kept for percentiles
+    RECONNECT_MAX_SECONDS = 60
+
+    def __init__(self, dsn: str = None, lead_cache=None, note_cache=None, redis_client=None):
+        self.dsn = dsn or (
+            os.getenv('CACHE_INVALIDATION_DSN')
+            or os.getenv('SUPABASE_DIRECT_URL')
+            or os.getenv('DATABASE_URL')
+        )
+        self._lead_cache = lead_cache
+        self._note_cache = note_cache
+        self._redis = redis_client
+        self._conn = None
+        self._stop = threading.Event()
+        self._disconnected_at: Optional[datetime] = None
+        self._last_heartbeat = 0.0
+        self._last_poll = datetime.now(timezone.utc)
+        self._connected_once = False
+
+        self._lags: deque = deque(maxlen=self.LAG_WINDOW)
+        self._stats = {
+            'notifications': 0,
+            'applied': 0,
+            'batches': 0,
+            'reconnects': 0,
+            'catch_up_evictions': 0,
+            'last_lag_ms': None,
+            'max_lag_ms': 0,
+            'last_change_at': None,
+        }
+
+    # ------------------------------------------------------------------
+    # Caches
+    # ------------------------------------------------------------------
+
+    @property
+    def caches(self) -> Dict[str, Any]:
+        if self._lead_cache is None:
+            from app.database.lead_cache import LeadCacheSingleton
+            self._lead_cache = LeadCacheSingleton.get_instance()
+        if self._note_cache is None:
+            from app.database.note_cache import NoteCacheSingleton
+            self._note_cache = NoteCacheSingleton.get_instance()
+        return {'leads': self._lead_cache, 'lead_notes': self._note_cache}
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from app.service.redis_service import RedisServiceSingleton
+            self._redis = RedisServiceSingleton.get_instance()
+        return self._redis
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+
+    def run_forever(self) -> None:
+        """Listen until stop(), reconnecting with backoff."""
+        if not self.dsn:
+            raise RuntimeError("No Postgres URL: set CACHE_INVALIDATION_DSN, SUPABASE_DIRECT_URL or DATABASE_URL")
+
+        self._disconnected_at = self._last_seen() - timedelta(seconds=CATCH_UP_MARGIN_SECONDS)
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                backoff = 1
+                self._listen()
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error: {e}")
+                self._close()
+                if self._disconnected_at is None:
+                    # updated_at is set when the row is written, before commit
+                    self._disconnected_at = self._last_poll - timedelta(seconds=CATCH_UP_MARGIN_SECONDS)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.RECONNECT_MAX_SECONDS)
+        self._close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _connect(self) -> None:
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        self._conn = psycopg2.connect(self.dsn)
+        self._conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL};")
+        logger.info(f"Cache invalidation listener connected, listening on '{CHANNEL}'")
+
+        if self._connected_once:
+            self._stats['reconnects'] += 1
+        self._connected_once = True
+        if self._disconnected_at is not None:
+            self._catch_up(self._disconnected_at)
+            self._disconnected_at = None
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            self._heartbeat()
+            self._last_poll = datetime.now(timezone.utc)
+            if not self._conn.notifies:
+                if select.select([self._conn], [], [], HEARTBEAT_INTERVAL_SECONDS) == ([], [], []):
+                    continue
+                self._conn.poll()
+            notifies = []
+            while self._conn.notifies and len(notifies) < self.MAX_BATCH:
+                notifies.append(self._conn.notifies.pop(0))
+            if notifies:
+                self.handle_payloads([n.payload for n in notifies])
+
+    def _last_seen(self) -> datetime:
+        """When the feed was last known to be live (catch-up start on startup)."""
+        try:
+            last_seen = self.redis.get(LAST_SEEN_KEY)
+            if last_seen:
+                return datetime.fromtimestamp(float(last_seen), timezone.utc)
+        except Exception as e:
+            logger.warning(f"Could not read cache invalidation last-seen time: {e}")
+        return datetime.fromtimestamp(time.time() - DEFAULT_CATCH_UP_SECONDS, timezone.utc)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    # ------------------------------------------------------------------
+    # Applying changes
+    # ------------------------------------------------------------------
+
+    def handle_payloads(self, payloads: List[str]) -> int:
+        """Apply a batch of notification payloads. Returns changes applied."""
+        changes = [c for c in (parse_notification(p) for p in payloads) if c]
+        self._stats['notifications'] += len(payloads)
+        if not changes:
+            return 0
+
+        applied = 0
+        for table, table_changes in coalesce(changes).items():
+            if not table_changes:
+                continue
+            try:
+                self.caches[table].apply_changes(table_changes)
+                applied += len(table_changes)
+            except Exception as e:
+                logger.error(f"Could not apply {len(table_changes)} {table} change(s) to cache: {e}")
+
+        now = time.time()
+        for change in changes:
+            if change.get('ts'):
+                self._lags.append(max(0.0, (now - float(change['ts'])) * 1000))
+        self._stats['applied'] += applied
+        self._stats['batches'] += 1
+        self._stats['last_change_at'] = datetime.now(timezone.utc).isoformat()
+        if self._lags:
+            self._stats['last_lag_ms'] = round(self._lags[-1], 1)
+            self._stats['max_lag_ms'] = round(max(self._stats['max_lag_ms'], max(self._lags)), 1)
+        return applied
+
+    def _catch_up(self, since: datetime) -> None:
+        """Evict cached rows that changed while the listener was disconnected.
+
+        Deletes during the gap can't be seen here; those entries age out via
+        time-based verification, which reads fall back to while the feed is down.
+        """
+        evictions = 0
+        with self._conn.cursor() as cursor:
+            for table, key_column in TABLE_KEYS.items():
+                cursor.execute(
+                    f"SELECT {key_column} FROM {table} WHERE updated_at >= %s AND {key_column} IS NOT NULL",
+                    (since,),
+                )
+                keys = [str(row[0]) for row in cursor.fetchall()]
+                if keys:
+                    self.caches[table].apply_changes([{'op': 'DELETE', 'key': key} for key in keys])
+                    evictions += len(keys)
+        self._stats['catch_up_evictions'] += evictions
+        logger.info(f"Cache invalidation catch-up since {since.isoformat()}: evicted {evictions} entries")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Notification counts and lag (ms from row change to cache update)."""
+        stats = dict(self._stats)
+        lags = sorted(self._lags)
+        if lags:
+            stats['p50_lag_ms'] = round(lags[len(lags) // 2], 1)
+            stats['p95_lag_ms'] = round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 1)
+        stats['connected'] = self._conn is not None
+        return stats
+
+    def _heartbeat(self) -> None:
+        now = time.time()
+        if now - self._last_heartbeat < HEARTBEAT_INTERVAL_SECONDS:
+            return
+        self._last_heartbeat = now
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(HEARTBEAT_KEY, now, ex=HEARTBEAT_TTL_SECONDS)
+            pipe.set(LAST_SEEN_KEY, now)
+            pipe.set(STATS_KEY, json.dumps(self.stats()), ex=HEARTBEAT_TTL_SECONDS * 10)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish cache invalidation heartbeat: {e}")
+
+
+def get_feed_stats(redis_client=None) -> Dict[str, Any]:
+    """Last stats published by the listener process (for health endpoints)."""
+    if redis_client is None:
+        from app.service.redis_service import RedisServiceSingleton
+        redis_client = RedisServiceSingleton.get_instance()
+    raw = redis_client.get(STATS_KEY)
+    stats = json.loads(raw) if raw else {}
+    stats['active'] = bool(raw) and invalidation_feed_active(redis_client)
+    return stats
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    CacheInvalidationListener().run_forever()
@@ -0,0 +1,234 @@
+"""
+Cache Verifier - Batched background verification of cached rows.
+
+LeadCacheService and NoteCacheService serve reads from Redis and check a
+cached entry against the database once its verification stamp has expired.
+Instead of a thread and a single-row query per entry, they hand the entry to
+a CacheVerifier: one worker thread per cache drains a bounded queue, loads up
+to `batch_size` rows with one `in_()` query, compares `updated_at`, and hands
+back which entries to refresh, invalidate or just re-stamp so the cache can
+write them in one pipeline.
+
+Usage:
+    verifier = CacheVerifier(
+        'leads',
+        fetch_batch=lead_service.get_by_fub_person_ids,   # keys -> {key: row}
+        apply_batch=self._apply_verification,            # (refresh, invalidate, verified)
+    )
+    verifier.submit(fub_person_id, cached_lead)
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def parse_updated_at(value: Any) -> Optional[datetime]:
+    """Parse an updated_at value (datetime or ISO string) into an aware datetime."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def is_newer(db_updated_at: Any, cached_updated_at: Any) -> bool:
+    """True when the database row was updated after the cached copy."""
+    db_updated = parse_updated_at(db_updated_at)
+    cache_updated = parse_updated_at(cached_updated_at)
+    return bool(db_updated and cache_updated and db_updated > cache_updated)
+
+
+class CacheVerifier:
+    """Single bounded worker that verifies cached entries in batches."""
+
+    BATCH_SIZE = 100
+    MAX_QUEUE = 5000
+    BATCH_WAIT_SECONDS = 0.25  # how long a batch waits to fill up
+
+    def __init__(
+        self,
+        name: str,
+        fetch_batch: Callable[[List[str]], Dict[str, Any]],
+        apply_batch: Callable[[List[Tuple[str, Any]], List[Tuple[str, Any]], List[str]], None],
+        batch_size: int = BATCH_SIZE,
+        max_queue: int = MAX_QUEUE,
+        batch_wait: float = BATCH_WAIT_SECONDS,
+    ):
+        """
+        Args:
+            name: Cache name for logs and stats
+            fetch_batch: Loads DB rows for a list of keys, returning {key: row}.
+                Must raise on query errors: a key missing from the result
+                is treated as deleted and invalidated.
+            apply_batch: Writes the outcome: (refresh [(key, db_row)],
+                invalidate [(key, cached)], verified [key])
+            batch_size: Max entries per DB query
+            max_queue: Entries waiting beyond this are dropped (re-submitted
+                on a later read, since their stamp stays expired)
+            batch_wait: Seconds to wait for a batch to fill before running it
+        """
+        self.name = name
+        self.fetch_batch = fetch_batch
+        self.apply_batch = apply_batch
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._pending = set()  # keys queued or being verified
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._idle = threading.Condition(self._lock)
+
+        self._stats = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'dropped': 0,
+            'batches': 0,
+            'batched': 0,
+            'verified': 0,
+            'refreshed': 0,
+            'invalidated': 0,
+            'errors': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+        }
+
+    # ------------------------------------------------------------------
+
+    def submit(self, key: str, cached: Any = None) -> bool:
+        """
+        Queue a cached entry for verification. Never blocks.
+
+        Args:
+            key: Cache key (FUB person ID / FUB note ID)
+            cached: The cached object, compared with and invalidated from the DB row
+
+        Returns:
+            True if queued (or already queued), False if the queue is full
+        """
+        key = str(key)
+        with self._lock:
+            if key in self._pending:
+                self._stats['deduplicated'] += 1
+                return True
+            try:
+                self._queue.put_nowait((key, cached))
+            except queue.Full:
+                self._stats['dropped'] += 1
+                return False
+            self._pending.add(key)
+            self._stats['submitted'] += 1
+            self._ensure_worker()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch sizes and outcome counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queue_depth'] = self._queue.qsize()
+            stats['in_progress'] = len(self._pending)
+        stats['name'] = self.name
+        stats['avg_batch_size'] = round(stats['batched'] / stats['batches'], 2) if stats['batches'] else 0
+        return stats
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Block until every queued entry has been verified (tests, shutdown)."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        # Caller holds self._lock
+        if self._worker is None or not self._worker.is_alive():
+            self._stopping.clear()
+            self._worker = threading.Thread(
+                target=self._run, name=f"cache-verifier-{self.name}", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._verify(batch)
+
+    def _next_batch(self) -> List[Tuple[str, Any]]:
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _verify(self, batch: List[Tuple[str, Any]]) -> None:
+        keys = [key for key, _ in batch]
+        refresh, invalidate, verified = [], [], []
+        try:
+            rows = self.fetch_batch(keys) or {}
+            for key, cached in batch:
+                row = rows.get(key)
+                if row is None:
+                    invalidate.append((key, cached))
+                    continue
+                verified.append(key)
+                if cached is not None and is_newer(getattr(row, 'updated_at', None),
+                                                   getattr(cached, 'updated_at', None)):
+                    refresh.append((key, row))
+
+            self.apply_batch(refresh, invalidate, verified)
+
+            if invalidate:
+                logger.info(f"Cache verifier [{self.name}]: invalidated {len(invalidate)} entries missing from DB")
+            logger.debug(
+                f"Cache verifier [{self.name}]: verified batch of {len(batch)} "
+                f"({len(refresh)} refreshed, {len(invalidate)} invalidated)"
+            )
+        except Exception as e:
+            # Entries stay unstamped, so the next read re-submits them
+            logger.error(f"Cache verifier [{self.name}]: batch of {len(batch)} failed: {e}")
+            refresh, invalidate, verified = [], [], []
+            with self._lock:
+                self._stats['errors'] += 1
+
+        with self._idle:
+            self._pending.difference_update(keys)
+            self._stats['batches'] += 1
+            self._stats['batched'] += len(batch)
+            self._stats['verified'] += len(verified) + len(invalidate)
+            self._stats['refreshed'] += len(refresh)
+            self._stats['invalidated'] += len(invalidate)
+            self._stats['last_batch_size'] = len(batch)
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(batch))
+            self._idle.notify_all()
+
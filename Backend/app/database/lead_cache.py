@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any, TYPE_CHECKING
 
 import redis
 
+from app.database.cache_invalidation import invalidation_feed_active
+from app.database.cache_verifier import CacheVerifier
 from app.service.lead_service import LeadService
 from app.utils.dependency_container import DependencyContainer
 from app.service.redis_service import RedisServiceSingleton
@@ -15,6 +17,8 @@ if TYPE_CHECKING:
 
 container = DependencyContainer().get_instance()
 
+_verifier_lock = threading.Lock()
+
 
 class LeadCacheSingleton:
     _instance = None
@@ -48,12 +52,14 @@ class LeadCacheService:
             self.redis = RedisServiceSingleton.get_instance()
             self.ttl_seconds = ttl_hours * 3600
             self._lead_service = None
+            self._verifier = None
             logging.info("Redis cache service initialized successfully")
         except (redis.RedisError, Exception) as e:
             logging.warning(f"Redis not available, cache service will be disabled: {e}")
             self.redis = None
             self.ttl_seconds = ttl_hours * 3600
             self._lead_service = None
+            self._verifier = None
             # Don't raise - allow the service to continue without Redis
 
     @property
@@ -64,6 +70,59 @@ class LeadCacheService:
             self._lead_service = DependencyContainer.get_instance().get_service("lead_service")
         return self._lead_service
 
+    @property
+    def verifier(self) -> CacheVerifier:
+        """Background verifier for cached leads whose verification stamp expired"""
+        if self._verifier is None:
+            with _verifier_lock:
+                if self._verifier is None:
+                    self._verifier = CacheVerifier(
+                        "leads",
+                        fetch_batch=self.lead_service.get_by_fub_person_ids,
+                        apply_batch=self._apply_verification,
+                    )
+        return self._verifier
+
+    def _apply_verification(self, refresh, invalidate, verified) -> None:
+        """Write a verified batch in one pipeline: refresh newer leads,
+        drop leads deleted from the DB, and re-stamp the rest."""
+        pipe = self.redis.pipeline()
+        for _, db_lead in refresh:
+            self._queue_store_lead(pipe, db_lead)
+        for fub_person_id, cached_lead in invalidate:
+            self._queue_invalidate_lead(pipe, fub_person_id, cached_lead)
+        current_time = int(datetime.now().timestamp())
+        for fub_person_id in verified:
+            pipe.set(f"lead:verified:{fub_person_id}", current_time, ex=self.ttl_seconds)
+        pipe.execute()
+
+    def apply_changes(self, changes) -> None:
+        """
+        Apply row changes from the DB change feed (app.database.cache_invalidation).
+
+        Only leads already in the cache are touched: they are rewritten from
+        the changed row, or evicted on delete / when the row wasn't in the
+        notification.
+        """
+        from app.models.lead import Lead
+
+        pipe = self.redis.pipeline()
+        for change in changes:
+            pipe.hgetall(f"lead:{change['key']}")
+        cached = pipe.execute()
+
+        pipe = self.redis.pipeline()
+        current_time = int(datetime.now().timestamp())
+        for change, data in zip(changes, cached):
+            if not data:
+                continue
+            fub_person_id = change['key']
+            self._queue_invalidate_lead(pipe, fub_person_id, Lead.from_fub_to_redis(data))
+            if change['op'] != 'DELETE' and change.get('row'):
+                self._queue_store_lead(pipe, LeadService.lead_from_row(change['row']))
+                pipe.set(f"lead:verified:{fub_person_id}", current_time, ex=self.ttl_seconds)
+        pipe.execute()
+
     def store_lead(self, lead: "Lead") -> bool:
         """
         Store a lead in Redis with indexes for lookups
@@ -80,52 +139,10 @@ class LeadCacheService:
             logging.debug(f"Redis not available, skipping cache for lead {lead.fub_person_id}")
             return False
 
-        key = f"lead:{lead.fub_person_id}"
-
         try:
-            # Convert lead to a flat dictionary for Redis hash
-            lead_data = lead.to_dict()
-
-            # Filter out None values and convert them to empty strings or appropriate defaults
-            sanitized_data = {}
-            for k, v in lead_data.items():
-                if v is None:
-                    # Convert None to appropriate default values based on field type
-                    if k in ['tags']:
-                        sanitized_data[k] = json.dumps([])
-                    else:
-                        sanitized_data[k] = ""
-                elif isinstance(v, (list, dict)):
-                    # Convert lists and dicts to JSON strings
-                    sanitized_data[k] = json.dumps(v)
-                else:
-                    sanitized_data[k] = v
-
-            # Store as hash in Redis
-            self.redis.hset(key, mapping=sanitized_data)
-
-            # Set TTL for automatic cache invalidation
-            self.redis.expire(key, self.ttl_seconds)
-
-            # Store indexes for lookups
-            if lead.email:
-                self.redis.set(f"lead:email:{lead.email}", lead.fub_person_id, ex=self.ttl_seconds)
-
-            if lead.phone:
-                self.redis.set(f"lead:phone:{lead.phone}", lead.fub_person_id, ex=self.ttl_seconds)
-
-            # Add to status index for filtering
-            if lead.status:
-                # Generate timestamp score for sorting (newer leads first)
-                timestamp = int(datetime.now().timestamp())
-
-                # Add to the status-specific sorted set
-                self.redis.zadd(f"leads:status:{lead.status}", {lead.fub_person_id: timestamp})
-                self.redis.expire(f"leads:status:{lead.status}", self.ttl_seconds)
-
-                # Also add to the "all leads" sorted set
-                self.redis.zadd("leads:all", {lead.fub_person_id: timestamp})
-                self.redis.expire("leads:all", self.ttl_seconds)
+            pipe = self.redis.pipeline()
+            self._queue_store_lead(pipe, lead)
+            pipe.execute()
 
             # print("Lead is stored in cache successfully")
             logging.info(f"Lead {lead.fub_person_id} stored in cache successfully")
@@ -138,6 +155,68 @@ class LeadCacheService:
             logging.debug(f"Unexpected error storing lead {lead.fub_person_id}: {e}")
             return False
 
+    def _queue_store_lead(self, pipe, lead: "Lead") -> None:
+        """Queue the writes that cache a lead and its indexes on a pipeline."""
+        key = f"lead:{lead.fub_person_id}"
+
+        # Convert lead to a flat dictionary for Redis hash
+        lead_data = lead.to_dict()
+
+        # Filter out None values and convert them to empty strings or appropriate defaults
+        sanitized_data = {}
+        for k, v in lead_data.items():
+            if v is None:
+                # Convert None to appropriate default values based on field type
+                if k in ['tags']:
+                    sanitized_data[k] = json.dumps([])
+                else:
+                    sanitized_data[k] = ""
+            elif isinstance(v, (list, dict)):
+                # Convert lists and dicts to JSON strings
+                sanitized_data[k] = json.dumps(v)
+            else:
+                sanitized_data[k] = v
+
+        # Store as hash in Redis (field by field, for older Redis versions)
+        for k, v in sanitized_data.items():
+            pipe.hset(key, k, v)
+
+        # Set TTL for automatic cache invalidation
+        pipe.expire(key, self.ttl_seconds)
+
+        # Store indexes for lookups
+        if lead.email:
+            pipe.set(f"lead:email:{lead.email}", lead.fub_person_id, ex=self.ttl_seconds)
+
+        if lead.phone:
+            pipe.set(f"lead:phone:{lead.phone}", lead.fub_person_id, ex=self.ttl_seconds)
+
+        # Add to status index for filtering
+        if lead.status:
+            # Generate timestamp score for sorting (newer leads first)
+            timestamp = int(datetime.now().timestamp())
+
+            # Add to the status-specific sorted set
+            pipe.zadd(f"leads:status:{lead.status}", {lead.fub_person_id: timestamp})
+            pipe.expire(f"leads:status:{lead.status}", self.ttl_seconds)
+
+            # Also add to the "all leads" sorted set
+            pipe.zadd("leads:all", {lead.fub_person_id: timestamp})
+            pipe.expire("leads:all", self.ttl_seconds)
+
+    @staticmethod
+    def _queue_invalidate_lead(pipe, fub_person_id: str, lead: Optional["Lead"]) -> None:
+        """Queue the deletes that remove a cached lead and its indexes."""
+        if lead is not None:
+            if lead.email:
+                pipe.delete(f"lead:email:{lead.email}")
+            if lead.phone:
+                pipe.delete(f"lead:phone:{lead.phone}")
+            if lead.status:
+                pipe.zrem(f"leads:status:{lead.status}", fub_person_id)
+        pipe.zrem("leads:all", fub_person_id)
+        pipe.delete(f"lead:{fub_person_id}", f"lead:verified:{fub_person_id}")
+
     def get_lead(self, fub_person_id: str) -> Optional["Lead"]:
         """
         Retrieve a lead from cache by FUB person ID
@@ -260,23 +339,9 @@ class LeadCacheService:
                 logging.debug(f"Lead {fub_person_id} not found in cache, nothing to invalidate")
                 return False
 
-            # Remove email index
-            if lead.email:
-                self.redis.delete(f"lead:email:{lead.email}")
-
-            # Remove phone index
-            if lead.phone:
-                self.redis.delete(f"lead:phone:{lead.phone}")
-
-            # Remove from status-specific index
-            if lead.status:
-                self.redis.zrem(f"leads:status:{lead.status}", fub_person_id)
-
-            # Remove from all leads index
-            self.redis.zrem("leads:all", fub_person_id)
-
-            # Finally, remove the lead itself
-            self.redis.delete(f"lead:{fub_person_id}")
+            pipe = self.redis.pipeline()
+            self._queue_invalidate_lead(pipe, fub_person_id, lead)
+            pipe.execute()
             logging.info(f"Successfully invalidated lead {fub_person_id} from cache")
             return True
         except redis.RedisError as e:
@@ -291,11 +356,12 @@ class LeadCacheService:
         """
         Get lead from cache with periodic DB verification.
         This hybrid approach returns cache data immediately while
-        periodically verifying cache against database in the background.
+        periodically verifying cache against database in the background
+        (batched by the cache verifier, see _apply_verification). The
+        verification is skipped while the DB change feed is live
+        (see app.database.cache_invalidation).
         """
 
-        import threading
-
         if not fub_person_id:
             logging.warning("Cannot sync lead: missing fub_person_id")
             return None
@@ -309,6 +375,10 @@ class LeadCacheService:
             if lead:
                 logging.debug(f"Lead {fub_person_id} found in cache")
 
+                # While the change feed is live the listener keeps the cache current
+                if invalidation_feed_active(self.redis):
+                    return lead
+
                 # Determine if we need to verify with the database
                 verification_key = f"lead:verified:{fub_person_id}"
                 verification_timeout = 14400 # 4 hours in seconds
@@ -318,48 +388,8 @@ class LeadCacheService:
 
                 # If no verification timestamp, or it's too old, verify with DB
                 if not last_verified or (current_time - int(last_verified)) > verification_timeout:
-                    logging.debug(f"Starting background verification for lead {fub_person_id}")
-
-                    def verify_lead():
-                        try:
-                            db_lead = self.lead_service.get_by_fub_person_id(fub_person_id)
-
-                            if not db_lead:
-                                logging.warning(f"Lead {fub_person_id} exists in cache but not in DB, invalidating...")
-                                self.invalidate_lead(fub_person_id)
-                            else:
-                                # Update verification timestamp
-                                self.redis.set(verification_key, current_time, ex=self.ttl_seconds)
-
-                                # If DB version is different than cache version, update cache
-                                if db_lead.updated_at and lead.updated_at:
-                                    db_updated = db_lead.updated_at
-                                    cache_updated = lead.updated_at
-
-                                    # Convert string to datetime if needed
-                                    if isinstance(db_updated, str):
-                                        try:
-                                            db_updated = datetime.fromisoformat(db_updated.replace('Z', '+00:00'))
-                                        except ValueError:
-                                            db_updated = None
-
-                                    if isinstance(cache_updated, str):
-                                        try:
-                                            cache_updated = datetime.fromisoformat(cache_updated.replace('Z', '+00:00'))
-                                        except ValueError:
-                                            cache_updated = None
-
-                                    # Now compare only if both are valid timedate objects
-                                    if db_updated and cache_updated and db_updated > cache_updated:
-                                        logging.debug(f"Updating cached lead {fub_person_id} with newer DB version")
-                                        self.store_lead(db_lead)
-                        except Exception as e:
-                            logging.error(f"Background verification error for lead {fub_person_id}: {e}")
-
-                    # Running verification in background thread
-                    thread = threading.Thread(target=verify_lead)
-                    thread.daemon = True
-                    thread.start()
+                    logging.debug(f"Queueing background verification for lead {fub_person_id}")
+                    self.verifier.submit(fub_person_id, lead)
 
                 return lead
 
@@ -367,24 +367,48 @@ class LeadRepository:
     async def bulk_update_tiers(
         self,
         tier_updates: List[Tuple[int, LeadTier]],
+        priority_scores: Optional[Dict[int, int]] = None,
+        organization_id: Optional[str] = None,
     ) -> Dict[str, int]:
         """
         Bulk update lead tiers.
 
+        Writes MAX_BATCH_SIZE leads per apply_lead_tiers call; a chunk whose
+        call fails is retried lead by lead.
+
         Args:
             tier_updates: List of (fub_person_id, new_tier) tuples
+            priority_scores: Optional {fub_person_id: priority_score} written with the tier
+            organization_id: Only update leads in this organization
 
         Returns:
             Dict with success/failure counts
         """
         results = {"success": 0, "failed": 0}
+        priority_scores = priority_scores or {}
 
-        for fub_person_id, tier in tier_updates:
-            success = await self.update_lead_tier(fub_person_id, tier)
-            if success:
-                results["success"] += 1
-            else:
-                results["failed"] += 1
+        for start in range(0, len(tier_updates), self.MAX_BATCH_SIZE):
+            chunk = tier_updates[start:start + self.MAX_BATCH_SIZE]
+            try:
+                result = self.supabase.rpc("apply_lead_tiers", {
+                    "p_organization_id": organization_id,
+                    "p_person_ids": [str(person_id) for person_id, _ in chunk],
+                    "p_tiers": [tier.value for _, tier in chunk],
+                    "p_priority_scores": [priority_scores.get(person_id) for person_id, _ in chunk],
+                }).execute()
+                updated = result.data if isinstance(result.data, int) else len(chunk)
+                results["success"] += updated
+                results["failed"] += len(chunk) - updated
+                continue
+            except Exception as e:
+                logger.warning(f"Bulk tier update failed, updating {len(chunk)} leads one by one: {e}")
+
+            for fub_person_id, tier in chunk:
+                success = await self.update_lead_tier(fub_person_id, tier)
+                if success:
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
 
         return results
 
@@ -7,6 +7,8 @@ from typing import Optional, Dict, Any, TYPE_CHECKING
 import redis
 from postgrest.utils import sanitize_param
 
+from app.database.cache_invalidation import invalidation_feed_active
+from app.database.cache_verifier import CacheVerifier
 from app.service.note_service import NoteService
 from app.utils.dependency_container import DependencyContainer
 from app.service.redis_service import RedisServiceSingleton
@@ -16,6 +18,8 @@ if TYPE_CHECKING:
 
 container = DependencyContainer().get_instance()
 
+_verifier_lock = threading.Lock()
+
 class NoteCacheSingleton:
     _instance = None
     _lock = threading.Lock()
@@ -37,6 +41,7 @@ class NoteCacheService:
             self.redis = RedisServiceSingleton.get_instance()
             self.ttl_seconds = ttl_hours * 3600
             self._note_service = None
+            self._verifier = None
         except redis.RedisError as e:
             logging.error(f"Failed to initialize Redis connection for notes: {e}")
             self.redis = None
@@ -52,11 +57,94 @@ class NoteCacheService:
         return self._note_service
 
 
+    @property
+    def verifier(self) -> CacheVerifier:
+        """Background verifier for cached notes whose verification stamp expired"""
+        if self._verifier is None:
+            with _verifier_lock:
+                if self._verifier is None:
+                    self._verifier = CacheVerifier(
+                        "notes",
+                        fetch_batch=self.note_service.get_by_note_ids,
+                        apply_batch=self._apply_verification,
+                    )
+        return self._verifier
+
+    def _apply_verification(self, refresh, invalidate, verified) -> None:
+        """Write a verified batch in one pipeline: refresh newer notes,
+        drop notes deleted from the DB, and re-stamp the rest."""
+        pipe = self.redis.pipeline()
+        for _, db_note in refresh:
+            self._queue_store_note(pipe, db_note)
+        for fub_note_id, cached_note in invalidate:
+            self._queue_invalidate_note(pipe, fub_note_id, cached_note)
+        current_time = int(datetime.now().timestamp())
+        for fub_note_id in verified:
+            pipe.set(f"note:verified:{fub_note_id}", current_time, ex=self.ttl_seconds)
+        pipe.execute()
+
+
+    def apply_changes(self, changes) -> None:
+        """
+        Apply row changes from the DB change feed (app.database.cache_invalidation).
+
+        Only notes already in the cache are touched: they are rewritten from
+        the changed row, or evicted on delete / when the row wasn't in the
+        notification.
+        """
+        from app.models.lead import LeadNote
+
+        pipe = self.redis.pipeline()
+        for change in changes:
+            pipe.get(f"note:fub:{change['key']}")
+        note_ids = pipe.execute()
+
+        cached_changes = [(change, note_id) for change, note_id in zip(changes, note_ids) if note_id]
+        if not cached_changes:
+            return
+
+        pipe = self.redis.pipeline()
+        for _, note_id in cached_changes:
+            pipe.hgetall(f"note:{note_id}")
+        cached = pipe.execute()
+
+        pipe = self.redis.pipeline()
+        current_time = int(datetime.now().timestamp())
+        for (change, note_id), data in zip(cached_changes, cached):
+            fub_note_id = change['key']
+            cached_note = LeadNote.from_dict(data) if data else None
+            if cached_note is not None and not cached_note.id:
+                cached_note.id = note_id
+            self._queue_invalidate_note(pipe, fub_note_id, cached_note)
+            if change['op'] != 'DELETE' and change.get('row'):
+                self._queue_store_note(pipe, LeadNote.from_dict(change['row']))
+                pipe.set(f"note:verified:{fub_note_id}", current_time, ex=self.ttl_seconds)
+        pipe.execute()
+
+
     def store_note(self, note: "LeadNote") -> bool:
         if not note or not note.id:
             logging.warning("Cannot store note: missing note object or id")
             return False
 
+        try:
+            pipe = self.redis.pipeline()
+            self._queue_store_note(pipe, note)
+            pipe.execute()
+
+            logging.info(f"Note {note.id} stored in cache successfully")
+            return True
+
+        except redis.RedisError as e:
+            logging.error(f"Error storing note {note.id} in cache: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error storing note {note.id}: {e}")
+            return False
+
+
+    def _queue_store_note(self, pipe, note: "LeadNote") -> None:
+        """Queue the writes that cache a note and its indexes on a pipeline."""
         # Main note key
         key = f"note:{note.id}"
 
@@ -67,45 +155,44 @@ class NoteCacheService:
         elif hasattr(note, 'note_id') and note.note_id:
             fub_note_key = f"note:fub:{note.note_id}"
 
-        try:
-            # Convert note to a dictionary for Redis hash
-            note_data = note.to_json() if hasattr(note, 'to_json') else vars(note)
-
-            # Filter out None values and convert complex types
-            sanitized_data = {}
-            for k, v in note_data.items():
-                if v is None:
-                    sanitized_data[k] = ""
-                elif isinstance(v, (list, dict)):
-                    sanitized_data[k] = json.dumps(v)
-                else:
-                    sanitized_data[k] = v
-
-            # Store as hash in Redis
-            self.redis.hset(key, mapping=sanitized_data)
-            self.redis.expire(key, self.ttl_seconds)
+        # Convert note to a dictionary for Redis hash
+        note_data = note.to_json() if hasattr(note, 'to_json') else vars(note)
 
-            # Store FUB note ID index if available
-            if fub_note_key:
-                self.redis.set(fub_note_key, note.id, ex=self.ttl_seconds)
-
-            # Add to lead notes index
+        # Filter out None values and convert complex types
+        sanitized_data = {}
+        for k, v in note_data.items():
+            if v is None:
+                sanitized_data[k] = ""
+            elif isinstance(v, (list, dict)):
+                sanitized_data[k] = json.dumps(v)
+            else:
+                sanitized_data[k] = v
+
+        # Store as hash in Redis (field by field, for older Redis versions)
+        for k, v in sanitized_data.items():
+            pipe.hset(key, k, v)
+        pipe.expire(key, self.ttl_seconds)
+
+        # Store FUB note ID index if available
+        if fub_note_key:
+            pipe.set(fub_note_key, note.id, ex=self.ttl_seconds)
+
+        # Add to lead notes index
+        if note.lead_id:
+            # Generate timestamp score for sorting (newer notes first)
+            timestamp = int(datetime.now().timestamp())
+            lead_notes_key = f"lead:{note.lead_id}:notes"
+            pipe.zadd(lead_notes_key, {note.id: timestamp})
+            pipe.expire(lead_notes_key, self.ttl_seconds)
+
+    @staticmethod
+    def _queue_invalidate_note(pipe, fub_note_id: str, note: Optional["LeadNote"]) -> None:
+        """Queue the deletes that remove a cached note and its indexes."""
+        pipe.delete(f"note:fub:{fub_note_id}", f"note:verified:{fub_note_id}")
+        if note is not None:
             if note.lead_id:
-                # Generate timestamp score for sorting (newer notes first)
-                timestamp = int(datetime.now().timestamp())
-                lead_notes_key = f"lead:{note.lead_id}:notes"
-                self.redis.zadd(lead_notes_key, {note.id: timestamp})
-                self.redis.expire(lead_notes_key, self.ttl_seconds)
-
-            logging.info(f"Note {note.id} stored in cache successfully")
-            return True
-
-        except redis.RedisError as e:
-            logging.error(f"Error storing note {note.id} in cache: {e}")
-            return False
-        except Exception as e:
-            logging.error(f"Unexpected error storing note {note.id}: {e}")
-            return False
+                pipe.zrem(f"lead:{note.lead_id}:notes", note.id)
+            pipe.delete(f"note:{note.id}")
 
 
     def get_note(self, note_id: str) -> Optional["LeadNote"]:
@@ -234,8 +321,6 @@ class NoteCacheService:
             return False
 
     def sync_with_db_and_cache(self, fub_note_id: str) -> Optional["LeadNote"]:
-        import threading
-
         if not fub_note_id:
             logging.warning("Cannot sync note: missing fub_note_id")
             return None
@@ -249,6 +334,10 @@ class NoteCacheService:
             if note:
                 logging.debug(f"Note {fub_note_id} found in cache")
 
+                # While the change feed is live the listener keeps the cache current
+                if invalidation_feed_active(self.redis):
+                    return note
+
                 # Determine if we need to verify with the database
                 verification_key = f"note:verified:{fub_note_id}"
                 verification_timeout = 3600
@@ -258,42 +347,8 @@ class NoteCacheService:
 
                 # If no verification timestamp, or it's too old, verify with DB
                 if not last_verified or (current_time - int(last_verified)) > verification_timeout:
-                    logging.debug(f"Starting background verification for note {fub_note_id}")
-
-                    def verify_note():
-                        try:
-                            db_note = self.note_service.get_by_note_id(fub_note_id)
-
-                            if not db_note:
-                                logging.warning(f"Note {fub_note_id} exists in cache but not in DB, invalidating...")
-                                self.invalidate_note(note.id)
-                            else:
-                                # Update verification timestamp
-                                self.redis.set(verification_key, current_time, ex=self.ttl_seconds)
-
-                                # If DB version is different than cache version, update cache
-                                if db_note.updated_at and note.updated_at:
-                                    if isinstance(db_note.updated_at, str):
-                                        db_updated = datetime.fromisoformat(db_note.updated_at.replace('Z', '+00:00'))
-                                    else:
-                                        db_updated = db_note.updated_at
-
-                                    if isinstance(note.updated_at, str):
-                                        cache_updated = datetime.fromisoformat(note.updated_at.replace('Z', "+00:00"))
-                                    else:
-                                        cache_updated = note.updated_at
-
-                                    if db_updated > cache_updated:
-                                        logging.debug(f"Updating cached noted {fub_note_id} with newer DB version")
-                                        self.store_note(db_note)
-
-                        except Exception as e:
-                            logging.error(f"Background verification error for note {fub_note_id}: {e}")
-
-                    # Running verification in background thread
-                    thread = threading.Thread(target=verify_note)
-                    thread.daemon = True
-                    thread.start()
+                    logging.debug(f"Queueing background verification for note {fub_note_id}")
+                    self.verifier.submit(fub_note_id, note)
 
                 return note
 
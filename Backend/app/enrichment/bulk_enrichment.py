@@ -0,0 +1,594 @@
+"""
+Bulk Enrichment - Contact-enrich a whole list of FUB people in one job.
+
+Auto-enhancement handles leads one at a time as their webhooks arrive; an
+imported list (or any FUB people filter) goes through a bulk job instead:
+
+1. The job and one item row per person are stored (enrichment_jobs /
+   enrichment_job_items), so an interrupted, cancelled or credit-starved job
+   resumes with just the people still pending. A running job refreshes
+   updated_at with every batch; one whose worker died stops doing so and can
+   be claimed again once RUNNING_LEASE_SECONDS have passed.
+2. Credits for the whole batch are reserved up front in one atomic step
+   (CreditService.reserve_credits); a credit is only kept for people who were
+   actually enriched, the rest are returned when the job settles.
+3. Endato lookups run on a bounded pool of workers sharing the client's
+   keep-alive session (and the lookup cache).
+4. Results are written in batches: one insert for lookup_history, one upsert
+   for the item rows, and the FUB notes/contact updates for the batch posted
+   concurrently over a pooled session.
+5. Progress goes through SyncStatusTracker, so the sync-status SSE stream
+   (/api/supabase/sync-status/<job_id>/stream) works for enrichment jobs too,
+   and cancelling there stops the job.
+
+Usage:
+    service = get_bulk_enrichment_service()
+    job = service.create_job(user_id, fub_person_ids=[101, 102, 103])
+    run_bulk_enrichment_job.delay(job['id'])    # Celery (app.scheduler.tasks)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.webhook.auto_enhancement_handler import extract_enrichment_criteria
+
+logger = logging.getLogger(__name__)
+
+JOBS_TABLE = 'enrichment_jobs'
+ITEMS_TABLE = 'enrichment_job_items'
+
+# Item statuses
+STATUS_PENDING = 'pending'
+STATUS_ENRICHED = 'enriched'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+# Filter keys passed through to FUB GET /people
+PERSON_FILTER_KEYS = ('source', 'updated_since')
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _has_enough_criteria(criteria: Dict[str, Any]) -> bool:
+    """Contact enrichment needs 2 of: full name, phone, email, address."""
+    fields = [
+        bool(criteria.get('first_name') and criteria.get('last_name')),
+        bool(criteria.get('phone')),
+        bool(criteria.get('email')),
+        bool(criteria.get('address')),
+    ]
+    return sum(fields) >= 2
+
+
+class BulkEnrichmentService:
+    """Creates and runs bulk contact enrichment jobs."""
+
+    CREDIT_TYPE = 'enhancement'
+    CONCURRENCY = 8          # Endato lookups in flight per job
+    WRITE_BATCH_SIZE = 25    # results per batched write
+    MAX_PEOPLE = 10000       # per job
+    FILTER_PAGE_SIZE = 100
+    RUNNING_LEASE_SECONDS = 600  # a running job not updated for this long lost its worker
+
+    def __init__(
+        self,
+        supabase_client=None,
+        endato_client=None,
+        credit_service=None,
+        tracker=None,
+        concurrency: int = CONCURRENCY,
+        write_batch_size: int = WRITE_BATCH_SIZE,
+    ):
+        if supabase_client is None:
+            from app.database.supabase_client import SupabaseClientSingleton
+            supabase_client = SupabaseClientSingleton.get_instance()
+        if endato_client is None:
+            from app.enrichment.endato_client import EndatoClientSingleton
+            endato_client = EndatoClientSingleton.get_instance()
+        if credit_service is None:
+            from app.billing.credit_service import CreditServiceSingleton
+            credit_service = CreditServiceSingleton.get_instance()
+        if tracker is None:
+            from app.service.sync_status_tracker import get_tracker
+            tracker = get_tracker()
+
+        self.supabase = supabase_client
+        self.endato = endato_client
+        self.credit_service = credit_service
+        self.tracker = tracker
+        self.concurrency = concurrency
+        self.write_batch_size = write_batch_size
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def create_job(
+        self,
+        user_id: str,
+        fub_person_ids: List[int] = None,
+        person_filter: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
+        """
+        Store a new job. People from a filter are listed when the job runs.
+
+        Args:
+            user_id: User whose credits and FUB account are used
+            fub_person_ids: Explicit FUB person IDs
+            person_filter: FUB people filter (source, updated_since) instead of IDs
+
+        Returns:
+            The enrichment_jobs row
+        """
+        person_ids = list(dict.fromkeys(int(pid) for pid in (fub_person_ids or [])))
+        if not person_ids and not person_filter:
+            raise ValueError("fub_person_ids or person_filter is required")
+        if len(person_ids) > self.MAX_PEOPLE:
+            raise ValueError(f"Maximum {self.MAX_PEOPLE} people per job")
+
+        job = self.supabase.table(JOBS_TABLE).insert({
+            'user_id': user_id,
+            'status': 'pending',
+            'person_filter': self._clean_filter(person_filter) if not person_ids else None,
+            'total': len(person_ids),
+        }).execute().data[0]
+
+        if person_ids:
+            self._insert_items(job['id'], [{'fub_person_id': pid} for pid in person_ids])
+
+        logger.info(f"Created bulk enrichment job {job['id']} for user {user_id} ({len(person_ids) or 'filter'})")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        result = self.supabase.table(JOBS_TABLE).select('*').eq('id', job_id).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    def run_job(self, job_id: str) -> Dict[str, Any]:
+        """Run (or resume) a job to completion. Blocking; called from Celery."""
+        return asyncio.run(self.run_job_async(job_id))
+
+    async def run_job_async(self, job_id: str) -> Dict[str, Any]:
+        job = self.get_job(job_id)
+        if not job:
+            return {'success': False, 'error': 'Job not found'}
+        if job['status'] == 'completed':
+            return {'success': True, 'job': job}
+
+        if not self._claim_job(job):
+            logger.info(f"Bulk enrichment job {job_id} already claimed by another run")
+            return {'success': False, 'error': 'Job is already running'}
+
+        user_id = job['user_id']
+
+        try:
+            if job.get('person_filter') and not job.get('total'):
+                job['total'] = await asyncio.to_thread(self._list_filter_people, job)
+
+            pending = await asyncio.to_thread(self._pending_items, job_id)
+            reservation = await asyncio.to_thread(self._reserve_for, job, len(pending))
+            run = _JobRun(self, job, reservation)
+
+            self.tracker.start_sync(job_id, 'bulk_enrichment', 'Bulk Enrichment', job['total'], user_id)
+            self.tracker.update_progress(
+                job_id,
+                processed=run.counts['processed'],
+                successful=run.counts['enriched'],
+                failed=run.counts['failed'],
+                skipped=run.counts['skipped'],
+                message=f"Enriching {len(pending)} people ({reservation['reserved'] - reservation['used']} credits reserved)",
+            )
+
+            await run.process(pending)
+            return await asyncio.to_thread(run.finish)
+
+        except Exception as e:
+            logger.error(f"Bulk enrichment job {job_id} failed: {e}", exc_info=True)
+            self._update_job(job_id, {'status': 'failed', 'error': str(e)})
+            self.tracker.complete_sync(job_id, error=str(e))
+            return {'success': False, 'error': str(e)}
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def _list_filter_people(self, job: Dict[str, Any]) -> int:
+        """Page through FUB people matching the job's filter into item rows."""
+        from app.database.fub_api_client import FUBApiClient
+
+        person_filter = job['person_filter'] or {}
+        client = FUBApiClient(api_key=self._fub_api_key(job['user_id']))
+        total, cursor = 0, None
+        while total < self.MAX_PEOPLE:
+            page = client.get_people(
+                limit=self.FILTER_PAGE_SIZE,
+                next_cursor=cursor,
+                source=person_filter.get('source'),
+                updated_since=person_filter.get('updated_since'),
+            )
+            people = page.get('people', [])[:self.MAX_PEOPLE - total]
+            if people:
+                self._insert_items(job['id'], [
+                    {'fub_person_id': person['id'], 'person': extract_enrichment_criteria(person)}
+                    for person in people
+                ])
+                total += len(people)
+            cursor = (page.get('_metadata') or {}).get('next')
+            if not cursor or not people:
+                break
+
+        self._update_job(job['id'], {'total': total})
+        logger.info(f"Bulk enrichment job {job['id']}: {total} people match {person_filter}")
+        return total
+
+    def _pending_items(self, job_id: str) -> List[Dict[str, Any]]:
+        result = self.supabase.table(ITEMS_TABLE).select(
+            'fub_person_id, person'
+        ).eq('job_id', job_id).eq('status', STATUS_PENDING).order('id').limit(self.MAX_PEOPLE).execute()
+        return result.data or []
+
+    def _reserve_for(self, job: Dict[str, Any], pending: int) -> Dict[str, Any]:
+        """Reuse what is left of an interrupted run's reservation, top up the rest."""
+        reservation = job.get('credit_reservation') or {
+            'user_id': job['user_id'],
+            'credit_type': self.CREDIT_TYPE,
+            'reserved': 0,
+            'used': 0,
+            'pools': [],
+        }
+        needed = pending - (reservation['reserved'] - reservation['used'])
+        if needed > 0:
+            extra = self.credit_service.reserve_credits(job['user_id'], self.CREDIT_TYPE, needed)
+            reservation['reserved'] += extra['reserved']
+            reservation['pools'].extend(extra['pools'])
+        self._update_job(job['id'], {'credit_reservation': reservation})
+        return reservation
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _insert_items(self, job_id: str, items: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(items), 500):
+            rows = [{'job_id': job_id, 'status': STATUS_PENDING, **item} for item in items[start:start + 500]]
+            self.supabase.table(ITEMS_TABLE).upsert(
+                rows, on_conflict='job_id,fub_person_id', ignore_duplicates=True
+            ).execute()
+
+    def _claim_job(self, job: Dict[str, Any]) -> bool:
+        """Move the job to running only if it hasn't changed since it was read.
+
+        A running job is only claimable once its lease has expired; matching on
+        updated_at as well means two runs taking over the same stale job can't
+        both win.
+        """
+        if job['status'] == 'running' and not self.running_lease_expired(job):
+            return False
+        query = self.supabase.table(JOBS_TABLE).update({
+            'status': 'running',
+            'started_at': job.get('started_at') or _now(),
+            'error': None,
+            'updated_at': _now(),
+        }).eq('id', job['id']).eq('status', job['status'])
+        if job['status'] == 'running':
+            logger.warning(f"Bulk enrichment job {job['id']} lease expired (last update {job['updated_at']}), reclaiming")
+            query = query.eq('updated_at', job['updated_at'])
+        result = query.execute()
+        return bool(result.data)
+
+    def running_lease_expired(self, job: Dict[str, Any]) -> bool:
+        """True when a running job hasn't been updated within RUNNING_LEASE_SECONDS."""
+        try:
+            updated_at = datetime.fromisoformat(str(job['updated_at']).replace('Z', '+00:00'))
+        except (KeyError, TypeError, ValueError):
+            return False
+        if updated_at.tzinfo:
+            updated_at = updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return (datetime.utcnow() - updated_at).total_seconds() > self.RUNNING_LEASE_SECONDS
+
+    def _update_job(self, job_id: str, data: Dict[str, Any]) -> None:
+        try:
+            self.supabase.table(JOBS_TABLE).update({**data, 'updated_at': _now()}).eq('id', job_id).execute()
+        except Exception as e:
+            logger.warning(f"Could not update bulk enrichment job {job_id}: {e}")
+
+    def _fub_api_key(self, user_id: str) -> Optional[str]:
+        try:
+            result = self.supabase.table('users').select('fub_api_key').eq('id', user_id).limit(1).execute()
+            if result.data and result.data[0].get('fub_api_key'):
+                return result.data[0]['fub_api_key']
+        except Exception as e:
+            logger.warning(f"Could not load FUB API key for user {user_id}: {e}")
+        return os.getenv('FUB_API_KEY') or os.getenv('FOLLOWUPBOSS_API_KEY')
+
+    def _user_settings(self, user_id: str) -> Dict[str, Any]:
+        from app.webhook.auto_enhancement_handler import get_auto_enhancement_handler
+        return get_auto_enhancement_handler().get_user_auto_enhance_settings(user_id)
+
+    @staticmethod
+    def _clean_filter(person_filter: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in (person_filter or {}).items() if k in PERSON_FILTER_KEYS and v}
+
+
+class _JobRun:
+    """State of one run of a job: worker pool, credit budget, write batches."""
+
+    def __init__(self, service: BulkEnrichmentService, job: Dict[str, Any], reservation: Dict[str, Any]):
+        from app.fub.note_service import FUBNoteService
+
+        self.service = service
+        self.job = job
+        self.job_id = job['id']
+        self.reservation = reservation
+        self.counts = {key: job.get(key) or 0 for key in ('processed', 'enriched', 'failed', 'skipped')}
+        self.settings = service._user_settings(job['user_id'])
+        self.note_service = FUBNoteService(service._fub_api_key(job['user_id']))
+        self.cancelled = False
+        self.out_of_credits = False
+        self._claimed = 0  # credits held by lookups in flight
+        self._budget_lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._write_lock = asyncio.Lock()
+
+    async def process(self, items: List[Dict[str, Any]]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.service.concurrency, len(items)) or 1)
+        ]
+        await asyncio.gather(*workers)
+        await self._flush(final=True)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while not queue.empty() and not self.cancelled and not self.out_of_credits:
+            if self.service.tracker.is_cancelled(self.job_id):
+                self.cancelled = True
+                break
+            item = queue.get_nowait()
+            outcome = await asyncio.to_thread(self._enrich, item)
+            if outcome is None:
+                # No credit left for this person; stays pending for a resume
+                self.out_of_credits = True
+                break
+            self._buffer.append(outcome)
+            if len(self._buffer) >= self.service.write_batch_size:
+                await self._flush()
+
+    # ------------------------------------------------------------------
+
+    def _claim_credit(self) -> bool:
+        with self._budget_lock:
+            if self.reservation['used'] + self._claimed >= self.reservation['reserved']:
+                return False
+            self._claimed += 1
+            return True
+
+    def _return_credit(self, used: bool) -> None:
+        with self._budget_lock:
+            self._claimed -= 1
+            if used:
+                self.reservation['used'] += 1
+
+    def _enrich(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look one person up. Returns None when no reserved credit is left."""
+        person_id = item['fub_person_id']
+        criteria = item.get('person')
+        if not criteria:
+            person = self.note_service.get_person(person_id)
+            if not person or 'error' in person:
+                error = person.get('error') if person else 'No response'
+                return {'fub_person_id': person_id, 'status': STATUS_FAILED, 'error': f"Could not load person: {error}"}
+            criteria = extract_enrichment_criteria(person)
+
+        name = f"{criteria.get('first_name') or ''} {criteria.get('last_name') or ''}".strip() or str(person_id)
+        if not _has_enough_criteria(criteria):
+            return {'fub_person_id': person_id, 'name': name, 'status': STATUS_SKIPPED,
+                    'error': 'Not enough contact details to enrich'}
+
+        if not self._claim_credit():
+            return None
+
+        result, used = None, False
+        try:
+            result = self.service.endato.contact_enrichment(
+                first_name=criteria.get('first_name') or '',
+                last_name=criteria.get('last_name') or '',
+                phone=criteria.get('phone') or '',
+                email=criteria.get('email') or '',
+                address_line1=criteria.get('address') or '',
+            )
+            used = bool(result) and 'error' not in result
+        finally:
+            self._return_credit(used)
+
+        if not used:
+            error = result.get('error', {}).get('message', 'Enrichment failed') if result else 'No response'
+            return {'fub_person_id': person_id, 'name': name, 'status': STATUS_FAILED, 'error': error}
+
+        return {
+            'fub_person_id': person_id,
+            'name': name,
+            'status': STATUS_ENRICHED,
+            'criteria': criteria,
+            'result': result,
+            'cache_key': self.service.endato.pop_last_lookup_key(),
+        }
+
+    # ------------------------------------------------------------------
+    # Batched writes
+    # ------------------------------------------------------------------
+
+    async def _flush(self, final: bool = False) -> None:
+        """Write full batches (and the remainder when final)."""
+        size = self.service.write_batch_size
+        async with self._write_lock:
+            while len(self._buffer) >= size or (final and self._buffer):
+                batch, self._buffer = self._buffer[:size], self._buffer[size:]
+                enriched = [o for o in batch if o['status'] == STATUS_ENRICHED]
+                await asyncio.gather(*(asyncio.to_thread(self._write_to_fub, o) for o in enriched))
+                await asyncio.to_thread(self._write_batch, batch, enriched)
+
+    def _write_to_fub(self, outcome: Dict[str, Any]) -> None:
+        person_id = outcome['fub_person_id']
+        try:
+            if self.settings.get('add_phones_to_fub', True) or self.settings.get('add_emails_to_fub', True):
+                added = self.note_service.add_enrichment_data_to_person(
+                    person_id,
+                    outcome['result'],
+                    add_phones=self.settings.get('add_phones_to_fub', True),
+                    add_emails=self.settings.get('add_emails_to_fub', True),
+                )
+                outcome['phones_added'] = added.get('phones_added', 0)
+                outcome['emails_added'] = added.get('emails_added', 0)
+
+            if self.settings.get('add_note_to_fub', True):
+                criteria = outcome['criteria']
+                note = self.note_service.post_enrichment_note(
+                    person_id=person_id,
+                    search_type='contact_enrichment',
+                    search_data=outcome['result'],
+                    search_criteria={
+                        'firstName': criteria.get('first_name'),
+                        'lastName': criteria.get('last_name'),
+                        'phone': criteria.get('phone'),
+                        'email': criteria.get('email'),
+                    },
+                )
+                outcome['note_posted'] = bool(note) and 'error' not in note
+        except Exception as e:
+            logger.warning(f"Bulk enrichment job {self.job_id}: FUB update failed for {person_id}: {e}")
+
+    def _write_batch(self, batch: List[Dict[str, Any]], enriched: List[Dict[str, Any]]) -> None:
+        supabase = self.service.supabase
+        user_id = self.job['user_id']
+
+        if enriched:
+            history = []
+            for outcome in enriched:
+                criteria = outcome['criteria']
+                row = {
+                    'user_id': user_id,
+                    'search_type': 'contact_enrichment',
+                    'criteria': {
+                        'firstName': criteria.get('first_name'),
+                        'lastName': criteria.get('last_name'),
+                        'phone': criteria.get('phone'),
+                        'email': criteria.get('email'),
+                    },
+                    'result': outcome['result'],
+                    'success': True,
+                    'usage_type': 'enhancement',
+                    'fub_person_id': str(outcome['fub_person_id']),
+                }
+                if outcome.get('cache_key'):
+                    row['cache_key'] = outcome['cache_key']
+                history.append(row)
+            try:
+                supabase.table('lookup_history').insert(history).execute()
+            except Exception as e:
+                logger.warning(f"Bulk enrichment job {self.job_id}: could not log lookups: {e}")
+
+        try:
+            supabase.table(ITEMS_TABLE).upsert([
+                {
+                    'job_id': self.job_id,
+                    'fub_person_id': o['fub_person_id'],
+                    'status': o['status'],
+                    'error': o.get('error'),
+                    'phones_added': o.get('phones_added', 0),
+                    'emails_added': o.get('emails_added', 0),
+                    'note_posted': o.get('note_posted', False),
+                    'updated_at': _now(),
+                }
+                for o in batch
+            ], on_conflict='job_id,fub_person_id').execute()
+        except Exception as e:
+            logger.warning(f"Bulk enrichment job {self.job_id}: could not save item results: {e}")
+
+        for outcome in batch:
+            self.counts['processed'] += 1
+            self.counts[outcome['status']] += 1
+
+        self.service._update_job(self.job_id, {**self.counts, 'credit_reservation': self.reservation})
+        last = batch[-1]
+        self.service.tracker.update_progress(
+            self.job_id,
+            processed=self.counts['processed'],
+            successful=self.counts['enriched'],
+            failed=self.counts['failed'],
+            skipped=self.counts['skipped'],
+            current_lead=last.get('name'),
+            message=f"Enriched {len(enriched)}/{len(batch)} in batch",
+        )
+
+    # ------------------------------------------------------------------
+
+    def finish(self) -> Dict[str, Any]:
+        """Settle credits and record the job's final status."""
+        used, released = self.service.credit_service.settle_reservation(
+            self.reservation, description=f"Bulk enrichment job {self.job_id}"
+        )
+        credits_used = (self.job.get('credits_used') or 0) + used
+
+        remaining = self.job['total'] - self.counts['processed']
+        if self.cancelled:
+            status, message = 'cancelled', 'Cancelled by user'
+        elif remaining > 0:
+            status, message = 'paused', f"Insufficient credits: {remaining} people still pending"
+        else:
+            status, message = 'completed', None
+
+        update = {
+            **self.counts,
+            'status': status,
+            'error': message,
+            'credit_reservation': None,
+            'credits_used': credits_used,
+        }
+        if status == 'completed':
+            update['completed_at'] = _now()
+        self.service._update_job(self.job_id, update)
+
+        if message:
+            self.service.tracker.update_progress(self.job_id, message=message)
+        self.service.tracker.complete_sync(self.job_id, results={
+            'successful': self.counts['enriched'],
+            'failed': self.counts['failed'],
+            'details': [],
+        })
+
+        logger.info(
+            f"Bulk enrichment job {self.job_id} {status}: {self.counts['enriched']} enriched, "
+            f"{self.counts['failed']} failed, {self.counts['skipped']} skipped, "
+            f"{used} credits used, {released} released"
+        )
+        return {
+            'success': True,
+            'job_id': self.job_id,
+            'status': status,
+            **self.counts,
+            'credits_used': credits_used,
+            'credits_released': released,
+        }
+
+
+_bulk_enrichment_service: Optional[BulkEnrichmentService] = None
+_bulk_enrichment_lock = threading.Lock()
+
+
+def get_bulk_enrichment_service() -> BulkEnrichmentService:
+    """Get the process-wide bulk enrichment service."""
+    global _bulk_enrichment_service
+    if _bulk_enrichment_service is None:
+        with _bulk_enrichment_lock:
+            if _bulk_enrichment_service is None:
+                _bulk_enrichment_service = BulkEnrichmentService()
+    return _bulk_enrichment_service
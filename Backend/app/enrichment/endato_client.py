@@ -8,13 +8,20 @@ import requests
 import logging
 import json
 import uuid
+import functools
+import inspect
 from typing import Dict, Any, Optional
 
+from app.enrichment.lookup_cache import EndatoLookupCache, get_lookup_cache
+
 logger = logging.getLogger(__name__)
 
 # Endato API base URL
 ENDATO_BASE_URL = "https://devapi.endato.com"
 
+# Keep-alive connections to Endato (bulk enrichment runs several lookups at once)
+HTTP_POOL_SIZE = 16
+
 # Search type to API version mapping
 SEARCH_TYPE_MAPPING = {
     'contact_enrichment': 'DevAPIContactEnrich',
@@ -38,18 +45,55 @@ ENDPOINT_MAPPING = {
 }
 
 
+def cached_lookup(search_type: str):
+    """
+    Serve a search method through the lookup cache.
+
+    The method's arguments are the cache criteria. Callers may pass
+    refresh=True to bypass cached results (e.g. an explicit re-enhance).
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, refresh: bool = False, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            criteria = {k: v for k, v in bound.arguments.items() if k != 'self'}
+            return self.cache.lookup(
+                search_type,
+                criteria,
+                lambda: method(self, *args, **kwargs),
+                refresh=refresh,
+            )
+        return wrapper
+    return decorator
+
+
 class EndatoClient:
     """
     Client for interacting with the Endato API.
 
     Handles authentication, request formatting, and response parsing
-    for all enrichment search types.
+    for all enrichment search types. Successful results are reused
+    through the lookup cache (see lookup_cache.py).
     """
 
-    def __init__(self):
+    def __init__(self, cache: EndatoLookupCache = None):
         self.base_url = ENDATO_BASE_URL
         self.key_name = os.environ.get('ENDATO_KEY_NAME')
         self.key_password = os.environ.get('ENDATO_KEY_PASSWORD')
+        self.cache = cache or get_lookup_cache()
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+
+    def pop_last_lookup_key(self) -> Optional[str]:
+        """
+        Cache key of this thread's last search that reached Endato.
+
+        Store it as lookup_history.cache_key so the row can serve later
+        lookups of the same criteria.
+        """
+        return self.cache.pop_last_key()
 
     def _validate_credentials(self) -> bool:
         """Check if API credentials are configured."""
@@ -113,7 +157,8 @@ class EndatoClient:
             logger.debug(f"Request params: {json.dumps(params, indent=2)}")
 
             # Make the request
-            response = requests.post(
+            self.cache.record_vendor_call()
+            response = self.session.post(
                 url,
                 json=params,
                 headers=headers,
@@ -160,6 +205,7 @@ class EndatoClient:
     # Search Methods
     # =========================================================================
 
+    @cached_lookup('contact_enrichment')
     def contact_enrichment(self, first_name: str = "", last_name: str = "",
                           phone: str = "", email: str = "",
                           address_line1: str = "", address_line2: str = "") -> Optional[Dict[str, Any]]:
@@ -217,6 +263,7 @@ class EndatoClient:
         params['search_type'] = 'contact_enrichment'
         return self._make_request('Contact/Enrich', params, 'contact_enrichment')
 
+    @cached_lookup('reverse_phone')
     def reverse_phone(self, phone: str) -> Optional[Dict[str, Any]]:
         """
         Perform a reverse phone lookup.
@@ -253,6 +300,7 @@ class EndatoClient:
 
         return self._make_request('Phone/Enrich', params, 'reverse_phone')
 
+    @cached_lookup('reverse_email')
     def reverse_email(self, email: str) -> Optional[Dict[str, Any]]:
         """
         Perform a reverse email lookup.
@@ -272,6 +320,7 @@ class EndatoClient:
 
         return self._make_request('Email/Enrich', params, 'reverse_email')
 
+    @cached_lookup('criminal_search')
     def criminal_search(self, first_name: str, last_name: str,
                        state: str = None) -> Optional[Dict[str, Any]]:
         """
@@ -311,6 +360,7 @@ class EndatoClient:
 
         return self._make_request('CriminalSearch/V2', params, 'criminal_search')
 
+    @cached_lookup('owner_search')
     def owner_search(self, address: str, searched_name: str = None) -> Optional[Dict[str, Any]]:
         """
         Search for property owner information from an address.
@@ -394,6 +444,7 @@ class EndatoClient:
             logger.error(f"Error processing address: {str(e)}", exc_info=True)
             return {'error': {'message': f'Error processing address: {str(e)}'}}
 
+    @cached_lookup('advanced_person_search')
     def person_search(self, first_name: str = None, last_name: str = None,
                      city: str = None, state: str = None,
                      age: int = None, dob: str = None) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,411 @@
+"""
+Endato Lookup Cache - Reuses enrichment results across agents and requests.
+
+Every Endato search is a blocking vendor call (often several seconds). The
+same phone, email or person is routinely looked up again - by another agent
+on the team, by a manual search after auto-enhancement, by the FUB embedded
+app - and each repeat used to pay the full vendor latency.
+
+Lookups are keyed on their normalized criteria (phone digits, lower-cased
+email, case/whitespace-folded names) and served from, in order:
+1. an in-process LRU
+2. Redis (shared by the web workers and Celery)
+3. lookup_history - the audit log already stores every successful result,
+   rows written with a cache_key double as the persistent tier
+4. the vendor
+
+Concurrent identical lookups in a process share a single vendor call.
+
+Only successful results are cached; each search type has its own TTL
+(criminal records go stale faster than contact data).
+
+Usage:
+    cache = get_lookup_cache()
+    result = cache.lookup('reverse_phone', {'phone': phone}, lambda: client.call(...))
+    cache.stats()   # hit rate, vendor calls avoided
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+# How long a successful result is reused, per search type
+CACHE_TTL_SECONDS = {
+    'contact_enrichment': 30 * DAY,
+    'reverse_phone': 30 * DAY,
+    'reverse_email': 30 * DAY,
+    'owner_search': 30 * DAY,
+    'advanced_person_search': 30 * DAY,
+    'criminal_search': 7 * DAY,
+}
+DEFAULT_TTL_SECONDS = 7 * DAY
+
+# Outcomes counted by stats()
+HIT_TIERS = ('memory', 'redis', 'history')
+
+
+def _normalize_phone(value: str) -> str:
+    digits = ''.join(c for c in str(value) if c.isdigit())
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+
+def _normalize_value(field: str, value: Any) -> Any:
+    if isinstance(value, str):
+        if 'phone' in field.lower():
+            return _normalize_phone(value)
+        return re.sub(r'\s+', ' ', value).strip().casefold()
+    return value
+
+
+def normalize_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty fields and fold formatting differences out of the rest."""
+    normalized = {}
+    for field, value in criteria.items():
+        value = _normalize_value(field, value)
+        if value in (None, '', [], {}):
+            continue
+        normalized[field] = value
+    return normalized
+
+
+def lookup_cache_key(search_type: str, criteria: Dict[str, Any]) -> str:
+    """Stable key for a search type and its criteria."""
+    payload = json.dumps(normalize_criteria(criteria), sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:40]
+    return f"{search_type}:{digest}"
+
+
+def is_cacheable(result: Optional[Dict[str, Any]]) -> bool:
+    return bool(result) and 'error' not in result
+
+
+class _InflightCall:
+    """A vendor call other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class EndatoLookupCache:
+    """Tiered result cache with in-flight dedup for Endato searches."""
+
+    KEY_PREFIX = "endato:lookup"
+    STATS_KEY = "endato:lookup:stats"
+    MAX_ENTRIES = 1000
+    INFLIGHT_WAIT_SECONDS = 45  # vendor timeout is 30s
+    REDIS_RETRY_SECONDS = 60
+
+    def __init__(
+        self,
+        redis_service=None,
+        supabase_client=None,
+        max_entries: int = MAX_ENTRIES,
+        ttls: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            redis_service: RedisService wrapper (defaults to the shared one)
+            supabase_client: Database client for the lookup_history tier
+            max_entries: In-process LRU size
+            ttls: Per-search-type TTL overrides, in seconds
+        """
+        self.max_entries = max_entries
+        self.ttls = {**CACHE_TTL_SECONDS, **(ttls or {})}
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, _InflightCall] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counts: Dict[str, int] = {}
+
+        self.redis = redis_service
+        self._redis_retry_at = 0.0 if redis_service is None else float("inf")
+        self._supabase = supabase_client
+
+    def ttl_for(self, search_type: str) -> int:
+        return self.ttls.get(search_type, DEFAULT_TTL_SECONDS)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(
+        self,
+        search_type: str,
+        criteria: Dict[str, Any],
+        fetch: Callable[[], Optional[Dict[str, Any]]],
+        refresh: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached result for the criteria, or fetch (once) and cache it.
+
+        Args:
+            search_type: Endato search type (see CACHE_TTL_SECONDS)
+            criteria: Search arguments, normalized for the key
+            fetch: Performs the vendor search on a miss
+            refresh: Skip cached results (the fresh result is still cached)
+
+        Returns:
+            The search result; callers get their own copy
+        """
+        key = lookup_cache_key(search_type, criteria)
+        self._local.last_key = None
+        self._count('lookups')
+
+        if not refresh:
+            result = self._cached(key, search_type)
+            if result is not None:
+                return copy.deepcopy(result)
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InflightCall()
+
+        if not leader:
+            # Identical lookup already running in this process - share it
+            if call.done.wait(self.INFLIGHT_WAIT_SECONDS):
+                self._count('inflight_shared')
+                return copy.deepcopy(call.result)
+            logger.warning(f"Timed out waiting on in-flight {search_type} lookup, calling vendor")
+            return self._fetch(key, search_type, fetch)
+
+        try:
+            call.result = self._fetch(key, search_type, fetch)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return copy.deepcopy(call.result)
+
+    def pop_last_key(self) -> Optional[str]:
+        """
+        Cache key of this thread's last vendor fetch, cleared on read.
+
+        Stored on the lookup_history row so the row serves later lookups.
+        Cache hits leave it unset: a fresh row for a cached result would keep
+        the key from ever expiring out of the history tier.
+        """
+        key = getattr(self._local, 'last_key', None)
+        self._local.last_key = None
+        return key
+
+    def invalidate(self, search_type: str, criteria: Dict[str, Any]) -> None:
+        """Forget a cached result (memory and Redis; history rows age out)."""
+        key = lookup_cache_key(search_type, criteria)
+        with self._lock:
+            self._entries.pop(key, None)
+        redis_client = self._redis_client()
+        if redis_client is not None:
+            try:
+                redis_client.delete(f"{self.KEY_PREFIX}:{key}")
+            except Exception as e:
+                logger.warning(f"Failed to invalidate cached Endato lookup: {e}")
+
+    def record_vendor_call(self) -> None:
+        """Count a request actually sent to Endato."""
+        self._count('vendor_calls')
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit rate and vendor calls avoided.
+
+        Counted across processes when Redis is available, otherwise for this
+        process only.
+        """
+        counts = dict(self._counts)
+        scope = 'process'
+        redis_client = self._redis_client()
+        if redis_client is not None:
+            try:
+                shared = redis_client.hgetall(self.STATS_KEY)
+                if shared:
+                    counts = {k: int(v) for k, v in shared.items()}
+                    scope = 'cluster'
+            except Exception as e:
+                logger.warning(f"Failed to read Endato cache stats: {e}")
+
+        lookups = counts.get('lookups', 0)
+        hits = {tier: counts.get(f'hit_{tier}', 0) for tier in HIT_TIERS}
+        avoided = sum(hits.values()) + counts.get('inflight_shared', 0)
+        return {
+            'scope': scope,
+            'lookups': lookups,
+            'hits': hits,
+            'inflight_shared': counts.get('inflight_shared', 0),
+            'vendor_calls': counts.get('vendor_calls', 0),
+            'vendor_calls_avoided': avoided,
+            'hit_rate': round(avoided / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._entries),
+        }
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _cached(self, key: str, search_type: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        result = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    result = None
+        if result is not None:
+            self._count('hit_memory')
+            return result
+
+        result = self._redis_get(key)
+        if result is not None:
+            self._remember(key, result, self.ttl_for(search_type))
+            self._count('hit_redis')
+            return result
+
+        result, remaining = self._history_get(key, search_type)
+        if result is not None:
+            self._remember(key, result, remaining)
+            self._redis_set(key, result, remaining)
+            self._count('hit_history')
+            return result
+        return None
+
+    def _fetch(self, key: str, search_type: str, fetch: Callable) -> Optional[Dict[str, Any]]:
+        self._count('misses')
+        result = fetch()
+        if is_cacheable(result):
+            ttl = self.ttl_for(search_type)
+            stored = copy.deepcopy(result)
+            self._remember(key, stored, ttl)
+            self._redis_set(key, stored, ttl)
+            self._local.last_key = key
+        return result
+
+    def _remember(self, key: str, result: Dict[str, Any], ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return None
+        try:
+            raw = redis_client.get(f"{self.KEY_PREFIX}:{key}")
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Failed to read cached Endato lookup: {e}")
+            return None
+
+    def _redis_set(self, key: str, result: Dict[str, Any], ttl: int) -> None:
+        redis_client = self._redis_client()
+        if redis_client is None or ttl <= 0:
+            return
+        try:
+            redis_client.set(f"{self.KEY_PREFIX}:{key}", json.dumps(result, default=str), ex=int(ttl))
+        except Exception as e:
+            logger.warning(f"Failed to cache Endato lookup: {e}")
+
+    def _history_get(self, key: str, search_type: str):
+        """Newest successful lookup_history row for the key within the TTL."""
+        supabase = self._supabase_client()
+        if supabase is None:
+            return None, 0
+        ttl = self.ttl_for(search_type)
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+        try:
+            rows = supabase.table('lookup_history').select(
+                'result, created_at'
+            ).eq('cache_key', key).eq('success', True).gte(
+                'created_at', cutoff.isoformat()
+            ).order('created_at', desc=True).limit(1).execute().data
+        except Exception as e:
+            logger.warning(f"Failed to read lookup_history cache tier: {e}")
+            return None, 0
+
+        if not rows or not rows[0].get('result'):
+            return None, 0
+        remaining = ttl
+        try:
+            created = datetime.fromisoformat(rows[0]['created_at'].replace('Z', '+00:00'))
+            age = (datetime.utcnow() - created.replace(tzinfo=None)).total_seconds()
+            remaining = max(int(ttl - age), 1)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return rows[0]['result'], remaining
+
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+        redis_client = self._redis_client()
+        if redis_client is not None:
+            try:
+                redis_client.hincrby(self.STATS_KEY, name, 1)
+            except Exception:
+                pass
+
+    def _redis_client(self):
+        """Raw Redis client, or None while Redis is unreachable (retried periodically)."""
+        if self.redis is None:
+            if time.time() < self._redis_retry_at:
+                return None
+            try:
+                from app.service.redis_service import RedisServiceSingleton
+                service = RedisServiceSingleton.get_instance()
+                if not service.is_connected():
+                    raise ConnectionError("ping failed")
+                self.redis = service
+            except Exception as e:
+                logger.warning(f"Redis not available, Endato lookups are cached per process: {e}")
+                self._redis_retry_at = time.time() + self.REDIS_RETRY_SECONDS
+                return None
+        return self.redis.redis
+
+    def _supabase_client(self):
+        if self._supabase is None:
+            try:
+                from app.database.supabase_client import SupabaseClientSingleton
+                self._supabase = SupabaseClientSingleton.get_instance()
+            except Exception as e:
+                logger.warning(f"lookup_history cache tier unavailable: {e}")
+                return None
+        return self._supabase
+
+
+_lookup_cache: Optional[EndatoLookupCache] = None
+_lookup_cache_lock = threading.Lock()
+
+
+def get_lookup_cache() -> EndatoLookupCache:
+    """Get the process-wide Endato lookup cache."""
+    global _lookup_cache
+    if _lookup_cache is None:
+        with _lookup_cache_lock:
+            if _lookup_cache is None:
+                _lookup_cache = EndatoLookupCache()
+    return _lookup_cache
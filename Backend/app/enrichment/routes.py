@@ -9,6 +9,7 @@ Endpoints:
 - /api/enrichment/dnc - DNC (Do Not Call) check
 - /api/enrichment/owner - Property owner search
 - /api/enrichment/person - Advanced person search
+- /api/enrichment/bulk - Bulk contact enrichment jobs
 """
 
 from flask import request, jsonify
@@ -74,8 +75,14 @@ def check_and_deduct_credits(user_id: str, credit_type: str, description: str =
 
 def log_lookup_history(user_id: str, search_type: str, criteria: dict,
                        result: dict, success: bool, message: str = None,
-                       lead_id: str = None, fub_person_id: str = None):
-    """Log a search to the lookup history table."""
+                       lead_id: str = None, fub_person_id: str = None,
+                       cache_key: str = None):
+    """
+    Log a search to the lookup history table.
+
+    Rows logged with a cache_key also serve as the persistent tier of the
+    Endato lookup cache.
+    """
     try:
         supabase = SupabaseClientSingleton.get_instance()
 
@@ -101,6 +108,8 @@ def log_lookup_history(user_id: str, search_type: str, criteria: dict,
             'lead_id': lead_id,
             'fub_person_id': fub_person_id,
         }
+        if cache_key:
+            lookup_data['cache_key'] = cache_key
 
         supabase.table('lookup_history').insert(lookup_data).execute()
 
@@ -178,7 +187,8 @@ def contact_enrichment():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -247,7 +257,8 @@ def reverse_phone():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -316,7 +327,8 @@ def reverse_email():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -393,7 +405,8 @@ def criminal_search():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -579,7 +592,8 @@ def owner_search():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -663,7 +677,8 @@ def person_search():
             result=result,
             success=True,
             lead_id=data.get('lead_id'),
-            fub_person_id=data.get('fub_person_id')
+            fub_person_id=data.get('fub_person_id'),
+            cache_key=endato.pop_last_lookup_key()
         )
 
         return jsonify({
@@ -676,6 +691,146 @@ def person_search():
         return jsonify({"error": str(e)}), 500
 
 
+# =============================================================================
+# Lookup Cache
+# =============================================================================
+
+@enrichment_bp.route('/cache/stats', methods=['GET'])
+def get_lookup_cache_stats():
+    """Hit rate of the Endato lookup cache and vendor calls it avoided."""
+    try:
+        return jsonify({
+            "success": True,
+            "stats": EndatoClientSingleton.get_instance().cache.stats()
+        })
+
+    except Exception as e:
+        logger.error(f"Error getting lookup cache stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+# =============================================================================
+# Bulk Enrichment
+# =============================================================================
+
+def _get_owned_bulk_job(job_id: str, user_id: str):
+    """Load a bulk enrichment job, or None when it isn't the user's."""
+    from app.enrichment.bulk_enrichment import get_bulk_enrichment_service
+
+    job = get_bulk_enrichment_service().get_job(job_id)
+    if not job or job.get('user_id') != user_id:
+        return None
+    return job
+
+
+@enrichment_bp.route('/bulk', methods=['POST'])
+def start_bulk_enrichment():
+    """
+    Start a bulk contact enrichment job.
+
+    Request body:
+        - fub_person_ids: List of FUB person IDs, or
+        - filter: FUB people filter ({source, updated_since})
+
+    Progress is streamed at /api/supabase/sync-status/<job_id>/stream.
+    """
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
+
+    data = request.get_json() or {}
+    fub_person_ids = data.get('fub_person_ids') or []
+    person_filter = data.get('filter')
+
+    try:
+        from app.enrichment.bulk_enrichment import get_bulk_enrichment_service
+        from app.scheduler.tasks import run_bulk_enrichment_job
+
+        job = get_bulk_enrichment_service().create_job(
+            user_id, fub_person_ids=fub_person_ids, person_filter=person_filter
+        )
+        run_bulk_enrichment_job.delay(job['id'])
+
+        return jsonify({
+            "success": True,
+            "job_id": job['id'],
+            "total": job.get('total', 0),
+            "status": job.get('status')
+        }), 202
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error starting bulk enrichment: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@enrichment_bp.route('/bulk/<job_id>', methods=['GET'])
+def get_bulk_enrichment(job_id):
+    """Get a bulk enrichment job's status and counts."""
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
+
+    try:
+        job = _get_owned_bulk_job(job_id, user_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify({"success": True, "job": job})
+
+    except Exception as e:
+        logger.error(f"Error getting bulk enrichment job: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@enrichment_bp.route('/bulk/<job_id>/resume', methods=['POST'])
+def resume_bulk_enrichment(job_id):
+    """Re-queue a paused, cancelled or failed job (or one whose worker died) for its pending people."""
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
+
+    try:
+        job = _get_owned_bulk_job(job_id, user_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        # A pending job is already queued; dispatching it again would run it twice.
+        # A running job is only resumable once its worker stopped renewing the lease.
+        from app.enrichment.bulk_enrichment import get_bulk_enrichment_service
+        stale = job['status'] == 'running' and get_bulk_enrichment_service().running_lease_expired(job)
+        if job['status'] in ('pending', 'running', 'completed') and not stale:
+            return jsonify({"success": False, "error": f"Job is {job['status']}"}), 409
+
+        from app.scheduler.tasks import run_bulk_enrichment_job
+        run_bulk_enrichment_job.delay(job_id)
+        return jsonify({"success": True, "job_id": job_id}), 202
+
+    except Exception as e:
+        logger.error(f"Error resuming bulk enrichment job: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@enrichment_bp.route('/bulk/<job_id>/cancel', methods=['POST'])
+def cancel_bulk_enrichment(job_id):
+    """Stop a running job after the lookups in flight; it can be resumed later."""
+    user_id = get_user_id_from_request()
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
+
+    try:
+        job = _get_owned_bulk_job(job_id, user_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        from app.service.sync_status_tracker import get_tracker
+        cancelled = get_tracker().cancel_sync(job_id)
+        return jsonify({"success": bool(cancelled), "job_id": job_id})
+
+    except Exception as e:
+        logger.error(f"Error cancelling bulk enrichment job: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 # =============================================================================
 # Lookup History
 # =============================================================================
@@ -20,6 +20,9 @@ logger = logging.getLogger(__name__)
 # FUB API base URL
 FUB_API_BASE_URL = "https://api.followupboss.com/v1"
 
+# Keep-alive connections to FUB (bulk enrichment posts notes concurrently)
+HTTP_POOL_SIZE = 16
+
 
 class FUBNoteService:
     """
@@ -35,6 +38,8 @@ class FUBNoteService:
         """
         self.api_key = api_key or os.environ.get('FUB_API_KEY')
         self.base_url = FUB_API_BASE_URL
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
 
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for FUB API requests."""
@@ -75,7 +80,7 @@ class FUBNoteService:
 
             logger.info(f"Making FUB API request: {method} {endpoint}")
 
-            response = requests.request(
+            response = self.session.request(
                 method=method,
                 url=url,
                 headers=headers,
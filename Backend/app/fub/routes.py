@@ -563,6 +563,9 @@ def manual_search():
                 'lead_id': lead_id if lead_id else None,
                 'fub_person_id': str(fub_person_id) if fub_person_id else None,
             }
+            cache_key = endato.pop_last_lookup_key()
+            if cache_key:
+                lookup_data['cache_key'] = cache_key
 
             supabase.table('lookup_history').insert(lookup_data).execute()
 
@@ -1464,13 +1467,14 @@ def re_enhance_lead():
         phone = person.get('phones', [{}])[0].get('value', '') if person.get('phones') else ''
         email = person.get('emails', [{}])[0].get('value', '') if person.get('emails') else ''
 
-        # Perform enrichment
+        # Perform enrichment (a re-enhance always asks the vendor again)
         endato = EndatoClientSingleton.get_instance()
         result = endato.contact_enrichment(
             first_name=first_name,
             last_name=last_name,
             phone=phone,
-            email=email
+            email=email,
+            refresh=True
         )
 
         if result and 'error' not in result:
@@ -1492,6 +1496,9 @@ def re_enhance_lead():
                 'usage_type': 'enhancement',
                 'fub_person_id': str(fub_person_id),
             }
+            cache_key = endato.pop_last_lookup_key()
+            if cache_key:
+                lookup_data['cache_key'] = cache_key
             supabase.table('lookup_history').insert(lookup_data).execute()
 
             # Add contact data to FUB if enabled
@@ -1861,6 +1868,9 @@ def save_fub_login_settings():
                 "message": "Could not determine user or organization context"
             }), 400
 
+        from app.ai_agent.settings_cache import get_settings_cache
+        get_settings_cache(supabase).invalidate()
+
         # Auto-register webhooks for AI agent after saving FUB settings
         # For multi-tenant: Use user's FUB API key and include org_id in webhook URLs
         webhook_result = None
@@ -2498,6 +2508,10 @@ def trigger_lead_followup():
         }), 500
 
 
+# Each backfill worker holds an LLM call and an FUB send at once
+BACKFILL_MAX_CONCURRENCY = 10
+
+
 @fub_bp.route('/ai/backfill-outreach', methods=['POST'])
 def backfill_proactive_outreach():
     """
@@ -2509,18 +2523,26 @@ def backfill_proactive_outreach():
     Body (all optional):
         - person_ids: List of FUB person IDs (if empty, auto-discovers)
         - dry_run: If true, just return which leads would be targeted (default: false)
+        - concurrency: Leads processed at once (default: 3, max: 10)
+
+    Messages for every lead are generated in one BulkGenerationEngine run with
+    a per-day checkpoint, then sent.
 
     Returns:
         - results: Dict of person_id -> result for each lead
     """
     import asyncio
-    import time
     from app.database.supabase_client import SupabaseClientSingleton
 
     try:
         data = request.get_json() or {}
         person_ids = data.get('person_ids', [])
         dry_run = data.get('dry_run', False)
+        try:
+            concurrency = int(data.get('concurrency', 3))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "message": "concurrency must be an integer"}), 400
+        concurrency = max(1, min(concurrency, BACKFILL_MAX_CONCURRENCY))
 
         supabase = SupabaseClientSingleton.get_instance()
 
@@ -2574,39 +2596,40 @@ def backfill_proactive_outreach():
                     'user_id': uid,
                 })
 
-        from app.ai_agent.proactive_outreach_orchestrator import trigger_proactive_outreach
+        import tempfile
+        from app.ai_agent.proactive_outreach_orchestrator import trigger_proactive_outreach_batch
 
-        results = {}
-        for lead in leads_needing:
-            pid = lead['fub_person_id']
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(
-                        trigger_proactive_outreach(
-                            fub_person_id=int(pid),
-                            organization_id=lead['organization_id'],
-                            user_id=lead['user_id'],
-                            trigger_reason="backfill",
-                            enable_type="manual",
-                        )
-                    )
-                    results[pid] = {
-                        "success": result.get("success", False),
-                        "actions": result.get("actions_taken", []),
-                        "followups": result.get("followups_scheduled", 0),
-                        "stage": result.get("lead_stage"),
-                        "errors": result.get("errors", []),
-                    }
-                finally:
-                    loop.close()
+        # Messages are generated in one bulk run and checkpointed; a rerun the
+        # same day (e.g. after a timeout) reuses what was already generated
+        checkpoint_path = os.path.join(
+            tempfile.gettempdir(),
+            f"backfill_outreach_{datetime.utcnow().strftime('%Y%m%d')}.jsonl",
+        )
 
-                time.sleep(5)  # Stagger to avoid rate limits
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            outcomes = loop.run_until_complete(trigger_proactive_outreach_batch(
+                leads_needing,
+                trigger_reason="backfill",
+                enable_type="manual",
+                concurrency=concurrency,
+                checkpoint_path=checkpoint_path,
+                supabase_client=supabase,
+            ))
+        finally:
+            loop.close()
 
-            except Exception as e:
-                results[pid] = {"success": False, "error": str(e)}
-                logger.error(f"Backfill failed for {pid}: {e}")
+        results = {}
+        for lead, result in zip(leads_needing, outcomes):
+            pid = lead['fub_person_id']
+            results[pid] = {
+                "success": result.get("success", False),
+                "actions": result.get("actions_taken", []),
+                "followups": result.get("followups_scheduled", 0),
+                "stage": result.get("lead_stage"),
+                "errors": result.get("errors", []),
+            }
 
         return jsonify({
             "success": True,
@@ -2775,6 +2798,8 @@ def manage_excluded_stages():
         result = supabase.table('ai_agent_settings').update({
             'excluded_stages': excluded_stages
         }).limit(1).execute()
+        from app.ai_agent.settings_cache import get_settings_cache
+        get_settings_cache(supabase).invalidate()
         return jsonify({
             "success": True,
             "excluded_stages": result.data[0].get('excluded_stages', []) if result.data else excluded_stages
@@ -3494,6 +3519,44 @@ def get_ai_health():
         except Exception:
             pass
 
+    # Playwright per-agent queue depth / wait times (only if the service is running)
+    try:
+        from app.messaging.playwright_sms_service import PlaywrightSMSServiceSingleton
+        if PlaywrightSMSServiceSingleton._instance is not None:
+            metrics["playwright_queues"] = PlaywrightSMSServiceSingleton._instance.get_queue_metrics()
+    except Exception:
+        pass
+
+    # Shared settings cache hit rates
+    try:
+        from app.ai_agent.settings_cache import get_settings_cache
+        metrics["settings_cache"] = get_settings_cache().get_stats()
+    except Exception:
+        pass
+
+    # Lead profile cache hit / refresh counters
+    try:
+        from app.ai_agent.lead_profile_cache import get_lead_profile_cache
+        metrics["lead_profile_cache"] = get_lead_profile_cache().get_stats()
+    except Exception:
+        pass
+
+    # Delayed AI replies waiting for (or in the middle of) their send
+    try:
+        from app.ai_agent.delayed_reply_queue import get_delayed_reply_queue
+        metrics["delayed_replies"] = get_delayed_reply_queue().get_stats()
+    except Exception:
+        pass
+
+    # End-to-end reply latency (per-stage breakdown at /ai/health/latency)
+    try:
+        from app.utils.tracing import get_tracer
+        stages = get_tracer().exporter.stage_stats()
+        if "webhook_to_send" in stages:
+            metrics["reply_latency"] = stages["webhook_to_send"]
+    except Exception:
+        pass
+
     return jsonify({
         "status": status,
         "timestamp": datetime.utcnow().isoformat(),
@@ -3502,6 +3565,40 @@ def get_ai_health():
     })
 
 
+@fub_bp.route('/ai/health/latency', methods=['GET'])
+def get_ai_latency():
+    """
+    Per-stage latency of the AI reply pipeline (webhook -> SMS sent).
+
+    Query params:
+        window: Seconds to aggregate over (default / max: the last hour)
+        traces: Also return the N most recent spans
+        format: 'otlp' to return recent spans as OTLP/JSON instead
+
+    Stats are per worker process.
+    """
+    from app.utils.tracing import get_tracer
+
+    exporter = get_tracer().exporter
+    try:
+        window = int(request.args.get('window', exporter.window_seconds))
+        traces = int(request.args.get('traces', 0))
+    except ValueError:
+        return jsonify({"error": "window and traces must be integers"}), 400
+
+    if request.args.get('format') == 'otlp':
+        return jsonify(exporter.to_otlp(limit=traces or 100))
+
+    response = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "window_seconds": min(window, exporter.window_seconds),
+        "stages": exporter.stage_stats(window),
+    }
+    if traces:
+        response["recent_spans"] = [span.to_dict() for span in exporter.recent_spans(traces)]
+    return jsonify(response)
+
+
 @fub_bp.route('/admin/trigger-bulk-sync', methods=['POST'])
 def trigger_bulk_sync():
     """Trigger an immediate bulk sync of all lead sources that are due."""
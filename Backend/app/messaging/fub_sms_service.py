@@ -19,6 +19,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from app.utils.constants import Credentials
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -157,6 +158,7 @@ class FUBSMSService:
                 "error": error_msg,
             }
 
+    @traced("sms_send.fub_api")
     async def send_text_message_async(
         self,
         person_id: int,
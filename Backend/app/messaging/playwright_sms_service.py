@@ -1,11 +1,14 @@
 """Playwright SMS Service - Send SMS via FUB web interface."""
 
 from playwright.async_api import async_playwright, Browser, Playwright
-from typing import Dict, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
 import asyncio
 import threading
 import logging
 import os
+import time
 
 from .session_store import SessionStore
 from .fub_browser_session import FUBBrowserSession
@@ -13,12 +16,79 @@ from .fub_browser_session import FUBBrowserSession
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _QueuedOperation:
+    """A browser operation waiting for its agent's worker."""
+    name: str
+    func: Callable[[FUBBrowserSession], Awaitable[Any]]
+    credentials: dict
+    timeout: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.time)
+
+
+class _AgentQueue:
+    """FIFO work queues and metrics for one agent's browser operations.
+
+    asyncio queues are bound to a loop, so each event loop that submits work for
+    the agent gets its own queue and worker. Workers hold the agent's busy flag
+    while they have a context open, so only one of them drives the browser at a time.
+    """
+
+    def __init__(self):
+        self.queues: Dict[asyncio.AbstractEventLoop, asyncio.Queue] = {}
+        self.workers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.contexts_created = 0
+        self.wait_times_ms = deque(maxlen=200)
+
+    def queue_for(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+        """Get this loop's queue, dropping queues of loops that have closed."""
+        for stale in [other for other in self.queues if other.is_closed()]:
+            self.queues.pop(stale, None)
+            self.workers.pop(stale, None)
+        if loop not in self.queues:
+            self.queues[loop] = asyncio.Queue()
+        return self.queues[loop]
+
+    def metrics(self) -> dict:
+        waits = sorted(self.wait_times_ms)
+        return {
+            "queue_depth": sum(q.qsize() for q in self.queues.values()) + self.in_flight,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "contexts_created": self.contexts_created,
+            "ops_per_context": round(self.processed / self.contexts_created, 2) if self.contexts_created else 0,
+            "wait_ms_p50": self._percentile(waits, 0.50),
+            "wait_ms_p95": self._percentile(waits, 0.95),
+            "wait_ms_max": round(waits[-1], 1) if waits else 0,
+        }
+
+    @staticmethod
+    def _percentile(sorted_values: list, pct: float) -> float:
+        if not sorted_values:
+            return 0
+        index = min(len(sorted_values) - 1, int(round(pct * (len(sorted_values) - 1))))
+        return round(sorted_values[index], 1)
+
+
 class PlaywrightSMSService:
     """Send SMS via FUB web interface using Playwright browser automation.
 
     CRITICAL: This service serializes ALL Playwright operations per agent to avoid
     browser conflicts. Only one operation can use the browser at a time per agent.
-    Uses a simple flag-based approach instead of locks to avoid async/sync deadlocks.
+    Each agent has an asyncio FIFO work queue drained by a single worker task, so
+    waiting operations are woken in order instead of polling a busy flag. Operations
+    queued back-to-back share one browser context (up to CONTEXT_REUSE_MAX_OPS);
+    the context is closed as soon as the queue drains.
+
+    The service is driven from several event loops (the webhook loop, asyncio.run
+    in Celery tasks, per-request loops in routes). The per-agent busy flag is the
+    cross-loop lock: a worker holds it from opening a context until the context is
+    closed, and get_or_create_session takes the same flag.
     """
 
     # Self-healing settings
@@ -28,7 +98,12 @@ class PlaywrightSMSService:
     # Login rate limiting - prevent spamming FUB with verification emails
     LOGIN_COOLDOWN_SECONDS = 600  # 10 minutes cooldown after failed login
 
-    def __init__(self):
+    # Per-agent queue settings
+    QUEUE_MAX_WAIT_SECONDS = 120  # Fail an operation that waited longer than this
+    BUSY_STALE_SECONDS = 300  # Busy flag untouched this long = holder died (loop closed mid-op)
+    CONTEXT_REUSE_MAX_OPS = int(os.getenv("PLAYWRIGHT_CONTEXT_REUSE_OPS", "5"))  # 1 = fresh context per op
+
+    def __init__(self, context_reuse_max_ops: Optional[int] = None):
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.sessions: Dict[str, FUBBrowserSession] = {}  # agent_id -> session
@@ -41,6 +116,8 @@ class PlaywrightSMSService:
         self._consecutive_failures: Dict[str, int] = {}  # Track failures per agent
         self._login_cooldown: Dict[str, float] = {}  # agent_id -> timestamp when cooldown ends
         self._operation_count: int = 0  # Track operations for proactive browser restart
+        self._agent_queues: Dict[str, _AgentQueue] = {}  # agent_id -> FIFO work queues
+        self.context_reuse_max_ops = max(1, context_reuse_max_ops or self.CONTEXT_REUSE_MAX_OPS)
 
     async def initialize(self):
         """Initialize Playwright and browser instance."""
@@ -92,11 +169,29 @@ class PlaywrightSMSService:
         import time
         with self._agent_busy_lock:
             if self._agent_busy.get(agent_id, False):
-                return False
+                busy_for = time.time() - self._agent_busy_since.get(agent_id, time.time())
+                if busy_for < self.BUSY_STALE_SECONDS:
+                    return False
+                # Circuit breaker: the holder's loop closed without releasing
+                logger.warning(f"Agent {agent_id} busy flag stale ({busy_for:.0f}s), taking over")
             self._agent_busy[agent_id] = True
             self._agent_busy_since[agent_id] = time.time()
             return True
 
+    async def _acquire_agent(self, agent_id: str, deadline: float):
+        """Wait for the agent's busy flag (held by another loop's worker or a
+        get_or_create_session caller) until the deadline."""
+        while not self._try_acquire_agent(agent_id):
+            if time.time() >= deadline:
+                raise Exception(f"Timeout waiting for agent {agent_id} to become available")
+            await asyncio.sleep(0.5)
+
+    def _touch_agent(self, agent_id: str):
+        """Refresh the busy timestamp so a long run of queued ops isn't seen as stale."""
+        with self._agent_busy_lock:
+            if self._agent_busy.get(agent_id, False):
+                self._agent_busy_since[agent_id] = time.time()
+
     def _release_agent(self, agent_id: str):
         """Mark agent as no longer busy."""
         with self._agent_busy_lock:
@@ -170,19 +265,14 @@ class PlaywrightSMSService:
     async def get_or_create_session(self, agent_id: str, credentials: dict) -> FUBBrowserSession:
         """Get existing session or create new one for agent.
 
-        Waits if another operation is in progress for the same agent.
+        Waits for the agent's busy flag, the same cross-loop lock the queue
+        workers hold while they have a context open. The flag stays held on
+        return; the caller must call _release_agent() when done with the session.
         """
         logger.debug(f"get_or_create_session called for agent {agent_id}")
 
-        # Wait for agent to become available (with timeout)
-        max_wait = 120  # 2 minutes max wait
-        waited = 0
-        while not self._try_acquire_agent(agent_id):
-            if waited >= max_wait:
-                raise Exception(f"Timeout waiting for agent {agent_id} to become available")
-            logger.info(f"Agent {agent_id} is busy, waiting... ({waited}s)")
-            await asyncio.sleep(2)
-            waited += 2
+        # Wait for agent to become available (2 minutes max)
+        await self._acquire_agent(agent_id, deadline=time.time() + self.QUEUE_MAX_WAIT_SECONDS)
 
         try:
             logger.debug(f"Agent {agent_id} acquired, proceeding...")
@@ -221,12 +311,9 @@ class PlaywrightSMSService:
 
         except Exception as e:
             logger.error(f"Error in get_or_create_session for {agent_id}: {e}")
+            # No session handed out - don't leave the agent locked
+            self._release_agent(agent_id)
             raise
-        finally:
-            # Always release the agent when done with session management
-            # Note: We release here but the session is still usable
-            # The caller will use the session for their operation
-            pass  # Don't release here - release after the operation completes
 
     async def _ensure_browser_alive(self):
         """Check if the browser process is alive. If not, restart it.
@@ -407,19 +494,17 @@ class PlaywrightSMSService:
             pass
 
     async def _run_with_session(self, agent_id: str, credentials: dict, operation_name: str, operation_func, timeout: int = 90):
-        """Run an operation with a FRESH browser context each time.
+        """Run an operation on the agent's FIFO work queue.
 
-        CRITICAL DESIGN: We create a new browser context for every operation and
-        close it when done. This avoids the Railway issue where Chromium contexts
-        freeze between operations (the browser process dies or becomes unresponsive
-        after ~20-30 seconds of inactivity).
+        The operation is queued behind any others for the same agent and this
+        coroutine waits (without polling) until the agent's worker has run it.
 
-        The flow:
-        1. Ensure browser is alive (restart if dead)
-        2. Create fresh context with saved cookies
-        3. Run the operation
-        4. Save updated cookies
-        5. Close the context
+        CRITICAL DESIGN: Contexts are never kept open while the agent is idle.
+        This avoids the Railway issue where Chromium contexts freeze between
+        operations (the browser process dies or becomes unresponsive after
+        ~20-30 seconds of inactivity). Operations that are already queued run
+        back-to-back in the same context, saving the context-creation and
+        cookie-restore cost for each of them.
 
         Args:
             agent_id: Agent identifier
@@ -428,105 +513,203 @@ class PlaywrightSMSService:
             operation_func: Async function taking session as argument
             timeout: Max seconds for the operation (default 90s)
         """
-        # Wait for agent to become available
-        max_wait = 120
-        waited = 0
-        while not self._try_acquire_agent(agent_id):
-            if waited >= max_wait:
-                raise Exception(f"Timeout waiting for agent {agent_id} to become available for {operation_name}")
-
-            # CIRCUIT BREAKER: Check if agent has been stuck for too long
-            # If agent busy for >120s (longer than operation timeout of 90s), assume it's dead/frozen
-            import time
-            busy_since = self._agent_busy_since.get(agent_id)
-            if busy_since:
-                busy_duration = time.time() - busy_since
-                if busy_duration > 120:
-                    logger.error(f"Agent {agent_id} stuck for {busy_duration:.1f}s - FORCE RELEASING (circuit breaker)")
-                    # Force release the stuck agent
-                    self._release_agent(agent_id)
-                    # Invalidate its session (it's probably dead)
-                    await self._invalidate_session(agent_id)
-                    # Try to acquire again
+        state, queue = self._get_agent_queue(agent_id)
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(_QueuedOperation(
+            name=operation_name,
+            func=operation_func,
+            credentials=credentials,
+            timeout=timeout,
+            future=future,
+        ))
+        depth = state.metrics()["queue_depth"]
+        if depth > 1:
+            logger.info(f"Agent {agent_id} busy, {operation_name} queued (depth {depth})")
+        return await future
+
+    def _get_agent_queue(self, agent_id: str) -> tuple[_AgentQueue, asyncio.Queue]:
+        """Get the agent's work queue for the running loop, starting its worker if needed."""
+        loop = asyncio.get_running_loop()
+        with self._agent_busy_lock:
+            state = self._agent_queues.setdefault(agent_id, _AgentQueue())
+            queue = state.queue_for(loop)
+            worker = state.workers.get(loop)
+            if worker is None or worker.done():
+                state.workers[loop] = loop.create_task(self._agent_worker(agent_id, state, queue))
+        return state, queue
+
+    def get_queue_metrics(self) -> Dict[str, dict]:
+        """Queue depth, wait times and context reuse per agent."""
+        return {agent_id: state.metrics() for agent_id, state in self._agent_queues.items()}
+
+    async def _agent_worker(self, agent_id: str, state: _AgentQueue, queue: asyncio.Queue):
+        """Drain one loop's queue for an agent, one operation at a time, in FIFO order.
+
+        The agent's busy flag is held from opening a context until it is closed,
+        which keeps workers on other loops (and get_or_create_session) off the
+        browser. When the queue drains, the context is closed and the flag
+        released *before* the last caller is woken, so a short-lived loop that
+        finishes right after never leaves a context open or the agent locked.
+        """
+        session: Optional[FUBBrowserSession] = None
+        holds_agent = False
+        ops_in_context = 0
+
+        try:
+            while True:
+                op = await queue.get()
+                wait_ms = (time.time() - op.enqueued_at) * 1000
+                state.wait_times_ms.append(wait_ms)
+
+                if op.future.done():
+                    continue  # Caller gave up (cancelled)
+
+                if wait_ms > self.QUEUE_MAX_WAIT_SECONDS * 1000:
+                    op.future.set_exception(Exception(
+                        f"Timeout waiting for agent {agent_id} to become available for {op.name}"
+                    ))
+                    state.failed += 1
                     continue
 
-            logger.info(f"Agent {agent_id} busy, waiting for {operation_name}... ({waited}s)")
-            await asyncio.sleep(2)
-            waited += 2
+                state.in_flight += 1
+                _op_start = time.time()
+                result = None
+                error: Optional[BaseException] = None
+                try:
+                    if not holds_agent:
+                        # Another loop's worker may have the browser for this agent
+                        await self._acquire_agent(agent_id, deadline=op.enqueued_at + self.QUEUE_MAX_WAIT_SECONDS)
+                        holds_agent = True
+                    self._touch_agent(agent_id)
+                    logger.warning(f"[{op.name}] Agent {agent_id} acquired (waited {(time.time() - op.enqueued_at):.1f}s)")
+
+                    # Reuse the context only if nobody invalidated it and it's under the cap
+                    if session is not None and (
+                        self.sessions.get(agent_id) is not session
+                        or ops_in_context >= self.context_reuse_max_ops
+                    ):
+                        await self._retire_session(agent_id, session, save_cookies=True)
+                        session = None
+
+                    if session is None:
+                        session = await self._open_session(agent_id, op.credentials, op.name, _op_start)
+                        state.contexts_created += 1
+                        ops_in_context = 0
+                    else:
+                        logger.warning(f"[{op.name}] Reusing context ({ops_in_context} ops so far)")
+
+                    # Run the operation
+                    result = await asyncio.wait_for(op.func(session), timeout=op.timeout)
+                    logger.warning(f"[{op.name}] Operation complete ({time.time() - _op_start:.1f}s)")
+
+                    ops_in_context += 1
+                    state.processed += 1
+                    self._record_success(agent_id)
+                    self._operation_count += 1
+                    logger.warning(f"[{op.name}] Op count: {self._operation_count}/{self.PROACTIVE_RESTART_INTERVAL}")
+
+                except asyncio.TimeoutError:
+                    logger.error(
+                        f"[{op.name}] TIMED OUT after {time.time() - _op_start:.1f}s "
+                        f"(limit={op.timeout}s) for agent {agent_id}"
+                    )
+                    state.failed += 1
+                    self._record_failure(agent_id)
+                    await self._discard_session(agent_id, session)
+                    session = None
+                    error = Exception(f"Operation {op.name} timed out after {op.timeout}s")
 
-        session = None
-        try:
-            import time as _time
-            _op_start = _time.time()
-            logger.warning(f"[{operation_name}] Agent {agent_id} acquired")
-
-            # Check if login is on cooldown
-            on_cooldown, remaining = self._is_login_on_cooldown(agent_id)
-            if on_cooldown:
-                raise Exception(
-                    f"Login on cooldown for {agent_id}. "
-                    f"Please wait {remaining}s before retrying."
-                )
+                except Exception as e:
+                    error_msg = str(e)
+                    if any(x in error_msg.lower() for x in ['verification', 'security check', 'new location', 'email']):
+                        self._set_login_cooldown(agent_id, f"email verification failed: {error_msg[:100]}")
+                    state.failed += 1
+                    self._record_failure(agent_id)
+                    await self._discard_session(agent_id, session)
+                    session = None
+                    error = e
+
+                finally:
+                    state.in_flight -= 1
+                    logger.debug(f"Agent {agent_id} released after {op.name}")
+
+                if queue.empty():
+                    # Idle: don't leave the context open to freeze, and let other loops in
+                    if session is not None:
+                        await self._retire_session(agent_id, session, save_cookies=True)
+                        session = None
+                    if holds_agent:
+                        self._release_agent(agent_id)
+                        holds_agent = False
+
+                if not op.future.done():
+                    if error is None:
+                        op.future.set_result(result)
+                    else:
+                        op.future.set_exception(error)
+        finally:
+            # Worker cancelled (shutdown) - always close the context
+            if session is not None:
+                await self._discard_session(agent_id, session)
+            if holds_agent:
+                self._release_agent(agent_id)
+
+    async def _open_session(self, agent_id: str, credentials: dict, operation_name: str, op_start: float) -> FUBBrowserSession:
+        """Create a fresh context for the agent (cookie restore or login)."""
+        # Check if login is on cooldown
+        on_cooldown, remaining = self._is_login_on_cooldown(agent_id)
+        if on_cooldown:
+            raise Exception(
+                f"Login on cooldown for {agent_id}. "
+                f"Please wait {remaining}s before retrying."
+            )
 
-            # Ensure browser process is alive (restart if crashed)
-            await self._ensure_browser_alive()
+        # Ensure browser process is alive (restart if crashed)
+        await self._ensure_browser_alive()
 
-            # Close any stale session from previous operation
-            if agent_id in self.sessions:
-                old = self.sessions.pop(agent_id)
-                try:
-                    await asyncio.wait_for(old.close(), timeout=3)
-                except Exception:
-                    pass  # Don't care if stale close fails
+        # Close any stale session from previous operation
+        if agent_id in self.sessions:
+            old = self.sessions.pop(agent_id)
+            try:
+                await asyncio.wait_for(old.close(), timeout=3)
+            except Exception:
+                pass  # Don't care if stale close fails
 
-            # Create a FRESH session (new context + login/cookie restore)
-            logger.warning(f"[{operation_name}] Creating fresh session...")
-            session = FUBBrowserSession(self.browser, agent_id, self.session_store)
+        # Create a FRESH session (new context + login/cookie restore)
+        logger.warning(f"[{operation_name}] Creating fresh session...")
+        session = FUBBrowserSession(self.browser, agent_id, self.session_store)
+        try:
             await asyncio.wait_for(
                 session.login(credentials),
                 timeout=60  # Login timeout (includes potential 2FA)
             )
-            self._clear_login_cooldown(agent_id)
-            logger.warning(f"[{operation_name}] Session ready ({_time.time() - _op_start:.1f}s)")
-
-            # Run the operation
-            result = await asyncio.wait_for(operation_func(session), timeout=timeout)
-            logger.warning(f"[{operation_name}] Operation complete ({_time.time() - _op_start:.1f}s)")
-
-            # Save cookies for next operation, then close context
+        except BaseException:
             try:
-                await session.save_cookies_and_close()
-            except Exception as e:
-                logger.warning(f"[{operation_name}] Cookie save/close error: {e}")
-
-            session = None  # Prevent double-close in finally
-            self._record_success(agent_id)
-            self._operation_count += 1
-            logger.warning(f"[{operation_name}] Op count: {self._operation_count}/{self.PROACTIVE_RESTART_INTERVAL}")
-            return result
-
-        except asyncio.TimeoutError:
-            elapsed = _time.time() - _op_start if '_op_start' in dir() else -1
-            logger.error(f"[{operation_name}] TIMED OUT after {elapsed:.1f}s (limit={timeout}s) for agent {agent_id}")
-            self._record_failure(agent_id)
-            raise Exception(f"Operation {operation_name} timed out after {timeout}s")
-
-        except Exception as e:
-            error_msg = str(e)
-            if any(x in error_msg.lower() for x in ['verification', 'security check', 'new location', 'email']):
-                self._set_login_cooldown(agent_id, f"email verification failed: {error_msg[:100]}")
-            self._record_failure(agent_id)
+                await asyncio.wait_for(session.close(), timeout=5)
+            except Exception:
+                pass
             raise
+        self._clear_login_cooldown(agent_id)
+        self.sessions[agent_id] = session
+        logger.warning(f"[{operation_name}] Session ready ({time.time() - op_start:.1f}s)")
+        return session
+
+    async def _retire_session(self, agent_id: str, session: FUBBrowserSession, save_cookies: bool):
+        """Close a context after use, saving cookies for the next one."""
+        if self.sessions.get(agent_id) is session:
+            self.sessions.pop(agent_id, None)
+        try:
+            if save_cookies:
+                await asyncio.wait_for(session.save_cookies_and_close(), timeout=10)
+            else:
+                await asyncio.wait_for(session.close(), timeout=5)
+        except Exception as e:
+            logger.warning(f"[session] Cookie save/close error for {agent_id}: {e}")
 
-        finally:
-            # Always close the context to avoid leaving Chromium state around
-            if session:
-                try:
-                    await asyncio.wait_for(session.close(), timeout=5)
-                except Exception:
-                    pass
-            self._release_agent(agent_id)
-            logger.debug(f"Agent {agent_id} released after {operation_name}")
+    async def _discard_session(self, agent_id: str, session: Optional[FUBBrowserSession]):
+        """Close a context after a failure (cookies are not trusted)."""
+        if session is not None:
+            await self._retire_session(agent_id, session, save_cookies=False)
 
     async def send_sms(
         self,
@@ -806,6 +989,17 @@ class PlaywrightSMSService:
 
     async def shutdown(self):
         """Shutdown the service and cleanup resources."""
+        loop = asyncio.get_running_loop()
+        for state in self._agent_queues.values():
+            for worker_loop, worker in state.workers.items():
+                if worker.done() or worker_loop.is_closed():
+                    continue
+                if worker_loop is loop:
+                    worker.cancel()
+                else:
+                    worker_loop.call_soon_threadsafe(worker.cancel)
+        self._agent_queues.clear()
+
         await self.close_all_sessions()
 
         if self.browser:
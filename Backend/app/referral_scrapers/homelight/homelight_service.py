@@ -10,6 +10,7 @@ from app.referral_scrapers.base_referral_service import BaseReferralService
 from app.referral_scrapers.utils.driver_service import DriverService
 from app.referral_scrapers.utils.web_interaction_simulator import WebInteractionSimulator as wis
 from app.service.lead_service import LeadServiceSingleton
+from app.service.sync_result_sink import SyncResultSink
 from app.utils.constants import Credentials
 
 CREDS = Credentials()
@@ -900,7 +901,7 @@ class HomelightService(BaseReferralService):
 
         return False
 
-    def _process_urgent_sweep(self, leads_data: List[Tuple[Lead, str]], results: Dict[str, Any], tracker=None, sync_id: str = None) -> Dict[str, Any]:
+    def _process_urgent_sweep(self, leads_data: List[Tuple[Lead, str]], results: Dict[str, Any], tracker=None, sync_id: str = None, sink=None) -> Dict[str, Any]:
         """
         Process all urgent referrals as a final sweep after regular processing.
         This catches any leads that might be in urgent status but weren't found via normal search.
@@ -1013,13 +1014,18 @@ class HomelightService(BaseReferralService):
 
                             # Update results - increment successful, potentially decrement failed
                             # Check if this lead was previously marked as failed
-                            for detail in results.get("details", []):
-                                if detail.get("lead_id") == matched_lead.id and detail.get("status") == "failed":
-                                    detail["status"] = "success"
-                                    detail["note"] = "Updated via urgent sweep"
+                            if sink is not None:
+                                if sink.mark_recovered(matched_lead.id, "Updated via urgent sweep"):
                                     results["successful"] = results.get("successful", 0) + 1
                                     results["failed"] = max(0, results.get("failed", 0) - 1)
-                                    break
+                            else:
+                                for detail in results.get("details", []):
+                                    if detail.get("lead_id") == matched_lead.id and detail.get("status") == "failed":
+                                        detail["status"] = "success"
+                                        detail["note"] = "Updated via urgent sweep"
+                                        results["successful"] = results.get("successful", 0) + 1
+                                        results["failed"] = max(0, results.get("failed", 0) - 1)
+                                        break
                         else:
                             self.logger.info(f"[URGENT SWEEP] Update failed")
 
@@ -1826,7 +1832,9 @@ class HomelightService(BaseReferralService):
             "failed": 0,
             "details": []
         }
-        
+        # Per-lead outcomes stream to sync_lead_results instead of piling up in memory
+        sink = SyncResultSink(sync_id, "HomeLight")
+
         try:
             tracker.update_progress(sync_id, message="Logging into HomeLight...")
             login_start = time.time()
@@ -1836,6 +1844,7 @@ class HomelightService(BaseReferralService):
             if not login_success:
                 error_msg = "Failed to login to HomeLight"
                 tracker.complete_sync(sync_id, error=error_msg)
+                results.update(sink.summary())
                 return results
             
             tracker.update_progress(
@@ -1852,7 +1861,7 @@ class HomelightService(BaseReferralService):
                         sync_id,
                         message=f"Sync cancelled. Processed {processed_count} of {len(leads_data)} leads before cancellation."
                     )
-                    results["details"].append({
+                    sink.record({
                         "lead_id": None,
                         "fub_person_id": None,
                         "name": "SYNC CANCELLED",
@@ -1945,7 +1954,7 @@ class HomelightService(BaseReferralService):
                                 skipped=results["skipped"],
                                 message=f"{full_name} skipped - {skip_reason}"
                             )
-                            results["details"].append({
+                            sink.record({
                                 "lead_id": lead.id,
                                 "fub_person_id": lead.fub_person_id,
                                 "name": full_name,
@@ -2026,7 +2035,7 @@ class HomelightService(BaseReferralService):
                                 successful=results["successful"],
                                 message=f"{full_name} updated successfully"
                             )
-                            results["details"].append({
+                            sink.record({
                                 "lead_id": lead.id,
                                 "fub_person_id": lead.fub_person_id,
                                 "name": full_name,
@@ -2039,7 +2048,7 @@ class HomelightService(BaseReferralService):
                                 failed=results["failed"],
                                 message=f"{full_name} update failed"
                             )
-                            results["details"].append({
+                            sink.record({
                                 "lead_id": lead.id,
                                 "fub_person_id": lead.fub_person_id,
                                 "name": full_name,
@@ -2066,7 +2075,7 @@ class HomelightService(BaseReferralService):
                             failed=results["failed"],
                             message=f"{full_name} not found"
                         )
-                        results["details"].append({
+                        sink.record({
                             "lead_id": lead.id,
                             "fub_person_id": lead.fub_person_id,
                             "name": full_name,
@@ -2098,7 +2107,7 @@ class HomelightService(BaseReferralService):
                         failed=results["failed"],
                         message=f"Error processing {full_name}: {str(e)[:50]}"
                     )
-                    results["details"].append({
+                    sink.record({
                         "lead_id": lead.id,
                         "fub_person_id": lead.fub_person_id,
                         "name": full_name,
@@ -2113,15 +2122,17 @@ class HomelightService(BaseReferralService):
             # Run urgent sweep to catch any missed leads
             if not tracker.is_cancelled(sync_id):
                 tracker.update_progress(sync_id, message="Running urgent sweep...")
-                results = self._process_urgent_sweep(leads_data, results, tracker=tracker, sync_id=sync_id)
+                results = self._process_urgent_sweep(leads_data, results, tracker=tracker, sync_id=sync_id, sink=sink)
 
             # Complete sync with current results (will mark as cancelled if cancellation was requested)
+            results.update(sink.summary())
             tracker.complete_sync(sync_id, results=results)
             return results
             
         except Exception as e:
             logger.error(f"Error in bulk sync with tracker: {e}", exc_info=True)
-            tracker.complete_sync(sync_id, error=str(e))
+            results.update(sink.summary())
+            tracker.complete_sync(sync_id, results=results, error=str(e))
             return results
         finally:
             self.logout()
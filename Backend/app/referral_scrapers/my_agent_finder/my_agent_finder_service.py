@@ -22,6 +22,7 @@ from app.referral_scrapers.utils.web_interaction_simulator import (
 )
 from app.models.lead import Lead
 from app.service.lead_service import LeadServiceSingleton
+from app.service.sync_result_sink import SyncResultSink
 from app.referral_scrapers.base_referral_service import BaseReferralService
 
 # Constants
@@ -1665,6 +1666,9 @@ class MyAgentFinderService(BaseReferralService):
         if not leads_data:
             return results
 
+        # Per-lead outcomes stream to sync_lead_results instead of piling up in memory
+        sink = SyncResultSink(sync_id, "MyAgentFinder")
+
         try:
             # Login once
             logger.info(f"Starting bulk sync for {len(leads_data)} leads")
@@ -1672,11 +1676,12 @@ class MyAgentFinderService(BaseReferralService):
                 logger.error("Login failed - cannot process leads")
                 for lead, _ in leads_data:
                     results["failed"] += 1
-                    results["details"].append({
+                    sink.record({
                         "name": f"{lead.first_name} {lead.last_name}",
                         "status": "failed",
                         "error": "Login failed"
                     })
+                results.update(sink.summary())
                 return results
 
             # Process each lead
@@ -1689,7 +1694,7 @@ class MyAgentFinderService(BaseReferralService):
                             sync_id,
                             message=f"Sync cancelled. Processed {i} of {len(leads_data)} leads before cancellation."
                         )
-                    results["details"].append({
+                    sink.record({
                         "name": "SYNC CANCELLED",
                         "status": "cancelled",
                         "error": "Sync was cancelled by user"
@@ -1712,7 +1717,7 @@ class MyAgentFinderService(BaseReferralService):
                     # Check if lead was recently synced
                     if self._should_skip_lead(lead):
                         results["skipped"] += 1
-                        results["details"].append({
+                        sink.record({
                             "name": lead_name,
                             "status": "skipped",
                             "reason": "Recently synced"
@@ -1741,7 +1746,7 @@ class MyAgentFinderService(BaseReferralService):
                             logger.error("Re-login failed after session death - aborting remaining leads")
                             for remaining_lead, _ in leads_data[i:]:
                                 results["failed"] += 1
-                                results["details"].append({
+                                sink.record({
                                     "name": f"{remaining_lead.first_name} {remaining_lead.last_name}",
                                     "status": "failed",
                                     "error": "Session died and re-login failed"
@@ -1759,7 +1764,7 @@ class MyAgentFinderService(BaseReferralService):
 
                     if success:
                         results["successful"] += 1
-                        results["details"].append({
+                        sink.record({
                             "name": lead_name,
                             "status": "success"
                         })
@@ -1783,7 +1788,7 @@ class MyAgentFinderService(BaseReferralService):
                             if "cancelled" not in results:
                                 results["cancelled"] = 0
                             results["cancelled"] += 1
-                            results["details"].append({
+                            sink.record({
                                 "name": lead_name,
                                 "status": "cancelled",
                                 "error": "Lead is in Cancelled section on MyAgentFinder"
@@ -1791,15 +1796,16 @@ class MyAgentFinderService(BaseReferralService):
                             error_msg = f"{lead_name} is in Cancelled section"
                         elif self.last_find_result == "not_found":
                             results["failed"] += 1
-                            results["details"].append({
+                            sink.record({
                                 "name": lead_name,
-                                "status": "not_found",
+                                "status": "failed",
+                                "reason": "not_found",
                                 "error": "Lead not found in Active or Cancelled sections"
                             })
                             error_msg = f"{lead_name} not found on MAF"
                         else:
                             results["failed"] += 1
-                            results["details"].append({
+                            sink.record({
                                 "name": lead_name,
                                 "status": "failed",
                                 "error": f"Update failed ({self.last_find_result or 'unknown'})"
@@ -1820,7 +1826,7 @@ class MyAgentFinderService(BaseReferralService):
                     error_str = str(e)
                     is_session_dead = "invalid session id" in error_str.lower() or isinstance(e, InvalidSessionIdException)
                     results["failed"] += 1
-                    results["details"].append({
+                    sink.record({
                         "name": lead_name,
                         "status": "failed",
                         "error": f"Session error: {error_str[:100]}"
@@ -1843,7 +1849,7 @@ class MyAgentFinderService(BaseReferralService):
 
                 except Exception as e:
                     results["failed"] += 1
-                    results["details"].append({
+                    sink.record({
                         "name": lead_name,
                         "status": "failed",
                         "error": str(e)
@@ -1860,12 +1866,14 @@ class MyAgentFinderService(BaseReferralService):
                             message=f"Error processing {lead_name}: {str(e)[:50]}"
                         )
 
+            results.update(sink.summary())
             cancelled_count = results.get('cancelled', 0)
             logger.info(f"Bulk sync complete: {results['successful']} success, {results['failed']} failed, {cancelled_count} cancelled, {results['skipped']} skipped")
             return results
 
         except Exception as e:
             logger.error(f"Bulk sync error: {e}")
+            results.update(sink.summary())
             return results
 
         finally:
@@ -19,6 +19,7 @@ from app.utils.email_2fa_helper import Email2FAHelper, get_redfin_2fa_code
 from app.referral_scrapers.utils.driver_service import DriverService
 from app.models.lead import Lead
 from app.service.lead_service import LeadService, LeadServiceSingleton
+from app.service.sync_result_sink import SyncResultSink
 from app.referral_scrapers.base_referral_service import BaseReferralService
 
 CREDS = Credentials()
@@ -1644,6 +1645,8 @@ class RedfinService(BaseReferralService):
             "skipped": 0,
             "details": []
         }
+        # Per-lead outcomes stream to sync_lead_results instead of piling up in memory
+        sink = SyncResultSink(sync_id, "Redfin")
 
         try:
             tracker.update_progress(sync_id, message="Logging into Redfin...")
@@ -1657,13 +1660,14 @@ class RedfinService(BaseReferralService):
                 # Mark all as failed
                 for lead, status in leads_data:
                     results["failed"] += 1
-                    results["details"].append({
+                    sink.record({
                         "lead_id": lead.id,
                         "fub_person_id": lead.fub_person_id,
                         "name": f"{lead.first_name} {lead.last_name}",
                         "status": "failed",
                         "error": error_msg
                     })
+                results.update(sink.summary())
                 return results
 
             tracker.update_progress(
@@ -1683,7 +1687,7 @@ class RedfinService(BaseReferralService):
                         sync_id,
                         message=f"Sync cancelled. Processed {processed_count} of {len(leads_data)} leads."
                     )
-                    results["details"].append({
+                    sink.record({
                         "lead_id": None,
                         "fub_person_id": None,
                         "name": "SYNC CANCELLED",
@@ -1753,7 +1757,7 @@ class RedfinService(BaseReferralService):
 
                     if should_skip:
                         results["skipped"] += 1
-                        results["details"].append({
+                        sink.record({
                             "lead_id": lead.id,
                             "fub_person_id": lead.fub_person_id,
                             "name": full_name,
@@ -1768,7 +1772,7 @@ class RedfinService(BaseReferralService):
                     if success:
                         consecutive_timeouts = 0  # Reset on success
                         results["successful"] += 1
-                        results["details"].append({
+                        sink.record({
                             "lead_id": lead.id,
                             "fub_person_id": lead.fub_person_id,
                             "name": full_name,
@@ -1795,7 +1799,7 @@ class RedfinService(BaseReferralService):
                         )
                     else:
                         results["failed"] += 1
-                        results["details"].append({
+                        sink.record({
                             "lead_id": lead.id,
                             "fub_person_id": lead.fub_person_id,
                             "name": full_name,
@@ -1820,7 +1824,7 @@ class RedfinService(BaseReferralService):
                     else:
                         consecutive_timeouts = 0
                     results["failed"] += 1
-                    results["details"].append({
+                    sink.record({
                         "lead_id": lead.id,
                         "fub_person_id": lead.fub_person_id,
                         "name": full_name,
@@ -1839,17 +1843,14 @@ class RedfinService(BaseReferralService):
                 self.wis.human_delay(1, 2)
 
             # Complete the sync
-            tracker.complete_sync(
-                sync_id,
-                total=len(leads_data),
-                successful=results["successful"],
-                failed=results["failed"]
-            )
+            results.update(sink.summary())
+            tracker.complete_sync(sync_id, results=results)
 
         except Exception as e:
             error_msg = f"Bulk update error: {str(e)}"
             logger.error(error_msg)
-            tracker.complete_sync(sync_id, error=error_msg)
+            results.update(sink.summary())
+            tracker.complete_sync(sync_id, results=results, error=error_msg)
 
         finally:
             self.close()
@@ -17,6 +17,8 @@ from typing import Optional, Dict, Any, List
 from celery import shared_task
 import asyncio
 
+from app.ai_agent.conversation_history_cache import get_conversation_history_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -588,11 +590,16 @@ def cancel_lead_sequences(self, fub_person_id: int, reason: str = None):
     supabase = SupabaseClientSingleton.get_instance()
     total_cancelled = 0
 
-    # Cancel from scheduled_messages table
+    # Cancel from scheduled_messages table. Delayed AI replies are left alone:
+    # this task is dispatched when the lead's message arrives and can run after
+    # the reply to that very message was queued. Queuing the reply to a newer
+    # message supersedes them instead (see DelayedReplyQueue.supersede).
     try:
         result = supabase.table("scheduled_messages").update({
             "status": "cancelled",
-        }).eq("fub_person_id", fub_person_id).eq("status", "pending").execute()
+        }).eq("fub_person_id", fub_person_id).eq("status", "pending").or_(
+            "sequence_type.is.null,sequence_type.neq.delayed_reply"
+        ).execute()
 
         count = len(result.data) if result.data else 0
         total_cancelled += count
@@ -967,14 +974,16 @@ def send_re_engagement_message(self, fub_person_id: int, attempt_number: int = 1
         }).eq("fub_person_id", fub_person_id).execute()
 
         # Log the message
-        supabase.table("ai_message_log").insert({
+        log_row = {
             "fub_person_id": fub_person_id,
             "direction": "outbound",
             "channel": channel,
             "message_content": message,
             "intent_detected": f"re_engagement_{attempt_number}",
             "created_at": datetime.utcnow().isoformat(),
-        }).execute()
+        }
+        supabase.table("ai_message_log").insert(log_row).execute()
+        get_conversation_history_cache(supabase).append(log_row)
 
         logger.info(f"Re-engagement message #{attempt_number} sent via {channel} to {fub_person_id}")
 
@@ -1185,10 +1194,12 @@ def process_pending_messages(self):
     supabase = SupabaseClientSingleton.get_instance()
     now = datetime.utcnow()
 
-    # Get all due messages
+    # Get all due messages (delayed AI replies have their own dispatcher on the webhook loop)
     result = supabase.table("scheduled_messages").select("*").eq(
         "status", "pending"
-    ).lte("scheduled_for", now.isoformat()).limit(100).execute()
+    ).lte("scheduled_for", now.isoformat()).or_(
+        "sequence_type.is.null,sequence_type.neq.delayed_reply"
+    ).limit(100).execute()
 
     if not result.data:
         return {"processed": 0}
@@ -1235,6 +1246,31 @@ def cleanup_old_messages(self, days_old: int = 30):
     return {"deleted": deleted}
 
 
+@shared_task(bind=True)
+def refresh_active_lead_profiles(self, limit: int = 50):
+    """
+    Re-warm lead profile caches for recently active leads before they expire.
+
+    Leads that texted or were updated recently get their profile refreshed
+    ahead of the 24h TTL, so their next message doesn't pay for a full
+    FUB refresh.
+    """
+    from app.database.supabase_client import SupabaseClientSingleton
+    from app.database.fub_api_client import FUBApiClient
+    from app.ai_agent.lead_profile_cache import get_lead_profile_cache
+
+    cache = get_lead_profile_cache(
+        supabase_client=SupabaseClientSingleton.get_instance(),
+        fub_client=FUBApiClient(),
+    )
+    stats = asyncio.run(cache.refresh_due_profiles(limit=limit))
+
+    logger.info(
+        f"Profile re-warm: {stats['active']} active, {stats['due']} due, {stats['refreshed']} refreshed"
+    )
+    return stats
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -1266,14 +1302,7 @@ def _mark_message_skipped(supabase, message_id: str, reason: str):
 
 def _get_conversation_history(supabase, fub_person_id: int) -> List[Dict]:
     """Get conversation history for a lead."""
-    result = supabase.table("ai_message_log").select("*").eq(
-        "fub_person_id", fub_person_id
-    ).order("created_at", desc=True).limit(20).execute()
-
-    if result.data:
-        # Reverse to get chronological order
-        return list(reversed(result.data))
-    return []
+    return get_conversation_history_cache(supabase).get_recent(fub_person_id, limit=20)
 
 
 def _get_conversation_context(supabase, fub_person_id: int):
@@ -1388,26 +1417,33 @@ def _trigger_handoff(fub_client, supabase, fub_person_id: int, reason: str):
 
 def _log_ai_interaction(supabase, fub_person_id: int, incoming: str, response):
     """Log AI interaction for analytics and debugging."""
-    supabase.table("ai_message_log").insert({
+    rows = [{
         "fub_person_id": fub_person_id,
         "direction": "inbound",
-        "content": incoming,
+        "message_content": incoming,
         "channel": "sms",
         "created_at": datetime.utcnow().isoformat(),
-    }).execute()
+    }]
 
     if response.response_text:
-        supabase.table("ai_message_log").insert({
+        rows.append({
             "fub_person_id": fub_person_id,
             "direction": "outbound",
-            "content": response.response_text,
+            "message_content": response.response_text,
             "channel": "sms",
             "ai_model": response.model_used,
-            "detected_intent": response.detected_intent,
-            "detected_sentiment": response.detected_sentiment,
-            "conversation_state": response.conversation_state,
+            "intent_detected": response.detected_intent,
+            "extracted_data": {
+                "sentiment": response.detected_sentiment,
+                "conversation_state": response.conversation_state,
+            },
             "created_at": datetime.utcnow().isoformat(),
-        }).execute()
+        })
+
+    history_cache = get_conversation_history_cache(supabase)
+    for log_row in rows:
+        supabase.table("ai_message_log").insert(log_row).execute()
+        history_cache.append(log_row)
 
 
 # ============================================================================
@@ -1662,12 +1698,41 @@ NURTURE_SEQUENCES = {
 # NEXT BEST ACTION SCAN TASK (Runs every 15 minutes)
 # ============================================================================
 
+def _nba_scan_shards(supabase) -> Dict[str, str]:
+    """
+    Organizations that have leads, mapped to each one's own timezone.
+
+    Leads without an organization get an UNASSIGNED_ORGANIZATION shard, so
+    every lead the unscoped scan used to cover is still scanned.
+    """
+    from app.ai_agent.next_best_action import UNASSIGNED_ORGANIZATION
+
+    lead_orgs = supabase.rpc("list_lead_organization_ids", {}).execute()
+    settings = supabase.table("ai_agent_settings").select(
+        "organization_id, user_id, timezone"
+    ).not_.is_("organization_id", "null").execute()
+
+    timezones = {}
+    for row in settings.data or []:
+        org_id = row["organization_id"]
+        # Org-level settings (no user_id) win over a user's override
+        if org_id not in timezones or not row.get("user_id"):
+            timezones[org_id] = row.get("timezone")
+
+    shards = {}
+    for row in lead_orgs.data or []:
+        org_id = row.get("organization_id") or UNASSIGNED_ORGANIZATION
+        shards[org_id] = timezones.get(org_id) or "America/New_York"
+    return shards
+
+
 @shared_task(bind=True)
 def run_nba_scan_task(
     self,
     organization_id: str = None,
     execute: bool = True,
     batch_size: int = 50,
+    timezone: str = None,
 ):
     """
     Run the Next Best Action scan to find leads needing attention.
@@ -1675,6 +1740,10 @@ def run_nba_scan_task(
     This task should be scheduled to run every 15 minutes via Celery Beat.
     It proactively scans all leads and determines the optimal action to take.
 
+    Without an organization_id the task fans out one shard per organization
+    (each with its own timezone for TCPA hours), so total scan time stays
+    flat as organizations are added.
+
     Actions include:
     - First contact for new leads
     - Follow-up for leads that went silent
@@ -1684,7 +1753,8 @@ def run_nba_scan_task(
     Args:
         organization_id: Filter by organization (optional)
         execute: Whether to execute recommended actions
-        batch_size: Number of leads to process per run
+        batch_size: Number of leads to process per run (per organization)
+        timezone: The organization's timezone (set by the fan-out)
 
     Schedule via Celery Beat:
         'run-nba-scan': {
@@ -1692,7 +1762,28 @@ def run_nba_scan_task(
             'schedule': crontab(minute='*/15'),  # Every 15 minutes
         }
     """
-    logger.info(f"Starting NBA scan task (execute={execute}, batch_size={batch_size})")
+    if organization_id is None:
+        try:
+            from app.database.supabase_client import SupabaseClientSingleton
+            shards = _nba_scan_shards(SupabaseClientSingleton.get_instance())
+        except Exception as e:
+            logger.warning(f"Could not list organizations for NBA scan, scanning unsharded: {e}")
+            shards = {}
+
+        if shards:
+            for org_id, org_timezone in shards.items():
+                run_nba_scan_task.delay(
+                    organization_id=org_id,
+                    execute=execute,
+                    batch_size=batch_size,
+                    timezone=org_timezone,
+                )
+            logger.info(f"NBA scan fanned out to {len(shards)} organization shards")
+            return {"success": True, "shards": len(shards), "organizations": list(shards)}
+
+    logger.info(
+        f"Starting NBA scan task (org={organization_id}, execute={execute}, batch_size={batch_size})"
+    )
 
     try:
         from app.ai_agent.next_best_action import run_nba_scan
@@ -1702,10 +1793,11 @@ def run_nba_scan_task(
             organization_id=organization_id,
             execute=execute,
             batch_size=batch_size,
+            timezone=timezone,
         ))
 
         logger.info(
-            f"NBA scan complete: {result['recommendations_count']} recommendations, "
+            f"NBA scan complete (org={organization_id}): {result['recommendations_count']} recommendations, "
             f"{result['executed_count']} executed, {result['skipped_count']} skipped"
         )
 
@@ -1716,6 +1808,121 @@ def run_nba_scan_task(
         return {"success": False, "error": str(e)}
 
 
+# ============================================================================
+# LEAD RESCORING TASK (Runs daily)
+# ============================================================================
+
+@shared_task(bind=True)
+def rescore_leads_task(self, organization_id: str = None, dry_run: bool = False):
+    """
+    Rescore and decay every lead in an organization, then update tiers.
+
+    Without an organization_id the task fans out one run per organization
+    (same shards as the NBA scan), so each org's leads are scored in
+    its own batch. Leads without an organization are not rescored: tiers
+    are written per organization (apply_lead_tiers) and have no org to
+    scope to.
+
+    Args:
+        organization_id: Organization to rescore (optional)
+        dry_run: Score and count without writing anything
+
+    Schedule via Celery Beat:
+        'rescore-leads': {
+            'task': 'app.scheduler.ai_tasks.rescore_leads_task',
+            'schedule': crontab(hour=7, minute=15),  # Daily
+        }
+    """
+    from app.database.supabase_client import SupabaseClientSingleton
+    from app.ai_agent.next_best_action import UNASSIGNED_ORGANIZATION
+
+    if organization_id is None:
+        try:
+            shards = _nba_scan_shards(SupabaseClientSingleton.get_instance())
+        except Exception as e:
+            logger.error(f"Could not list organizations for lead rescoring: {e}")
+            return {"success": False, "error": str(e)}
+        shards.pop(UNASSIGNED_ORGANIZATION, None)
+
+        for org_id in shards:
+            rescore_leads_task.delay(organization_id=org_id, dry_run=dry_run)
+        logger.info(f"Lead rescoring fanned out to {len(shards)} organizations")
+        return {"success": True, "shards": len(shards), "organizations": list(shards)}
+
+    try:
+        from app.ai_agent.batch_lead_scorer import get_batch_lead_scorer
+
+        scorer = get_batch_lead_scorer(SupabaseClientSingleton.get_instance())
+        stats = asyncio.run(scorer.rescore_organization(organization_id, dry_run=dry_run))
+        return {"success": "error" not in stats, **stats}
+
+    except Exception as e:
+        logger.error(f"Error in lead rescoring task: {e}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# CAMPAIGN SEND TASK (Runs every minute)
+# ============================================================================
+
+async def _deliver_campaign_sms(lead: Dict[str, Any], campaign: Dict[str, Any]) -> bool:
+    """Render and send one re-engagement campaign text (CampaignSendEngine deliver)."""
+    from app.ai_agent.template_engine import get_template_engine
+
+    fub_person_id = lead["fub_person_id"]
+    variables = {"first_name": lead.get("first_name") or "there", "area": "the area"}
+
+    if campaign.get("custom_message"):
+        message = campaign["custom_message"].replace("{first_name}", variables["first_name"])
+    else:
+        template_engine = get_template_engine()
+        message = None
+        if campaign.get("message_template"):
+            message = template_engine.get_message(
+                campaign["message_template"], variables, lead_id=str(fub_person_id), track_ab_test=False,
+            )
+        if not message:
+            message = template_engine.get_message(
+                "re_engage_cold", variables, lead_id=str(fub_person_id), track_ab_test=False,
+            )
+
+    result = await _send_sms_via_fub_api(fub_person_id, message, organization_id=campaign["organization_id"])
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "FUB send failed")
+    return True
+
+
+@shared_task(bind=True)
+def run_campaign_sends_task(self, organization_id: str = None):
+    """
+    Send the due leads of every running re-engagement campaign.
+
+    Each run is one CampaignSendEngine tick (under a minute): today's
+    batches are spread over each recipient's texting window, and due leads
+    are claimed, checked and sent within the per-org and global caps.
+
+    Args:
+        organization_id: Only run this organization's campaigns (optional)
+
+    Schedule via Celery Beat:
+        'run-campaign-sends': {
+            'task': 'app.scheduler.ai_tasks.run_campaign_sends_task',
+            'schedule': crontab(minute='*'),  # Every minute
+        }
+    """
+    try:
+        from app.database.supabase_client import SupabaseClientSingleton
+        from app.ai_agent.campaign_send_engine import CampaignSendEngine
+
+        engine = CampaignSendEngine(SupabaseClientSingleton.get_instance(), deliver=_deliver_campaign_sms)
+        result = asyncio.run(engine.tick(organization_id=organization_id))
+        return {"success": True, **result}
+
+    except Exception as e:
+        logger.error(f"Error in campaign send task: {e}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+
 @shared_task(bind=True)
 def trigger_new_lead_followup(
     self,
@@ -1964,14 +2171,16 @@ def trigger_instant_ai_response(
                         logger.info(f"✅ Instant EMAIL sent to person {fub_person_id}")
 
                         # Log the email
-                        supabase.table("ai_message_log").insert({
+                        log_row = {
                             "fub_person_id": fub_person_id,
                             "direction": "outbound",
                             "channel": "email",
                             "message_content": outreach.email_subject,
                             "intent_detected": "first_contact_instant_email",
                             "created_at": datetime.utcnow().isoformat(),
-                        }).execute()
+                        }
+                        supabase.table("ai_message_log").insert(log_row).execute()
+                        get_conversation_history_cache(supabase).append(log_row)
                     else:
                         logger.warning(f"Email send failed: {email_result.error}")
 
@@ -1990,14 +2199,16 @@ def trigger_instant_ai_response(
             }, on_conflict="fub_person_id").execute()
 
             # Log the SMS message
-            supabase.table("ai_message_log").insert({
+            log_row = {
                 "fub_person_id": fub_person_id,
                 "direction": "outbound",
                 "channel": "sms",
                 "message_content": message,
                 "intent_detected": "first_contact_instant",
                 "created_at": datetime.utcnow().isoformat(),
-            }).execute()
+            }
+            supabase.table("ai_message_log").insert(log_row).execute()
+            get_conversation_history_cache(supabase).append(log_row)
 
             # Now schedule the REST of the aggressive sequence (skip step 0)
             # The remaining steps: 30min, Day 1, Day 2, etc.
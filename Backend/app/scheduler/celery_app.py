@@ -55,15 +55,28 @@ celery.conf.beat_schedule = {
         'task': 'app.scheduler.ai_tasks.run_nba_scan_task',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    # Rescore and decay all leads per organization, refresh tiers/priority scores
+    'rescore_leads': {
+        'task': 'app.scheduler.ai_tasks.rescore_leads_task',
+        'schedule': crontab(hour=7, minute=15),  # Daily at 7:15 UTC
+    },
+    # Send due re-engagement campaign leads (paced, per-org and global caps)
+    'run_campaign_sends': {
+        'task': 'app.scheduler.ai_tasks.run_campaign_sends_task',
+        'schedule': crontab(minute='*'),  # Every minute
+    },
     # Process pending scheduled messages (follow-up sequences, deferred messages)
     'process_pending_messages': {
         'task': 'app.scheduler.ai_tasks.process_pending_messages',
         'schedule': crontab(minute='*/5'),  # Every 5 minutes
     },
+    # Re-warm lead profile caches for active leads before their 24h TTL expires
+    'refresh_active_lead_profiles': {
+        'task': 'app.scheduler.ai_tasks.refresh_active_lead_profiles',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
 }
 
-celery.conf.timezone = 'Asia/Manila'
-
 # Update configuration for webhook handling
 celery.conf.update(
     task_routes={
@@ -74,7 +87,7 @@ celery.conf.update(
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
-    timezone='UTC',
+    timezone='UTC',  # beat_schedule crontabs above are in UTC
     enable_utc=True,
     
     # Webhook-specific settings
@@ -209,6 +209,19 @@ def bulk_sync_lead_sources(self, force_sync: bool = False) -> Dict[str, Any]:
     return {"processed_sources": len(summary), "details": summary}
 
 
+@celery.task(bind=True, max_retries=0, time_limit=7200, soft_time_limit=7000)
+def run_bulk_enrichment_job(self, job_id: str) -> Dict[str, Any]:
+    """Run (or resume) a bulk contact enrichment job.
+
+    See app.enrichment.bulk_enrichment; re-queueing a paused or interrupted
+    job picks up the people still pending.
+    """
+    from app.enrichment.bulk_enrichment import get_bulk_enrichment_service
+
+    logger.info("Bulk enrichment: running job %s", job_id)
+    return get_bulk_enrichment_service().run_job(job_id)
+
+
 def _kill_chrome_processes():
     """Kill any lingering Chrome/ChromeDriver processes to free memory between platform syncs."""
     import subprocess
@@ -135,27 +135,46 @@ class LeadService:
             )
 
             if result.data and len(result.data) > 0:
-                import json
-                lead = Lead()
-                data = result.data[0]
-
-                for key, value in data.items():
-                    if hasattr(lead, key):
-                        # Parse metadata if it's a JSON string
-                        if key == "metadata" and isinstance(value, str):
-                            try:
-                                value = json.loads(value)
-                            except (json.JSONDecodeError, TypeError):
-                                value = {}
-                        setattr(lead, key, value)
-
-                return lead
+                return self.lead_from_row(result.data[0])
 
             return None
         except Exception as e:
             print(f"Error retrieving lead with FUB person ID {fub_person_id}: {str(e)}")
             return None
 
+    def get_by_fub_person_ids(self, fub_person_ids: List[str]) -> Dict[str, "Lead"]:
+        """Get leads for many FUB person IDs in one query, keyed by FUB person ID.
+
+        Query errors are raised (a missing key means the lead doesn't exist).
+        """
+        if not fub_person_ids:
+            return {}
+        result = (
+            self.supabase.table(self.table_name)
+            .select("*")
+            .in_("fub_person_id", [str(pid) for pid in fub_person_ids])
+            .execute()
+        )
+        return {
+            str(row["fub_person_id"]): self.lead_from_row(row)
+            for row in result.data or []
+        }
+
+    @staticmethod
+    def lead_from_row(data: Dict[str, Any]) -> "Lead":
+        import json
+        lead = Lead()
+        for key, value in data.items():
+            if hasattr(lead, key):
+                # Parse metadata if it's a JSON string
+                if key == "metadata" and isinstance(value, str):
+                    try:
+                        value = json.loads(value)
+                    except (json.JSONDecodeError, TypeError):
+                        value = {}
+                setattr(lead, key, value)
+        return lead
+
     # Get leads by agent ID
     def get_by_agent_id(
         self, agent_id: str, limit: int = 100, offset: int = 0
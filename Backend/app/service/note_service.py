@@ -104,6 +104,24 @@ class NoteService:
             return note
         
         return None
+
+    def get_by_note_ids(self, note_ids: List[str]) -> Dict[str, LeadNote]:
+        """Get notes for many FUB note IDs in one query, keyed by FUB note ID.
+
+        Query errors are raised (a missing key means the note doesn't exist).
+        """
+        if not note_ids:
+            return {}
+        result = self.supabase.table(self.table_name).select('*').in_('note_id', [str(n) for n in note_ids]).execute()
+
+        notes = {}
+        for data in result.data or []:
+            note = LeadNote()
+            for key, value in data.items():
+                if hasattr(note, key):
+                    setattr(note, key, value)
+            notes[str(data['note_id'])] = note
+        return notes
     
     
     def get_notes_for_lead(self, lead_id: str, limit: int = 100, offset: int = 0) -> List[LeadNote]:
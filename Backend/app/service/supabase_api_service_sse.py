@@ -4,7 +4,6 @@ Server-Sent Events endpoints for real-time sync updates
 from flask import Response, stream_with_context, Blueprint
 from app.service.sync_status_tracker import get_tracker
 import json
-import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -65,6 +64,35 @@ def get_sync_status(sync_id):
         }), 500
 
 
+@sse_bp.route("/sync-status/<sync_id>/results", methods=["GET"])
+def get_sync_results(sync_id):
+    """Page through a sync's per-lead results (?status=failed&offset=0&limit=100)"""
+    from flask import jsonify, request
+    from app.service.sync_result_sink import get_sync_results as fetch_sync_results
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 100)), 1), 500)
+        results = fetch_sync_results(sync_id, status=request.args.get("status"), offset=offset, limit=limit)
+
+        return jsonify({
+            "success": True,
+            "data": results,
+            "offset": offset,
+            "limit": limit
+        }), 200
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "offset and limit must be integers"
+        }), 400
+    except Exception as e:
+        logger.error(f"Error getting sync results: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
 @sse_bp.route("/sync-status/<sync_id>/cancel", methods=["POST"])
 def cancel_sync(sync_id):
     """Cancel a running sync"""
@@ -93,58 +121,38 @@ def cancel_sync(sync_id):
 
 @sse_bp.route("/sync-status/<sync_id>/stream", methods=["GET"])
 def stream_sync_status(sync_id):
-    """Stream sync status updates via Server-Sent Events"""
+    """
+    Stream sync status updates via Server-Sent Events
+
+    Sends one full status snapshot, then only the deltas (progress counters,
+    new messages) as the sync publishes them, and a final 'complete' event.
+    Works whichever process or replica is running the sync.
+    """
+    from flask import request
+
+    last_event_id = request.headers.get("Last-Event-ID")
+
     def generate():
         tracker = get_tracker()
-        last_message_count = 0
-        
+
         try:
-            # Send initial status
-            status = tracker.get_status(sync_id)
-            if not status:
-                yield f"data: {json.dumps({'error': 'Sync not found'})}\n\n"
-                return
-            
-            yield f"data: {json.dumps({'type': 'status', 'data': status})}\n\n"
-            
-            # Keep connection alive and send updates
-            while True:
-                status = tracker.get_status(sync_id)
-                
-                if not status:
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'Sync not found'})}\n\n"
-                    break
-                
-                # Check if sync is complete
-                if status.get("status") in ["completed", "failed", "cancelled"]:
-                    yield f"data: {json.dumps({'type': 'complete', 'data': status})}\n\n"
-                    break
-                
-                # Check if sync is being cancelled
-                if status.get("status") == "cancelling":
-                    yield f"data: {json.dumps({'type': 'status', 'data': status})}\n\n"
-                
-                # Send update if there are new messages
-                current_message_count = len(status.get("messages", []))
-                if current_message_count > last_message_count:
-                    new_messages = status.get("messages", [])[last_message_count:]
-                    for msg in new_messages:
-                        yield f"data: {json.dumps({'type': 'message', 'data': msg})}\n\n"
-                    last_message_count = current_message_count
-                
-                # Send periodic status update
-                yield f"data: {json.dumps({'type': 'status', 'data': status})}\n\n"
-                
-                # Wait before next check
-                time.sleep(1)
-                
+            for item in tracker.stream_events(sync_id, last_event_id=last_event_id):
+                if item is None:
+                    # Keepalive comment - also how a closed client gets noticed
+                    yield ": keepalive\n\n"
+                    continue
+
+                event_id, event = item
+                prefix = f"id: {event_id}\n" if event_id else ""
+                yield f"{prefix}data: {json.dumps(event, default=str)}\n\n"
+
         except GeneratorExit:
             # Client disconnected
             pass
         except Exception as e:
             logger.error(f"Error in sync stream: {str(e)}")
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-    
+
     return Response(
         stream_with_context(generate()),
         mimetype='text/event-stream',
@@ -154,4 +162,3 @@ def stream_sync_status(sync_id):
             'Connection': 'keep-alive'
         }
     )
-
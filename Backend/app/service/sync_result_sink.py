@@ -0,0 +1,204 @@
+"""
+Sync Result Sink - streams per-lead bulk sync outcomes out of memory
+
+Referral bulk syncs used to collect every lead's result dict in a list that
+lived for the whole sync (hours, on a 10k-lead run). The sink instead writes
+each outcome to the sync_lead_results table in small batches and keeps only:
+- counters per status
+- a ring buffer of the most recent results (shown in the sync summary)
+- the ids of failed leads (so a later pass can mark them recovered)
+
+The final summary is counted from the table; the full list of results is
+paged from there (GET /sync-status/<sync_id>/results).
+
+Usage:
+    sink = SyncResultSink(sync_id, "Redfin")
+    sink.record({"lead_id": lead.id, "name": name, "status": "success"})
+    ...
+    results.update(sink.summary())
+
+If the table can't be written the sink keeps going on its in-memory
+counters, so a database hiccup never fails the sync itself.
+"""
+import logging
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Detail "status" values and the summary keys they are counted under
+SUMMARY_KEYS = {
+    "success": "successful",
+    "failed": "failed",
+    "skipped": "skipped",
+}
+
+
+class SyncResultSink:
+    """Bounded-memory writer for per-lead bulk sync results."""
+
+    TABLE_NAME = "sync_lead_results"
+    FLUSH_SIZE = 50
+    RECENT_SIZE = 50
+
+    def __init__(
+        self,
+        sync_id: Optional[str],
+        source_name: str,
+        supabase_client=None,
+        flush_size: int = FLUSH_SIZE,
+        recent_size: int = RECENT_SIZE,
+    ):
+        """
+        Args:
+            sync_id: Sync being recorded; without one nothing is persisted
+            source_name: Platform name stored with each row
+            supabase_client: Database client (defaults to the shared one)
+            flush_size: Rows buffered before a batch insert
+            recent_size: Results kept in memory for the summary
+        """
+        self.sync_id = sync_id
+        self.source_name = source_name
+        self.flush_size = flush_size
+        self.counts: Counter = Counter()
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent_size)
+        self.recorded = 0
+        self.write_errors = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._failed_lead_ids: Set[str] = set()
+
+        self.supabase = None
+        if sync_id:
+            try:
+                from app.database.supabase_client import SupabaseClientSingleton
+                self.supabase = supabase_client or SupabaseClientSingleton.get_instance()
+            except Exception as e:
+                logger.warning(f"Sync results for {sync_id} will not be persisted: {e}")
+
+    def record(self, detail: Dict[str, Any]) -> None:
+        """Record one lead's outcome (a detail dict with at least a status)."""
+        status = detail.get("status", "unknown")
+        self.counts[status] += 1
+        self.recorded += 1
+        self.recent.append(detail)
+
+        lead_id = detail.get("lead_id")
+        if status == "failed" and lead_id is not None:
+            self._failed_lead_ids.add(str(lead_id))
+
+        if self.supabase is not None:
+            self._buffer.append(self._row(detail))
+            if len(self._buffer) >= self.flush_size:
+                self.flush()
+
+    def mark_recovered(self, lead_id: Any, note: str) -> bool:
+        """
+        Flip a lead recorded as failed to success (e.g. fixed by a later sweep).
+
+        Returns:
+            True if the lead had failed in this sync
+        """
+        key = str(lead_id)
+        if key not in self._failed_lead_ids:
+            return False
+        self._failed_lead_ids.discard(key)
+        self.counts["failed"] -= 1
+        self.counts["success"] += 1
+
+        for detail in self.recent:
+            if str(detail.get("lead_id")) == key and detail.get("status") == "failed":
+                detail["status"] = "success"
+                detail["note"] = note
+
+        if self.supabase is not None:
+            self.flush()
+            try:
+                self.supabase.table(self.TABLE_NAME).update({
+                    "status": "success",
+                    "error": None,
+                    "detail": {"lead_id": lead_id, "status": "success", "note": note},
+                }).eq("sync_id", self.sync_id).eq("lead_id", key).eq("status", "failed").execute()
+            except Exception as e:
+                self.write_errors += 1
+                logger.warning(f"Could not mark lead {lead_id} recovered in sync {self.sync_id}: {e}")
+        return True
+
+    def flush(self) -> None:
+        """Write buffered rows."""
+        if not self._buffer or self.supabase is None:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            self.supabase.table(self.TABLE_NAME).insert(rows).execute()
+        except Exception as e:
+            self.write_errors += 1
+            logger.warning(f"Could not write {len(rows)} sync results for {self.sync_id}: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Final counts plus the most recent results.
+
+        Counts come from the results table when every write succeeded,
+        otherwise from the in-memory counters.
+        """
+        self.flush()
+        counts = self._persisted_counts() if self.supabase is not None and not self.write_errors else None
+        if counts is None:
+            counts = {key: self.counts[status] for status, key in SUMMARY_KEYS.items()}
+
+        return {
+            **counts,
+            "details": list(self.recent),
+            "details_truncated": self.recorded > len(self.recent),
+            "recorded": self.recorded,
+            "results_table": self.TABLE_NAME if self.supabase is not None else None,
+        }
+
+    # ------------------------------------------------------------------
+
+    def _row(self, detail: Dict[str, Any]) -> Dict[str, Any]:
+        lead_id = detail.get("lead_id")
+        fub_person_id = detail.get("fub_person_id")
+        return {
+            "sync_id": self.sync_id,
+            "source": self.source_name,
+            "lead_id": str(lead_id) if lead_id is not None else None,
+            "fub_person_id": str(fub_person_id) if fub_person_id is not None else None,
+            "name": detail.get("name"),
+            "status": detail.get("status", "unknown"),
+            "error": detail.get("error") or detail.get("reason"),
+            "detail": detail,
+        }
+
+    def _persisted_counts(self) -> Optional[Dict[str, int]]:
+        try:
+            counts = {}
+            for status, key in SUMMARY_KEYS.items():
+                result = self.supabase.table(self.TABLE_NAME).select(
+                    "id", count="exact"
+                ).eq("sync_id", self.sync_id).eq("status", status).limit(1).execute()
+                counts[key] = result.count or 0
+            return counts
+        except Exception as e:
+            logger.warning(f"Could not count sync results for {self.sync_id}, using in-memory counts: {e}")
+            return None
+
+
+def get_sync_results(
+    sync_id: str,
+    status: str = None,
+    offset: int = 0,
+    limit: int = 100,
+    supabase_client=None,
+) -> List[Dict[str, Any]]:
+    """Page through the stored per-lead results of a sync."""
+    from app.database.supabase_client import SupabaseClientSingleton
+
+    supabase = supabase_client or SupabaseClientSingleton.get_instance()
+    query = supabase.table(SyncResultSink.TABLE_NAME).select(
+        "lead_id, fub_person_id, name, status, error, detail, created_at"
+    ).eq("sync_id", sync_id)
+    if status:
+        query = query.eq("status", status)
+    result = query.order("id").range(offset, offset + limit - 1).execute()
+    return result.data or []
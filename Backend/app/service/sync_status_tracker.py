@@ -1,64 +1,116 @@
 """
 Sync Status Tracker - Manages real-time sync status for frontend updates
+
+Bulk syncs usually run in a Celery worker while the SSE endpoint is served
+by a Flask process, so status lives in Redis where every process and
+replica can see it:
+
+- sync:{id}:status    hash of the scalar status fields (JSON-encoded values)
+- sync:{id}:messages  list of the last MAX_MESSAGES progress messages
+- sync:{id}:details   list of the last MAX_DETAILS per-lead result details
+                      (the full list is in sync_lead_results, see SyncResultSink)
+- sync:{id}:events    stream of deltas (progress / message / complete),
+                      capped at STREAM_MAXLEN entries
+- sync:user:{user_id} set of the user's running sync ids
+
+Writers append a delta to the stream alongside each change. SSE clients take
+one snapshot, then block on XREAD and forward only the new deltas - no
+polling and no re-serializing the full status every second. Stream ids are
+sent as SSE event ids, so a reconnecting EventSource resumes where it left
+off (Last-Event-ID).
+
+Every process also keeps its own in-memory copy of the syncs it runs. If
+Redis is unavailable the tracker works from that copy alone, as before
+(status is then only visible to the process running the sync).
 """
+import json
+import logging
+import queue
 import threading
 import time
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 from collections import defaultdict
 
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("running", "in_progress", "cancelling")
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# (event_id, event) pairs yielded by stream_events(); None means "still waiting"
+StreamItem = Optional[Tuple[Optional[str], Dict[str, Any]]]
+
+
 class SyncStatusTracker:
-    """Thread-safe tracker for sync progress"""
-    
-    _instance = None
-    _lock = threading.Lock()
-    
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(SyncStatusTracker, cls).__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
-    
-    def __init__(self):
-        if self._initialized:
-            return
-            
+    """Thread-safe, cross-process tracker for sync progress"""
+
+    KEY_PREFIX = "sync"
+    MAX_MESSAGES = 100
+    MAX_DETAILS = 200
+    STREAM_MAXLEN = 500
+    KEY_TTL_SECONDS = 24 * 3600
+    REDIS_RETRY_SECONDS = 60
+    IDLE_TIMEOUT_SECONDS = 15.0  # SSE keepalive interval
+
+    def __init__(self, redis_service=None):
         self._lock = threading.Lock()
         self._statuses: Dict[str, Dict[str, Any]] = {}  # {sync_id: status}
         self._listeners: Dict[str, List] = defaultdict(list)  # {sync_id: [callbacks]}
         self._cancelled: Dict[str, bool] = {}  # {sync_id: cancelled}
-        self._initialized = True
-    
+
+        self.redis = redis_service
+        self._redis_retry_at = 0.0 if redis_service is None else float("inf")
+
+    # ------------------------------------------------------------------
+    # Writers (called from the process running the sync)
+    # ------------------------------------------------------------------
+
     def start_sync(self, sync_id: str, source_id: str, source_name: str, total_leads: int, user_id: str) -> None:
         """Initialize a new sync status"""
+        status = {
+            "sync_id": sync_id,
+            "source_id": source_id,
+            "source_name": source_name,
+            "user_id": user_id,
+            "status": "running",
+            "started_at": _now(),
+            "total_leads": total_leads,
+            "processed": 0,
+            "successful": 0,
+            "failed": 0,
+            "skipped": 0,
+            "current_lead": None,
+            "messages": [],
+            "details": [],
+            "filter_summary": None,
+            "completed_at": None,
+            "error": None,
+            "cancelled": False
+        }
+        # Finished syncs are dropped from memory as new ones start
+        self.cleanup_old_syncs()
         with self._lock:
-            self._statuses[sync_id] = {
-                "sync_id": sync_id,
-                "source_id": source_id,
-                "source_name": source_name,
-                "user_id": user_id,
-                "status": "running",
-                "started_at": datetime.now(timezone.utc).isoformat(),
-                "total_leads": total_leads,
-                "processed": 0,
-                "successful": 0,
-                "failed": 0,
-                "skipped": 0,
-                "current_lead": None,
-                "messages": [],
-                "details": [],
-                "filter_summary": None,
-                "completed_at": None,
-                "error": None,
-                "cancelled": False
-            }
+            self._statuses[sync_id] = status
             self._cancelled[sync_id] = False
-    
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return
+        try:
+            keys = self._keys(sync_id)
+            pipe = redis_client.pipeline()
+            pipe.delete(keys["status"], keys["messages"], keys["details"], keys["events"])
+            pipe.hset(keys["status"], mapping=_encode_fields(_scalar_fields(status)))
+            pipe.sadd(self._user_key(user_id), sync_id)
+            pipe.expire(self._user_key(user_id), self.KEY_TTL_SECONDS)
+            self._queue_event(pipe, keys, "status", _scalar_fields(status))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish sync {sync_id} start to Redis: {e}")
+
     def update_progress(
-        self, 
-        sync_id: str, 
+        self,
+        sync_id: str,
         processed: int = None,
         successful: int = None,
         failed: int = None,
@@ -68,119 +120,206 @@ class SyncStatusTracker:
         detail: Dict[str, Any] = None
     ) -> None:
         """Update sync progress"""
+        changes = {}
+        if processed is not None:
+            changes["processed"] = processed
+        if successful is not None:
+            changes["successful"] = successful
+        if failed is not None:
+            changes["failed"] = failed
+        if skipped is not None:
+            changes["skipped"] = skipped
+        if current_lead:
+            changes["current_lead"] = current_lead
+        entry = {"timestamp": _now(), "message": message} if message else None
+
         with self._lock:
-            if sync_id not in self._statuses:
-                return
-            
-            status = self._statuses[sync_id]
-            
-            if processed is not None:
-                status["processed"] = processed
-            if successful is not None:
-                status["successful"] = successful
-            if failed is not None:
-                status["failed"] = failed
-            if skipped is not None:
-                status["skipped"] = skipped
-            if current_lead:
-                status["current_lead"] = current_lead
-            if message:
-                status["messages"].append({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "message": message
-                })
-                # Keep only last 100 messages
-                if len(status["messages"]) > 100:
-                    status["messages"] = status["messages"][-100:]
-            if detail:
-                status["details"].append(detail)
-            
-            # Notify listeners
-            self._notify_listeners(sync_id, status.copy())
-    
+            status = self._statuses.get(sync_id)
+            if status is not None:
+                status.update(changes)
+                if entry:
+                    status["messages"].append(entry)
+                    # Keep only the last MAX_MESSAGES messages
+                    if len(status["messages"]) > self.MAX_MESSAGES:
+                        status["messages"] = status["messages"][-self.MAX_MESSAGES:]
+                if detail:
+                    status["details"] = (status["details"] + [detail])[-self.MAX_DETAILS:]
+                if changes:
+                    self._notify_listeners(sync_id, {"type": "progress", "data": changes})
+                if entry:
+                    self._notify_listeners(sync_id, {"type": "message", "data": entry})
+
+        self._publish(sync_id, changes, entry, [detail] if detail else None)
+
     def cancel_sync(self, sync_id: str) -> bool:
-        """Cancel a running sync"""
+        """Cancel a running sync (from any process)"""
+        status = self.get_status(sync_id)
+        if not status or status.get("status") not in ACTIVE_STATUSES:
+            return False  # Can't cancel completed/failed syncs
+
+        changes = {"status": "cancelling", "cancelled": True}
+        entry = {"timestamp": _now(), "message": "Sync cancellation requested..."}
+
         with self._lock:
-            if sync_id not in self._statuses:
-                return False
-            
-            status = self._statuses[sync_id]
-            if status.get("status") not in ["running", "in_progress", "cancelling"]:
-                return False  # Can't cancel completed/failed syncs
-            
             self._cancelled[sync_id] = True
-            status["cancelled"] = True
-            status["status"] = "cancelling"
-            status["messages"].append({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message": "Sync cancellation requested..."
-            })
-            
-            self._notify_listeners(sync_id, status.copy())
-            return True
-    
+            local = self._statuses.get(sync_id)
+            if local is not None:
+                local.update(changes)
+                local["messages"].append(entry)
+                self._notify_listeners(sync_id, {"type": "progress", "data": changes})
+                self._notify_listeners(sync_id, {"type": "message", "data": entry})
+
+        self._publish(sync_id, changes, entry)
+        return True
+
     def is_cancelled(self, sync_id: str) -> bool:
-        """Check if a sync has been cancelled"""
+        """Check if a sync has been cancelled (the request may come from another process)"""
         with self._lock:
-            return self._cancelled.get(sync_id, False)
-    
+            if self._cancelled.get(sync_id, False):
+                return True
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return False
+        try:
+            cancelled = redis_client.hget(self._keys(sync_id)["status"], "cancelled")
+            return bool(cancelled and json.loads(cancelled))
+        except Exception as e:
+            logger.debug(f"Could not read cancel flag for sync {sync_id}: {e}")
+            return False
+
     def complete_sync(
-        self, 
-        sync_id: str, 
+        self,
+        sync_id: str,
         results: Dict[str, Any] = None,
         error: str = None
     ) -> None:
         """Mark sync as completed"""
+        cancelled = self.is_cancelled(sync_id)
+
         with self._lock:
-            if sync_id not in self._statuses:
+            status = self._statuses.get(sync_id)
+            status = dict(status, messages=list(status["messages"])) if status else None
+        if status is None:
+            # Started by another process
+            status = self._redis_snapshot(sync_id)
+            if not status:
                 return
-            
-            status = self._statuses[sync_id]
-            
-            # If cancelled, mark as cancelled instead of completed
-            if self._cancelled.get(sync_id, False):
-                status["status"] = "cancelled"
-                status["messages"].append({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "message": "Sync cancelled by user"
-                })
-            else:
-                status["status"] = "completed" if not error else "failed"
-            
-            status["completed_at"] = datetime.now(timezone.utc).isoformat()
-            
-            if error:
-                status["error"] = error
-            
-            if results:
-                status["successful"] = results.get("successful", 0)
-                status["failed"] = results.get("failed", 0)
-                status["skipped"] = results.get("filter_summary", {}).get("skipped_recently_synced", 0)
-                status["details"] = results.get("details", [])
-                status["filter_summary"] = results.get("filter_summary")
-            
+
+        # If cancelled, mark as cancelled instead of completed
+        entry = None
+        if cancelled:
+            status["status"] = "cancelled"
+            entry = {"timestamp": _now(), "message": "Sync cancelled by user"}
+            status["messages"] = (status["messages"] + [entry])[-self.MAX_MESSAGES:]
+        else:
+            status["status"] = "completed" if not error else "failed"
+
+        status["completed_at"] = _now()
+
+        if error:
+            status["error"] = error
+
+        if results:
+            status["successful"] = results.get("successful", 0)
+            status["failed"] = results.get("failed", 0)
+            status["skipped"] = results.get("filter_summary", {}).get("skipped_recently_synced", 0)
+            status["details"] = list(results.get("details", []))[-self.MAX_DETAILS:]
+            status["filter_summary"] = results.get("filter_summary")
+
+        with self._lock:
+            self._statuses[sync_id] = status
             # Final notification
-            self._notify_listeners(sync_id, status.copy())
-    
+            self._notify_listeners(sync_id, {"type": "complete", "data": status})
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return
+        try:
+            keys = self._keys(sync_id)
+            pipe = redis_client.pipeline()
+            pipe.hset(keys["status"], mapping=_encode_fields(_scalar_fields(status)))
+            if entry:
+                self._queue_message(pipe, keys, entry)
+            if results:
+                pipe.delete(keys["details"])
+                if status["details"]:
+                    pipe.rpush(keys["details"], *[json.dumps(d, default=str) for d in status["details"]])
+            pipe.srem(self._user_key(status.get("user_id")), sync_id)
+            self._queue_event(pipe, keys, "complete", status)
+            self._queue_expire(pipe, keys)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish sync {sync_id} completion to Redis: {e}")
+
+    # ------------------------------------------------------------------
+    # Readers (any process)
+    # ------------------------------------------------------------------
+
     def get_status(self, sync_id: str) -> Optional[Dict[str, Any]]:
         """Get current status for a sync"""
+        status = self._redis_snapshot(sync_id)
+        if status:
+            return status
         with self._lock:
-            return self._statuses.get(sync_id, {}).copy()
+            local = self._statuses.get(sync_id)
+            return dict(local, messages=list(local["messages"]), details=list(local["details"])) if local else {}
 
     def get_active_syncs(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all active (running/cancelling) syncs for a user"""
+        active = {}
+        redis_client = self._redis_client()
+        if redis_client is not None:
+            try:
+                for sync_id in redis_client.smembers(self._user_key(user_id)):
+                    status = self._redis_snapshot(sync_id)
+                    if status and status.get("status") in ACTIVE_STATUSES:
+                        active[sync_id] = status
+            except Exception as e:
+                logger.warning(f"Could not list active syncs from Redis: {e}")
+
         with self._lock:
-            active = []
             for sync_id, status in self._statuses.items():
-                if status.get("user_id") == user_id and status.get("status") in ["running", "in_progress", "cancelling"]:
-                    active.append(status.copy())
-            return active
-    
+                if sync_id not in active and status.get("user_id") == user_id and status.get("status") in ACTIVE_STATUSES:
+                    active[sync_id] = status.copy()
+        return list(active.values())
+
+    def stream_events(
+        self,
+        sync_id: str,
+        last_event_id: str = None,
+        idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+    ) -> Iterator[StreamItem]:
+        """
+        Push-based feed of a sync's updates, for SSE.
+
+        Yields (event_id, event) pairs: first a full 'status' snapshot and
+        the buffered messages, then 'progress' / 'message' deltas as they are
+        published, ending with 'complete'. Yields None after idle_timeout
+        seconds without an update so the caller can send a keepalive.
+
+        Args:
+            sync_id: Sync to follow
+            last_event_id: Resume after this stream id instead of sending a snapshot
+            idle_timeout: Seconds to block before yielding None
+        """
+        redis_client = self._redis_client()
+        if redis_client is not None:
+            try:
+                in_redis = bool(redis_client.exists(self._keys(sync_id)["status"]))
+            except Exception as e:
+                logger.warning(f"Could not read sync {sync_id} from Redis, streaming local status: {e}")
+                in_redis = False
+            if in_redis:
+                yield from self._stream_redis(redis_client, sync_id, last_event_id, idle_timeout)
+                return
+        yield from self._stream_local(sync_id, idle_timeout)
+
     def subscribe(self, sync_id: str, callback) -> None:
-        """Subscribe to updates for a sync"""
+        """Subscribe to this process's updates for a sync (callback gets each event)"""
         with self._lock:
             self._listeners[sync_id].append(callback)
-    
+
     def unsubscribe(self, sync_id: str, callback) -> None:
         """Unsubscribe from updates"""
         with self._lock:
@@ -189,43 +328,241 @@ class SyncStatusTracker:
                     self._listeners[sync_id].remove(callback)
                 except ValueError:
                     pass
-    
-    def _notify_listeners(self, sync_id: str, status: Dict[str, Any]) -> None:
-        """Notify all listeners of a status update"""
-        listeners = self._listeners.get(sync_id, [])[:]  # Copy list
-        for callback in listeners:
-            try:
-                callback(status)
-            except Exception as e:
-                print(f"Error notifying listener: {e}")
-    
+
     def cleanup_old_syncs(self, max_age_hours: int = 24) -> None:
-        """Remove old completed syncs to prevent memory leaks"""
+        """Remove old completed syncs from memory (Redis keys expire on their own)"""
         with self._lock:
             now = datetime.now(timezone.utc)
             cutoff = now.timestamp() - (max_age_hours * 3600)
-            
+
             to_remove = []
             for sync_id, status in self._statuses.items():
-                if status.get("status") in ["completed", "failed"]:
+                if status.get("status") in TERMINAL_STATUSES:
                     completed_at = status.get("completed_at")
                     if completed_at:
                         try:
                             completed = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
                             if completed.timestamp() < cutoff:
                                 to_remove.append(sync_id)
-                        except:
+                        except ValueError:
                             pass
-            
+
             for sync_id in to_remove:
                 del self._statuses[sync_id]
+                self._cancelled.pop(sync_id, None)
                 if sync_id in self._listeners:
                     del self._listeners[sync_id]
 
+    # ------------------------------------------------------------------
+
+    def _redis_client(self):
+        """Raw Redis client, or None while Redis is unreachable (retried periodically)."""
+        if self.redis is None:
+            if time.time() < self._redis_retry_at:
+                return None
+            try:
+                from app.service.redis_service import RedisServiceSingleton
+                service = RedisServiceSingleton.get_instance()
+                if not service.is_connected():
+                    raise ConnectionError("ping failed")
+                self.redis = service
+            except Exception as e:
+                logger.warning(f"Redis not available, sync status is visible to this process only: {e}")
+                self._redis_retry_at = time.time() + self.REDIS_RETRY_SECONDS
+                return None
+        return self.redis.redis
+
+    def _keys(self, sync_id: str) -> Dict[str, str]:
+        base = f"{self.KEY_PREFIX}:{sync_id}"
+        return {
+            "status": f"{base}:status",
+            "messages": f"{base}:messages",
+            "details": f"{base}:details",
+            "events": f"{base}:events",
+        }
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.KEY_PREFIX}:user:{user_id}"
+
+    def _publish(
+        self,
+        sync_id: str,
+        changes: Dict[str, Any],
+        entry: Optional[Dict[str, Any]] = None,
+        details: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Write a change to Redis and append its deltas to the event stream."""
+        if not (changes or entry or details):
+            return
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return
+        try:
+            keys = self._keys(sync_id)
+            pipe = redis_client.pipeline()
+            if changes:
+                pipe.hset(keys["status"], mapping=_encode_fields(changes))
+                self._queue_event(pipe, keys, "progress", changes)
+            if entry:
+                self._queue_message(pipe, keys, entry)
+            if details:
+                pipe.rpush(keys["details"], *[json.dumps(d, default=str) for d in details])
+                pipe.ltrim(keys["details"], -self.MAX_DETAILS, -1)
+            self._queue_expire(pipe, keys)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Could not publish sync {sync_id} progress to Redis: {e}")
+
+    def _queue_message(self, pipe, keys: Dict[str, str], entry: Dict[str, Any]) -> None:
+        pipe.rpush(keys["messages"], json.dumps(entry))
+        pipe.ltrim(keys["messages"], -self.MAX_MESSAGES, -1)
+        self._queue_event(pipe, keys, "message", entry)
+
+    def _queue_event(self, pipe, keys: Dict[str, str], event_type: str, data: Dict[str, Any]) -> None:
+        pipe.xadd(
+            keys["events"],
+            {"event": json.dumps({"type": event_type, "data": data}, default=str)},
+            maxlen=self.STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    def _queue_expire(self, pipe, keys: Dict[str, str]) -> None:
+        for key in keys.values():
+            pipe.expire(key, self.KEY_TTL_SECONDS)
+
+    def _redis_snapshot(self, sync_id: str) -> Optional[Dict[str, Any]]:
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return None
+        try:
+            status, _ = self._read_snapshot(redis_client, sync_id)
+            return status
+        except Exception as e:
+            logger.warning(f"Could not read sync {sync_id} from Redis: {e}")
+            return None
+
+    def _read_snapshot(self, redis_client, sync_id: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Status plus the id of the last event it includes, read atomically."""
+        keys = self._keys(sync_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hgetall(keys["status"])
+        pipe.lrange(keys["messages"], 0, -1)
+        pipe.lrange(keys["details"], 0, -1)
+        pipe.xrevrange(keys["events"], count=1)
+        fields, messages, details, last = pipe.execute()
+
+        last_event_id = last[0][0] if last else "0-0"
+        if not fields:
+            return None, last_event_id
+
+        status = {key: json.loads(value) for key, value in fields.items()}
+        status["messages"] = [json.loads(m) for m in messages]
+        status["details"] = [json.loads(d) for d in details]
+        return status, last_event_id
+
+    def _stream_redis(
+        self,
+        redis_client,
+        sync_id: str,
+        last_event_id: Optional[str],
+        idle_timeout: float,
+    ) -> Iterator[StreamItem]:
+        events_key = self._keys(sync_id)["events"]
+
+        if last_event_id is None:
+            status, last_event_id = self._read_snapshot(redis_client, sync_id)
+            if status is None:
+                yield None, {"type": "error", "message": "Sync not found"}
+                return
+            if status.get("status") in TERMINAL_STATUSES:
+                yield last_event_id, {"type": "complete", "data": status}
+                return
+            yield last_event_id, {"type": "status", "data": status}
+            for entry in status["messages"]:
+                yield None, {"type": "message", "data": entry}
+
+        while True:
+            response = redis_client.xread({events_key: last_event_id}, count=100, block=int(idle_timeout * 1000))
+            if not response:
+                if not redis_client.exists(self._keys(sync_id)["status"]):
+                    yield None, {"type": "error", "message": "Sync not found"}
+                    return
+                yield None
+                continue
+
+            for event_id, fields in response[0][1]:
+                last_event_id = event_id
+                event = json.loads(fields["event"])
+                yield event_id, event
+                if event["type"] == "complete":
+                    return
+
+    def _stream_local(self, sync_id: str, idle_timeout: float) -> Iterator[StreamItem]:
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        with self._lock:
+            status = self._statuses.get(sync_id)
+            if status is not None:
+                # Snapshot and subscribe under one lock so no update falls in between
+                snapshot = dict(status, messages=list(status["messages"]), details=list(status["details"]))
+                self._listeners[sync_id].append(events.put)
+
+        if status is None:
+            yield None, {"type": "error", "message": "Sync not found"}
+            return
+
+        try:
+            if snapshot.get("status") in TERMINAL_STATUSES:
+                yield None, {"type": "complete", "data": snapshot}
+                return
+            yield None, {"type": "status", "data": snapshot}
+            for entry in snapshot["messages"]:
+                yield None, {"type": "message", "data": entry}
+
+            while True:
+                try:
+                    event = events.get(timeout=idle_timeout)
+                except queue.Empty:
+                    yield None
+                    continue
+                yield None, event
+                if event["type"] == "complete":
+                    return
+        finally:
+            self.unsubscribe(sync_id, events.put)
+
+    def _notify_listeners(self, sync_id: str, event: Dict[str, Any]) -> None:
+        """Notify all listeners of a status update (caller holds the lock)"""
+        listeners = self._listeners.get(sync_id, [])[:]  # Copy list
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Error notifying sync listener: {e}")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _scalar_fields(status: Dict[str, Any]) -> Dict[str, Any]:
+    """Status without the list fields (stored in their own Redis lists)."""
+    return {k: v for k, v in status.items() if k not in ("messages", "details")}
+
+
+def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    return {k: json.dumps(v, default=str) for k, v in fields.items()}
+
+
 # Singleton instance
-_tracker = SyncStatusTracker()
+_tracker: Optional[SyncStatusTracker] = None
+_tracker_lock = threading.Lock()
+
 
 def get_tracker() -> SyncStatusTracker:
     """Get the singleton tracker instance"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = SyncStatusTracker()
     return _tracker
-
@@ -700,6 +700,9 @@ def update_notification_settings():
                 'support_notification_emails': notification_emails
             }).execute()
 
+        from app.ai_agent.settings_cache import get_settings_cache
+        get_settings_cache(supabase).invalidate()
+
         logger.info(f"Updated notification emails for user {user_id}: {notification_emails}")
 
         return jsonify({
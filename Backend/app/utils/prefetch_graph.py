@@ -0,0 +1,165 @@
+"""
+Declarative async prefetch graph.
+
+Request handlers often need a handful of independent lookups (settings,
+flags, profiles, history) before they can do real work. Awaiting them one
+after another makes the request as slow as the SUM of the lookups; a
+PrefetchGraph starts every node as soon as its dependencies resolve, so the
+request is only as slow as the longest dependency chain.
+
+Usage:
+    graph = PrefetchGraph("inbound_text")
+    graph.add("settings", lambda: get_agent_settings(supabase, org_id))
+    graph.add("person", lambda: asyncio.to_thread(fub.get_person, person_id))
+    graph.add("profile", lambda person: build_profile(person), deps=("person",))
+    graph.start()
+
+    settings = await graph.get("settings")   # cached for the rest of the request
+    ...
+    logger.info(graph.summary())              # per-node wall times
+
+Node functions are called with their dependencies' results as keyword
+arguments and must return an awaitable. Results are computed once; use
+refresh() when a value is known to be out of date (e.g. after a write).
+
+Many of our "async" service methods call the synchronous Supabase client
+internally and never yield, so awaiting them concurrently on one loop still
+runs them back to back. Register those with blocking=True: the coroutine
+then runs on its own short-lived loop in a worker thread. Don't use it for
+coroutines that spawn background tasks - they're cancelled when that loop
+closes.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.utils.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchGraph:
+    """Run named async lookups concurrently, respecting their dependencies."""
+
+    def __init__(self, name: str = "prefetch"):
+        self.name = name
+        self._nodes: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...], bool]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._timings: Dict[str, float] = {}
+        self._started_at: Optional[float] = None
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        deps: Iterable[str] = (),
+        blocking: bool = False,
+    ) -> "PrefetchGraph":
+        """
+        Register a node. Must be called before start().
+
+        Args:
+            name: Node name, used with get()/refresh()
+            fn: Called with each dependency's result as a keyword argument
+            deps: Names of nodes that must finish first
+            blocking: The coroutine blocks internally; run it in a worker thread
+        """
+        if self._started_at is not None:
+            raise RuntimeError(f"Cannot add node '{name}' to a started graph")
+        if name in self._nodes:
+            raise ValueError(f"Duplicate prefetch node '{name}'")
+        self._nodes[name] = (fn, tuple(deps), blocking)
+        return self
+
+    def start(self) -> "PrefetchGraph":
+        """Validate the graph and schedule every node on the running loop."""
+        self._validate()
+        self._started_at = time.perf_counter()
+        for name in self._nodes:
+            self._schedule(name)
+        return self
+
+    async def get(self, name: str) -> Any:
+        """Result of a node (re-raises the node's exception)."""
+        if name not in self._tasks:
+            raise KeyError(f"Unknown prefetch node '{name}'")
+        # Shield so a cancelled caller doesn't cancel work other callers share
+        return await asyncio.shield(self._tasks[name])
+
+    def refresh(self, name: str) -> None:
+        """
+        Recompute a node.
+
+        Nodes that already consumed the old value are not re-run; refresh
+        those explicitly if they need the new one. Callers already waiting
+        on the old run still get its result.
+        """
+        if name not in self._tasks:
+            raise KeyError(f"Unknown prefetch node '{name}'")
+        self._timings.pop(name, None)
+        self._schedule(name)
+
+    def cancel(self) -> None:
+        """Cancel every node that hasn't finished (e.g. on an early return)."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Wall time in ms of each finished node, excluding time spent waiting on deps."""
+        return dict(self._timings)
+
+    def summary(self) -> str:
+        """One-line timing report for logging."""
+        elapsed = (time.perf_counter() - self._started_at) * 1000 if self._started_at else 0.0
+        nodes = ", ".join(
+            f"{name}={ms:.0f}ms" for name, ms in sorted(self._timings.items(), key=lambda kv: -kv[1])
+        )
+        return f"[{self.name}] prefetch {elapsed:.0f}ms total ({nodes})"
+
+    # ------------------------------------------------------------------
+
+    def _schedule(self, name: str) -> None:
+        task = asyncio.ensure_future(self._run(name))
+        # Retrieve exceptions so nodes nobody awaited don't log "never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._tasks[name] = task
+
+    async def _run(self, name: str) -> Any:
+        fn, deps, blocking = self._nodes[name]
+        kwargs = {dep: await self.get(dep) for dep in deps}
+
+        started = time.perf_counter()
+        try:
+            with start_span(f"prefetch.{name}"):
+                if blocking:
+                    return await asyncio.to_thread(asyncio.run, fn(**kwargs))
+                return await fn(**kwargs)
+        finally:
+            self._timings[name] = (time.perf_counter() - started) * 1000
+
+    def _validate(self) -> None:
+        for name, (_, deps, _) in self._nodes.items():
+            for dep in deps:
+                if dep not in self._nodes:
+                    raise ValueError(f"Prefetch node '{name}' depends on unknown node '{dep}'")
+
+        # Depth-first cycle check
+        visiting, done = set(), set()
+
+        def visit(node: str):
+            if node in done:
+                return
+            if node in visiting:
+                raise ValueError(f"Prefetch graph has a cycle through '{node}'")
+            visiting.add(node)
+            for dep in self._nodes[node][1]:
+                visit(dep)
+            visiting.discard(node)
+            done.add(node)
+
+        for name in self._nodes:
+            visit(name)
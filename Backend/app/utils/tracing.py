@@ -0,0 +1,351 @@
+"""
+Lightweight span tracing for the AI reply pipeline.
+
+Measures where time goes between a FUB webhook and the outbound SMS
+(tenant resolution, message fetch, Playwright reads, prefetch, intent
+detection, LLM generation, reply delay, send) without pulling in a
+tracing backend.
+
+Usage:
+    from app.utils.tracing import start_span, traced
+
+    with start_span("message_fetch", person_id=person_id):
+        ...
+
+    @traced("llm_generation")
+    async def generate_response(...):
+        ...
+
+Spans nest through contextvars, so children are linked to their parent
+across awaits, asyncio tasks and asyncio.to_thread. Finished spans go to
+the LocalSpanExporter, which keeps:
+- a rolling window of durations per span name (p50/p95/p99 for /ai/health/latency)
+- the most recent spans, exportable as OTLP/JSON
+
+OpenTelemetry compatibility: spans use the OTel data model (128-bit trace
+IDs, 64-bit span IDs, unix-nano timestamps, attributes, OK/ERROR status)
+and to_otlp() emits the OTLP/JSON shape a collector accepts. If
+opentelemetry-api is installed, every span is also mirrored to the global
+OTel tracer, so a configured SDK exporter sees the same pipeline.
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+SERVICE_NAME = "leadsynergy-ai"
+DEFAULT_WINDOW_SECONDS = 3600
+MAX_SAMPLES_PER_SPAN = 5000
+MAX_RECENT_SPANS = 500
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation (OTel data model)."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id",
+        "start_time_ns", "end_time_ns", "attributes", "status", "status_message",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_time_ns: Optional[int] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.start_time_ns = start_time_ns or time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_ns or time.time_ns()
+        return (end - self.start_time_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "duration_ms": round(self.duration_ms, 1),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """This span in OTLP/JSON form."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status]},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LocalSpanExporter:
+    """In-process exporter: rolling per-span durations plus recent spans."""
+
+    def __init__(
+        self,
+        window_seconds: int = DEFAULT_WINDOW_SECONDS,
+        max_samples: int = MAX_SAMPLES_PER_SPAN,
+        max_recent: int = MAX_RECENT_SPANS,
+    ):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._errors: Dict[str, int] = {}
+        self._recent: Deque[Span] = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        ended_at = (span.end_time_ns or time.time_ns()) / 1e9
+        with self._lock:
+            samples = self._samples.get(span.name)
+            if samples is None:
+                samples = self._samples[span.name] = deque(maxlen=self.max_samples)
+            samples.append((ended_at, span.duration_ms))
+            if span.status == "ERROR":
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+            self._recent.append(span)
+
+    def stage_stats(self, window_seconds: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """p50/p95/p99/max per span name over the rolling window (or a shorter one)."""
+        now = time.time()
+        expired = now - self.window_seconds
+        cutoff = now - min(window_seconds or self.window_seconds, self.window_seconds)
+        stats = {}
+        with self._lock:
+            for name, samples in self._samples.items():
+                while samples and samples[0][0] < expired:
+                    samples.popleft()
+                durations = sorted(ms for ended_at, ms in samples if ended_at >= cutoff)
+                if not durations:
+                    continue
+                stats[name] = {
+                    "count": len(durations),
+                    "p50_ms": round(_percentile(durations, 50), 1),
+                    "p95_ms": round(_percentile(durations, 95), 1),
+                    "p99_ms": round(_percentile(durations, 99), 1),
+                    "max_ms": round(durations[-1], 1),
+                    "errors": self._errors.get(name, 0),
+                }
+        return stats
+
+    def recent_spans(self, limit: int = 50, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = [s for s in self._recent if trace_id is None or s.trace_id == trace_id]
+        return spans[-limit:]
+
+    def to_otlp(self, limit: int = 100) -> Dict[str, Any]:
+        """Recent spans as an OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in self.recent_spans(limit)],
+                }],
+            }],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._errors.clear()
+            self._recent.clear()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter."""
+
+    def __init__(self, exporter: Optional[LocalSpanExporter] = None):
+        self.exporter = exporter or LocalSpanExporter()
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes) -> Iterator[Span]:
+        """
+        Time a block as a child of the current span.
+
+        Args:
+            name: Stage name (used as the percentile key)
+            trace_id: Continue an existing trace (e.g. one stored with a queued
+                reply); defaults to the parent's trace or a new one
+            **attributes: Span attributes
+        """
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=trace_id or (parent.trace_id if parent else os.urandom(16).hex()),
+            parent_span_id=parent.span_id if parent and not trace_id else None,
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        otel_cm = _otel_span(name, attributes)
+        try:
+            yield span
+            if span.status == "UNSET":
+                span.status = "OK"
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_time_ns = time.time_ns()
+            _current_span.reset(token)
+            if otel_cm is not None:
+                _end_otel_span(otel_cm, span)
+            self.exporter.export(span)
+
+    def record(
+        self,
+        name: str,
+        duration_ms: float,
+        trace_id: Optional[str] = None,
+        **attributes,
+    ) -> Span:
+        """Record a stage that was timed elsewhere (e.g. a queued delay)."""
+        parent = _current_span.get()
+        end_ns = time.time_ns()
+        span = Span(
+            name,
+            trace_id=trace_id or (parent.trace_id if parent else os.urandom(16).hex()),
+            parent_span_id=parent.span_id if parent and not trace_id else None,
+            attributes=attributes,
+            start_time_ns=end_ns - int(duration_ms * 1e6),
+        )
+        span.end_time_ns = end_ns
+        span.status = "OK"
+        self.exporter.export(span)
+        return span
+
+
+def _otel_span(name: str, attributes: Dict[str, Any]):
+    """Start a mirrored OTel span when opentelemetry-api is installed."""
+    if otel_trace is None:
+        return None
+    try:
+        cm = otel_trace.get_tracer(__name__).start_as_current_span(
+            name, attributes={k: v if isinstance(v, (bool, int, float, str)) else str(v) for k, v in attributes.items()},
+        )
+        cm.__enter__()
+        return cm
+    except Exception:
+        return None
+
+
+def _end_otel_span(cm, span: Span) -> None:
+    try:
+        otel_span = otel_trace.get_current_span()
+        for key, value in span.attributes.items():
+            otel_span.set_attribute(key, value if isinstance(value, (bool, int, float, str)) else str(value))
+        if span.status == "ERROR":
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.status_message))
+        cm.__exit__(None, None, None)
+    except Exception:
+        pass
+
+
+# Global tracer
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def start_span(name: str, trace_id: Optional[str] = None, **attributes):
+    """Shortcut for get_tracer().span(...)."""
+    return get_tracer().span(name, trace_id=trace_id, **attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the active span, if any (to carry a trace across a queue)."""
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def traced(name: str):
+    """Decorator: run the (sync or async) function inside a span."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
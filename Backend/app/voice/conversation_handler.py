@@ -10,7 +10,8 @@ Handles:
 
 import logging
 import os
-from typing import Optional, Dict, Any, List
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -21,9 +22,14 @@ from .voice_prompts import (
     build_voice_context,
     VOICE_RESPONSE_GUIDELINES,
 )
+from .streaming import SentenceSegmenter, TurnLatencyTracker, parse_sse_delta
 
 logger = logging.getLogger(__name__)
 
+# Fallback lines spoken when the LLM call fails
+FALLBACK_MISSED = "Sorry, I missed that. Could you say that again?"
+FALLBACK_ERROR = "I'm having trouble hearing you. One more time?"
+
 
 class CallState(Enum):
     """State of the voice call."""
@@ -78,6 +84,46 @@ class VoiceConversationHandler:
             "anthropic/claude-3-5-haiku-20241022"  # Fast for voice
         )
 
+        # Shared, pooled HTTP client (created lazily on the running loop)
+        self._http_client = None
+        self._http_client_loop = None
+
+        # Per-turn latency (time-to-first-sentence / total)
+        self.latency = TurnLatencyTracker()
+
+    def _get_http_client(self):
+        """
+        Get the pooled OpenRouter HTTP client.
+
+        httpx async connections are bound to the event loop that opened them,
+        so the client is rebuilt if it is used from a different loop.
+        """
+        import asyncio
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._http_client is None or self._http_client_loop is not loop:
+            self._http_client = httpx.AsyncClient(
+                base_url=self.openrouter_base_url,
+                headers={
+                    "Authorization": f"Bearer {self.openrouter_api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://leadsynergy.com",
+                    "X-Title": "LeadSynergy Voice AI",
+                },
+                timeout=10.0,  # Fast timeout for voice
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            self._http_client_loop = loop
+        return self._http_client
+
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._http_client_loop = None
+
     async def start_conversation(
         self,
         person_id: int,
@@ -138,18 +184,101 @@ class VoiceConversationHandler:
                 "action": None
             }
 
-        # Add to history
+        self._record_lead_turn(conversation, transcript)
+
+        # Generate AI response
+        started = time.monotonic()
+        response_text = await self._generate_response(conversation, transcript)
+        total_ms = (time.monotonic() - started) * 1000
+        # Non-streaming: the first sentence is only ready when the whole reply is
+        self.latency.record(total_ms, total_ms)
+
+        return self._complete_turn(conversation, transcript, response_text)
+
+    async def process_transcript_stream(
+        self,
+        person_id: int,
+        transcript: str,
+        on_sentence: Callable[[str, int], Awaitable[None]],
+    ) -> Dict[str, Any]:
+        """
+        Process a transcript, streaming the AI reply sentence by sentence.
+
+        Each finished sentence is passed to `on_sentence(text, index)` as soon
+        as the LLM has produced it, so TTS can start before the completion ends.
+
+        Args:
+            person_id: FUB person ID
+            transcript: What the lead said (from Deepgram)
+            on_sentence: Async callback invoked for every complete sentence
+
+        Returns:
+            Dict with 'response' (full AI text), optional 'action' and 'timing'
+        """
+        conversation = self.active_conversations.get(person_id)
+        if not conversation:
+            logger.warning(f"No active conversation for person {person_id}")
+            fallback = "I'm sorry, I didn't catch that. Could you repeat?"
+            await on_sentence(fallback, 0)
+            return {"response": fallback, "action": None}
+
+        self._record_lead_turn(conversation, transcript)
+
+        started = time.monotonic()
+        first_sentence_ms = None
+        sentences: List[str] = []
+
+        async def emit(sentence: str) -> None:
+            nonlocal first_sentence_ms
+            if first_sentence_ms is None:
+                first_sentence_ms = (time.monotonic() - started) * 1000
+            sentences.append(sentence)
+            await on_sentence(sentence, len(sentences) - 1)
+
+        try:
+            segmenter = SentenceSegmenter()
+            async for delta in self._stream_completion(self._build_messages(conversation)):
+                for sentence in segmenter.feed(delta):
+                    await emit(sentence)
+            tail = segmenter.flush()
+            if tail:
+                await emit(tail)
+        except Exception as e:
+            logger.error(f"Error streaming voice response: {e}")
+
+        if not sentences:
+            await emit(FALLBACK_ERROR)
+
+        total_ms = (time.monotonic() - started) * 1000
+        self.latency.record(first_sentence_ms, total_ms)
+        logger.info(
+            f"Voice turn for person {person_id}: first sentence in "
+            f"{first_sentence_ms:.0f}ms, full reply in {total_ms:.0f}ms"
+        )
+
+        result = self._complete_turn(conversation, transcript, " ".join(sentences))
+        result["timing"] = {
+            "time_to_first_sentence_ms": round(first_sentence_ms, 1),
+            "total_ms": round(total_ms, 1),
+            "sentences": len(sentences),
+        }
+        return result
+
+    def _record_lead_turn(self, conversation: VoiceConversation, transcript: str) -> None:
+        """Add what the lead said to history and transcript."""
         conversation.history.append({
             "role": "user",
             "content": transcript
         })
-
-        # Update transcript
         conversation.transcript += f"\nLead: {transcript}"
 
-        # Generate AI response
-        response_text = await self._generate_response(conversation, transcript)
-
+    def _complete_turn(
+        self,
+        conversation: VoiceConversation,
+        transcript: str,
+        response_text: str,
+    ) -> Dict[str, Any]:
+        """Record the AI reply and work out actions/state for the turn."""
         # Add response to history
         conversation.history.append({
             "role": "assistant",
@@ -219,8 +348,56 @@ class VoiceConversationHandler:
         Returns:
             AI response text (optimized for voice)
         """
-        import httpx
+        messages = self._build_messages(conversation)
+
+        # Generate response via OpenRouter
+        try:
+            client = self._get_http_client()
+            response = await client.post(
+                "/chat/completions",
+                json={
+                    "model": self.default_model,
+                    "messages": messages,
+                    "max_tokens": 100,  # Keep responses short for voice
+                    "temperature": 0.7,
+                },
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return data["choices"][0]["message"]["content"].strip()
+            else:
+                logger.error(f"OpenRouter error: {response.status_code}")
+                return FALLBACK_MISSED
 
+        except Exception as e:
+            logger.error(f"Error generating voice response: {e}")
+            return FALLBACK_ERROR
+
+    async def _stream_completion(self, messages: List[Dict[str, str]]):
+        """Yield content deltas from a streamed OpenRouter completion."""
+        client = self._get_http_client()
+        async with client.stream(
+            "POST",
+            "/chat/completions",
+            json={
+                "model": self.default_model,
+                "messages": messages,
+                "max_tokens": 100,  # Keep responses short for voice
+                "temperature": 0.7,
+                "stream": True,
+            },
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"OpenRouter error: {response.status_code}")
+
+            async for line in response.aiter_lines():
+                delta = parse_sse_delta(line)
+                if delta:
+                    yield delta
+
+    def _build_messages(self, conversation: VoiceConversation) -> List[Dict[str, str]]:
+        """Build the LLM message list (system prompt + recent history)."""
         # Build context
         context = build_voice_context(
             lead_profile=conversation.lead_profile,
@@ -246,36 +423,7 @@ class VoiceConversationHandler:
                 "content": msg["content"]
             })
 
-        # Generate response via OpenRouter
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.openrouter_base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openrouter_api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://leadsynergy.com",
-                        "X-Title": "LeadSynergy Voice AI",
-                    },
-                    json={
-                        "model": self.default_model,
-                        "messages": messages,
-                        "max_tokens": 100,  # Keep responses short for voice
-                        "temperature": 0.7,
-                    },
-                    timeout=10.0,  # Fast timeout for voice
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data["choices"][0]["message"]["content"].strip()
-                else:
-                    logger.error(f"OpenRouter error: {response.status_code}")
-                    return "Sorry, I missed that. Could you say that again?"
-
-        except Exception as e:
-            logger.error(f"Error generating voice response: {e}")
-            return "I'm having trouble hearing you. One more time?"
+        return messages
 
     def _check_for_actions(
         self,
@@ -8,8 +8,10 @@ Provides:
 - REST endpoints for voice settings and call history
 """
 
+import asyncio
 import logging
 import json
+import threading
 from typing import Optional
 from flask import Blueprint, request, jsonify
 
@@ -26,6 +28,40 @@ _conversation_handler: Optional[VoiceConversationHandler] = None
 # SocketIO instance (will be set by init_voice_socketio)
 _socketio = None
 
+# Persistent event loop for voice coroutines. Creating and closing a loop per
+# utterance threw away the handler's pooled HTTP connections every turn.
+_voice_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_voice_loop_lock = threading.Lock()
+
+
+def _get_voice_loop() -> asyncio.AbstractEventLoop:
+    """Get (or create) the single persistent event loop for voice work."""
+    global _voice_event_loop
+    if _voice_event_loop is not None and not _voice_event_loop.is_closed():
+        return _voice_event_loop
+
+    with _voice_loop_lock:
+        if _voice_event_loop is not None and not _voice_event_loop.is_closed():
+            return _voice_event_loop
+
+        loop = asyncio.new_event_loop()
+        _voice_event_loop = loop
+
+        def run_loop():
+            asyncio.set_event_loop(loop)
+            loop.run_forever()
+
+        t = threading.Thread(target=run_loop, daemon=True, name="voice-event-loop")
+        t.start()
+        logger.info("Started persistent voice event loop")
+        return loop
+
+
+def run_voice_coroutine(coroutine, timeout: float = 60.0):
+    """Run a coroutine on the voice loop and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coroutine, _get_voice_loop())
+    return future.result(timeout=timeout)
+
 
 def get_conversation_handler() -> VoiceConversationHandler:
     """Get or create the conversation handler."""
@@ -71,7 +107,6 @@ def init_voice_socketio(socketio):
         Args:
             data: {person_id: int, organization_id: str}
         """
-        import asyncio
         from flask_socketio import emit, join_room
 
         person_id = data.get('person_id')
@@ -89,9 +124,8 @@ def init_voice_socketio(socketio):
         handler = get_conversation_handler()
 
         # Start conversation (run async in sync context)
-        loop = asyncio.new_event_loop()
         try:
-            conversation = loop.run_until_complete(
+            conversation = run_voice_coroutine(
                 handler.start_conversation(
                     person_id=person_id,
                     organization_id=organization_id,
@@ -126,22 +160,24 @@ def init_voice_socketio(socketio):
         except Exception as e:
             logger.error(f"Error starting voice session: {e}")
             emit('error', {'message': str(e)})
-        finally:
-            loop.close()
 
     @socketio.on('transcript', namespace='/voice')
     def handle_transcript(data):
         """
         Handle incoming transcript from Deepgram.
 
+        With `stream: true` the reply is sent as it is generated: one
+        'response_chunk' per finished sentence (ready for TTS), then the usual
+        'response' event with the full text, action and turn timing.
+
         Args:
-            data: {person_id: int, transcript: str, timestamp: int}
+            data: {person_id: int, transcript: str, timestamp: int, stream: bool}
         """
-        import asyncio
         from flask_socketio import emit
 
         person_id = data.get('person_id')
         transcript = data.get('transcript', '').strip()
+        stream = bool(data.get('stream'))
 
         if not person_id or not transcript:
             return
@@ -149,26 +185,44 @@ def init_voice_socketio(socketio):
         logger.info(f"Received transcript for person {person_id}: {transcript}")
 
         handler = get_conversation_handler()
+        sid = request.sid
+
+        async def send_sentence(text: str, index: int) -> None:
+            socketio.emit('response_chunk', {
+                'person_id': person_id,
+                'text': text,
+                'index': index,
+            }, namespace='/voice', to=sid)
 
         # Process transcript
-        loop = asyncio.new_event_loop()
         try:
-            result = loop.run_until_complete(
-                handler.process_transcript(
-                    person_id=person_id,
-                    transcript=transcript,
+            if stream:
+                result = run_voice_coroutine(
+                    handler.process_transcript_stream(
+                        person_id=person_id,
+                        transcript=transcript,
+                        on_sentence=send_sentence,
+                    )
+                )
+            else:
+                result = run_voice_coroutine(
+                    handler.process_transcript(
+                        person_id=person_id,
+                        transcript=transcript,
+                    )
                 )
-            )
 
             # Send response
             emit('response', {
                 'response': result['response'],
                 'action': result.get('action'),
+                'streamed': stream,
+                'timing': result.get('timing'),
             })
 
             # Handle end call action
-            if result.get('action', {}).get('type') == 'end_call':
-                loop.run_until_complete(
+            if (result.get('action') or {}).get('type') == 'end_call':
+                run_voice_coroutine(
                     handler.end_conversation(
                         person_id=person_id,
                         reason=result['action'].get('reason', 'normal'),
@@ -182,8 +236,6 @@ def init_voice_socketio(socketio):
         except Exception as e:
             logger.error(f"Error processing transcript: {e}")
             emit('error', {'message': str(e)})
-        finally:
-            loop.close()
 
     @socketio.on('end_session', namespace='/voice')
     def handle_end_session(data):
@@ -193,7 +245,6 @@ def init_voice_socketio(socketio):
         Args:
             data: {person_id: int, reason: str}
         """
-        import asyncio
         from flask_socketio import emit, leave_room
 
         person_id = data.get('person_id')
@@ -208,9 +259,8 @@ def init_voice_socketio(socketio):
 
         handler = get_conversation_handler()
 
-        loop = asyncio.new_event_loop()
         try:
-            loop.run_until_complete(
+            run_voice_coroutine(
                 handler.end_conversation(
                     person_id=person_id,
                     reason=reason,
@@ -222,8 +272,6 @@ def init_voice_socketio(socketio):
             })
         except Exception as e:
             logger.error(f"Error ending session: {e}")
-        finally:
-            loop.close()
 
     @socketio.on('ping', namespace='/voice')
     def handle_ping():
@@ -244,18 +292,12 @@ def get_voice_settings():
     Query params:
         organization_id: Optional organization ID
     """
-    import asyncio
-
     organization_id = request.args.get('organization_id')
     handler = get_conversation_handler()
 
-    loop = asyncio.new_event_loop()
-    try:
-        settings = loop.run_until_complete(
-            handler._load_settings(organization_id)
-        )
-    finally:
-        loop.close()
+    settings = run_voice_coroutine(
+        handler._load_settings(organization_id)
+    )
 
     return jsonify({
         "enabled": settings.get("sequence_voice_enabled", False),
@@ -310,6 +352,7 @@ def test_voice_connection():
         "openrouter_configured": bool(handler.openrouter_api_key) if handler else False,
         "active_conversations": len(handler.active_conversations) if handler else 0,
         "socketio_initialized": _socketio is not None,
+        "turn_latency": handler.latency.summary() if handler else None,
     })
 
 
@@ -334,8 +377,6 @@ def voice_respond():
             "action": null or {"type": "end_call", ...}
         }
     """
-    import asyncio
-
     data = request.get_json()
     person_id = data.get('person_id')
     transcript = data.get('transcript', '').strip()
@@ -350,18 +391,13 @@ def voice_respond():
 
     # Check if conversation exists, if not start one
     if person_id not in handler.active_conversations:
-        loop = asyncio.new_event_loop()
-        try:
-            loop.run_until_complete(
-                handler.start_conversation(person_id=person_id)
-            )
-        finally:
-            loop.close()
+        run_voice_coroutine(
+            handler.start_conversation(person_id=person_id)
+        )
 
     # Process transcript
-    loop = asyncio.new_event_loop()
     try:
-        result = loop.run_until_complete(
+        result = run_voice_coroutine(
             handler.process_transcript(
                 person_id=person_id,
                 transcript=transcript,
@@ -374,8 +410,6 @@ def voice_respond():
             "response": "Sorry, I didn't catch that. Could you repeat?",
             "action": None
         })
-    finally:
-        loop.close()
 
 
 @voice_bp.route('/end-session', methods=['POST'])
@@ -391,8 +425,6 @@ def end_voice_session():
             "reason": "session_ended"
         }
     """
-    import asyncio
-
     data = request.get_json()
     person_id = data.get('person_id')
     reason = data.get('reason', 'normal')
@@ -402,9 +434,8 @@ def end_voice_session():
 
     handler = get_conversation_handler()
 
-    loop = asyncio.new_event_loop()
     try:
-        conversation = loop.run_until_complete(
+        conversation = run_voice_coroutine(
             handler.end_conversation(
                 person_id=person_id,
                 reason=reason,
@@ -418,8 +449,6 @@ def end_voice_session():
     except Exception as e:
         logger.error(f"Error ending voice session: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
-    finally:
-        loop.close()
 
 
 @voice_bp.route('/health', methods=['GET'])
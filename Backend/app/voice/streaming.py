@@ -0,0 +1,117 @@
+"""
+Voice Streaming Helpers - Sentence segmentation and SSE parsing for streamed LLM replies.
+
+Used by VoiceConversationHandler's streaming mode so each finished sentence
+can be handed to TTS while the rest of the completion is still generating.
+"""
+
+import json
+import re
+from collections import deque
+from typing import Optional, List, Dict, Any
+
+# Abbreviations that end in a period but don't end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "jr", "sr", "vs", "etc", "approx", "ave", "blvd"}
+
+# Sentence terminator (one or more of .!?, optionally followed by a closing quote/paren)
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+class SentenceSegmenter:
+    """
+    Incrementally splits streamed text into complete sentences.
+
+    Usage:
+        segmenter = SentenceSegmenter()
+        for token in tokens:
+            for sentence in segmenter.feed(token):
+                speak(sentence)
+        tail = segmenter.flush()
+    """
+
+    def __init__(self, min_length: int = 2):
+        self.min_length = min_length
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any sentences it completed."""
+        if not text:
+            return []
+
+        self._buffer += text
+        sentences = []
+        search_from = 0
+
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[search_from:match.end()].strip()
+            if self._is_abbreviation(candidate) or len(candidate) < self.min_length:
+                continue
+            sentences.append(candidate)
+            search_from = match.end()
+
+        self._buffer = self._buffer[search_from:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream ends."""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return tail or None
+
+    @staticmethod
+    def _is_abbreviation(candidate: str) -> bool:
+        words = candidate.rstrip('.!?"\')] ').split()
+        if not words or not candidate.rstrip().endswith('.'):
+            return False
+        return words[-1].lower().strip('(') in ABBREVIATIONS
+
+
+def parse_sse_delta(line: str) -> Optional[str]:
+    """
+    Extract the content delta from one OpenAI-compatible SSE line.
+
+    Returns None for keep-alives, comments, [DONE] and malformed lines.
+    """
+    line = line.strip()
+    if not line.startswith("data:"):
+        return None
+
+    payload = line[len("data:"):].strip()
+    if not payload or payload == "[DONE]":
+        return None
+
+    try:
+        data = json.loads(payload)
+        return data["choices"][0].get("delta", {}).get("content")
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+class TurnLatencyTracker:
+    """Rolling window of per-turn voice latency (time-to-first-sentence and total)."""
+
+    def __init__(self, window: int = 200):
+        self._turns = deque(maxlen=window)
+
+    def record(self, time_to_first_sentence_ms: Optional[float], total_ms: float) -> None:
+        self._turns.append((time_to_first_sentence_ms, total_ms))
+
+    def summary(self) -> Dict[str, Any]:
+        first = sorted(t for t, _ in self._turns if t is not None)
+        total = sorted(t for _, t in self._turns)
+        return {
+            "turns": len(self._turns),
+            "time_to_first_sentence_ms": _percentiles(first),
+            "total_ms": _percentiles(total),
+        }
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None}
+
+    def pick(pct: float) -> float:
+        index = min(len(values) - 1, int(round(pct * (len(values) - 1))))
+        return round(values[index], 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95)}
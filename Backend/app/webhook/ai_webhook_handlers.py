@@ -21,6 +21,7 @@ import threading
 import random
 import re
 import sys
+import time
 import pytz
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
@@ -70,6 +71,11 @@ from app.database.supabase_client import SupabaseClientSingleton
 from app.database.fub_api_client import FUBApiClient
 from app.utils.constants import Credentials
 from app.ai_agent.lead_profile_cache import get_lead_profile_cache, LeadProfileCacheService
+from app.ai_agent.conversation_history_cache import get_conversation_history_cache
+from app.ai_agent.settings_cache import get_settings_cache, SOURCE_USER, SOURCE_ORG
+from app.ai_agent.delayed_reply_queue import DelayedReplyQueue, ReplySkipped, get_delayed_reply_queue
+from app.utils.prefetch_graph import PrefetchGraph
+from app.utils.tracing import current_trace_id, get_tracer, start_span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -273,6 +279,286 @@ def handle_text_message_webhook():
         return Response("Error processing webhook", status=500)
 
 
+# ============================================================
+# DELAYED REPLY DELIVERY
+# ============================================================
+# Replies wait out their human-like delay in the durable delayed reply
+# queue instead of asyncio.sleep(). The dispatcher runs on the persistent
+# webhook loop, so sends still reuse the warm Playwright session.
+# ============================================================
+
+def get_reply_queue() -> DelayedReplyQueue:
+    """Get the delayed reply queue, starting its dispatcher on the webhook loop."""
+    queue = get_delayed_reply_queue(supabase_client=supabase, deliver=_deliver_delayed_reply)
+    queue.start(_get_persistent_webhook_loop())
+    return queue
+
+
+def _reply_payload(
+    agent_response,
+    inbound_message: str,
+    from_number: Optional[str],
+    conversation_id: str,
+    received_at: float,
+) -> Dict[str, Any]:
+    """What _record_sent_reply() needs from the agent response, as plain JSON."""
+    return {
+        # Tracing: continue the webhook's trace when the dispatcher sends
+        "trace_id": current_trace_id(),
+        "received_at": received_at,
+        "queued_at": time.time(),
+        "conversation_id": conversation_id,
+        "inbound_message": inbound_message,
+        "from_number": from_number,
+        "lead_score_delta": agent_response.lead_score_delta or 0,
+        "state_changed": bool(agent_response.state_changed),
+        "conversation_state": agent_response.conversation_state,
+        "extracted_info": agent_response.extracted_info or {},
+        "should_handoff": bool(agent_response.should_handoff),
+        "handoff_reason": agent_response.handoff_reason,
+        "detected_intent": agent_response.detected_intent,
+    }
+
+
+async def _send_reply_sms(person_id: int, message: str, user_id: str, organization_id: str) -> Dict[str, Any]:
+    """
+    Send an AI reply via Playwright browser automation.
+
+    Must use send_sms_with_auto_credentials() — uses the singleton with default_agent
+    (cached cookies). Creating a new PlaywrightSMSService() per request uses a
+    different agent_id with no cached session, causing login failures.
+    """
+    from app.messaging.playwright_sms_service import send_sms_with_auto_credentials
+
+    logger.info(f"Sending SMS via Playwright to person {person_id}...")
+    try:
+        with start_span("sms_send.playwright", person_id=person_id) as span:
+            result = await send_sms_with_auto_credentials(
+                person_id=person_id,
+                message=message,
+                user_id=user_id,
+                organization_id=organization_id,
+                supabase_client=supabase,
+            )
+            span.set_attribute("success", bool(result.get('success')))
+            return result
+    except Exception as sms_err:
+        logger.error(f"SMS send FAILED for person {person_id}: {sms_err}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+
+async def _record_sent_reply(
+    context,
+    conversation_manager,
+    compliance_checker,
+    person_id: int,
+    organization_id: str,
+    response_text: str,
+    reply: Dict[str, Any],
+):
+    """Apply a sent reply to the conversation, compliance counters, logs and A/B stats."""
+    from app.ai_agent.conversation_manager import ConversationState
+
+    # Record outbound message
+    context.add_message("outbound", response_text, "sms")
+
+    # Update context from agent response
+    if reply.get("lead_score_delta"):
+        context.lead_score += reply["lead_score_delta"]
+
+    if reply.get("state_changed") and reply.get("conversation_state"):
+        context.state = ConversationState(reply["conversation_state"])
+
+    # Update qualification data
+    for key, value in (reply.get("extracted_info") or {}).items():
+        if value and hasattr(context.qualification_data, key):
+            setattr(context.qualification_data, key, value)
+
+    # Handle handoff if needed
+    if reply.get("should_handoff"):
+        context.handoff_reason = reply.get("handoff_reason") or 'AI recommended handoff'
+        context.state = ConversationState.HANDED_OFF
+        # Create task for human follow-up via FUB API
+        try:
+            handoff_fub_client = FUBApiClient(api_key=CREDS.FUB_API_KEY)
+            handoff_fub_client.create_task(
+                person_id=person_id,
+                description=f"AI Handoff: {context.handoff_reason}",
+            )
+            # Also add a note
+            handoff_fub_client.add_note(
+                person_id=person_id,
+                note_content=f"<b>AI Agent Handoff</b><br>Reason: {context.handoff_reason}<br>Last message: {reply.get('inbound_message', '')}",
+            )
+        except Exception as task_error:
+            logger.warning(f"Could not create handoff task/note: {task_error}")
+
+    # Save updated context
+    await conversation_manager.save_context(context)
+
+    # Update compliance counter
+    await compliance_checker.increment_message_count(person_id, organization_id, reply.get("from_number"))
+
+    # Log the AI interaction
+    await log_ai_message(
+        conversation_id=context.conversation_id,
+        fub_person_id=person_id,
+        direction="outbound",
+        channel="sms",
+        message_content=response_text,
+        lead_score_delta=reply.get("lead_score_delta") or 0,
+        extracted_data=reply.get("extracted_info") or {},
+        intent_detected=reply.get("detected_intent") or None,
+    )
+
+    # Track A/B test outcomes — appointment or opt-out
+    try:
+        detected = (reply.get("detected_intent") or "").lower()
+        if "appointment" in detected or "schedule" in detected or "time_selection" in detected:
+            from app.ai_agent.template_engine import get_template_engine
+            ab_engine = get_template_engine(supabase_client=supabase)
+            ab_engine.record_ab_test_outcome(
+                conversation_id=context.conversation_id,
+                led_to_appointment=True,
+            )
+    except Exception:
+        pass  # A/B tracking is non-critical
+
+
+async def _deliver_delayed_reply(row: Dict[str, Any]) -> bool:
+    """Send a reply claimed by the delayed reply queue and record it."""
+    reply = row.get("payload") or {}
+    with start_span("reply_dispatch", trace_id=reply.get("trace_id"), person_id=row["fub_person_id"]):
+        if reply.get("queued_at"):
+            # Planned human-like delay plus any dispatcher lateness
+            get_tracer().record("reply_delay", (time.time() - reply["queued_at"]) * 1000)
+        delivered = await _deliver_reply_row(row, reply)
+        if delivered and reply.get("received_at"):
+            get_tracer().record("webhook_to_send", (time.time() - reply["received_at"]) * 1000)
+        return delivered
+
+
+async def _deliver_reply_row(row: Dict[str, Any], reply: Dict[str, Any]) -> bool:
+    from app.ai_agent.compliance_checker import ComplianceChecker
+    from app.ai_agent.conversation_manager import ConversationManager, ConversationState
+
+    person_id = row["fub_person_id"]
+    organization_id = row.get("organization_id")
+    user_id = row.get("user_id")
+
+    conversation_manager = ConversationManager(supabase_client=supabase)
+    context = await conversation_manager.get_or_create_conversation(
+        fub_person_id=person_id,
+        user_id=user_id,
+        organization_id=organization_id,
+    )
+
+    # A human may have taken over while the reply was waiting
+    if context.state == ConversationState.HANDED_OFF:
+        raise ReplySkipped("conversation_handed_off")
+
+    result = await _send_reply_sms(person_id, row["message_content"], user_id, organization_id)
+    if not result.get('success'):
+        logger.error(f"SMS send FAILED for person {person_id}: {result.get('error', 'unknown error')}")
+        return False
+
+    logger.info(f"SMS sent successfully to person {person_id}: {row['message_content'][:50]}...")
+    await _record_sent_reply(
+        context=context,
+        conversation_manager=conversation_manager,
+        compliance_checker=ComplianceChecker(supabase_client=supabase),
+        person_id=person_id,
+        organization_id=organization_id,
+        response_text=row["message_content"],
+        reply=reply,
+    )
+    return True
+
+
+def _start_inbound_text_prefetch(
+    person_id: int,
+    organization_id: str,
+    user_id: str,
+    phone: Optional[str],
+    fub_client: FUBApiClient,
+    compliance_checker,
+    conversation_manager,
+) -> PrefetchGraph:
+    """
+    Start every context lookup process_inbound_text() needs, concurrently.
+
+    Once person/org/user are known none of these depend on each other
+    (beyond the edges declared below), so the handler waits roughly as long
+    as the slowest one instead of their sum. Everything past the settings
+    and the per-lead flag waits until the AI is known to be enabled for this
+    lead, so disabled leads never cost a FUB person fetch, a compliance check
+    or a history read, and never get a conversation created.
+    """
+    from app.ai_agent.settings_service import get_agent_settings
+    from app.ai_agent.lead_ai_settings_service import LeadAISettingsServiceSingleton
+
+    lead_ai_service = LeadAISettingsServiceSingleton.get_instance(supabase)
+
+    async def ai_allowed(settings, lead_ai_enabled):
+        return bool(settings and settings.is_enabled and lead_ai_enabled is True)
+
+    async def person(ai_allowed):
+        if not ai_allowed:
+            return None
+        return await asyncio.to_thread(fub_client.get_person, person_id)
+
+    async def compliance(org_settings, ai_allowed):
+        if not ai_allowed:
+            return None
+        return await compliance_checker.check_sms_compliance(
+            fub_person_id=person_id,
+            organization_id=organization_id,
+            phone_number=phone,
+            recipient_timezone=org_settings.timezone if org_settings else "America/Denver",
+        )
+
+    async def history(ai_allowed):
+        if not ai_allowed:
+            return []
+        return await get_conversation_history(person_id, limit=15)
+
+    async def lead_profile(person, ai_allowed):
+        if not (person and ai_allowed):
+            return None
+        return await build_lead_profile_from_fub(person, organization_id)
+
+    async def conversation(person, ai_allowed):
+        if not (person and ai_allowed):
+            return None
+        return await conversation_manager.get_or_create_conversation(
+            fub_person_id=person_id,
+            user_id=user_id,
+            organization_id=organization_id,
+            lead_data=person,
+        )
+
+    graph = PrefetchGraph(f"inbound_text:{person_id}")
+    graph.add("settings", lambda: get_agent_settings(supabase, organization_id, user_id), blocking=True)
+    # Org-level row (no user) drives the timezone and reply pacing, as before
+    graph.add("org_settings", lambda: get_agent_settings(supabase, organization_id), blocking=True)
+    graph.add("lead_ai_enabled", lambda: lead_ai_service.is_ai_enabled_for_lead(
+        fub_person_id=person_id,
+        organization_id=organization_id,
+        user_id=user_id,
+    ), blocking=True)
+    graph.add("ai_allowed", ai_allowed, deps=("settings", "lead_ai_enabled"))
+    graph.add("person", person, deps=("ai_allowed",))
+    graph.add("compliance", compliance, deps=("org_settings", "ai_allowed"), blocking=True)
+    graph.add("history", history, deps=("ai_allowed",), blocking=True)
+    # Not blocking: the profile cache schedules stale-while-revalidate refreshes on this loop
+    graph.add("lead_profile", lead_profile, deps=("person", "ai_allowed"))
+    graph.add("conversation", conversation, deps=("person", "ai_allowed"), blocking=True)
+    return graph.start()
+
+
+@traced("webhook.inbound_text")
 async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str, resource_ids: list, org_id_hint: str = None):
     """
     Process an inbound text message using the full AI Agent Service.
@@ -280,7 +566,8 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
     Steps:
     1. Fetch the message details from FUB
     2. Check if it's an inbound message (not our own outbound)
-    3. Build rich lead profile from FUB data
+    3. Prefetch settings, lead profile, history, compliance and the
+       conversation concurrently (see _start_inbound_text_prefetch)
     4. Check compliance (opt-out keywords, rate limits)
     5. Process through full AI Agent Service (intent detection, qualification, objection handling)
     6. Send response via FUB native texting
@@ -293,6 +580,8 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
     """
     global _playwright_sms_service
 
+    received_at = time.time()
+    prefetch = None
     try:
         import aiohttp
         import base64
@@ -307,7 +596,8 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
         # If org_id is provided in URL, use that org's API key
         fub_api_key = CREDS.FUB_API_KEY  # Default fallback
         if org_id_hint:
-            org_api_key = await get_fub_api_key_for_org(org_id_hint)
+            with start_span("tenant_resolution", organization_id=org_id_hint):
+                org_api_key = await get_fub_api_key_for_org(org_id_hint)
             if org_api_key:
                 fub_api_key = org_api_key
                 logger.info(f"Using org-specific FUB API key for org {org_id_hint}")
@@ -318,12 +608,13 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
             'Authorization': f'Basic {base64.b64encode(f"{fub_api_key}:".encode()).decode()}',
         }
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(resource_uri) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch text message: {response.status}")
-                    return
-                message_data = await response.json()
+        with start_span("message_fetch"):
+            async with aiohttp.ClientSession(headers=headers) as session:
+                async with session.get(resource_uri) as response:
+                    if response.status != 200:
+                        logger.error(f"Failed to fetch text message: {response.status}")
+                        return
+                    message_data = await response.json()
 
         # Get the text message details
         text_messages = message_data.get('textmessages', [])
@@ -353,13 +644,31 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
         to_number = text_msg.get('toNumber')
 
         # MULTI-TENANT: Use org_id from URL if provided, otherwise resolve
-        organization_id = org_id_hint or await resolve_organization_for_person(person_id)
-        user_id = await resolve_user_for_person(person_id, organization_id)
+        with start_span("lead_owner_resolution", person_id=person_id):
+            organization_id = org_id_hint or await resolve_organization_for_person(person_id)
+            user_id = await resolve_user_for_person(person_id, organization_id)
 
         if not organization_id or not user_id:
             logger.warning(f"Could not resolve organization/user for person {person_id}")
             return
 
+        from app.ai_agent.compliance_checker import ComplianceChecker
+        from app.ai_agent.conversation_manager import ConversationManager, ConversationState
+
+        fub_client = FUBApiClient(api_key=CREDS.FUB_API_KEY)
+        compliance_checker = ComplianceChecker(supabase_client=supabase)
+        conversation_manager = ConversationManager(supabase_client=supabase)
+
+        prefetch = _start_inbound_text_prefetch(
+            person_id=person_id,
+            organization_id=organization_id,
+            user_id=user_id,
+            phone=text_msg.get('to') or text_msg.get('from'),
+            fub_client=fub_client,
+            compliance_checker=compliance_checker,
+            conversation_manager=conversation_manager,
+        )
+
         # ============================================
         # AI ENABLE CHECK - TWO-LEVEL OPT-IN MODEL
         # ============================================
@@ -373,8 +682,7 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
         # ============================================
 
         # First, check the GLOBAL switch (master kill switch)
-        from app.ai_agent.settings_service import get_agent_settings
-        ai_settings = await get_agent_settings(supabase, organization_id, user_id)
+        ai_settings = await prefetch.get("settings")
 
         if not ai_settings.is_enabled:
             logger.info(f"Skipping person {person_id} - AI system is GLOBALLY DISABLED")
@@ -441,13 +749,7 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
             logger.info(f"Phone number {to_number} is not blocked - proceeding with AI response")
 
         # Global is ON - now check per-lead setting (OPT-IN model)
-        from app.ai_agent.lead_ai_settings_service import LeadAISettingsServiceSingleton
-        lead_ai_service = LeadAISettingsServiceSingleton.get_instance(supabase)
-        per_lead_enabled = await lead_ai_service.is_ai_enabled_for_lead(
-            fub_person_id=person_id,
-            organization_id=organization_id,
-            user_id=user_id,
-        )
+        per_lead_enabled = await prefetch.get("lead_ai_enabled")
 
         # OPT-IN MODEL: Lead must be EXPLICITLY enabled
         # If per_lead_enabled is None (no setting) or False, AI does NOT respond
@@ -498,9 +800,8 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
             except Exception as db_cancel_error:
                 logger.error(f"CRITICAL: Both Celery and direct DB cancel failed for lead {person_id}: {db_cancel_error}")
 
-        # Fetch person data for profile building
-        fub_client = FUBApiClient(api_key=CREDS.FUB_API_KEY)
-        person_data = fub_client.get_person(person_id)
+        # Person data for profile building (fetched by the prefetch stage)
+        person_data = await prefetch.get("person")
 
         if not person_data:
             logger.warning(f"Could not fetch person data for {person_id}")
@@ -544,18 +845,19 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
             agent_id = credentials.get("agent_id", user_id or "default")
 
             # Check if this is first contact - no message history in our database
-            existing_history = await get_conversation_history(person_id, limit=1)
+            existing_history = await prefetch.get("history")
             is_first_contact = len(existing_history) == 0
 
             if is_first_contact:
                 # First contact with this lead - sync their message history for AI context
                 logger.info(f"First contact with person {person_id} - syncing message history...")
-                history_result = await _playwright_sms_service.read_recent_messages(
-                    agent_id=agent_id,
-                    person_id=person_id,
-                    credentials=credentials,
-                    limit=15,  # Get last 15 messages for context
-                )
+                with start_span("playwright_read", person_id=person_id, mode="history"):
+                    history_result = await _playwright_sms_service.read_recent_messages(
+                        agent_id=agent_id,
+                        person_id=person_id,
+                        credentials=credentials,
+                        limit=15,  # Get last 15 messages for context
+                    )
 
                 if history_result.get("success") and history_result.get("messages"):
                     # Save all historical messages to ai_message_log
@@ -573,6 +875,9 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
                             ai_model="historical_sync",  # Mark as synced history
                         )
 
+                    # The prefetched history predates the sync
+                    prefetch.refresh("history")
+
                     # Get the latest incoming message from history for current processing
                     for msg in history_messages:
                         if msg.get("is_incoming"):
@@ -582,21 +887,23 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
                 else:
                     logger.warning(f"Failed to sync history for person {person_id}, falling back to single message read")
                     # Fall back to reading just the latest message
-                    read_result = await _playwright_sms_service.read_latest_message(
-                        agent_id=agent_id,
-                        person_id=person_id,
-                        credentials=credentials,
-                    )
+                    with start_span("playwright_read", person_id=person_id, mode="latest"):
+                        read_result = await _playwright_sms_service.read_latest_message(
+                            agent_id=agent_id,
+                            person_id=person_id,
+                            credentials=credentials,
+                        )
                     if read_result.get("success"):
                         message_content = read_result.get("message", "")
             else:
                 # Not first contact - just read the latest message
                 logger.info(f"Reading latest message via Playwright for person {person_id}...")
-                read_result = await _playwright_sms_service.read_latest_message(
-                    agent_id=agent_id,
-                    person_id=person_id,
-                    credentials=credentials,
-                )
+                with start_span("playwright_read", person_id=person_id, mode="latest"):
+                    read_result = await _playwright_sms_service.read_latest_message(
+                        agent_id=agent_id,
+                        person_id=person_id,
+                        credentials=credentials,
+                    )
 
                 if not read_result.get("success"):
                     logger.error(f"Playwright read failed for person {person_id}: {read_result.get('error')}")
@@ -628,14 +935,7 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
 
         logger.info(f"Processing inbound text from person {person_id}: {message_content[:50]}...")
 
-        # Import AI agent components
-        from app.ai_agent.compliance_checker import ComplianceChecker
-        from app.ai_agent.conversation_manager import ConversationManager, ConversationState
-
-        # person_data, organization_id, and user_id already fetched earlier - no need to fetch again
-
         # Check for opt-in keyword (START) - re-subscribe opted-out leads
-        compliance_checker = ComplianceChecker(supabase_client=supabase)
         if message_content.strip().lower() == "start":
             logger.info(f"Opt-in keyword (START) detected from person {person_id}")
             await compliance_checker.clear_opt_out(
@@ -685,6 +985,11 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
                 logger.error(f"Failed to disable AI for opted-out lead {person_id}: {disable_err}")
 
             # Mark conversation as completed
+            try:
+                # Let a prefetched conversation insert land first so it's covered too
+                await prefetch.get("conversation")
+            except Exception:
+                pass
             try:
                 supabase.table('ai_conversations').update({
                     'state': 'completed',
@@ -724,20 +1029,11 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
 
             return
 
-        # Check compliance before responding
-        phone = text_msg.get('to') or text_msg.get('from')
-
-        # Load AI agent settings to get the configured timezone
-        from app.ai_agent.settings_service import get_agent_settings
-        ai_settings = await get_agent_settings(supabase, organization_id)
+        # Check compliance before responding (timezone comes from the org-level settings)
+        ai_settings = await prefetch.get("org_settings")
         configured_timezone = ai_settings.timezone if ai_settings else "America/Denver"
 
-        compliance_result = await compliance_checker.check_sms_compliance(
-            fub_person_id=person_id,
-            organization_id=organization_id,
-            phone_number=phone,
-            recipient_timezone=configured_timezone,
-        )
+        compliance_result = await prefetch.get("compliance")
 
         # Track if we need to queue the response for later (outside hours)
         queue_for_later = False
@@ -764,26 +1060,16 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
                 )
                 return
 
-        # Build rich lead profile from FUB data
-        logger.info(f"Building lead profile for person {person_id}...")
-        lead_profile = await build_lead_profile_from_fub(person_data, organization_id)
+        # Rich lead profile, history and conversation context (all prefetched)
+        lead_profile = await prefetch.get("lead_profile")
         logger.info(f"Lead profile built for {person_id}: {lead_profile.first_name} {lead_profile.last_name}")
 
-        # Get conversation history for context
-        logger.info(f"Getting conversation history for person {person_id}...")
-        conversation_history = await get_conversation_history(person_id, limit=15)
+        conversation_history = await prefetch.get("history")
         logger.info(f"Got {len(conversation_history) if conversation_history else 0} history messages")
 
-        # Get or create conversation context
-        logger.info(f"Getting conversation context for person {person_id}...")
-        conversation_manager = ConversationManager(supabase_client=supabase)
-        context = await conversation_manager.get_or_create_conversation(
-            fub_person_id=person_id,
-            user_id=user_id,
-            organization_id=organization_id,
-            lead_data=person_data,
-        )
+        context = await prefetch.get("conversation")
         logger.info(f"Conversation context ready, state: {context.state}")
+        logger.info(prefetch.summary())
 
         # CRITICAL: Skip AI responses if conversation has been handed off to human agent
         # Once handed off, the human agent owns the conversation thread
@@ -904,6 +1190,7 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
             # HUMAN-LIKE RESPONSE DELAY
             # Uses settings from ai_agent_settings table (configurable in frontend)
             # Instant replies feel robotic. Real agents need time to read, think, and type.
+            # The wait happens in the delayed reply queue, not in this coroutine.
             # ============================================
             import random as _random
             response_text = agent_response.response_text
@@ -945,99 +1232,48 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
                 f"(msg #{outbound_count + 1}, {msg_length} chars, "
                 f"settings: first={first_delay_min}-{first_delay_max}s, ongoing={ongoing_delay_min}-{ongoing_delay_max}s)"
             )
-            await asyncio.sleep(total_delay)
+            # Persist the reply and let the dispatcher send it when the delay is up,
+            # instead of holding this coroutine (and everything it references) asleep
+            send_at = datetime.utcnow() + timedelta(seconds=total_delay)
+            reply = _reply_payload(agent_response, message_content, from_number, context.conversation_id, received_at)
 
-            # Send response via Playwright browser automation
-            # Must use send_sms_with_auto_credentials() — uses the singleton with default_agent
-            # (cached cookies). Creating a new PlaywrightSMSService() per request uses a
-            # different agent_id with no cached session, causing login failures.
-            logger.info(f"Sending SMS via Playwright to person {person_id}...")
-
-            try:
-                from app.messaging.playwright_sms_service import send_sms_with_auto_credentials
-
-                result = await send_sms_with_auto_credentials(
-                    person_id=person_id,
-                    message=agent_response.response_text,
-                    user_id=user_id,
-                    organization_id=organization_id,
-                    supabase_client=supabase,
-                )
-            except Exception as sms_err:
-                logger.error(f"SMS send FAILED for person {person_id}: {sms_err}")
-                import traceback
-                traceback.print_exc()
-                raise
+            # Save the inbound message now - the context isn't kept around until the send
+            await conversation_manager.save_context(context)
 
-            if result.get('success'):
-                logger.info(f"SMS sent successfully to person {person_id}: {agent_response.response_text[:50]}...")
-                # Record outbound message
-                context.add_message("outbound", agent_response.response_text, "sms")
-
-                # Update context from agent response
-                if agent_response.lead_score_delta:
-                    context.lead_score += agent_response.lead_score_delta
-
-                if agent_response.state_changed and agent_response.conversation_state:
-                    context.state = ConversationState(agent_response.conversation_state)
-
-                # Update qualification data
-                if agent_response.extracted_info:
-                    for key, value in agent_response.extracted_info.items():
-                        if value and hasattr(context.qualification_data, key):
-                            setattr(context.qualification_data, key, value)
-
-                # Handle handoff if needed
-                if agent_response.should_handoff:
-                    context.handoff_reason = agent_response.handoff_reason or 'AI recommended handoff'
-                    context.state = ConversationState.HANDED_OFF
-                    # Create task for human follow-up via FUB API
-                    try:
-                        fub_client.create_task(
-                            person_id=person_id,
-                            description=f"AI Handoff: {context.handoff_reason}",
-                        )
-                        # Also add a note
-                        fub_client.add_note(
-                            person_id=person_id,
-                            note_content=f"<b>AI Agent Handoff</b><br>Reason: {context.handoff_reason}<br>Last message: {message_content}",
-                        )
-                    except Exception as task_error:
-                        logger.warning(f"Could not create handoff task/note: {task_error}")
+            # This reply answers the newer message, so any reply still waiting is stale
+            get_reply_queue().supersede(person_id)
+            queued_id = get_reply_queue().enqueue(
+                fub_person_id=person_id,
+                message_content=response_text,
+                send_at=send_at,
+                organization_id=organization_id,
+                user_id=user_id,
+                payload=reply,
+            )
+            if queued_id:
+                return
 
-                # Save updated context
-                await conversation_manager.save_context(context)
+            # Couldn't persist the reply - fall back to waiting in-process
+            logger.warning(f"Delayed reply queue unavailable for person {person_id}, sending inline")
+            with start_span("reply_delay", person_id=person_id, inline=True):
+                await asyncio.sleep(total_delay)
 
-                # Update compliance counter
-                await compliance_checker.increment_message_count(person_id, organization_id, from_number)
+            result = await _send_reply_sms(person_id, response_text, user_id, organization_id)
 
-                # Log the AI interaction
-                await log_ai_message(
-                    conversation_id=context.conversation_id,
-                    fub_person_id=person_id,
-                    direction="outbound",
-                    channel="sms",
-                    message_content=agent_response.response_text,
-                    lead_score_delta=agent_response.lead_score_delta or 0,
-                    extracted_data=agent_response.extracted_info or {},
-                    intent_detected=agent_response.detected_intent if agent_response.detected_intent else None,
+            if result.get('success'):
+                logger.info(f"SMS sent successfully to person {person_id}: {response_text[:50]}...")
+                get_tracer().record("webhook_to_send", (time.time() - received_at) * 1000, person_id=person_id)
+                await _record_sent_reply(
+                    context=context,
+                    conversation_manager=conversation_manager,
+                    compliance_checker=compliance_checker,
+                    person_id=person_id,
+                    organization_id=organization_id,
+                    response_text=response_text,
+                    reply=reply,
                 )
-
-                # Track A/B test outcomes — appointment or opt-out
-                try:
-                    detected = (agent_response.detected_intent or "").lower()
-                    if "appointment" in detected or "schedule" in detected or "time_selection" in detected:
-                        from app.ai_agent.template_engine import get_template_engine
-                        ab_engine = get_template_engine(supabase_client=supabase)
-                        ab_engine.record_ab_test_outcome(
-                            conversation_id=context.conversation_id,
-                            led_to_appointment=True,
-                        )
-                except Exception:
-                    pass  # A/B tracking is non-critical
             else:
                 logger.error(f"SMS send FAILED for person {person_id}: {result.get('error', 'unknown error')}")
-
         else:
             logger.warning(f"No AI response generated for person {person_id}")
 
@@ -1050,8 +1286,13 @@ async def process_inbound_text(webhook_data: Dict[str, Any], resource_uri: str,
         traceback.print_exc()
         sys.stdout.flush()
         sys.stderr.flush()
+    finally:
+        # Early returns leave unneeded lookups running
+        if prefetch is not None:
+            prefetch.cancel()
 
 
+@traced("profile_build")
 async def build_lead_profile_from_fub(person_data: Dict[str, Any], organization_id: str, force_refresh: bool = False) -> 'LeadProfile':
     """
     Build a COMPREHENSIVE LeadProfile from FUB data with SMART CACHING.
@@ -1067,7 +1308,7 @@ async def build_lead_profile_from_fub(person_data: Dict[str, Any], organization_
     - Tasks assigned
 
     CACHING STRATEGY:
-    - Profiles are cached in Supabase (ai_lead_profile_cache table)
+    - Profiles are cached in Supabase (ai_lead_profile_sections, one row per section)
     - Cache is refreshed every 24 hours or on-demand
     - Incremental updates via webhooks keep cache fresh between full refreshes
     - This reduces FUB API calls from 7 per message to 1 DB read
@@ -1382,71 +1623,15 @@ async def build_lead_profile_from_fub(person_data: Dict[str, Any], organization_
 
 
 async def get_conversation_history(fub_person_id: int, limit: int = 15) -> List[Dict[str, Any]]:
-    """Get conversation history from database."""
-    try:
-        result = supabase.table("ai_message_log").select(
-            "direction, channel, message_content, ai_model, created_at"
-        ).eq(
-            "fub_person_id", fub_person_id
-        ).order(
-            "created_at", desc=True
-        ).limit(limit + 20).execute()  # Fetch extra to account for filtered messages
-
-        if result.data:
-            # Reverse to get chronological order
-            history = list(reversed(result.data))
-
-            # Filter out non-conversation messages
-            filtered_history = []
-            for h in history:
-                content = h.get("message_content", "")
-                ai_model = h.get("ai_model", "")
-
-                # Skip messages that are privacy placeholders
-                if "Body is hidden" in content or "hidden for privacy" in content.lower():
-                    logger.debug(f"Skipping privacy-redacted message in history for person {fub_person_id}")
-                    continue
-
-                # Skip enrichment/skip trace data logged as messages
-                # These are from historical_sync and contain contact info, criminal records, etc.
-                if ai_model == "historical_sync" and (
-                    "Contact Information:" in content
-                    or "Criminal History" in content
-                    or "Email Owner:" in content
-                    or "Phone Numbers" in content and "Addresses" in content
-                    or "Risk Assessment:" in content
-                    or "Test note from" in content
-                    or "Re-engagement Test" in content
-                    or len(content) > 500  # Historical sync messages that are too long are likely enrichment data
-                ):
-                    logger.debug(f"Skipping enrichment/sync data in history for person {fub_person_id}")
-                    continue
-
-                filtered_history.append({
-                    "role": "lead" if h["direction"] == "inbound" else "agent",
-                    "content": content,
-                    "channel": h["channel"],
-                    "timestamp": h["created_at"],
-                })
-
-            # Return only the most recent `limit` messages after filtering
-            return filtered_history[-limit:]
-    except Exception as e:
-        logger.error(f"Error fetching conversation history: {e}")
-
-    return []
+    """Get filtered conversation history (Redis window, DB backfill on a cold miss)."""
+    return get_conversation_history_cache(supabase).get_recent(fub_person_id, limit=limit)
 
 
 async def get_agent_info_for_org(organization_id: str) -> Dict[str, Any]:
     """Get agent info for an organization."""
     try:
-        # Only select columns that exist in ai_agent_settings table
-        result = supabase.table("ai_agent_settings").select(
-            "agent_name, brokerage_name"
-        ).eq("organization_id", organization_id).limit(1).execute()
-
-        if result.data:
-            data = result.data[0]
+        data, source = get_settings_cache(supabase).get_row(organization_id=organization_id)
+        if data and (source == SOURCE_ORG or data.get("organization_id") == organization_id):
             return {
                 "agent_name": data.get("agent_name", "Sarah"),
                 "brokerage_name": data.get("brokerage_name", "our team"),
@@ -1944,14 +2129,16 @@ async def schedule_welcome_sequence(context, settings: Dict[str, Any]):
                             logger.info(f"[FALLBACK] Email sent to lead {fub_person_id} via Playwright")
 
                             # Log to database
-                            supabase.table("ai_message_log").insert({
+                            log_row = {
                                 "fub_person_id": fub_person_id,
                                 "direction": "outbound",
                                 "channel": "email",
                                 "message_content": outreach.email_subject,
                                 "intent_detected": "fallback_welcome_email",
                                 "created_at": datetime.utcnow().isoformat(),
-                            }).execute()
+                            }
+                            supabase.table("ai_message_log").insert(log_row).execute()
+                            get_conversation_history_cache(supabase).append(log_row)
                         else:
                             logger.error(f"[FALLBACK] Email failed for lead {fub_person_id}: {email_result.get('error')}")
                     else:
@@ -2099,15 +2286,10 @@ async def get_fub_user_id_for_user(user_id: str) -> Optional[int]:
 async def get_ai_agent_settings(organization_id: str, user_id: str) -> Optional[Dict[str, Any]]:
     """Get AI agent settings for the organization/user."""
     try:
-        # Try user-specific settings first
-        result = supabase.table("ai_agent_settings").select("*").eq("user_id", user_id).execute()
-        if result.data:
-            return result.data[0]
-
-        # Fall back to organization settings
-        result = supabase.table("ai_agent_settings").select("*").eq("organization_id", organization_id).is_("user_id", "null").execute()
-        if result.data:
-            return result.data[0]
+        # User-specific settings first, then organization settings (shared cache)
+        row, source = get_settings_cache(supabase).get_row(user_id, organization_id)
+        if row and source in (SOURCE_USER, SOURCE_ORG):
+            return row
 
         # Return defaults
         return {
@@ -2161,6 +2343,7 @@ async def log_ai_message(
         if response_time_ms is not None:
             row["response_time_ms"] = response_time_ms
         supabase.table("ai_message_log").insert(row).execute()
+        get_conversation_history_cache(supabase).append(row)
     except Exception as e:
         logger.error(f"Error logging AI message: {e}")
 
@@ -21,6 +21,64 @@ from app.fub.note_service import FUBNoteServiceSingleton, add_enrichment_contact
 logger = logging.getLogger(__name__)
 
 
+def extract_enrichment_criteria(person_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    Pull contact enrichment criteria out of a FUB person record.
+
+    Uses the primary phone/email when marked, else the first one, and the
+    first address formatted as "street, city, state, zip".
+
+    Returns:
+        Dict with first_name, last_name, phone, email, address
+    """
+    first_name = person_data.get('firstName', '')
+    last_name = person_data.get('lastName', '')
+
+    # Get primary phone
+    phones = person_data.get('phones', [])
+    phone = None
+    for p in phones:
+        if p.get('isPrimary'):
+            phone = p.get('value')
+            break
+    if not phone and phones:
+        phone = phones[0].get('value')
+
+    # Get primary email
+    emails = person_data.get('emails', [])
+    email = None
+    for e in emails:
+        if e.get('isPrimary'):
+            email = e.get('value')
+            break
+    if not email and emails:
+        email = emails[0].get('value')
+
+    # Get address
+    addresses = person_data.get('addresses', [])
+    address = None
+    if addresses:
+        addr = addresses[0]
+        parts = []
+        if addr.get('street'):
+            parts.append(addr['street'])
+        if addr.get('city'):
+            parts.append(addr['city'])
+        if addr.get('state'):
+            parts.append(addr['state'])
+        if addr.get('code'):
+            parts.append(addr['code'])
+        address = ', '.join(parts) if parts else None
+
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': phone,
+        'email': email,
+        'address': address,
+    }
+
+
 class AutoEnhancementHandler:
     """
     Handler for automatically enhancing new leads when they arrive in FUB.
@@ -187,9 +245,10 @@ class AutoEnhancementHandler:
             if not success:
                 logger.warning(f"Failed to deduct credit for auto-enhancement: {msg}")
 
-            # Log the lookup
+            # Log the lookup (the row also feeds the lookup cache)
+            cache_key = self.endato.pop_last_lookup_key()
             try:
-                self.supabase.table('lookup_history').insert({
+                lookup_data = {
                     'user_id': user_id,
                     'search_type': 'contact_enrichment',
                     'criteria': {
@@ -202,7 +261,10 @@ class AutoEnhancementHandler:
                     'success': True,
                     'usage_type': 'auto_enhancement',
                     'fub_person_id': str(fub_person_id)
-                }).execute()
+                }
+                if cache_key:
+                    lookup_data['cache_key'] = cache_key
+                self.supabase.table('lookup_history').insert(lookup_data).execute()
             except Exception as log_error:
                 logger.warning(f"Failed to log auto-enhancement: {log_error}")
 
@@ -287,54 +349,13 @@ class AutoEnhancementHandler:
 
             if should_enhance:
                 # Extract person details
-                first_name = person_data.get('firstName', '')
-                last_name = person_data.get('lastName', '')
-
-                # Get primary phone
-                phones = person_data.get('phones', [])
-                phone = None
-                for p in phones:
-                    if p.get('isPrimary'):
-                        phone = p.get('value')
-                        break
-                if not phone and phones:
-                    phone = phones[0].get('value')
-
-                # Get primary email
-                emails = person_data.get('emails', [])
-                email = None
-                for e in emails:
-                    if e.get('isPrimary'):
-                        email = e.get('value')
-                        break
-                if not email and emails:
-                    email = emails[0].get('value')
-
-                # Get address
-                addresses = person_data.get('addresses', [])
-                address = None
-                if addresses:
-                    addr = addresses[0]
-                    parts = []
-                    if addr.get('street'):
-                        parts.append(addr['street'])
-                    if addr.get('city'):
-                        parts.append(addr['city'])
-                    if addr.get('state'):
-                        parts.append(addr['state'])
-                    if addr.get('code'):
-                        parts.append(addr['code'])
-                    address = ', '.join(parts) if parts else None
+                criteria = extract_enrichment_criteria(person_data)
 
                 # Perform auto-enhancement
                 enhance_result = self.enhance_new_lead(
                     user_id=user_id,
                     fub_person_id=fub_person_id,
-                    first_name=first_name,
-                    last_name=last_name,
-                    phone=phone,
-                    email=email,
-                    address=address
+                    **criteria
                 )
 
                 results['auto_enhanced'] = enhance_result.get('success', False)
@@ -9,7 +9,7 @@ This is used for:
 2. Re-triggering outreach for leads where initial outreach failed
 
 Usage:
-    python backfill_proactive_outreach.py
+    python backfill_proactive_outreach.py [--checkpoint backfill.jsonl]
 """
 
 import os
@@ -28,6 +28,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.database.supabase_client import SupabaseClientSingleton
 from app.database.fub_api_client import FUBApiClient
+from app.ai_agent.bulk_generation import BulkGenerationEngine, LLMSession
 from app.ai_agent.proactive_outreach_orchestrator import ProactiveOutreachOrchestrator
 from app.messaging.fub_sms_service import FUBSMSService
 from app.ai_agent.compliance_checker import ComplianceChecker
@@ -95,50 +96,31 @@ async def get_leads_needing_outreach(supabase):
     return leads_needing_outreach
 
 
-async def trigger_outreach_for_lead(orchestrator, lead, dry_run=False):
-    """Trigger proactive outreach for a single lead."""
+def print_outreach_result(lead, result):
+    """Print the outcome of proactive outreach for a single lead."""
     person_id = lead['fub_person_id']
-    org_id = lead['organization_id']
-    user_id = lead['user_id']
 
-    print(f"\n📤 Processing lead {person_id}...")
+    print(f"\n📤 Lead {person_id}...")
 
-    if dry_run:
-        print(f"   [DRY RUN] Would trigger outreach for lead {person_id}")
-        return {"success": True, "dry_run": True}
-
-    try:
-        result = await orchestrator.trigger_proactive_outreach(
-            fub_person_id=person_id,
-            organization_id=org_id,
-            user_id=user_id,
-            trigger_reason="backfill",
-            enable_type="manual",  # These were manually enabled
-        )
+    if result["success"]:
+        print(f"   ✅ Success - Actions: {', '.join(result['actions_taken'])}")
+        print(f"      Lead Stage: {result['lead_stage']}")
+        if result.get('messages', {}).get('sms_preview'):
+            print(f"      SMS Preview: {result['messages']['sms_preview']}")
+    else:
+        print(f"   ❌ Failed - Errors: {', '.join(result.get('errors', []))}")
 
-        if result["success"]:
-            print(f"   ✅ Success - Actions: {', '.join(result['actions_taken'])}")
-            print(f"      Lead Stage: {result['lead_stage']}")
-            if result.get('messages', {}).get('sms_preview'):
-                print(f"      SMS Preview: {result['messages']['sms_preview']}")
-        else:
-            print(f"   ❌ Failed - Errors: {', '.join(result.get('errors', []))}")
 
-        return result
-
-    except Exception as e:
-        print(f"   ❌ Exception: {e}")
-        return {"success": False, "errors": [str(e)]}
-
-
-async def backfill_proactive_outreach(dry_run=False, limit=None, delay_seconds=5):
+async def backfill_proactive_outreach(dry_run=False, limit=None, concurrency=3, checkpoint=None):
     """
     Backfill proactive outreach for existing leads.
 
     Args:
         dry_run: If True, don't actually send messages (just print what would happen)
         limit: Limit to N leads (for testing)
-        delay_seconds: Delay between leads to avoid rate limits
+        concurrency: Leads processed at once (sharing one pooled LLM session)
+        checkpoint: JSONL file for generated messages; rerun with the same
+            file to reuse messages from an interrupted run
     """
     load_dotenv()
 
@@ -164,38 +146,48 @@ async def backfill_proactive_outreach(dry_run=False, limit=None, delay_seconds=5
         leads = leads[:limit]
         print(f"\n⚠️  Limited to {limit} leads")
 
-    # Initialize orchestrator
+    if dry_run:
+        for lead in leads:
+            print(f"   [DRY RUN] Would trigger outreach for lead {lead['fub_person_id']}")
+        return
+
+    # Initialize orchestrator (one pooled LLM session for every lead)
+    llm_session = LLMSession.from_env(max_connections=concurrency)
     orchestrator = ProactiveOutreachOrchestrator(
         supabase_client=supabase,
         fub_client=fub_client,
         sms_service=FUBSMSService(),
         compliance_checker=ComplianceChecker(supabase_client=supabase),
+        llm_session=llm_session,
     )
+    engine = BulkGenerationEngine(llm_session, concurrency=concurrency, checkpoint_path=checkpoint)
 
     print(f"\n🚀 Starting backfill for {len(leads)} leads...")
-    print(f"   Delay between leads: {delay_seconds} seconds")
+    print(f"   Concurrency: {concurrency} leads at a time")
+    print(f"   Checkpoint: {checkpoint or 'none'}")
+
+    # Prepare every lead, generate all messages in one bulk run, then send
+    try:
+        outcomes = await orchestrator.trigger_proactive_outreach_batch(
+            leads,
+            engine,
+            trigger_reason="backfill",
+            enable_type="manual",  # These were manually enabled
+            concurrency=concurrency,
+        )
+    finally:
+        if llm_session:
+            await llm_session.close()
+
+    for lead, result in zip(leads, outcomes):
+        print_outreach_result(lead, result)
+    print(f"\n   Generation: {engine.stats}")
 
-    # Process each lead
     results = {
-        "success": 0,
-        "failed": 0,
+        "success": sum(1 for r in outcomes if r.get("success")),
         "total": len(leads),
     }
-
-    for idx, lead in enumerate(leads, 1):
-        print(f"\n[{idx}/{len(leads)}] Lead {lead['fub_person_id']}")
-
-        result = await trigger_outreach_for_lead(orchestrator, lead, dry_run=dry_run)
-
-        if result.get("success"):
-            results["success"] += 1
-        else:
-            results["failed"] += 1
-
-        # Delay between leads
-        if idx < len(leads):
-            print(f"   ⏳ Waiting {delay_seconds} seconds before next lead...")
-            await asyncio.sleep(delay_seconds)
+    results["failed"] = results["total"] - results["success"]
 
     # Print summary
     print("\n" + "="*80)
@@ -214,14 +206,20 @@ async def main():
     parser = argparse.ArgumentParser(description="Backfill proactive outreach for AI-enabled leads")
     parser.add_argument("--dry-run", action="store_true", help="Don't actually send messages")
     parser.add_argument("--limit", type=int, help="Limit to N leads (for testing)")
-    parser.add_argument("--delay", type=int, default=5, help="Delay seconds between leads (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=3, help="Leads processed at once (default: 3)")
+    parser.add_argument(
+        "--checkpoint",
+        default=f"backfill_outreach_{datetime.now().strftime('%Y%m%d')}.jsonl",
+        help="JSONL checkpoint for generated messages (default: backfill_outreach_<date>.jsonl)",
+    )
 
     args = parser.parse_args()
 
     await backfill_proactive_outreach(
         dry_run=args.dry_run,
         limit=args.limit,
-        delay_seconds=args.delay,
+        concurrency=args.concurrency,
+        checkpoint=args.checkpoint,
     )
 
 
@@ -265,6 +265,40 @@ def health():
     return jsonify(checks), status_code
 
 
+@app.route("/health/cache-verifier")
+def cache_verifier_health():
+    """Queue depth and batch sizes of this process's lead/note cache verifiers."""
+    from app.database.lead_cache import LeadCacheSingleton
+    from app.database.note_cache import NoteCacheSingleton
+
+    verifiers = {}
+    for name, singleton in (("leads", LeadCacheSingleton), ("notes", NoteCacheSingleton)):
+        try:
+            verifiers[name] = singleton.get_instance().verifier.stats()
+        except Exception as e:
+            verifiers[name] = {"error": str(e)[:100]}
+
+    return jsonify({"verifiers": verifiers, "timestamp": datetime.now().isoformat()})
+
+
+@app.route("/health/cache-invalidation")
+def cache_invalidation_health():
+    """DB change feed status and lag (ms from row change to cache update)."""
+    try:
+        from app.database.cache_invalidation import get_feed_stats
+        return jsonify({"feed": get_feed_stats(), "timestamp": datetime.now().isoformat()})
+    except Exception as e:
+        return jsonify({"feed": {"active": False, "error": str(e)[:100]}}), 503
+
+
+@app.route("/health/fast-path")
+def fast_path_health():
+    """Share of AI replies answered from templates, and LLM latency saved."""
+    from app.ai_agent.fast_path_responder import get_fast_path_stats
+
+    return jsonify({"fast_path": get_fast_path_stats().snapshot(), "timestamp": datetime.now().isoformat()})
+
+
 @app.route("/version")
 def version():
     """Version endpoint for deployment verification."""
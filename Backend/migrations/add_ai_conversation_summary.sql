@@ -0,0 +1,10 @@
+-- Migration: Rolling conversation summary on ai_conversations
+-- The response prompt sends recent turns verbatim and older turns as a short
+-- summary. The summary is updated incrementally (each message folded in once)
+-- and stored here, so older turns are never re-read on later messages.
+
+ALTER TABLE ai_conversations
+ADD COLUMN IF NOT EXISTS conversation_summary JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+COMMENT ON COLUMN ai_conversations.conversation_summary IS
+    'Rolling summary of turns older than the prompt history window (facts, folded_count, last_folded_key)';
@@ -0,0 +1,105 @@
+-- Migration: Bulk enrichment jobs
+-- Enrich a whole list of FUB people (explicit IDs or a people filter) in one
+-- background job. Every person is an item row so an interrupted or paused
+-- job resumes with the people still pending. Credits are reserved for the
+-- whole batch up front and unused ones are returned when the job settles.
+
+CREATE TABLE IF NOT EXISTS enrichment_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, running, paused, completed, cancelled, failed
+    person_filter JSONB,                            -- FUB people filter, when not given explicit IDs
+    total INTEGER DEFAULT 0,
+    processed INTEGER DEFAULT 0,
+    enriched INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    credit_reservation JSONB,                       -- outstanding reservation (see CreditService.reserve_credits)
+    credits_used INTEGER DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    completed_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_user_id ON enrichment_jobs(user_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS enrichment_job_items (
+    id BIGSERIAL PRIMARY KEY,
+    job_id UUID REFERENCES enrichment_jobs(id) ON DELETE CASCADE NOT NULL,
+    fub_person_id BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, enriched, failed, skipped
+    person JSONB,                                   -- name/phone/email/address snapshot from the filter listing
+    error TEXT,
+    phones_added INTEGER DEFAULT 0,
+    emails_added INTEGER DEFAULT 0,
+    note_posted BOOLEAN DEFAULT FALSE,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (job_id, fub_person_id)
+);
+
+-- Pending items of a job (resume)
+CREATE INDEX IF NOT EXISTS idx_enrichment_job_items_status ON enrichment_job_items(job_id, status);
+
+-- Takes up to p_amount credits from the given users columns, in order, while
+-- holding the user's row lock. Returns what was taken per column, e.g.
+-- {"trial_enhancement_credits": 3, "bundle_enhancement_credits": 97}.
+CREATE OR REPLACE FUNCTION reserve_credit_pools(
+    p_user_id UUID,
+    p_fields TEXT[],
+    p_amount INTEGER
+)
+RETURNS JSONB AS $$
+DECLARE
+    pool TEXT;
+    available INTEGER;
+    take INTEGER;
+    remaining INTEGER := p_amount;
+    taken JSONB := '{}'::jsonb;
+BEGIN
+    PERFORM 1 FROM users WHERE id = p_user_id FOR UPDATE;
+
+    FOREACH pool IN ARRAY p_fields LOOP
+        EXIT WHEN remaining <= 0;
+        IF pool !~ '^[a-z_]+_credits$' THEN
+            RAISE EXCEPTION 'Invalid credit pool: %', pool;
+        END IF;
+
+        EXECUTE format('SELECT COALESCE(%I, 0) FROM users WHERE id = $1', pool)
+            INTO available USING p_user_id;
+        take := LEAST(COALESCE(available, 0), remaining);
+
+        IF take > 0 THEN
+            EXECUTE format('UPDATE users SET %I = COALESCE(%I, 0) - $1 WHERE id = $2', pool, pool)
+                USING take, p_user_id;
+            taken := taken || jsonb_build_object(pool, take);
+            remaining := remaining - take;
+        END IF;
+    END LOOP;
+
+    RETURN taken;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Gives reserved credits back, e.g. p_amounts = {"bundle_enhancement_credits": 12}.
+CREATE OR REPLACE FUNCTION release_credit_pools(
+    p_user_id UUID,
+    p_amounts JSONB
+)
+RETURNS VOID AS $$
+DECLARE
+    pool TEXT;
+    amount TEXT;
+BEGIN
+    FOR pool, amount IN SELECT * FROM jsonb_each_text(p_amounts) LOOP
+        IF pool !~ '^[a-z_]+_credits$' THEN
+            RAISE EXCEPTION 'Invalid credit pool: %', pool;
+        END IF;
+        EXECUTE format('UPDATE users SET %I = COALESCE(%I, 0) + $1 WHERE id = $2', pool, pool)
+            USING amount::INTEGER, p_user_id;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,51 @@
+-- Migration: Change notifications for the Redis lead/note caches
+-- Every insert, update and delete on leads and lead_notes sends a NOTIFY on
+-- the cache_invalidation channel. The cache listener
+-- (python -m app.database.cache_invalidation) applies them to Redis as they
+-- arrive, instead of the caches re-reading rows on a timer.
+--
+-- Plain Postgres (no Supabase extensions), so it also runs against a local
+-- database. NOTIFY payloads are limited to 8000 bytes: the row is included
+-- when it fits, otherwise only the keys are sent and the entry is evicted.
+
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    key_column TEXT := TG_ARGV[0];  -- cache key column: fub_person_id / note_id
+    new_row JSONB;
+    old_row JSONB;
+    payload JSONB;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        new_row := to_jsonb(NEW);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        old_row := to_jsonb(OLD);
+    END IF;
+
+    payload := jsonb_build_object(
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'key', COALESCE(new_row, old_row) ->> key_column,
+        'old_key', old_row ->> key_column,
+        'ts', extract(epoch FROM clock_timestamp())
+    );
+
+    IF new_row IS NOT NULL AND octet_length((payload || jsonb_build_object('row', new_row))::text) < 7900 THEN
+        payload := payload || jsonb_build_object('row', new_row);
+    END IF;
+
+    PERFORM pg_notify('cache_invalidation', payload::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leads_cache_invalidation ON leads;
+CREATE TRIGGER leads_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE ON leads
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('fub_person_id');
+
+DROP TRIGGER IF EXISTS lead_notes_cache_invalidation ON lead_notes;
+CREATE TRIGGER lead_notes_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE ON lead_notes
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('note_id');
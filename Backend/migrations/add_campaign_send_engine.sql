@@ -0,0 +1,87 @@
+-- Migration: Paced campaign sending (used by CampaignSendEngine)
+-- Per-lead send times, chunked claims and recipient data for re-engagement
+-- campaign leads.
+
+-- send_after: when the lead's message is due (spread over its texting window)
+-- claim_token / claimed_at: which engine tick is sending it, and since when
+-- recipient_timezone / first_name / phone_number: copied from the lead at
+-- assignment so sends don't need another lookup
+ALTER TABLE ai_campaign_leads
+    ADD COLUMN IF NOT EXISTS send_after TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS claim_token UUID,
+    ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS recipient_timezone VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS first_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS phone_number VARCHAR(50);
+
+-- 'sending' = claimed, message may be going out right now
+ALTER TABLE ai_campaign_leads DROP CONSTRAINT IF EXISTS ai_campaign_leads_status_check;
+ALTER TABLE ai_campaign_leads ADD CONSTRAINT ai_campaign_leads_status_check
+    CHECK (status IN ('pending', 'sending', 'sent', 'responded', 'converted', 'skipped', 'failed'));
+
+CREATE INDEX IF NOT EXISTS idx_campaign_leads_due
+    ON ai_campaign_leads(campaign_id, send_after)
+    WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_campaign_leads_sending
+    ON ai_campaign_leads(claimed_at)
+    WHERE status = 'sending';
+
+-- Sets send times for a batch of pending leads. Leads held by p_claim_token
+-- (claimed but not sendable yet) are released back to pending.
+-- Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION schedule_campaign_sends(
+    p_campaign_id UUID,
+    p_person_ids BIGINT[],
+    p_send_after TIMESTAMPTZ[],
+    p_claim_token UUID DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE ai_campaign_leads AS l
+    SET send_after = t.send_after,
+        status = 'pending',
+        claim_token = NULL,
+        claimed_at = NULL
+    FROM unnest(p_person_ids, p_send_after) AS t(person_id, send_after)
+    WHERE l.campaign_id = p_campaign_id
+      AND l.fub_person_id = t.person_id
+      AND (l.status = 'pending'
+           OR (l.status = 'sending' AND p_claim_token IS NOT NULL AND l.claim_token = p_claim_token));
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Claims up to p_limit due leads of a campaign (earliest send time, then
+-- highest priority). SKIP LOCKED keeps concurrent engine ticks from claiming
+-- the same lead. Returns the claimed rows.
+CREATE OR REPLACE FUNCTION claim_campaign_leads(
+    p_campaign_id UUID,
+    p_limit INTEGER,
+    p_claim_token UUID
+)
+RETURNS SETOF ai_campaign_leads AS $$
+    UPDATE ai_campaign_leads AS l
+    SET status = 'sending',
+        claim_token = p_claim_token,
+        claimed_at = NOW()
+    FROM (
+        SELECT fub_person_id
+        FROM ai_campaign_leads
+        WHERE campaign_id = p_campaign_id
+          AND status = 'pending'
+          AND send_after IS NOT NULL
+          AND send_after <= NOW()
+        ORDER BY send_after, priority_score DESC
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ) AS due
+    WHERE l.campaign_id = p_campaign_id
+      AND l.fub_person_id = due.fub_person_id
+    RETURNING l.*;
+$$ LANGUAGE sql;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,10 @@
+-- Migration: Lead organizations for the sharded Next Best Action scan
+-- run_nba_scan_task fans out one shard per organization that has leads,
+-- plus one for leads with no organization (returned as a NULL row).
+
+CREATE OR REPLACE FUNCTION list_lead_organization_ids()
+RETURNS TABLE(organization_id UUID) AS $$
+    SELECT DISTINCT l.organization_id FROM leads AS l;
+$$ LANGUAGE sql STABLE;
+
+NOTIFY pgrst, 'reload schema';
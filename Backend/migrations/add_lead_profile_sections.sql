@@ -0,0 +1,53 @@
+-- Migration: Add ai_lead_profile_sections table
+-- Sectioned lead profile cache: one row per (lead, section) so webhook updates
+-- touch only the section that changed. Replaces ai_lead_profile_cache, which
+-- stored the whole profile as one row.
+
+CREATE TABLE IF NOT EXISTS ai_lead_profile_sections (
+    fub_person_id BIGINT NOT NULL,
+    organization_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    -- person, texts, emails, calls, notes, events, tasks
+    section VARCHAR(20) NOT NULL,
+    -- Object for person, array (most recent first) for every other section
+    data JSONB NOT NULL DEFAULT '[]',
+
+    -- Cache metadata
+    cached_at TIMESTAMPTZ DEFAULT NOW(),       -- last full refresh from FUB
+    last_updated_at TIMESTAMPTZ DEFAULT NOW(), -- last incremental update
+    update_count INTEGER DEFAULT 0,
+
+    PRIMARY KEY (fub_person_id, organization_id, section)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_profile_sections_cached_at
+    ON ai_lead_profile_sections(cached_at) WHERE section = 'person';
+
+-- Prepend one item to a list section and cap its length in a single statement.
+-- The UPDATE's row lock serializes concurrent appends for the same section.
+-- Returns false when the section isn't cached (the next read does a full refresh).
+CREATE OR REPLACE FUNCTION append_lead_profile_section(
+    p_fub_person_id BIGINT,
+    p_organization_id UUID,
+    p_section VARCHAR,
+    p_item JSONB,
+    p_max_items INTEGER
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE ai_lead_profile_sections
+    SET data = (
+            SELECT COALESCE(jsonb_agg(t.elem ORDER BY t.idx), '[]'::jsonb)
+            FROM jsonb_array_elements(jsonb_build_array(p_item) || data) WITH ORDINALITY AS t(elem, idx)
+            WHERE t.idx <= p_max_items
+        ),
+        last_updated_at = NOW(),
+        update_count = update_count + 1
+    WHERE fub_person_id = p_fub_person_id
+      AND organization_id = p_organization_id
+      AND section = p_section;
+
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+NOTIFY pgrst, 'reload schema';
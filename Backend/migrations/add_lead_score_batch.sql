@@ -0,0 +1,72 @@
+-- Migration: Batch lead rescoring (used by BatchLeadScorer)
+-- Stores the decay applied to each conversation's score, bulk RPCs for
+-- writing scores and tiers, and a per-run table of tier/temperature counts.
+
+-- Points currently subtracted from lead_score for inactivity. The batch job
+-- adds it back before reapplying decay, so reruns don't compound.
+ALTER TABLE ai_conversations
+    ADD COLUMN IF NOT EXISTS lead_score_decay INTEGER NOT NULL DEFAULT 0;
+
+-- Writes scores for a batch of conversations. Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION apply_lead_scores(
+    p_conversation_ids UUID[],
+    p_scores INTEGER[],
+    p_decays INTEGER[]
+)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE ai_conversations AS c
+    SET lead_score = t.score,
+        lead_score_decay = t.decay
+    FROM unnest(p_conversation_ids, p_scores, p_decays) AS t(id, score, decay)
+    WHERE c.id = t.id;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Writes tiers (and priority scores, when given) for a batch of leads.
+-- Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION apply_lead_tiers(
+    p_organization_id UUID,
+    p_person_ids TEXT[],
+    p_tiers TEXT[],
+    p_priority_scores INTEGER[]
+)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE leads AS l
+    SET tier = t.tier,
+        priority_score = COALESCE(t.priority_score, l.priority_score),
+        tier_updated_at = NOW()
+    FROM unnest(p_person_ids, p_tiers, p_priority_scores) AS t(person_id, tier, priority_score)
+    WHERE l.fub_person_id = t.person_id
+      AND (p_organization_id IS NULL OR l.organization_id = p_organization_id);
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One row per batch rescoring run
+CREATE TABLE IF NOT EXISTS lead_score_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    organization_id UUID,
+    leads_scored INTEGER NOT NULL DEFAULT 0,
+    scores_changed INTEGER NOT NULL DEFAULT 0,
+    tier_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    temperature_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    scoring_ms NUMERIC,
+    vectorized BOOLEAN NOT NULL DEFAULT false,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_lead_score_runs_org_created
+    ON lead_score_runs(organization_id, created_at DESC);
+
+NOTIFY pgrst, 'reload schema';
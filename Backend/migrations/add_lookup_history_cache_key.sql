@@ -0,0 +1,13 @@
+-- Migration: Let lookup_history serve as the Endato lookup cache's persistent tier
+-- Successful lookups are stored with the normalized-criteria key of the search,
+-- so a repeat lookup of the same phone/email/person within the search type's
+-- TTL is answered from the stored result instead of a new vendor call.
+
+ALTER TABLE lookup_history ADD COLUMN IF NOT EXISTS cache_key VARCHAR(100);
+
+-- Newest successful result per key
+CREATE INDEX IF NOT EXISTS idx_lookup_history_cache_key
+    ON lookup_history(cache_key, created_at DESC)
+    WHERE success = TRUE AND cache_key IS NOT NULL;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,12 @@
+-- Migration: claimed_at on scheduled_messages
+-- The delayed reply dispatcher stamps when it moved a reply to 'sending'.
+-- Replies stuck there past the lease (dispatcher died mid-send) are marked
+-- failed by DelayedReplyQueue.recover_interrupted - at-most-once, never resent.
+
+ALTER TABLE scheduled_messages ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_messages_sending_claimed_at
+    ON scheduled_messages(claimed_at)
+    WHERE status = 'sending';
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,14 @@
+-- Migration: Delayed AI replies in scheduled_messages
+-- process_inbound_text persists each AI reply with its human-like send time
+-- (sequence_type = 'delayed_reply') instead of sleeping before the send.
+
+-- Data the dispatcher needs after the send (score delta, state change,
+-- extracted info, handoff) - the agent response isn't kept in memory
+ALTER TABLE scheduled_messages ADD COLUMN IF NOT EXISTS payload JSONB;
+
+-- Supersede (newer inbound) and restart recovery look up pending replies per lead
+CREATE INDEX IF NOT EXISTS idx_scheduled_messages_delayed_replies
+    ON scheduled_messages(fub_person_id, status)
+    WHERE sequence_type = 'delayed_reply';
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,57 @@
+-- Migration: Add increment_sms_message_counts function
+-- Atomic daily SMS counter update for a batch of leads (used by ComplianceChecker)
+
+-- Increments messages_sent_today for every lead in p_person_ids, resetting the
+-- counter when last_message_date is not p_today. Leads without an sms_consent
+-- row get one created (implied consent) when a phone number is supplied.
+-- Returns the number of rows updated or created.
+CREATE OR REPLACE FUNCTION increment_sms_message_counts(
+    p_organization_id UUID,
+    p_person_ids BIGINT[],
+    p_phone_numbers TEXT[],
+    p_today DATE
+)
+RETURNS INTEGER AS $$
+DECLARE
+    upserted INTEGER;
+    updated INTEGER;
+BEGIN
+    -- Leads with a phone number: create or increment in one statement
+    INSERT INTO sms_consent (
+        fub_person_id, organization_id, phone_number,
+        messages_sent_today, last_message_date, consent_given, consent_source
+    )
+    SELECT t.person_id, p_organization_id, t.phone, 1, p_today, true, 'fub_import'
+    FROM unnest(p_person_ids, p_phone_numbers) AS t(person_id, phone)
+    WHERE t.phone IS NOT NULL
+    ON CONFLICT (fub_person_id, organization_id) DO UPDATE
+    SET messages_sent_today = CASE
+            WHEN sms_consent.last_message_date = p_today
+                THEN COALESCE(sms_consent.messages_sent_today, 0) + 1
+            ELSE 1
+        END,
+        last_message_date = p_today,
+        updated_at = NOW();
+    GET DIAGNOSTICS upserted = ROW_COUNT;
+
+    -- Leads without a phone number: only existing rows can be incremented
+    UPDATE sms_consent
+    SET messages_sent_today = CASE
+            WHEN last_message_date = p_today THEN COALESCE(messages_sent_today, 0) + 1
+            ELSE 1
+        END,
+        last_message_date = p_today,
+        updated_at = NOW()
+    WHERE organization_id = p_organization_id
+      AND fub_person_id IN (
+          SELECT t.person_id
+          FROM unnest(p_person_ids, p_phone_numbers) AS t(person_id, phone)
+          WHERE t.phone IS NULL
+      );
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    RETURN upserted + updated;
+END;
+$$ LANGUAGE plpgsql;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,27 @@
+-- Migration: Per-lead results of referral bulk syncs
+-- Bulk syncs (HomeLight, Redfin, My Agent Finder) stream each lead's outcome
+-- here as they go instead of holding every result dict in memory; the sync
+-- summary is counted from this table.
+
+CREATE TABLE IF NOT EXISTS sync_lead_results (
+    id BIGSERIAL PRIMARY KEY,
+    sync_id TEXT NOT NULL,
+    source VARCHAR(50),
+    lead_id TEXT,
+    fub_person_id TEXT,
+    name TEXT,
+    status VARCHAR(20) NOT NULL,
+    error TEXT,
+    detail JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Summary counts and result paging per sync
+CREATE INDEX IF NOT EXISTS idx_sync_lead_results_sync_status
+    ON sync_lead_results(sync_id, status);
+
+-- Old sync results can be pruned by age
+CREATE INDEX IF NOT EXISTS idx_sync_lead_results_created_at
+    ON sync_lead_results(created_at);
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,27 @@
+-- Migration: Bound ai_conversations.conversation_history to a short tail
+-- ConversationManager.save_context now writes only the columns that changed,
+-- and conversation_history only as its last 20 messages. Every message is
+-- already logged to ai_message_log, which is the full (append-only) history.
+-- Trim existing rows so loading a long-running conversation reads the same
+-- amount of data as a new one.
+
+-- Total message count, kept separately now that the history is only a tail.
+-- Backfilled from the untrimmed history, so this must run before the trim.
+ALTER TABLE ai_conversations
+    ADD COLUMN IF NOT EXISTS messages_exchanged INTEGER NOT NULL DEFAULT 0;
+
+UPDATE ai_conversations
+SET messages_exchanged = jsonb_array_length(conversation_history)
+WHERE jsonb_typeof(conversation_history) = 'array'
+  AND messages_exchanged = 0;
+
+UPDATE ai_conversations
+SET conversation_history = (
+    SELECT COALESCE(jsonb_agg(entry ORDER BY position), '[]'::jsonb)
+    FROM jsonb_array_elements(conversation_history) WITH ORDINALITY AS t(entry, position)
+    WHERE position > jsonb_array_length(conversation_history) - 20
+)
+WHERE jsonb_typeof(conversation_history) = 'array'
+  AND jsonb_array_length(conversation_history) > 20;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,130 @@
+"""
+Benchmark the compiled template renderer against the previous renderer.
+
+Renders every library template for a batch of synthetic leads three ways:
+- legacy: str.replace per variable + conditional regex (the old
+  MessageTemplate.render)
+- compiled: MessageTemplate.render, one call per lead
+- render_many: one bulk call per template
+
+Also checks that all three produce identical text.
+
+Usage:
+    python scripts/benchmark_template_render.py [--rows 5000] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+# Add Backend directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai_agent.template_engine import TemplateLibrary
+
+
+def legacy_render(template, variables, variant_index):
+    """The renderer MessageTemplate.render used before compiled plans."""
+    result = template.variants[variant_index]
+    for var_name in template.variables:
+        placeholder = f"{{{var_name}}}"
+        value = variables.get(var_name, "")
+        if var_name.endswith("_price") and isinstance(value, (int, float)):
+            value = f"${value:,.0f}"
+        elif var_name == "first_name" and not value:
+            value = "there"
+        result = result.replace(placeholder, str(value))
+
+    def replace_conditional(match):
+        return match.group(2) if variables.get(match.group(1)) else ""
+
+    result = re.sub(r'\{\?(\w+):([^}]+)\}', replace_conditional, result)
+    if len(result) > template.max_chars:
+        result = result[:template.max_chars - 3] + "..."
+    return result.strip()
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        rows.append({
+            "first_name": "" if i % 17 == 0 else f"Lead{i}",
+            "agent_name": "Sarah",
+            "area": "Downtown",
+            "property_address": f"{i} Main St",
+            "property_feature": "a pool" if i % 3 else "",
+            "property_price": 350000 + i,
+            "property_beds": 3,
+            "property_baths": 2,
+            "property_sqft": 1800,
+            "location": "123 Oak Ave" if i % 2 else "",
+            "appointment_date": "Thursday",
+            "appointment_time": "3pm",
+            "time_option_1": "tomorrow at 2pm",
+            "time_option_2": "Friday at 10am",
+            "referrer_name": "Pat",
+            "human_agent_name": "Jordan",
+        })
+    return rows
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    TemplateLibrary._init_templates()
+    templates = list(TemplateLibrary.TEMPLATES.values())
+    rows = make_rows(args.rows)
+    variant_rows = {t.id: [i % len(t.variants) for i in range(len(rows))] for t in templates}
+
+    mismatches = 0
+    for template in templates:
+        variants = variant_rows[template.id]
+        bulk = template.render_many(rows, variants)
+        for row, variant, bulk_text in zip(rows, variants, bulk):
+            expected = legacy_render(template, row, variant)
+            if template.render(row, variant) != expected or bulk_text != expected:
+                mismatches += 1
+
+    def run_legacy():
+        for template in templates:
+            for row, variant in zip(rows, variant_rows[template.id]):
+                legacy_render(template, row, variant)
+
+    def run_compiled():
+        for template in templates:
+            for row, variant in zip(rows, variant_rows[template.id]):
+                template.render(row, variant)
+
+    def run_bulk():
+        for template in templates:
+            template.render_many(rows, variant_rows[template.id])
+
+    total = len(templates) * len(rows)
+    legacy = timed(run_legacy, args.repeat)
+    compiled = timed(run_compiled, args.repeat)
+    bulk = timed(run_bulk, args.repeat)
+
+    print(f"{len(templates)} templates x {len(rows)} rows = {total} messages (best of {args.repeat})")
+    print(f"  legacy       {legacy:8.3f}s  {total / legacy:10.0f} msg/s")
+    print(f"  compiled     {compiled:8.3f}s  {total / compiled:10.0f} msg/s  ({legacy / compiled:.1f}x)")
+    print(f"  render_many  {bulk:8.3f}s  {total / bulk:10.0f} msg/s  ({legacy / bulk:.1f}x)")
+    print(f"  mismatches   {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
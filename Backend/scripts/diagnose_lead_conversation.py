@@ -131,15 +131,20 @@ def diagnose_lead(person_id: int, verbose: bool = False):
 
     # 4. Cached profile
     print("\n--- LEAD PROFILE CACHE ---")
-    cache_result = supabase.table('ai_lead_profile_cache').select('*').eq(
+    cache_result = supabase.table('ai_lead_profile_sections').select('*').eq(
         'fub_person_id', person_id
     ).execute()
 
-    if cache_result.data:
-        cache = cache_result.data[0]
-        person_data = cache.get('person_data', {})
-        if isinstance(person_data, str):
-            person_data = json.loads(person_data)
+    # One row per section (person, texts, emails, ...)
+    sections = {row['section']: row for row in (cache_result.data or [])}
+
+    if 'person' in sections:
+        def section_data(name, default):
+            data = sections.get(name, {}).get('data', default)
+            return json.loads(data) if isinstance(data, str) else data
+
+        person_row = sections['person']
+        person_data = section_data('person', {})
 
         print(f"  Name:       {person_data.get('firstName', 'N/A')} {person_data.get('lastName', 'N/A')}")
 
@@ -150,22 +155,19 @@ def diagnose_lead(person_id: int, verbose: bool = False):
             print(f"  Stage:      {stage or 'N/A'}")
 
         print(f"  Source:     {person_data.get('source', 'N/A')}")
-        print(f"  Cached At:  {cache.get('cached_at', 'N/A')}")
-        print(f"  Updated:    {cache.get('last_updated_at', 'N/A')}")
+        print(f"  Cached At:  {person_row.get('cached_at', 'N/A')}")
+        print(f"  Updated:    {max(row.get('last_updated_at') or '' for row in sections.values()) or 'N/A'}")
 
         # Show cached text messages count
-        texts = cache.get('text_messages', [])
-        if isinstance(texts, str):
-            texts = json.loads(texts)
-        emails = cache.get('emails', [])
-        if isinstance(emails, str):
-            emails = json.loads(emails)
+        texts = section_data('texts', [])
+        emails = section_data('emails', [])
         print(f"  Cached SMS: {len(texts)}")
         print(f"  Cached Emails: {len(emails)}")
 
         if verbose and texts:
             print(f"\n  Cached Text Messages (last 10):")
-            for msg in texts[-10:]:
+            # Sections are stored most recent first
+            for msg in reversed(texts[:10]):
                 if isinstance(msg, dict):
                     direction = msg.get('direction', '?')
                     body = msg.get('body', msg.get('message', '(empty)'))
@@ -229,7 +229,7 @@ async def test_database_tables():
             'ai_conversations',
             'ai_message_log',
             'ai_scheduled_followups',
-            'ai_lead_profile_cache',
+            'ai_lead_profile_sections',
         ]
 
         results = {}
@@ -6,7 +6,9 @@ Centralizes mock objects used across test_round4_features.py,
 test_round4_scenarios.py, test_api_round4.py, and existing tests.
 """
 
+import copy
 import pytest
+import redis
 from datetime import datetime, time, timedelta
 from unittest.mock import MagicMock, AsyncMock
 from typing import Dict, Any
@@ -69,6 +71,223 @@ def mock_fub_api():
     return mock
 
 
+# =============================================================================
+# REDIS MOCK
+# =============================================================================
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for RedisService / redis.Redis.
+
+    Exposes itself as `.redis` so code written against either the
+    RedisService wrapper or the raw client works. Pipelines queue calls
+    and run them in order on execute(); after watch() they run immediately
+    until multi(), and execute() raises WatchError if a watched key changed.
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.expirations = {}
+        self.published = []
+        self.redis = self
+
+    # strings
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        if ex:
+            self.expirations[key] = ex
+        return True
+
+    def incr(self, key, amount=1):
+        value = int(self.store.get(key, 0)) + amount
+        self.store[key] = str(value)
+        return value
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self.store.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    def exists(self, key):
+        return int(key in self.store)
+
+    def expire(self, key, seconds):
+        self.expirations[key] = seconds
+        return key in self.store
+
+    # lists
+    def rpush(self, key, *values):
+        self.store.setdefault(key, []).extend(str(v) for v in values)
+        return len(self.store[key])
+
+    def rpushx(self, key, *values):
+        if key not in self.store:
+            return 0
+        return self.rpush(key, *values)
+
+    def lrange(self, key, start, end):
+        items = self.store.get(key, [])
+        end = len(items) if end == -1 else end + 1
+        return items[start:end] if start >= 0 else items[max(len(items) + start, 0):end]
+
+    def ltrim(self, key, start, end):
+        if key in self.store:
+            self.store[key] = self.lrange(key, start, end)
+        return True
+
+    def llen(self, key):
+        return len(self.store.get(key, []))
+
+    # hashes
+    def hset(self, name, key=None, value=None, mapping=None):
+        bucket = self.store.setdefault(name, {})
+        if mapping:
+            bucket.update({k: str(v) for k, v in mapping.items()})
+            return len(mapping)
+        bucket[key] = str(value)
+        return 1
+
+    def hget(self, name, key):
+        return self.store.get(name, {}).get(key)
+
+    def hgetall(self, name):
+        return dict(self.store.get(name, {}))
+
+    def hincrby(self, name, key, amount=1):
+        bucket = self.store.setdefault(name, {})
+        bucket[key] = str(int(bucket.get(key, 0)) + amount)
+        return int(bucket[key])
+
+    # sorted sets
+    def zadd(self, name, mapping, nx=False):
+        bucket = self.store.setdefault(name, {})
+        added = 0
+        for member, score in mapping.items():
+            if nx and member in bucket:
+                continue
+            added += member not in bucket
+            bucket[member] = float(score)
+        return added
+
+    def zrangebyscore(self, name, min, max, start=None, num=None):
+        bucket = self.store.get(name, {})
+        members = [m for m, score in sorted(bucket.items(), key=lambda kv: kv[1]) if min <= score <= max]
+        if start is not None and num is not None:
+            members = members[start:start + num]
+        return members
+
+    def zrem(self, name, *members):
+        bucket = self.store.get(name, {})
+        return sum(bucket.pop(member, None) is not None for member in members)
+
+    def zcard(self, name):
+        return len(self.store.get(name, {}))
+
+    def zremrangebyscore(self, name, min, max):
+        bucket = self.store.get(name, {})
+        doomed = [m for m, score in bucket.items() if min <= score <= max]
+        for member in doomed:
+            del bucket[member]
+        return len(doomed)
+
+    # sets
+    def sadd(self, name, *members):
+        bucket = self.store.setdefault(name, set())
+        added = len(set(members) - bucket)
+        bucket.update(members)
+        return added
+
+    def srem(self, name, *members):
+        bucket = self.store.get(name, set())
+        removed = len(bucket & set(members))
+        bucket.difference_update(members)
+        return removed
+
+    def smembers(self, name):
+        return set(self.store.get(name, set()))
+
+    # streams (ids are "<n>-0"; xread never blocks)
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        entries = self.store.setdefault(name, [])
+        self._stream_seq = getattr(self, "_stream_seq", 0) + 1
+        event_id = f"{self._stream_seq}-0"
+        entries.append((event_id, {k: str(v) for k, v in fields.items()}))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        return event_id
+
+    def xrevrange(self, name, max="+", min="-", count=None):
+        entries = list(reversed(self.store.get(name, [])))
+        return entries[:count] if count else entries
+
+    def xread(self, streams, count=None, block=None):
+        response = []
+        for name, last_id in streams.items():
+            after = int(str(last_id).split("-")[0])
+            entries = [e for e in self.store.get(name, []) if int(e[0].split("-")[0]) > after]
+            if entries:
+                response.append([name, entries[:count] if count else entries])
+        return response
+
+    # pub/sub (messages are recorded, not delivered)
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+        self._watched = None
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._calls, self._watched, self._immediate = [], None, False
+
+    def watch(self, *keys):
+        self._watched = {key: copy.deepcopy(self._client.store.get(key)) for key in keys}
+        self._immediate = True
+
+    def multi(self):
+        self._immediate = False
+
+    def __getattr__(self, name):
+        if self._immediate:
+            return getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        watched, self._watched = self._watched, None
+        if watched and any(self._client.store.get(key) != value for key, value in watched.items()):
+            raise redis.WatchError("Watched variable changed.")
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis stand-in (see FakeRedis)."""
+    return FakeRedis()
+
+
 # =============================================================================
 # AI SERVICE
 # =============================================================================
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Availability engine tests.
+
+Covers the slot computation used by AppointmentScheduler, against a local
+calendar stub instead of the Google API:
+- Busy intervals are merged and swept once against working-hour windows
+- Team queries: first-available and round-robin agent assignment
+- Free/busy and working hours are cached; a booking invalidates free/busy
+- Failed free/busy reads are not cached
+
+Run with: pytest tests/test_availability_engine.py -v
+"""
+
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.calendar.availability import (
+    FIRST_AVAILABLE,
+    ROUND_ROBIN,
+    AvailabilityEngine,
+    merge_intervals,
+    sweep_slots,
+    working_windows,
+)
+
+# Monday well in the future, so no slot is filtered out as past
+MONDAY = datetime(2030, 1, 7)
+
+
+def _at(hour, minute=0, day=MONDAY):
+    return day.replace(hour=hour, minute=minute)
+
+
+class StubCalendar:
+    """Local calendar: fixed busy times per calendar, counting queries."""
+
+    def __init__(self, busy=None, fail=False):
+        self.busy = busy or {}
+        self.fail = fail
+        self.queries = []
+
+    async def get_busy_times_batch(self, calendar_ids, start_date, end_date):
+        self.queries.append(list(calendar_ids))
+        if self.fail:
+            return {}
+        return {calendar_id: self.busy.get(calendar_id, []) for calendar_id in calendar_ids}
+
+
+def _engine(fake_redis, calendar):
+    engine = AvailabilityEngine(calendar_source=calendar)
+    engine.redis = fake_redis
+    return engine
+
+
+def _supabase(rows):
+    supabase = MagicMock()
+    table = supabase.table.return_value
+    for method in ("select", "in_", "eq"):
+        getattr(table, method).return_value = table
+    table.execute.return_value = MagicMock(data=rows)
+    return supabase, table
+
+
+def _slots(engine, **kwargs):
+    return asyncio.run(engine.get_available_slots(
+        "agent-1", start_date=MONDAY, end_date=MONDAY, **kwargs
+    ))
+
+
+@pytest.mark.unit
+class TestSweep:
+    """Tests for merge_intervals() and sweep_slots()."""
+
+    def test_merge_sorts_and_strips_timezone(self):
+        merged = merge_intervals([
+            (_at(13), _at(14)),
+            (_at(9).replace(tzinfo=timezone.utc), _at(10).replace(tzinfo=timezone.utc)),
+            (_at(13, 30), _at(15)),
+            (_at(16), _at(16)),
+        ])
+
+        assert merged == [(_at(9), _at(10)), (_at(13), _at(15))]
+
+    def test_sweep_skips_busy_time_on_the_slot_grid(self):
+        windows = working_windows(MONDAY, MONDAY, {1: [(time(9), time(12))]})
+        busy = merge_intervals([(_at(9, 15), _at(10, 10))])
+
+        slots = sweep_slots(windows, busy, 30, not_before=datetime(2000, 1, 1))
+
+        assert [start.strftime("%H:%M") for start, _ in slots] == ["10:30", "11:00", "11:30"]
+
+    def test_past_slots_excluded(self):
+        windows = working_windows(MONDAY, MONDAY, {1: [(time(9), time(11))]})
+
+        slots = sweep_slots(windows, [], 30, not_before=_at(10))
+
+        assert [start.strftime("%H:%M") for start, _ in slots] == ["10:30"]
+
+
+@pytest.mark.unit
+class TestAvailabilityEngine:
+    """Tests for AvailabilityEngine against a stub calendar."""
+
+    def test_single_agent_slots(self, fake_redis):
+        calendar = StubCalendar({"primary": [(_at(10), _at(11))]})
+        engine = _engine(fake_redis, calendar)
+
+        slots = _slots(engine, working_hours=(time(9), time(12)))
+
+        assert [s.start.hour * 60 + s.start.minute for s in slots] == [540, 570, 660, 690]
+
+    def test_team_first_available(self, fake_redis):
+        calendar = StubCalendar({
+            "cal-a": [(_at(9), _at(10))],
+            "cal-b": [],
+        })
+        engine = _engine(fake_redis, calendar)
+
+        slots = asyncio.run(engine.get_team_slots(
+            ["a", "b"], start_date=MONDAY, end_date=MONDAY, duration_minutes=60,
+            mode=FIRST_AVAILABLE, calendar_ids={"a": "cal-a", "b": "cal-b"},
+        ))
+
+        assert [(s.start.hour, s.agent_user_id) for s in slots[:3]] == [(9, "b"), (10, "a"), (11, "a")]
+        assert len({s.start for s in slots}) == len(slots)
+        assert calendar.queries == [["cal-a", "cal-b"]]  # one free/busy call for the team
+
+    def test_team_round_robin_rotates_first_agent(self, fake_redis):
+        engine = _engine(fake_redis, StubCalendar())
+        agents = ["a", "b", "c"]
+        calendars = {agent: f"cal-{agent}" for agent in agents}
+
+        first_agents = []
+        for _ in range(4):
+            slots = asyncio.run(engine.get_team_slots(
+                agents, start_date=MONDAY, end_date=MONDAY, mode=ROUND_ROBIN, calendar_ids=calendars,
+            ))
+            first_agents.append(slots[0].agent_user_id)
+
+        assert first_agents == ["a", "b", "c", "a"]
+
+    def test_free_busy_cached_until_invalidated(self, fake_redis):
+        calendar = StubCalendar({"primary": [(_at(10), _at(11))]})
+        engine = _engine(fake_redis, calendar)
+
+        _slots(engine)
+        _slots(engine)
+        assert len(calendar.queries) == 1
+        assert engine.stats()["busy_hits"] == 1
+
+        engine.invalidate_calendar("primary")
+        _slots(engine)
+        assert len(calendar.queries) == 2
+
+    def test_failed_free_busy_not_cached(self, fake_redis):
+        calendar = StubCalendar(fail=True)
+        engine = _engine(fake_redis, calendar)
+
+        _slots(engine)
+        calendar.fail = False
+        _slots(engine)
+
+        assert len(calendar.queries) == 2
+
+    def test_working_hours_loaded_once_for_team(self, fake_redis):
+        supabase, table = _supabase([
+            {"user_id": "a", "day_of_week": 1, "start_time": "09:00:00", "end_time": "10:00:00"},
+            {"user_id": "b", "day_of_week": 1, "start_time": "14:00:00", "end_time": "15:00:00"},
+        ])
+        engine = _engine(fake_redis, StubCalendar())
+
+        hours = engine.get_working_hours(["a", "b"], supabase)
+        again = engine.get_working_hours(["a", "b"], supabase)
+
+        assert table.execute.call_count == 1
+        assert table.in_.call_args.args == ("user_id", ["a", "b"])
+        assert hours["b"][1] == [(time(14), time(15))]
+        assert again == hours
+
+    def test_calendar_service_invalidates_on_booking(self, fake_redis, monkeypatch):
+        from app.calendar.google_calendar import GoogleCalendarService
+
+        service = GoogleCalendarService(calendar_id="primary")
+        service.availability.redis = fake_redis
+        fake_redis.hset("calendar:busy:primary", "range", "{}")
+        monkeypatch.setattr(service, "_initialize", lambda: True)
+        service.service = MagicMock()
+        service.service.events.return_value.insert.return_value.execute.return_value = {"id": "evt-1"}
+
+        result = asyncio.run(service.create_appointment("Call", _at(10), _at(10) + timedelta(minutes=30)))
+
+        assert result["success"]
+        assert fake_redis.hgetall("calendar:busy:primary") == {}
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Batch lead scoring tests.
+
+Covers BatchLeadScorer and the bulk tier writes it relies on:
+- The NumPy path matches LeadScorer lead for lead
+- Decay is undone and reapplied, so repeated runs don't compound
+- Tiers come from leads.last_activity_at, not conversation timestamps
+- Only changed scores are written, in chunks; counts are published
+- LeadRepository.bulk_update_tiers chunks RPC calls and falls back per lead
+- The nightly task fans out per organization, skipping leads with none
+
+Run with: pytest tests/test_batch_lead_scorer.py -v
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.ai_agent import batch_lead_scorer
+from app.ai_agent.batch_lead_scorer import BatchLeadScorer, LeadScoreColumns
+from app.database.lead_repository import LeadRepository, LeadTier
+
+NOW = datetime.now(timezone.utc)
+
+TIMELINES = [None, "", "ASAP", "3 months", "within 6 months", "next year", "just browsing", "someday", "2 month"]
+BUDGETS = [None, "$300k-$400k", "450000", "flexible", "not sure", 500000]
+MOTIVATIONS = [None, "job transfer", "growing family", "retire", "investment property", "bored"]
+
+
+def _row(i, score=50, decay=0, days=0, **qualification):
+    return {
+        "id": f"conv-{i:04d}",
+        "fub_person_id": 1000 + i,
+        "lead_score": score,
+        "lead_score_decay": decay,
+        "qualification_data": qualification,
+        "last_human_message_at": (NOW - timedelta(days=days)).isoformat(),
+        "created_at": "2025-01-01T00:00:00Z",
+    }
+
+
+def _random_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        _row(
+            i,
+            score=rng.randint(0, 100),
+            decay=rng.choice([0, 0, 5, 20]),
+            days=rng.choice([0, 6, 29, 30, 61, 200, 400, 900]),
+            pre_approved=rng.choice([None, True, False]),
+            timeline=rng.choice(TIMELINES),
+            budget=rng.choice(BUDGETS),
+            motivation=rng.choice(MOTIVATIONS),
+        )
+        for i in range(count)
+    ]
+
+
+def _columns(rows):
+    columns = LeadScoreColumns()
+    for row in rows:
+        columns.append_row(row, NOW)
+    return columns
+
+
+def _lead(i, days):
+    return {
+        "id": f"lead-{i:04d}",
+        "fub_person_id": str(1000 + i),
+        "last_activity_at": (NOW - timedelta(days=days)).isoformat() if days is not None else None,
+    }
+
+
+def _table(pages):
+    """Chainable query mock returning pages of rows in order."""
+    table = MagicMock()
+    for method in ("select", "eq", "gt", "order", "limit", "insert"):
+        getattr(table, method).return_value = table
+    table.execute.side_effect = [MagicMock(data=page) for page in pages] + [MagicMock(data=[])] * 5
+    return table
+
+
+def _supabase(conversation_pages, lead_pages=()):
+    """Supabase mock with ai_conversations, leads and lead_score_runs tables."""
+    supabase = MagicMock()
+    supabase.tables = {
+        "ai_conversations": _table(conversation_pages),
+        "leads": _table(lead_pages),
+        "lead_score_runs": _table([]),
+    }
+    supabase.table.side_effect = lambda name: supabase.tables[name]
+    supabase.rpc.return_value.execute.side_effect = lambda: MagicMock(data=None)
+    return supabase
+
+
+@pytest.mark.unit
+class TestBatchScoring:
+    """Tests for BatchLeadScorer.score()."""
+
+    @pytest.mark.skipif(batch_lead_scorer.np is None, reason="numpy not installed")
+    def test_vectorized_matches_per_lead(self):
+        scorer = BatchLeadScorer()
+        columns = _columns(_random_rows(300))
+
+        vectorized = scorer._score_vectorized(columns)
+        per_lead = scorer._score_per_lead(columns)
+
+        assert vectorized == per_lead
+
+    def test_decay_idempotent_and_restored_on_reply(self):
+        scorer = BatchLeadScorer()
+        row = _row(1, score=60, days=95)
+
+        first = scorer.score(_columns([row]))
+        assert (first.scores, first.decay, first.changed) == ([45], [15], [True])
+
+        row.update(lead_score=45, lead_score_decay=15)
+        again = scorer.score(_columns([row]))
+        assert (again.scores, again.changed) == ([45], [False])
+
+        row["last_human_message_at"] = NOW.isoformat()
+        replied = scorer.score(_columns([row]))
+        assert (replied.scores, replied.decay) == ([60], [0])
+
+    def test_qualification_floor_and_temperature(self):
+        scorer = BatchLeadScorer()
+        rows = [
+            _row(1, score=10, days=2, pre_approved=True, timeline="ASAP", budget="$300k-$400k", motivation="job transfer"),
+            _row(2, score=45, days=20),
+            _row(3, score=80, days=400),
+        ]
+
+        batch = scorer.score(_columns(rows))
+
+        assert batch.scores[0] >= 70 and batch.temperatures[0] == "hot"
+        assert batch.temperatures[1:] == ["warm", "cold"]  # 80 decayed by 13 periods
+
+    def test_tiers_match_repository_boundaries(self):
+        days = [0, 6, 7, 29, 30, 364, 365, 900]
+        expected = ["hot", "hot", "warm", "warm", "dormant", "dormant", "archived", "archived"]
+
+        assert BatchLeadScorer().tiers(days) == expected
+        assert [batch_lead_scorer.activity_tier(d) for d in days] == expected
+
+
+@pytest.mark.unit
+class TestRescoreOrganization:
+    """Tests for BatchLeadScorer.rescore_organization()."""
+
+    def test_changed_scores_written_in_chunks(self):
+        rows = [_row(i, score=60, days=0) for i in range(7)] + [_row(7 + i, score=60, days=90) for i in range(5)]
+        # Lead activity, not the conversations, decides the tier
+        leads = [_lead(i, days=2) for i in range(5)] + [_lead(5 + i, days=400) for i in range(7)] + [_lead(20, None)]
+        supabase = _supabase([rows[:10], rows[10:]], [leads])
+        lead_repo = MagicMock()
+        lead_repo.bulk_update_tiers = AsyncMock(return_value={"success": 12, "failed": 0})
+        scorer = BatchLeadScorer(supabase, lead_repository=lead_repo)
+        scorer.PAGE_SIZE = 10
+        scorer.WRITE_CHUNK_SIZE = 2
+
+        stats = asyncio.run(scorer.rescore_organization("org-1"))
+
+        assert stats["leads_scored"] == 12 and stats["scores_changed"] == 5
+        score_calls = [c.args[1] for c in supabase.rpc.call_args_list if c.args[0] == "apply_lead_scores"]
+        assert [len(c["p_conversation_ids"]) for c in score_calls] == [2, 2, 1]
+        assert {s for c in score_calls for s in c["p_scores"]} == {45}
+        # Second page continues after the last id of the first
+        supabase.tables["ai_conversations"].gt.assert_called_with("id", "conv-0009")
+
+        updates = lead_repo.bulk_update_tiers.call_args
+        assert len(updates.args[0]) == 12
+        assert dict(updates.args[0])[1000] == LeadTier.HOT and dict(updates.args[0])[1005] == LeadTier.ARCHIVED
+        assert updates.kwargs["priority_scores"][1007] == 45
+        published = supabase.tables["lead_score_runs"].insert.call_args.args[0]
+        assert published["tier_counts"] == {"hot": 5, "archived": 7}
+
+    def test_dry_run_writes_nothing(self):
+        supabase = _supabase([[_row(1, score=60, days=90)]])
+        scorer = BatchLeadScorer(supabase, lead_repository=MagicMock())
+
+        stats = asyncio.run(scorer.rescore_organization("org-1", dry_run=True))
+
+        assert stats["scores_changed"] == 1 and stats["scores_written"] == 0
+        supabase.rpc.assert_not_called()
+        supabase.tables["lead_score_runs"].insert.assert_not_called()
+
+
+@pytest.mark.unit
+class TestRescoreLeadsTask:
+    """Tests for the rescore_leads_task fan-out."""
+
+    def test_fans_out_per_org_without_unassigned_shard(self):
+        from app.ai_agent.next_best_action import UNASSIGNED_ORGANIZATION
+        from app.scheduler import ai_tasks
+
+        shards = {"org-a": "America/Phoenix", UNASSIGNED_ORGANIZATION: "America/New_York"}
+        with patch.object(ai_tasks, "_nba_scan_shards", return_value=shards), \
+                patch("app.database.supabase_client.SupabaseClientSingleton.get_instance"), \
+                patch.object(ai_tasks.rescore_leads_task, "delay") as delay:
+            result = ai_tasks.rescore_leads_task.run()
+
+        # organization_id is a UUID column: there is no "unassigned" org to scope tiers to
+        assert result["organizations"] == ["org-a"]
+        delay.assert_called_once_with(organization_id="org-a", dry_run=False)
+
+
+@pytest.mark.unit
+class TestBulkUpdateTiers:
+    """Tests for LeadRepository.bulk_update_tiers()."""
+
+    def test_chunks_rpc_and_falls_back_per_lead(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = [MagicMock(data=2), Exception("rpc missing")]
+        repo = LeadRepository(supabase)
+        repo.MAX_BATCH_SIZE = 2
+        repo.update_lead_tier = AsyncMock(side_effect=[True, False])
+        updates = [(1, LeadTier.HOT), (2, LeadTier.WARM), (3, LeadTier.DORMANT), (4, LeadTier.ARCHIVED)]
+
+        result = asyncio.run(repo.bulk_update_tiers(updates, priority_scores={1: 80}, organization_id="org-1"))
+
+        assert result == {"success": 3, "failed": 1}
+        first = supabase.rpc.call_args_list[0].args[1]
+        assert first == {
+            "p_organization_id": "org-1", "p_person_ids": ["1", "2"],
+            "p_tiers": ["hot", "warm"], "p_priority_scores": [80, None],
+        }
+        assert repo.update_lead_tier.await_count == 2
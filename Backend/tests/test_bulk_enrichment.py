@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk enrichment job tests.
+
+Covers the bulk contact enrichment pipeline:
+- Lookups run on a bounded worker pool
+- Credits are reserved once for the batch and unused ones are released
+- Results are written in batches
+- Resumed jobs only process pending people (and reuse an open reservation)
+- Running out of reserved credits pauses the job; cancelling stops it
+- A job already claimed by another run is left alone, unless its lease expired
+
+Run with: pytest tests/test_bulk_enrichment.py -v
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.billing.credit_service import CreditService
+from app.enrichment.bulk_enrichment import BulkEnrichmentService
+
+ENRICHED = {'person': {'phones': [{'number': '5559876543'}]}}
+
+
+def _item(person_id):
+    return {
+        'fub_person_id': person_id,
+        'person': {'first_name': 'Lead', 'last_name': str(person_id), 'phone': '555123%04d' % person_id,
+                   'email': None, 'address': None},
+    }
+
+
+class _Endato:
+    """Endato client stand-in that records how many lookups overlap."""
+
+    def __init__(self, delay=0.02, result=ENRICHED):
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def contact_enrichment(self, **criteria):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return self.result
+
+    def pop_last_lookup_key(self):
+        return 'contact_enrichment:abc'
+
+
+def _credits(reserved):
+    credit_service = MagicMock()
+    credit_service.reserve_credits.side_effect = lambda user_id, credit_type, amount: {
+        'user_id': user_id, 'credit_type': credit_type, 'used': 0,
+        'reserved': min(amount, reserved),
+        'pools': [{'user_id': user_id, 'field': 'bundle_enhancement_credits', 'source': 'bundle',
+                   'amount': min(amount, reserved)}],
+    }
+    credit_service.settle_reservation.side_effect = lambda r, description=None: (
+        r['used'], r['reserved'] - r['used']
+    )
+    return credit_service
+
+
+def _service(job, items, endato=None, reserved=100, cancelled=False, **kwargs):
+    tracker = MagicMock()
+    tracker.is_cancelled.return_value = cancelled
+    service = BulkEnrichmentService(
+        supabase_client=MagicMock(),
+        endato_client=endato or _Endato(),
+        credit_service=_credits(reserved),
+        tracker=tracker,
+        **kwargs,
+    )
+    service.get_job = MagicMock(return_value=job)
+    service._pending_items = MagicMock(return_value=items)
+    service._update_job = MagicMock()
+    service._fub_api_key = MagicMock(return_value='fub-key')
+    service._user_settings = MagicMock(return_value={
+        'add_phones_to_fub': True, 'add_emails_to_fub': True, 'add_note_to_fub': True,
+    })
+    return service
+
+
+def _job(total, **fields):
+    return {'id': 'job-1', 'user_id': 'user-1', 'status': 'pending', 'total': total, **fields}
+
+
+@pytest.fixture
+def note_service():
+    with patch('app.fub.note_service.FUBNoteService') as cls:
+        instance = cls.return_value
+        instance.add_enrichment_data_to_person.return_value = {'phones_added': 1, 'emails_added': 0}
+        instance.post_enrichment_note.return_value = {'id': 1}
+        yield instance
+
+
+@pytest.mark.unit
+class TestBulkEnrichment:
+    """Tests for BulkEnrichmentService."""
+
+    def test_lookups_run_with_bounded_concurrency(self, note_service):
+        endato = _Endato()
+        items = [_item(i) for i in range(1, 21)]
+        service = _service(_job(20), items, endato=endato, concurrency=4)
+
+        result = service.run_job('job-1')
+
+        assert result['status'] == 'completed'
+        assert result['enriched'] == 20
+        assert endato.calls == 20
+        assert 1 < endato.max_in_flight <= 4
+        assert note_service.post_enrichment_note.call_count == 20
+
+    def test_batch_reservation_and_release(self, note_service):
+        endato = _Endato()
+        endato.result = None  # no match for anyone
+        items = [_item(i) for i in range(1, 6)]
+        service = _service(_job(5), items, endato=endato)
+
+        result = service.run_job('job-1')
+
+        service.credit_service.reserve_credits.assert_called_once_with('user-1', 'enhancement', 5)
+        reservation = service.credit_service.settle_reservation.call_args[0][0]
+        assert reservation['used'] == 0
+        assert result['failed'] == 5
+        assert result['credits_used'] == 0
+        assert result['credits_released'] == 5
+        note_service.post_enrichment_note.assert_not_called()
+
+    def test_results_written_in_batches(self, note_service):
+        items = [_item(i) for i in range(1, 11)]
+        service = _service(_job(10), items, write_batch_size=4)
+
+        service.run_job('job-1')
+
+        table = service.supabase.table
+        history = [c.args[0] for c in table.return_value.insert.call_args_list]
+        upserts = [c.args[0] for c in table.return_value.upsert.call_args_list]
+        assert [len(rows) for rows in history] == [4, 4, 2]
+        assert [len(rows) for rows in upserts] == [4, 4, 2]
+        assert all(row['cache_key'] == 'contact_enrichment:abc' for rows in history for row in rows)
+        assert {row['status'] for rows in upserts for row in rows} == {'enriched'}
+
+    def test_resume_uses_open_reservation(self, note_service):
+        open_reservation = {
+            'user_id': 'user-1', 'credit_type': 'enhancement', 'reserved': 10, 'used': 7,
+            'pools': [{'user_id': 'user-1', 'field': 'bundle_enhancement_credits', 'source': 'bundle', 'amount': 10}],
+        }
+        job = _job(10, status='paused', processed=7, enriched=7, credit_reservation=open_reservation, credits_used=0)
+        endato = _Endato()
+        service = _service(job, [_item(8), _item(9), _item(10)], endato=endato)
+
+        result = service.run_job('job-1')
+
+        service.credit_service.reserve_credits.assert_not_called()
+        assert endato.calls == 3
+        assert result['status'] == 'completed'
+        assert result['processed'] == 10
+        assert result['enriched'] == 10
+        assert result['credits_used'] == 10
+
+    def test_insufficient_credits_pauses_job(self, note_service):
+        endato = _Endato()
+        items = [_item(i) for i in range(1, 9)]
+        service = _service(_job(8), items, endato=endato, reserved=3, concurrency=2)
+
+        result = service.run_job('job-1')
+
+        assert endato.calls == 3
+        assert result['status'] == 'paused'
+        assert result['enriched'] == 3
+        upserted = [row['fub_person_id'] for c in service.supabase.table.return_value.upsert.call_args_list
+                    for row in c.args[0]]
+        assert len(upserted) == 3  # the rest stay pending
+
+    def test_cancelled_job_stops(self, note_service):
+        endato = _Endato()
+        service = _service(_job(5), [_item(i) for i in range(1, 6)], endato=endato, cancelled=True)
+
+        result = service.run_job('job-1')
+
+        assert endato.calls == 0
+        assert result['status'] == 'cancelled'
+        service.tracker.complete_sync.assert_called_once()
+
+    def test_job_claimed_by_another_run_not_processed(self, note_service):
+        endato = _Endato()
+        service = _service(_job(5), [_item(i) for i in range(1, 6)], endato=endato)
+        claim = service.supabase.table.return_value.update.return_value.eq.return_value.eq.return_value
+        claim.execute.return_value.data = []
+
+        result = service.run_job('job-1')
+
+        assert result['success'] is False
+        assert endato.calls == 0
+        service.credit_service.reserve_credits.assert_not_called()
+        service.supabase.table.return_value.update.return_value.eq.return_value.eq.assert_called_with(
+            'status', 'pending'
+        )
+
+    def test_running_job_with_live_lease_not_reclaimed(self, note_service):
+        endato = _Endato()
+        job = _job(5, status='running', updated_at=datetime.utcnow().isoformat())
+        service = _service(job, [_item(i) for i in range(1, 6)], endato=endato)
+
+        result = service.run_job('job-1')
+
+        assert result['success'] is False
+        assert endato.calls == 0
+        service.supabase.table.return_value.update.assert_not_called()
+
+    def test_running_job_with_expired_lease_reclaimed(self, note_service):
+        endato = _Endato()
+        stale = (datetime.utcnow() - timedelta(hours=1)).isoformat() + '+00:00'
+        job = _job(5, status='running', updated_at=stale)
+        service = _service(job, [_item(i) for i in range(1, 6)], endato=endato)
+
+        result = service.run_job('job-1')
+
+        assert result['enriched'] == 5
+        assert endato.calls == 5
+        # Conditional on the stale timestamp, so only one run can take it over
+        service.supabase.table.return_value.update.return_value.eq.return_value.eq.return_value.eq.assert_called_with(
+            'updated_at', stale
+        )
+
+    def test_people_without_enough_details_skipped(self, note_service):
+        endato = _Endato()
+        item = {'fub_person_id': 1, 'person': {'first_name': 'Only', 'last_name': 'Name'}}
+        service = _service(_job(1), [item], endato=endato)
+
+        result = service.run_job('job-1')
+
+        assert endato.calls == 0
+        assert result['skipped'] == 1
+        assert result['credits_released'] == 1
+
+
+@pytest.mark.unit
+class TestCreditReservation:
+    """Tests for CreditService.reserve_credits / settle_reservation."""
+
+    def _credit_service(self):
+        with patch('app.billing.credit_service.SupabaseClientSingleton.get_instance', return_value=MagicMock()):
+            service = CreditService()
+        service._record_transaction = MagicMock()
+        return service
+
+    def test_reserve_spills_into_broker_shared_pool(self):
+        service = self._credit_service()
+        service.get_user_credits = MagicMock(side_effect=lambda uid: {
+            'agent-1': {'user_type': 'agent', 'broker_id': 'broker-1'},
+            'broker-1': {'user_type': 'broker', 'credit_allocation_type': 'shared'},
+        }[uid])
+        service.supabase.rpc.return_value.execute.side_effect = [
+            MagicMock(data={'bundle_enhancement_credits': 4}),
+            MagicMock(data={'plan_enhancement_credits': 6}),
+            MagicMock(data=None),
+        ]
+
+        reservation = service.reserve_credits('agent-1', 'enhancement', 10)
+
+        assert reservation['reserved'] == 10
+        assert [(p['user_id'], p['amount']) for p in reservation['pools']] == [('agent-1', 4), ('broker-1', 6)]
+        first, second = service.supabase.rpc.call_args_list
+        assert first.args[1]['p_amount'] == 10 and second.args[1]['p_amount'] == 6
+
+        reservation['used'] = 5
+        used, released = service.settle_reservation(reservation)
+
+        assert (used, released) == (5, 5)
+        # shared pool was taken last, so it is refunded first
+        release = service.supabase.rpc.call_args_list[-1]
+        assert release.args == ('release_credit_pools', {'p_user_id': 'broker-1', 'p_amounts': {'plan_enhancement_credits': 5}})
+        assert service._record_transaction.call_args.kwargs['amount'] == 5
+
+    def test_release_adds_up_pools_on_same_field(self):
+        service = self._credit_service()
+        reservation = {
+            'user_id': 'agent-1', 'credit_type': 'enhancement', 'reserved': 7, 'used': 0,
+            'pools': [
+                {'user_id': 'agent-1', 'field': 'bundle_enhancement_credits', 'source': 'bundle', 'amount': 3},
+                {'user_id': 'agent-1', 'field': 'bundle_enhancement_credits', 'source': 'bundle', 'amount': 4},
+            ],
+        }
+
+        used, released = service.settle_reservation(reservation)
+
+        assert (used, released) == (0, 7)
+        service.supabase.rpc.assert_called_once_with(
+            'release_credit_pools', {'p_user_id': 'agent-1', 'p_amounts': {'bundle_enhancement_credits': 7}}
+        )
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk LLM generation tests.
+
+Runs BulkGenerationEngine against a local stub LLM server (aiohttp):
+- Calls in flight never exceed the worker count
+- Identical requests are generated once
+- Requests sharing a system prompt wait for the first one (warm prefix cache)
+- Checkpointed results are skipped on rerun; failures are retried
+- Follow-up and initial outreach batches parse the stub's replies
+- The outreach backfill generates every lead in one checkpointed run
+
+Run with: pytest tests/test_bulk_generation.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from app.ai_agent.bulk_generation import (
+    PROVIDER_ANTHROPIC,
+    BulkGenerationEngine,
+    GenerationRequest,
+    LLMSession,
+    load_batch_results,
+)
+from app.ai_agent.followup_manager import (
+    FollowUpManager,
+    FollowUpStatus,
+    MessageType,
+    ScheduledFollowUp,
+    generate_followup_message,
+    parse_followup_text,
+)
+from app.ai_agent.initial_outreach_generator import InitialOutreachGenerator, LeadContext
+from app.ai_agent.proactive_outreach_orchestrator import PreparedOutreach, ProactiveOutreachOrchestrator
+
+
+class StubLLM:
+    """Local OpenAI/Anthropic-style completion server."""
+
+    def __init__(self, delay=0.02, reply=None, fail_on=None):
+        self.delay = delay
+        self.reply = reply or (lambda user_prompt: f"reply to {user_prompt}")
+        self.fail_on = fail_on
+        self.calls = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def handle(self, request):
+        payload = await request.json()
+        user_prompt = payload["messages"][-1]["content"]
+        self.calls.append(payload)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        if self.fail_on and self.fail_on in user_prompt:
+            return web.Response(status=529, text="overloaded")
+        text = self.reply(user_prompt)
+        if "system" in payload:
+            return web.json_response({
+                "model": "stub", "content": [{"text": text}],
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+            })
+        return web.json_response({
+            "model": "stub", "choices": [{"message": {"content": text}}],
+            "usage": {"total_tokens": 15},
+        })
+
+    async def run(self, scenario, provider=None):
+        """Start the server, run scenario(llm_session), stop the server."""
+        app = web.Application()
+        app.router.add_post("/v1/complete", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        kwargs = {"provider": provider} if provider else {}
+        llm = LLMSession("test-key", api_url=f"http://127.0.0.1:{port}/v1/complete", **kwargs)
+        try:
+            return await scenario(llm)
+        finally:
+            await llm.close()
+            await runner.cleanup()
+
+
+def _run(stub, scenario, **kwargs):
+    return asyncio.run(stub.run(scenario, **kwargs))
+
+
+def _requests(count, system_prompt="system"):
+    return [GenerationRequest(key=f"lead-{i}", system_prompt=system_prompt, user_prompt=f"lead {i}") for i in range(count)]
+
+
+@pytest.mark.unit
+class TestBulkGenerationEngine:
+    """Tests for BulkGenerationEngine."""
+
+    def test_concurrency_is_bounded(self):
+        stub = StubLLM()
+
+        async def scenario(llm):
+            engine = BulkGenerationEngine(llm, concurrency=3)
+            return engine, await engine.run(_requests(12, system_prompt=""))
+
+        engine, results = _run(stub, scenario)
+
+        assert len(results) == 12 and all(r.ok for r in results.values())
+        assert results["lead-4"].text == "reply to lead 4"
+        assert stub.peak_in_flight == 3
+        assert engine.stats["peak_in_flight"] == 3
+
+    def test_identical_requests_generated_once(self):
+        stub = StubLLM()
+        requests = _requests(3) + [GenerationRequest(key="dup", system_prompt="system", user_prompt="lead 1")]
+
+        async def scenario(llm):
+            engine = BulkGenerationEngine(llm, concurrency=4)
+            return engine, await engine.run(requests)
+
+        engine, results = _run(stub, scenario)
+
+        assert len(stub.calls) == 3
+        assert results["dup"].text == results["lead-1"].text and results["dup"].shared
+        assert engine.stats["deduplicated"] == 1
+
+    def test_shared_prefix_warms_before_the_rest(self):
+        stub = StubLLM(delay=0.05)
+
+        async def scenario(llm):
+            return await BulkGenerationEngine(llm, concurrency=4).run(_requests(4))
+
+        _run(stub, scenario)
+
+        # The first call ran alone; the other three waited for it, then ran together
+        assert stub.peak_in_flight == 3
+        system = stub.calls[0]["messages"][0]["content"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_checkpoint_resume_retries_only_failures(self, tmp_path):
+        checkpoint = str(tmp_path / "batch.jsonl")
+        failing = StubLLM(fail_on="lead 2")
+
+        async def first_run(llm):
+            return await BulkGenerationEngine(llm, checkpoint_path=checkpoint).run(_requests(4))
+
+        results = _run(failing, first_run)
+        assert "529" in results["lead-2"].error
+        assert set(load_batch_results(checkpoint)) == {"lead-0", "lead-1", "lead-3"}
+
+        healthy = StubLLM()
+
+        async def second_run(llm):
+            return await BulkGenerationEngine(llm, checkpoint_path=checkpoint).run(_requests(4))
+
+        results = _run(healthy, second_run)
+
+        assert len(healthy.calls) == 1
+        assert results["lead-2"].ok and results["lead-0"].from_checkpoint
+        assert len(load_batch_results(checkpoint)) == 4
+
+
+@pytest.mark.unit
+class TestBulkCallers:
+    """Tests for follow-up and outreach batches."""
+
+    def test_followups_pregenerated_for_later_sending(self, tmp_path):
+        checkpoint = str(tmp_path / "followups.jsonl")
+        stub = StubLLM(reply=lambda _: '{"subject": "Austin update", "body": "Prices eased this month."}')
+        manager = FollowUpManager(supabase_client=None)
+        followups = [
+            ScheduledFollowUp(
+                id=f"fu-{i}", fub_person_id=100 + i, organization_id="org", scheduled_at=None,
+                channel="email", message_type=MessageType.EMAIL_MARKET_REPORT.value,
+                sequence_step=6, sequence_id="seq", status=FollowUpStatus.PENDING,
+            )
+            for i in range(3)
+        ]
+
+        async def scenario(llm):
+            engine = BulkGenerationEngine(llm, checkpoint_path=checkpoint)
+            return await manager.pregenerate_followup_messages(followups, engine, agent_name="Sarah")
+
+        results = _run(stub, scenario, provider=PROVIDER_ANTHROPIC)
+
+        assert set(results) == {"fu-0", "fu-1", "fu-2"}
+        assert stub.calls[0]["max_tokens"] == 500
+        saved = load_batch_results(checkpoint)["fu-1"]
+        assert parse_followup_text(saved.text, "email") == {
+            "subject": "Austin update", "content": "Prices eased this month.", "ai_used": True,
+        }
+
+    def test_outreach_batch_falls_back_per_lead(self):
+        reply = json.dumps({"sms": "Hey Ann! Saw you're looking in Austin.", "email_subject": "Austin homes", "email_body": "<p>Hi Ann</p>"})
+        stub = StubLLM(reply=lambda _: reply, fail_on="Lead Name: Bob")
+        generator = InitialOutreachGenerator(agent_name="Sarah", brokerage_name="Oak Realty")
+        leads = {
+            "1": (LeadContext(first_name="Ann", city="Austin"), None),
+            "2": (LeadContext(first_name="Bob", city="Austin"), None),
+        }
+
+        async def scenario(llm):
+            return await generator.generate_outreach_batch(leads, BulkGenerationEngine(llm))
+
+        outreach = _run(stub, scenario)
+
+        assert outreach["1"].sms_message == "Hey Ann! Saw you're looking in Austin."
+        assert outreach["1"].email_text == "Hi Ann" and outreach["1"].model_used == "stub"
+        assert outreach["2"].model_used != "stub"  # Smart fallback
+        assert {c["messages"][0]["content"][0]["text"] for c in stub.calls} == {generator.SYSTEM_PROMPT}
+
+    def test_single_followup_uses_shared_session(self):
+        stub = StubLLM(reply=lambda _: "Quick one - still looking in Austin?", fail_on="Day 3")
+
+        async def scenario(llm):
+            kwargs = dict(
+                person_data={"firstName": "Ann"}, message_type=MessageType.HELPFUL_CHECKIN,
+                channel="sms", agent_name="Sarah", agent_phone="", brokerage_name="Oak Realty", llm_session=llm,
+            )
+            ok = await generate_followup_message(sequence_day=2, **kwargs)
+            failed = await generate_followup_message(sequence_day=3, **kwargs)
+            return ok, failed, llm._session
+
+        ok, failed, session = _run(stub, scenario)
+
+        assert ok == {"content": "Quick one - still looking in Austin?", "ai_used": True}
+        assert failed["content"] == "[API error: 529]" and not failed["ai_used"]
+        assert session is not None  # Left open for the caller that owns it
+
+    def test_outreach_backfill_generates_in_one_checkpointed_run(self, tmp_path):
+        checkpoint = str(tmp_path / "backfill.jsonl")
+        reply = json.dumps({"sms": "Hey there!", "email_subject": "Homes", "email_body": "<p>Hi</p>"})
+        stub = StubLLM(reply=lambda _: reply)
+        delivered = []
+
+        class Orchestrator(ProactiveOutreachOrchestrator):
+            async def _prepare_outreach(self, fub_person_id, organization_id, user_id, trigger_reason, enable_type):
+                result = {"success": False, "actions_taken": [], "errors": [], "lead_stage": None, "messages": {}}
+                if fub_person_id == 3:
+                    result["errors"].append("Proactive outreach already sent to this lead")
+                    return None, result
+                agent = "Sarah" if organization_id == "org-a" else "Mike"
+                return PreparedOutreach(
+                    fub_person_id=fub_person_id, organization_id=organization_id,
+                    trigger_reason=trigger_reason, enable_type=enable_type,
+                    person_data={}, settings={}, historical_context=None,
+                    lead_context=LeadContext(first_name=f"Lead{fub_person_id}"),
+                    generator=InitialOutreachGenerator(agent_name=agent),
+                    generator_key=(agent,),
+                ), result
+
+            async def _deliver_outreach(self, prepared, outreach, result):
+                delivered.append((prepared.fub_person_id, prepared.generator.agent_name, outreach.sms_message))
+                result["success"] = True
+                return result
+
+        leads = [
+            {"fub_person_id": pid, "organization_id": org, "user_id": "u"}
+            for pid, org in ((1, "org-a"), (2, "org-b"), (3, "org-a"), (4, "org-a"))
+        ]
+        orchestrator = Orchestrator(None, None, None, None)
+
+        async def scenario(llm):
+            engine = BulkGenerationEngine(llm, checkpoint_path=checkpoint)
+            return await orchestrator.trigger_proactive_outreach_batch(leads, engine)
+
+        results = _run(stub, scenario)
+
+        assert [r["success"] for r in results] == [True, True, False, True]
+        assert sorted(delivered) == [(1, "Sarah", "Hey there!"), (2, "Mike", "Hey there!"), (4, "Sarah", "Hey there!")]
+        assert set(load_batch_results(checkpoint)) == {"1", "2", "4"}
+
+        # Rerun after a crash: messages come from the checkpoint
+        stub.calls.clear()
+        _run(stub, scenario)
+        assert stub.calls == []
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Cache invalidation feed tests.
+
+Covers the LISTEN/NOTIFY listener that keeps the lead/note caches current:
+- Trigger payloads are routed to the right cache, last change per key wins
+- Key changes evict the old key
+- Lag from row change to cache update is measured
+- Catch-up after downtime evicts rows changed during the gap
+- Reads skip time-based verification only while the heartbeat is fresh
+
+Run with: pytest tests/test_cache_invalidation.py -v
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.database import cache_invalidation
+from app.database.cache_invalidation import (
+    HEARTBEAT_KEY,
+    LAST_SEEN_KEY,
+    CacheInvalidationListener,
+    coalesce,
+    invalidation_feed_active,
+    parse_notification,
+)
+
+
+def _payload(table, op, key, old_key=None, row=None, ts=None):
+    payload = {'table': table, 'op': op, 'key': key, 'old_key': old_key,
+               'ts': ts if ts is not None else time.time()}
+    if row is not None:
+        payload['row'] = row
+    return json.dumps(payload)
+
+
+class _Cache:
+    def __init__(self):
+        self.batches = []
+
+    def apply_changes(self, changes):
+        self.batches.append(changes)
+
+
+def _listener(fake_redis):
+    leads, notes = _Cache(), _Cache()
+    listener = CacheInvalidationListener(dsn='postgresql://localhost/test', lead_cache=leads,
+                                         note_cache=notes, redis_client=fake_redis)
+    return listener, leads, notes
+
+
+@pytest.fixture(autouse=True)
+def reset_feed_check():
+    cache_invalidation._feed_check.update(active=False, checked_at=0.0)
+    yield
+    cache_invalidation._feed_check.update(active=False, checked_at=0.0)
+
+
+@pytest.mark.unit
+class TestCacheInvalidation:
+    """Tests for CacheInvalidationListener."""
+
+    def test_changes_routed_and_coalesced(self, fake_redis):
+        listener, leads, notes = _listener(fake_redis)
+
+        applied = listener.handle_payloads([
+            _payload('leads', 'UPDATE', 101, old_key=101, row={'fub_person_id': 101, 'status': 'A'}),
+            _payload('leads', 'UPDATE', 101, old_key=101, row={'fub_person_id': 101, 'status': 'B'}),
+            _payload('lead_notes', 'DELETE', 'n-9', old_key='n-9'),
+            _payload('leads', 'INSERT', 102, row={'fub_person_id': 102}),
+            'not json',
+            _payload('users', 'UPDATE', 'u-1'),
+        ])
+
+        assert applied == 3
+        assert [c['key'] for c in leads.batches[0]] == ['101', '102']
+        assert leads.batches[0][0]['row']['status'] == 'B'
+        assert [(c['op'], c['key']) for c in notes.batches[0]] == [('DELETE', 'n-9')]
+        assert listener.stats()['notifications'] == 6
+
+    def test_key_change_evicts_old_key(self):
+        changes = [parse_notification(_payload('leads', 'UPDATE', 202, old_key=201, row={'fub_person_id': 202}))]
+
+        grouped = coalesce(changes)
+
+        assert [(c['op'], c['key']) for c in grouped['leads']] == [('DELETE', '201'), ('UPDATE', '202')]
+
+    def test_lag_metric(self, fake_redis):
+        listener, _, _ = _listener(fake_redis)
+
+        listener.handle_payloads([
+            _payload('leads', 'UPDATE', i, ts=time.time() - 0.25) for i in range(10)
+        ] + [_payload('leads', 'UPDATE', 99, ts=time.time() - 2)])
+
+        stats = listener.stats()
+        assert 200 <= stats['p50_lag_ms'] < 1000
+        assert stats['max_lag_ms'] >= 2000
+        assert stats['p95_lag_ms'] >= stats['p50_lag_ms']
+
+        listener._heartbeat()
+        assert json.loads(fake_redis.get('cache:cdc:stats'))['applied'] == 11
+        assert fake_redis.get(LAST_SEEN_KEY) is not None
+
+    def test_catch_up_evicts_changed_rows(self, fake_redis):
+        listener, leads, notes = _listener(fake_redis)
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[(301,), (302,)], [('n-1',)]]
+        listener._conn = MagicMock()
+        listener._conn.cursor.return_value.__enter__.return_value = cursor
+
+        since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        listener._catch_up(since)
+
+        assert cursor.execute.call_args_list[0].args[1] == (since,)
+        assert [(c['op'], c['key']) for c in leads.batches[0]] == [('DELETE', '301'), ('DELETE', '302')]
+        assert [c['key'] for c in notes.batches[0]] == ['n-1']
+        assert listener.stats()['catch_up_evictions'] == 3
+
+    def test_startup_catch_up_starts_at_last_seen(self, fake_redis):
+        listener, _, _ = _listener(fake_redis)
+        fake_redis.set(LAST_SEEN_KEY, 1767225600.0)  # 2026-01-01
+
+        assert listener._last_seen() == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def test_feed_active_follows_heartbeat(self, fake_redis):
+        assert not invalidation_feed_active(fake_redis)
+
+        fake_redis.set(HEARTBEAT_KEY, time.time())
+        assert not invalidation_feed_active(fake_redis)  # memoized for a few seconds
+
+        cache_invalidation._feed_check['checked_at'] = 0.0
+        assert invalidation_feed_active(fake_redis)
+
+        fake_redis.set(HEARTBEAT_KEY, time.time() - 120)
+        cache_invalidation._feed_check['checked_at'] = 0.0
+        assert not invalidation_feed_active(fake_redis)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Cache verifier tests.
+
+Covers the batched background verification used by the lead and note caches:
+- Bursts of expired entries are checked in a few batched queries, not one
+  query (and thread) per entry
+- Newer DB rows are refreshed, rows missing from the DB are invalidated
+- Repeat submissions of a queued key are deduplicated; a full queue drops
+- A failed query invalidates nothing
+
+Run with: pytest tests/test_cache_verifier.py -v
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.database.cache_verifier import CacheVerifier, is_newer
+
+
+def _row(updated_at):
+    return SimpleNamespace(updated_at=updated_at)
+
+
+class _Recorder:
+    """fetch_batch / apply_batch pair recording each call."""
+
+    def __init__(self, rows=None, fail=False):
+        self.rows = rows or {}
+        self.fail = fail
+        self.queries = []
+        self.applied = []
+
+    def fetch(self, keys):
+        self.queries.append(list(keys))
+        if self.fail:
+            raise RuntimeError("db unavailable")
+        return {key: self.rows[key] for key in keys if key in self.rows}
+
+    def apply(self, refresh, invalidate, verified):
+        self.applied.append((refresh, invalidate, verified))
+
+
+@pytest.mark.unit
+class TestCacheVerifier:
+    """Tests for CacheVerifier."""
+
+    def test_burst_is_verified_in_batches(self):
+        recorder = _Recorder(rows={str(i): _row('2026-01-01T00:00:00Z') for i in range(250)})
+        verifier = CacheVerifier('leads', recorder.fetch, recorder.apply, batch_size=100, batch_wait=0.2)
+        threads_before = threading.active_count()
+
+        for i in range(250):
+            verifier.submit(i, _row('2026-01-01T00:00:00Z'))
+
+        assert verifier.wait_idle()
+        assert threading.active_count() <= threads_before + 1
+        assert [len(q) for q in recorder.queries] == [100, 100, 50]
+        assert sum(len(verified) for _, _, verified in recorder.applied) == 250
+
+        stats = verifier.stats()
+        assert stats['batches'] == 3
+        assert stats['max_batch_size'] == 100
+        assert stats['queue_depth'] == 0
+        assert stats['avg_batch_size'] == pytest.approx(83.33)
+
+    def test_refresh_and_invalidate(self):
+        recorder = _Recorder(rows={
+            'fresh': _row('2026-01-01T00:00:00+00:00'),
+            'stale': _row('2026-03-01T00:00:00Z'),
+        })
+        verifier = CacheVerifier('leads', recorder.fetch, recorder.apply, batch_wait=0.1)
+        cached_deleted = _row('2026-01-01T00:00:00')
+
+        verifier.submit('fresh', _row('2026-01-01T00:00:00'))
+        verifier.submit('stale', _row('2026-02-01T00:00:00'))
+        verifier.submit('deleted', cached_deleted)
+        assert verifier.wait_idle()
+
+        refresh, invalidate, verified = recorder.applied[0]
+        assert [key for key, _ in refresh] == ['stale']
+        assert invalidate == [('deleted', cached_deleted)]
+        assert sorted(verified) == ['fresh', 'stale']
+        stats = verifier.stats()
+        assert (stats['refreshed'], stats['invalidated']) == (1, 1)
+
+    def test_duplicates_and_full_queue(self):
+        gate = threading.Event()
+        recorder = _Recorder()
+
+        def slow_fetch(keys):
+            gate.wait(2)
+            return recorder.fetch(keys)
+
+        verifier = CacheVerifier('notes', slow_fetch, recorder.apply, batch_size=1, max_queue=2, batch_wait=0)
+        assert verifier.submit('a')
+        assert verifier.submit('a')   # queued or in flight: deduplicated
+        verifier.submit('b')
+        verifier.submit('c')
+        full = [verifier.submit(key) for key in ('d', 'e', 'f')]
+        gate.set()
+        assert verifier.wait_idle()
+
+        stats = verifier.stats()
+        assert stats['deduplicated'] == 1
+        assert False in full and stats['dropped'] == full.count(False)
+        assert ['a'] in recorder.queries
+        assert recorder.queries.count(['a']) == 1
+
+    def test_failed_query_invalidates_nothing(self):
+        recorder = _Recorder(fail=True)
+        verifier = CacheVerifier('leads', recorder.fetch, recorder.apply, batch_wait=0.05)
+
+        verifier.submit('1', _row('2026-01-01T00:00:00'))
+        assert verifier.wait_idle()
+
+        assert recorder.applied == []
+        stats = verifier.stats()
+        assert stats['errors'] == 1
+        assert stats['invalidated'] == 0
+        # can be re-submitted on the next read
+        assert verifier.submit('1') and verifier.wait_idle()
+        assert len(recorder.queries) == 2
+
+    def test_is_newer_handles_mixed_formats(self):
+        assert is_newer('2026-02-01T00:00:00Z', '2026-01-01T00:00:00')
+        assert not is_newer('2026-01-01T00:00:00+00:00', '2026-01-01T00:00:00Z')
+        assert not is_newer(None, '2026-01-01T00:00:00')
+        assert not is_newer('not a date', '2026-01-01T00:00:00')
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Campaign send engine tests.
+
+Runs CampaignSendEngine against an in-memory ai_campaign_leads table:
+- Send times are spread over each recipient's texting window
+- Per-organization and global caps bound sends per minute
+- Only due leads are claimed; compliance defers or skips the rest
+- Outcomes are written with bulk updates
+- A crash mid-send never leads to a second send
+- Campaign rows carry the organization's timezone
+
+Run with: pytest tests/test_campaign_send_engine.py -v
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.ai_agent.campaign_send_engine import (
+    INTERRUPTED_ERROR,
+    CampaignSendEngine,
+    ThroughputLimiter,
+    spread_send_times,
+)
+from app.ai_agent.compliance_checker import ComplianceResult, ComplianceStatus
+from app.ai_agent.reengagement_campaign import ReengagementCampaignManager
+
+
+DUE = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder for the engine."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.changes = None
+
+    def select(self, *_):
+        return self
+
+    def update(self, changes):
+        self.changes = changes
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda r: r.get(column) in values)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r[column] < value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r[column] <= value)
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda r: r.get(column) is None)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, _):
+        return self
+
+    def execute(self):
+        rows = [r for r in self.db.tables[self.table] if all(f(r) for f in self.filters)]
+        if self.changes is not None:
+            self.db.updates.append((self.table, dict(self.changes), len(rows)))
+            for row in rows:
+                row.update(self.changes)
+        return MagicMock(data=[dict(r) for r in rows])
+
+
+class FakeCampaignDB:
+    """In-memory ai_campaigns / ai_campaign_leads with the engine's RPCs."""
+
+    def __init__(self, campaigns, leads):
+        self.tables = {"ai_campaigns": campaigns, "ai_campaign_leads": leads}
+        self.updates = []
+        self.rpcs = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        self.rpcs.append(name)
+        return MagicMock(execute=lambda: MagicMock(data=getattr(self, name)(**params)))
+
+    def _lead(self, campaign_id, person_id):
+        return next(
+            r for r in self.tables["ai_campaign_leads"]
+            if r["campaign_id"] == campaign_id and r["fub_person_id"] == person_id
+        )
+
+    def schedule_campaign_sends(self, p_campaign_id, p_person_ids, p_send_after, p_claim_token=None):
+        for person_id, send_after in zip(p_person_ids, p_send_after):
+            row = self._lead(p_campaign_id, person_id)
+            if row["status"] == "pending" or (row["status"] == "sending" and row["claim_token"] == p_claim_token):
+                row.update(send_after=send_after, status="pending", claim_token=None, claimed_at=None)
+        return len(p_person_ids)
+
+    def claim_campaign_leads(self, p_campaign_id, p_limit, p_claim_token):
+        now = datetime.utcnow().isoformat()
+        due = sorted(
+            (r for r in self.tables["ai_campaign_leads"]
+             if r["campaign_id"] == p_campaign_id and r["status"] == "pending"
+             and r.get("send_after") and r["send_after"] <= now),
+            key=lambda r: (r["send_after"], -r["priority_score"]),
+        )[:p_limit]
+        for row in due:
+            row.update(status="sending", claim_token=p_claim_token, claimed_at=now)
+        return [dict(r) for r in due]
+
+
+def _campaign(campaign_id="camp-1", org="org-1"):
+    return {
+        "id": campaign_id, "organization_id": org, "status": "running", "daily_limit": 200,
+        "message_template": None, "custom_message": "Hi {first_name}!",
+        "started_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _lead(person_id, campaign_id="camp-1", due=True, batch=0):
+    send_after = DUE if due else None
+    return {
+        "campaign_id": campaign_id, "fub_person_id": person_id, "status": "pending",
+        "priority_score": person_id, "scheduled_batch": batch, "send_after": send_after,
+        "claim_token": None, "claimed_at": None, "recipient_timezone": "America/Chicago",
+        "first_name": "Ann", "phone_number": "+15125550100",
+    }
+
+
+def _compliance(results=None):
+    checker = MagicMock()
+
+    async def check(person_ids, organization_id=None, recipient_timezones=None):
+        return {
+            pid: (results or {}).get(pid, ComplianceResult(status=ComplianceStatus.COMPLIANT, can_send=True))
+            for pid in person_ids
+        }
+
+    checker.check_sms_compliance_batch = AsyncMock(side_effect=check)
+    checker.increment_message_counts = AsyncMock(return_value=0)
+    return checker
+
+
+def _limiter(org_cap, global_cap):
+    limiter = ThroughputLimiter(org_cap, global_cap)
+    limiter._window = lambda: 0  # One fixed minute for the whole test
+    return limiter
+
+
+def _engine(db, deliver, compliance=None, org_cap=100, global_cap=100):
+    return CampaignSendEngine(
+        db,
+        deliver=deliver,
+        campaign_manager=ReengagementCampaignManager(supabase_client=db),
+        compliance_checker=compliance or _compliance(),
+        limiter=_limiter(org_cap, global_cap),
+    )
+
+
+def _recording_deliver(sent):
+    async def deliver(lead, campaign):
+        sent.append(lead["fub_person_id"])
+        return True
+    return deliver
+
+
+@pytest.mark.unit
+class TestPacing:
+    """Tests for send spreading and throughput caps."""
+
+    def test_spread_over_local_window(self):
+        # 14:00 UTC = 9 AM in Chicago (CDT): 11 hours left in the window
+        times = spread_send_times(4, "America/Chicago", datetime(2026, 7, 1, 14, 0))
+
+        assert times[0] == datetime(2026, 7, 1, 14, 0)
+        assert times[1] - times[0] == timedelta(hours=11) / 4
+        assert times[-1] < datetime(2026, 7, 2, 1, 0)  # 8 PM CDT
+
+    def test_closed_window_moves_to_tomorrow(self):
+        # 03:00 UTC = 11 PM in New York (EDT)
+        times = spread_send_times(2, "America/New_York", datetime(2026, 7, 2, 3, 0))
+
+        assert times == [datetime(2026, 7, 2, 12, 0), datetime(2026, 7, 2, 18, 0)]
+
+    def test_org_and_global_caps(self):
+        limiter = _limiter(org_cap=5, global_cap=8)
+
+        assert limiter.reserve("org-a", 4) == 4
+        assert limiter.reserve("org-a", 4) == 1
+        assert limiter.reserve("org-b", 10) == 3
+        limiter.release("org-a", 2)
+        assert limiter.reserve("org-b", 10) == 2
+
+
+@pytest.mark.unit
+class TestCampaignSendEngine:
+    """Tests for CampaignSendEngine.tick()."""
+
+    def test_due_leads_sent_in_capped_chunks(self):
+        leads = [_lead(i) for i in range(1, 8)] + [_lead(50, due=False, batch=1)]
+        db = FakeCampaignDB([_campaign()], leads)
+        sent = []
+        engine = _engine(db, _recording_deliver(sent), org_cap=5)
+        engine.CLAIM_CHUNK_SIZE = 3
+
+        stats = asyncio.run(engine.tick(max_seconds=0.5))
+
+        # Highest priority first, capped at 5 this minute, tomorrow's batch untouched
+        assert sent == [7, 6, 5, 4, 3]
+        assert stats["sent"] == 5 and stats["sent_by_organization"] == {"org-1": 5}
+        assert {r["fub_person_id"]: r["status"] for r in leads if r["status"] != "pending"} == {
+            7: "sent", 6: "sent", 5: "sent", 4: "sent", 3: "sent",
+        }
+        sent_updates = [u for u in db.updates if u[1].get("status") == "sent"]
+        assert [count for _, _, count in sent_updates] == [3, 2]
+        assert leads[-1]["send_after"] is None
+
+    def test_compliance_defers_and_skips(self):
+        later = datetime.utcnow() + timedelta(hours=10)
+        results = {
+            1: ComplianceResult(status=ComplianceStatus.BLOCKED_OUTSIDE_HOURS, can_send=False, next_allowed_time=later),
+            2: ComplianceResult(status=ComplianceStatus.BLOCKED_OPTED_OUT, can_send=False, reason="Lead opted out"),
+        }
+        leads = [_lead(1), _lead(2), _lead(3)]
+        db = FakeCampaignDB([_campaign()], leads)
+        sent = []
+        compliance = _compliance(results)
+
+        stats = asyncio.run(_engine(db, _recording_deliver(sent), compliance).tick(max_seconds=0.5))
+
+        assert sent == [3]
+        assert (stats["deferred"], stats["skipped"]) == (1, 1)
+        assert leads[0]["status"] == "pending" and leads[0]["send_after"] == later.isoformat()
+        assert leads[1]["status"] == "skipped" and leads[1]["error_message"] == "Lead opted out"
+        compliance.increment_message_counts.assert_awaited_once_with([3], "org-1", {3: "+15125550100"})
+
+    def test_failures_recorded_and_campaign_completes(self):
+        leads = [_lead(1), _lead(2)]
+        db = FakeCampaignDB([_campaign()], leads)
+
+        async def deliver(lead, campaign):
+            if lead["fub_person_id"] == 1:
+                raise RuntimeError("FUB 429")
+            return True
+
+        stats = asyncio.run(_engine(db, deliver).tick(max_seconds=0.5))
+
+        assert (leads[0]["status"], leads[0]["error_message"]) == ("failed", "FUB 429")
+        assert leads[1]["status"] == "sent"
+        assert stats["completed"] == ["camp-1"]
+        assert db.tables["ai_campaigns"][0]["status"] == "completed"
+
+    def test_todays_batch_scheduled_before_claiming(self):
+        leads = [_lead(i, due=False) for i in range(1, 4)] + [_lead(9, due=False, batch=1)]
+        db = FakeCampaignDB([_campaign()], leads)
+
+        scheduled = _engine(db, _recording_deliver([])).schedule_due_batches(_campaign())
+
+        assert scheduled == 3
+        assert all(r["send_after"] for r in leads[:3]) and leads[3]["send_after"] is None
+
+    def test_interrupted_send_not_resent(self):
+        leads = [_lead(1), _lead(2)]
+        db = FakeCampaignDB([_campaign()], leads)
+        sent = []
+
+        async def crash_after_send(lead, campaign):
+            sent.append(lead["fub_person_id"])
+            raise SystemExit("worker killed")
+
+        with pytest.raises(SystemExit):
+            asyncio.run(_engine(db, crash_after_send).tick(max_seconds=0.5))
+        assert {r["status"] for r in leads} == {"sending"}
+        sent_before_crash = list(sent)
+
+        # Restarted worker, after the claim lease expired
+        for row in leads:
+            row["claimed_at"] = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        stats = asyncio.run(_engine(db, _recording_deliver(sent)).tick(max_seconds=0.5))
+
+        assert stats["recovered"] == 2 and stats["sent"] == 0
+        assert sent == sent_before_crash
+        assert {r["error_message"] for r in leads} == {INTERRUPTED_ERROR}
+
+
+@pytest.mark.unit
+class TestCampaignLeadRows:
+    """Tests for the rows create_campaign writes for the send engine."""
+
+    def test_rows_use_org_timezone(self, monkeypatch):
+        from app.ai_agent import reengagement_campaign
+        from app.ai_agent.settings_cache import SOURCE_ANY, SOURCE_ORG
+
+        cache = MagicMock()
+        monkeypatch.setattr(reengagement_campaign, "get_settings_cache", lambda *_: cache)
+        supabase = MagicMock()
+        manager = ReengagementCampaignManager(supabase_client=supabase)
+
+        cache.get_row.return_value = ({"timezone": "America/Chicago"}, SOURCE_ORG)
+        timezone = manager._get_org_timezone("org-1")
+        asyncio.run(manager._assign_leads_to_batches(
+            "camp-1", [{"fub_person_id": 1, "first_name": "Ann", "phone": "+15125550100"}], 200,
+            recipient_timezone=timezone,
+        ))
+
+        row = supabase.table.return_value.insert.call_args.args[0][0]
+        assert row["recipient_timezone"] == "America/Chicago"
+        # Another organization's settings row is no use
+        cache.get_row.return_value = ({"timezone": "America/Los_Angeles"}, SOURCE_ANY)
+        assert manager._get_org_timezone("org-2") is None
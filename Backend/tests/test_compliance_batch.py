@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Batch compliance tests.
+
+Covers ComplianceChecker's batch pre-flight and bulk counter update:
+- One sms_consent query per CONSENT_BATCH_SIZE leads
+- Time windows computed once per distinct timezone
+- Same verdicts as the single-lead check
+- Without an organization, a lead's rows from every org are merged
+- Message counts incremented with a single RPC call
+
+Run with: pytest tests/test_compliance_batch.py -v
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytz
+
+from app.ai_agent.compliance_checker import ComplianceChecker, ComplianceStatus
+
+
+def _make_supabase(consent_rows):
+    supabase = MagicMock()
+    table = supabase.table.return_value
+    for method in ("select", "eq", "in_"):
+        getattr(table, method).return_value = table
+    table.execute.return_value = MagicMock(data=consent_rows)
+    return supabase, table
+
+
+# Noon in New York - inside the texting window
+NOON_NY = pytz.timezone("America/New_York").localize(datetime(2026, 3, 10, 12, 0))
+
+
+@pytest.mark.unit
+class TestComplianceBatch:
+    """Tests for check_sms_compliance_batch()."""
+
+    @pytest.mark.asyncio
+    async def test_single_query_and_verdicts(self):
+        today = NOON_NY.date()
+        supabase, table = _make_supabase([
+            {"fub_person_id": 1, "opted_out": True, "opted_out_at": "2026-01-01"},
+            {"fub_person_id": 2, "consent_given": True, "is_on_dnc": True},
+            {"fub_person_id": 3, "consent_given": True, "messages_sent_today": 30,
+             "last_message_date": str(today)},
+            {"fub_person_id": 4, "consent_given": True, "messages_sent_today": 30,
+             "last_message_date": "2026-03-09"},
+        ])
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        pinned_window = checker._get_time_window("America/New_York", NOON_NY)
+        with patch.object(checker, "_get_time_window", return_value=pinned_window):
+            results = await checker.check_sms_compliance_batch(
+                [1, 2, 3, 4, 5], "org-1",
+                recipient_timezones={pid: "America/New_York" for pid in range(1, 6)},
+            )
+
+        assert table.execute.call_count == 1
+        assert results[1].status == ComplianceStatus.BLOCKED_OPTED_OUT
+        assert results[2].status == ComplianceStatus.BLOCKED_DNC
+        assert results[3].status == ComplianceStatus.BLOCKED_RATE_LIMIT
+        assert results[4].can_send  # yesterday's count doesn't carry over
+        assert results[5].can_send
+        assert results[5].warnings  # implied consent only
+
+    @pytest.mark.asyncio
+    async def test_large_batch_is_chunked(self):
+        supabase, table = _make_supabase([])
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        await checker.check_sms_compliance_batch(list(range(1200)), "org-1")
+
+        assert table.execute.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_window_computed_once_per_timezone(self):
+        checker = ComplianceChecker(supabase_client=None)
+        timezones = {pid: ("America/Denver" if pid % 2 else "America/Chicago") for pid in range(100)}
+
+        with patch.object(checker, "_get_time_window", wraps=checker._get_time_window) as spy:
+            results = await checker.check_sms_compliance_batch(list(range(100)), "org-1", timezones)
+
+        assert len(results) == 100
+        assert spy.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_check(self):
+        rows = [{"fub_person_id": 7, "consent_given": True, "opted_out": True}]
+        supabase, table = _make_supabase(rows)
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        batch = await checker.check_sms_compliance_batch([7], "org-1")
+        single = await checker.check_sms_compliance(7, "org-1", "+15555550100")
+
+        assert batch[7].to_dict() == single.to_dict()
+
+
+    @pytest.mark.asyncio
+    async def test_rows_from_every_org_are_merged(self):
+        today = str(NOON_NY.date())
+        supabase, table = _make_supabase([
+            {"fub_person_id": 1, "organization_id": "org-a", "consent_given": True},
+            {"fub_person_id": 1, "organization_id": "org-b", "opted_out": True, "opted_out_at": "2026-02-01"},
+            {"fub_person_id": 2, "organization_id": "org-a", "consent_given": True},
+            {"fub_person_id": 2, "organization_id": "org-b", "is_on_dnc": True},
+            {"fub_person_id": 3, "organization_id": "org-a", "messages_sent_today": 30, "last_message_date": "2026-03-09"},
+            {"fub_person_id": 3, "organization_id": "org-b", "messages_sent_today": 2, "last_message_date": today},
+            {"fub_person_id": 3, "organization_id": "org-c", "messages_sent_today": 30, "last_message_date": today},
+        ])
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        pinned_window = checker._get_time_window("America/New_York", NOON_NY)
+        with patch.object(checker, "_get_time_window", return_value=pinned_window):
+            results = await checker.check_sms_compliance_batch([1, 2, 3], None)
+
+        table.eq.assert_not_called()
+        assert results[1].status == ComplianceStatus.BLOCKED_OPTED_OUT
+        assert "2026-02-01" in results[1].reason
+        assert results[2].status == ComplianceStatus.BLOCKED_DNC
+        assert results[3].status == ComplianceStatus.BLOCKED_RATE_LIMIT
+
+
+@pytest.mark.unit
+class TestTimeWindow:
+    """Tests for the per-timezone window computation."""
+
+    def test_outside_hours_next_allowed_is_8am_local(self):
+        checker = ComplianceChecker()
+        late = pytz.utc.localize(datetime(2026, 3, 11, 3, 0))  # 11 PM New York
+
+        window = checker._get_time_window("America/New_York", late)
+
+        assert not window.is_allowed
+        assert window.next_allowed_time.hour == 8
+        assert window.next_allowed_time.utcoffset() == window.next_day_start.utcoffset()
+
+    def test_unknown_timezone_uses_default(self):
+        window = ComplianceChecker()._get_time_window("Mars/Olympus", NOON_NY)
+        assert window.timezone == ComplianceChecker.DEFAULT_TIMEZONE
+
+
+@pytest.mark.unit
+class TestBulkIncrement:
+    """Tests for increment_message_counts()."""
+
+    @pytest.mark.asyncio
+    async def test_single_rpc_for_batch(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = MagicMock(data=2)
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        updated = await checker.increment_message_counts(
+            [11, 12, 11], "org-1", phone_numbers={12: "(555) 555-0100"},
+        )
+
+        assert updated == 2
+        supabase.rpc.assert_called_once()
+        name, params = supabase.rpc.call_args[0]
+        assert name == "increment_sms_message_counts"
+        assert params["p_person_ids"] == [11, 12]
+        assert params["p_phone_numbers"] == [None, checker._normalize_phone("(555) 555-0100")]
+
+    @pytest.mark.asyncio
+    async def test_single_increment_uses_rpc(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = MagicMock(data=1)
+        checker = ComplianceChecker(supabase_client=supabase)
+
+        assert await checker.increment_message_count(11, "org-1") is True
+        supabase.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_per_lead_when_rpc_missing(self, mock_supabase):
+        mock_supabase.rpc = MagicMock(side_effect=Exception("function does not exist"))
+        checker = ComplianceChecker(supabase_client=mock_supabase)
+
+        with patch.object(checker, "_increment_message_count_single", return_value=True) as single:
+            updated = await checker.increment_message_counts([1, 2], "org-1")
+
+        assert updated == 2
+        assert single.call_count == 2
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Token-budgeted prompt context tests.
+
+Covers how AIResponseGenerator keeps prompts inside a token budget:
+- Sections are kept by priority; what doesn't fit is cut or dropped
+- Older turns are folded into a rolling summary once, not re-read per turn
+- The summary is persisted with the conversation when it changes
+- Prompt tokens are reported per request
+
+Run with: pytest tests/test_context_budget.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.ai_agent.context_budget import (
+    ContextSection,
+    RollingSummary,
+    estimate_tokens,
+    fit_sections,
+)
+from app.ai_agent.conversation_manager import ConversationManager
+from app.ai_agent.response_generator import AIResponseGenerator, LeadProfile
+
+
+def _history(count, start=0):
+    return [
+        {
+            "direction": "inbound" if i % 2 else "outbound",
+            "content": f"message {i} about a 3 bedroom place" if i % 2 else f"reply {i}",
+            "timestamp": f"2026-01-01T10:{i:02d}:00",
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def _profile(**overrides):
+    fields = dict(
+        first_name="Ann", score=55, source="Zillow", lead_type="buyer", timeline="short",
+        price_max=450000, important_notes=["Long agent note. " * 60],
+    )
+    fields.update(overrides)
+    return LeadProfile(**fields)
+
+
+@pytest.mark.unit
+class TestFitSections:
+    """Tests for fit_sections()."""
+
+    def test_keeps_by_priority_in_original_order(self):
+        sections = [
+            ContextSection("hints", "h" * 400, priority=5),
+            ContextSection("core", "c" * 400, required=True),
+            ContextSection("known", "k" * 400, priority=0),
+        ]
+
+        kept, report = fit_sections(sections, budget=220)
+
+        assert [s.name for s in kept] == ["core", "known"]
+        assert report.dropped == ["hints"]
+        assert report.total_tokens == 200
+
+    def test_truncates_at_line_boundary(self):
+        text = "\n".join(f"line {i} " + "x" * 40 for i in range(20))
+
+        kept, report = fit_sections([ContextSection("notes", text)], budget=100)
+
+        assert report.truncated == ["notes"]
+        assert kept[0].tokens <= 100
+        assert text.startswith(kept[0].text) and kept[0].text.endswith("x")
+
+    def test_no_budget_keeps_everything(self):
+        sections = [ContextSection("a", "aaaa"), ContextSection("b", ""), ContextSection("c", "cc")]
+
+        kept, report = fit_sections(sections, budget=None)
+
+        assert [s.name for s in kept] == ["a", "c"]
+        assert report.tokens_by_section == {"a": 1, "c": 1}
+
+
+@pytest.mark.unit
+class TestRollingSummary:
+    """Tests for incremental summaries of older turns."""
+
+    def test_each_message_folded_once(self):
+        summary = RollingSummary()
+        history = _history(10)
+
+        assert summary.fold(history[:6]) == 6
+        # The window moved on by two messages: only those are new
+        assert summary.fold(history[2:8]) == 2
+        assert summary.folded_count == 8
+        assert summary.fold(history[2:8]) == 0
+
+    def test_facts_and_round_trip(self):
+        summary = RollingSummary()
+        summary.fold([{"direction": "inbound", "content": "Budget is $450k, need 3 bedrooms"}])
+
+        restored = RollingSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+
+        assert restored == summary
+        assert "Lead mentioned budget: Budget is $450k" in restored.to_text()
+        assert RollingSummary().to_text().startswith("Early conversation")
+
+
+@pytest.mark.unit
+class TestBudgetedPrompt:
+    """Tests for AIResponseGenerator prompt budgeting."""
+
+    def test_history_beyond_window_goes_to_summary(self):
+        generator = AIResponseGenerator(api_key="test")
+        history = _history(40)
+        summary = RollingSummary()
+
+        messages = generator._build_messages("hi", history, rolling_summary=summary)
+
+        assert messages[0]["content"].startswith("[CONVERSATION SUMMARY")
+        assert len(messages) == generator.MAX_CONTEXT_MESSAGES + 2
+        assert summary.folded_count == 40 - generator.MAX_CONTEXT_MESSAGES
+
+    def test_history_token_budget_keeps_minimum(self):
+        generator = AIResponseGenerator(api_key="test")
+
+        messages = generator._build_messages("hi", _history(20), token_budget=10)
+
+        assert len(messages) == generator.MIN_VERBATIM_MESSAGES + 2
+
+    def test_low_priority_context_dropped_first(self):
+        generator = AIResponseGenerator(api_key="test")
+        args = ({}, "qualifying", {"timeline": "30_days"}, _profile(), _history(4))
+
+        full, _ = generator._build_budgeted_system_prompt(*args, token_budget=None)
+        trimmed, report = generator._build_budgeted_system_prompt(
+            *args, token_budget=estimate_tokens(full) - 200
+        )
+
+        assert "notes" in report.dropped + report.truncated
+        assert "known_info" not in report.dropped
+        assert "QUALIFICATION DATA COLLECTED" in trimmed
+        assert estimate_tokens(trimmed) <= estimate_tokens(full) - 200
+        assert full == generator._build_system_prompt(*args)
+
+    def test_generate_response_reports_prompt_tokens(self):
+        generator = AIResponseGenerator(api_key="test")
+        generator._generate_with_retry = AsyncMock(return_value=(
+            json.dumps({"response": "Happy to help you find a place in Austin!", "next_state": "qualifying"}),
+            "test-model", 900,
+        ))
+        summary = RollingSummary()
+
+        result = asyncio.run(generator.generate_response(
+            "What's available?", _history(40), {}, "qualifying",
+            lead_profile=_profile(), rolling_summary=summary,
+        ))
+
+        system_prompt = generator._generate_with_retry.call_args.kwargs["system_prompt"]
+        assert estimate_tokens(system_prompt) < result.prompt_tokens <= generator.PROMPT_TOKEN_BUDGET
+        assert generator.get_usage_stats()["avg_prompt_tokens"] == result.prompt_tokens
+        assert summary.folded_count > 0
+
+
+@pytest.mark.unit
+class TestSummaryPersistence:
+    """Tests for saving the rolling summary with the conversation."""
+
+    def test_summary_saved_only_when_changed(self):
+        supabase = MagicMock()
+        table = supabase.table.return_value
+        for method in ("select", "eq", "update"):
+            getattr(table, method).return_value = table
+        table.execute.return_value = MagicMock(data=[{"id": "conv-1"}])
+        manager = ConversationManager(supabase_client=supabase)
+        context = manager._context_from_db({
+            "id": "conv-1", "fub_person_id": 1, "user_id": "u1", "organization_id": "o1",
+            "state": "qualifying", "lead_score": 0, "conversation_summary": RollingSummary(folded_count=4).to_dict(),
+        })
+
+        summary = RollingSummary.from_dict(context.conversation_summary)
+        context.conversation_summary = summary.to_dict()
+        asyncio.run(manager.save_context(context))
+        assert table.update.call_count == 0
+
+        summary.fold(_history(2, start=7))
+        context.conversation_summary = summary.to_dict()
+        asyncio.run(manager.save_context(context))
+        assert table.update.call_args.args[0] == {"conversation_summary": summary.to_dict()}
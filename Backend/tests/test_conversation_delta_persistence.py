@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Conversation delta persistence tests.
+
+Covers ConversationManager.save_context writing only what changed:
+- A loaded context with no changes saves without a request
+- Only changed columns are sent; history only when messages were added
+- History is written as a bounded tail, however long the conversation
+- The total message count is kept beyond the history tail
+
+Run with: pytest tests/test_conversation_delta_persistence.py -v
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.ai_agent.conversation_manager import (
+    ConversationContext,
+    ConversationManager,
+    ConversationState,
+)
+
+
+def _row(history_size=0):
+    return {
+        "id": "conv-1",
+        "fub_person_id": 3277,
+        "user_id": "u1",
+        "organization_id": "o1",
+        "state": "qualifying",
+        "lead_score": 40,
+        "qualification_data": {"timeline": "30_days"},
+        "conversation_history": [
+            {"direction": "inbound", "content": f"msg {i}", "channel": "sms", "timestamp": None}
+            for i in range(history_size)
+        ],
+        "last_ai_message_at": "2026-01-01T10:00:00",
+        "last_human_message_at": None,
+        "handoff_reason": None,
+        "assigned_agent_id": None,
+    }
+
+
+def _manager():
+    supabase = MagicMock()
+    table = supabase.table.return_value
+    for method in ("select", "eq", "update", "insert"):
+        getattr(table, method).return_value = table
+    table.execute.return_value = MagicMock(data=[{"id": "conv-1"}])
+    return ConversationManager(supabase_client=supabase), table
+
+
+def _updates(table):
+    return [call.args[0] for call in table.update.call_args_list]
+
+
+@pytest.mark.unit
+class TestDeltaPersistence:
+    """Tests for dirty-column saves in ConversationManager."""
+
+    def test_unchanged_context_skips_write(self):
+        manager, table = _manager()
+        context = manager._context_from_db(_row(history_size=5))
+
+        assert asyncio.run(manager.save_context(context))
+        assert table.update.call_count == 0
+
+    def test_only_changed_columns_sent(self):
+        manager, table = _manager()
+        context = manager._context_from_db(_row(history_size=5))
+
+        context.lead_score += 10
+        context.qualification_data.budget = "$400k"
+        asyncio.run(manager.save_context(context))
+
+        assert _updates(table) == [{
+            "lead_score": 50,
+            "qualification_data": {**context.qualification_data.to_dict()},
+        }]
+
+        # saved values become the new baseline
+        context.state = ConversationState.SCHEDULING
+        asyncio.run(manager.save_context(context))
+        assert _updates(table)[-1] == {"state": "scheduling"}
+
+    def test_history_written_as_bounded_tail(self):
+        manager, table = _manager()
+        context = manager._context_from_db(_row(history_size=200))
+        assert len(context.conversation_history) == ConversationContext.HISTORY_TAIL_SIZE
+
+        context.add_message("outbound", "reply", "sms")
+        asyncio.run(manager.save_context(context))
+
+        update = _updates(table)[0]
+        assert set(update) == {"conversation_history", "messages_exchanged", "last_ai_message_at"}
+        assert len(update["conversation_history"]) == ConversationContext.HISTORY_TAIL_SIZE
+        assert update["conversation_history"][-1]["content"] == "reply"
+
+    def test_failed_save_keeps_changes_pending(self):
+        manager, table = _manager()
+        context = manager._context_from_db(_row())
+        table.execute.return_value = MagicMock(data=[])
+
+        context.handoff_reason = "hot_qualified_lead"
+        assert not asyncio.run(manager.save_context(context))
+
+        table.execute.return_value = MagicMock(data=[{"id": "conv-1"}])
+        assert asyncio.run(manager.save_context(context))
+        assert _updates(table) == [{"handoff_reason": "hot_qualified_lead"}] * 2
+
+    def test_unsaved_context_writes_everything(self):
+        manager, table = _manager()
+        context = ConversationContext(conversation_id="conv-2", fub_person_id=1, user_id="u1", organization_id="o1")
+
+        asyncio.run(manager.save_context(context))
+
+        assert set(_updates(table)[0]) == set(context.persisted_columns())
+
+    def test_message_count_survives_history_tail(self):
+        manager, table = _manager()
+        context = manager._context_from_db({**_row(history_size=20), "messages_exchanged": 120})
+
+        context.add_message("inbound", "still here", "sms")
+        asyncio.run(manager.save_context(context))
+
+        assert context.messages_exchanged == 121
+        assert _updates(table)[0]["messages_exchanged"] == 121
+        # Rows from before the counter start from their stored history
+        assert manager._context_from_db(_row(history_size=5)).messages_exchanged == 5
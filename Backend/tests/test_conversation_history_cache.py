@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Conversation history cache tests.
+
+Covers the Redis conversation window used by get_conversation_history:
+- History filters (privacy placeholders, enrichment dumps)
+- Cold miss → single filtered DB backfill
+- Warm reads served from Redis without touching the DB
+- log_ai_message-style appends only extend a warm window
+- A backfill racing an append is not cached over it
+
+Run with: pytest tests/test_conversation_history_cache.py -v
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.ai_agent.conversation_history_cache import (
+    ConversationHistoryCache,
+    is_conversation_message,
+    shape_history_entry,
+)
+
+
+def _make_rows(count, person_id=3277):
+    """ai_message_log rows, newest first (as returned by order desc)."""
+    rows = []
+    for i in range(count):
+        rows.append({
+            "fub_person_id": person_id,
+            "direction": "inbound" if i % 2 == 0 else "outbound",
+            "channel": "sms",
+            "message_content": f"Message {i}",
+            "ai_model": "claude",
+            "created_at": f"2026-01-01T00:{i:02d}:00",
+        })
+    return list(reversed(rows))
+
+
+def _make_cache(fake_redis, rows):
+    supabase = MagicMock()
+    table = supabase.table.return_value
+    for method in ("select", "eq", "order", "limit"):
+        getattr(table, method).return_value = table
+    table.execute.return_value = MagicMock(data=rows)
+
+    cache = ConversationHistoryCache(supabase_client=supabase, window_size=10)
+    cache.redis = fake_redis
+    return cache, table
+
+
+@pytest.mark.unit
+class TestHistoryFilters:
+    """Tests for is_conversation_message() and shape_history_entry()."""
+
+    def test_privacy_placeholder_skipped(self):
+        assert not is_conversation_message("Body is hidden for privacy reasons")
+
+    def test_enrichment_dump_skipped(self):
+        assert not is_conversation_message("Contact Information: ...", "historical_sync")
+
+    def test_long_historical_sync_skipped(self):
+        assert not is_conversation_message("x" * 501, "historical_sync")
+
+    def test_long_live_message_kept(self):
+        assert is_conversation_message("x" * 501, "claude")
+
+    def test_shape_inbound(self):
+        entry = shape_history_entry({
+            "direction": "inbound", "channel": "sms",
+            "message_content": "Hi", "created_at": "2026-01-01",
+        })
+        assert entry["role"] == "lead"
+        assert entry["content"] == "Hi"
+        assert entry["timestamp"] == "2026-01-01"
+
+
+@pytest.mark.unit
+class TestConversationHistoryCache:
+    """Tests for the Redis window read/append paths."""
+
+    def test_cold_miss_backfills_once(self, fake_redis):
+        cache, table = _make_cache(fake_redis, _make_rows(5))
+
+        first = cache.get_recent(3277, limit=3)
+        second = cache.get_recent(3277, limit=3)
+
+        assert [h["content"] for h in first] == ["Message 2", "Message 3", "Message 4"]
+        assert second == first
+        assert table.execute.call_count == 1
+
+    def test_backfill_filters_rows(self, fake_redis):
+        rows = _make_rows(3)
+        rows[0]["message_content"] = "Body is hidden for privacy reasons"
+        cache, _ = _make_cache(fake_redis, rows)
+
+        history = cache.get_recent(3277, limit=10)
+        assert [h["content"] for h in history] == ["Message 0", "Message 1"]
+
+    def test_append_extends_warm_window(self, fake_redis):
+        cache, table = _make_cache(fake_redis, _make_rows(2))
+        cache.get_recent(3277, limit=5)
+
+        assert cache.append({
+            "fub_person_id": 3277, "direction": "outbound",
+            "channel": "sms", "message_content": "New reply",
+        })
+        history = cache.get_recent(3277, limit=5)
+
+        assert history[-1]["content"] == "New reply"
+        assert history[-1]["timestamp"]
+        assert table.execute.call_count == 1
+
+    def test_append_to_cold_window_is_noop(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, [])
+        assert not cache.append({
+            "fub_person_id": 3277, "direction": "inbound",
+            "channel": "sms", "message_content": "Hello",
+        })
+        assert not fake_redis.exists("ai:history:3277")
+
+    def test_window_is_capped(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, _make_rows(10))
+        cache.get_recent(3277, limit=10)
+        for i in range(5):
+            cache.append({
+                "fub_person_id": 3277, "direction": "outbound",
+                "channel": "sms", "message_content": f"Extra {i}",
+            })
+
+        assert fake_redis.llen("ai:history:3277") == 10
+        assert cache.get_recent(3277, limit=1)[0]["content"] == "Extra 4"
+
+    def test_append_during_backfill_not_overwritten(self, fake_redis):
+        rows = _make_rows(3)
+        cache, table = _make_cache(fake_redis, rows)
+        newer = {
+            "fub_person_id": 3277, "direction": "inbound",
+            "channel": "sms", "message_content": "Logged mid-read",
+            "created_at": "2026-01-01T01:00:00",
+        }
+
+        def read_then_append():
+            # The DB read returns before the new row; its append lands right after
+            result = MagicMock(data=list(rows))
+            rows.insert(0, newer)
+            cache.append(newer)
+            return result
+        table.execute.side_effect = read_then_append
+
+        stale = cache.get_recent(3277, limit=10)
+        assert [h["content"] for h in stale] == ["Message 0", "Message 1", "Message 2"]
+        assert not fake_redis.exists("ai:history:3277")  # stale window not cached
+
+        table.execute.side_effect = None
+        table.execute.return_value = MagicMock(data=list(rows))
+        fresh = cache.get_recent(3277, limit=10)
+        assert fresh[-1]["content"] == "Logged mid-read"
+        assert fake_redis.llen("ai:history:3277") == 4
+
+    def test_backfill_keeps_window_stored_meanwhile(self, fake_redis):
+        cache, table = _make_cache(fake_redis, _make_rows(3))
+
+        def read_while_other_reader_caches():
+            fake_redis.rpush("ai:history:3277", '{"content": "other reader"}')
+            return MagicMock(data=_make_rows(3))
+        table.execute.side_effect = read_while_other_reader_caches
+
+        cache.get_recent(3277, limit=10)
+
+        assert fake_redis.lrange("ai:history:3277", 0, -1) == ['{"content": "other reader"}']
+
+    def test_no_redis_falls_back_to_db(self):
+        cache, table = _make_cache(None, _make_rows(4))
+        cache.redis = None
+
+        history = cache.get_recent(3277, limit=2)
+        assert [h["content"] for h in history] == ["Message 2", "Message 3"]
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Delayed reply queue tests.
+
+Covers the durable replacement for the in-handler asyncio.sleep():
+- Replies are persisted and only sent once due
+- A newer inbound message supersedes a waiting reply
+- Each reply is sent once even with several dispatchers
+- Pending replies are re-indexed after a restart
+- A reply is only dropped from the due index once its DB claim is settled
+- Replies interrupted mid-send are marked failed, not resent
+- In-process timers when Redis is unavailable
+
+Run with: pytest tests/test_delayed_reply_queue.py -v
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.ai_agent.delayed_reply_queue import DelayedReplyQueue, ReplySkipped, SUPERSEDED_REASON
+
+
+class FakeScheduledMessages:
+    """In-memory scheduled_messages supporting insert / update / select with eq / lt filters."""
+
+    def __init__(self):
+        self.rows = {}
+        self._next_id = 1
+
+    def table(self, name):
+        return _Query(self)
+
+
+class _Query:
+    def __init__(self, store):
+        self._store = store
+        self._filters = {}
+        self._before = {}
+        self._op = "select"
+        self._payload = None
+
+    def select(self, *args):
+        return self
+
+    def insert(self, data):
+        self._op, self._payload = "insert", data
+        return self
+
+    def update(self, data):
+        self._op, self._payload = "update", data
+        return self
+
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+
+    def lt(self, column, value):
+        self._before[column] = value
+        return self
+
+    def execute(self):
+        store = self._store
+        if self._op == "insert":
+            row = dict(self._payload, id=store._next_id)
+            store.rows[row["id"]] = row
+            store._next_id += 1
+            return MagicMock(data=[dict(row)])
+
+        matched = [
+            row for row in store.rows.values()
+            if all(str(row.get(k)) == str(v) for k, v in self._filters.items())
+            and all(row.get(k) is not None and row[k] < v for k, v in self._before.items())
+        ]
+        if self._op == "update":
+            for row in matched:
+                row.update(self._payload)
+        return MagicMock(data=[dict(row) for row in matched])
+
+
+def _make_queue(fake_redis, store=None, deliver=None):
+    store = store or FakeScheduledMessages()
+    sent = []
+
+    async def default_deliver(row):
+        sent.append(row)
+        return True
+
+    queue = DelayedReplyQueue(supabase_client=store, deliver=deliver or default_deliver)
+    queue.redis = fake_redis
+    return queue, store, sent
+
+
+def _enqueue(queue, person_id=1, seconds=0.0, text="Sounds good!"):
+    return queue.enqueue(
+        fub_person_id=person_id,
+        message_content=text,
+        send_at=datetime.utcnow() + timedelta(seconds=seconds),
+        organization_id="org-1",
+        user_id="user-1",
+        payload={"lead_score_delta": 5},
+    )
+
+
+@pytest.mark.unit
+class TestDelayedReplyDispatch:
+    """Tests for enqueue() and dispatch_due()."""
+
+    @pytest.mark.asyncio
+    async def test_reply_sent_only_when_due(self, fake_redis):
+        queue, store, sent = _make_queue(fake_redis)
+        later = _enqueue(queue, person_id=1, seconds=60)
+        now = _enqueue(queue, person_id=2, seconds=-1)
+
+        assert await queue.dispatch_due() == 1
+
+        assert [row["fub_person_id"] for row in sent] == [2]
+        assert sent[0]["payload"] == {"lead_score_delta": 5}
+        assert store.rows[int(now)]["status"] == "sent"
+        assert store.rows[int(later)]["status"] == "pending"
+        assert queue.in_flight() == 1
+
+    @pytest.mark.asyncio
+    async def test_newer_inbound_supersedes_waiting_reply(self, fake_redis):
+        queue, store, sent = _make_queue(fake_redis)
+        message_id = _enqueue(queue, person_id=1, seconds=-1)
+        _enqueue(queue, person_id=2, seconds=-1)
+
+        assert queue.supersede(1) == 1
+        await queue.dispatch_due()
+
+        assert [row["fub_person_id"] for row in sent] == [2]
+        assert store.rows[int(message_id)]["status"] == "skipped"
+        assert store.rows[int(message_id)]["skipped_reason"] == SUPERSEDED_REASON
+        assert queue.get_stats()["superseded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_each_reply_sent_once_across_dispatchers(self, fake_redis):
+        store = FakeScheduledMessages()
+        queue_a, _, sent_a = _make_queue(fake_redis, store)
+        queue_b, _, sent_b = _make_queue(fake_redis, store)
+        for person_id in range(5):
+            _enqueue(queue_a, person_id=person_id, seconds=-1)
+
+        await asyncio.gather(queue_a.dispatch_due(), queue_b.dispatch_due())
+
+        assert len(sent_a) + len(sent_b) == 5
+        assert all(row["status"] == "sent" for row in store.rows.values())
+
+    @pytest.mark.asyncio
+    async def test_skipped_and_failed_deliveries(self, fake_redis):
+        async def deliver(row):
+            if row["fub_person_id"] == 1:
+                raise ReplySkipped("conversation_handed_off")
+            return False
+
+        queue, store, _ = _make_queue(fake_redis, deliver=deliver)
+        skipped = _enqueue(queue, person_id=1, seconds=-1)
+        failed = _enqueue(queue, person_id=2, seconds=-1)
+
+        await queue.dispatch_due()
+
+        assert store.rows[int(skipped)]["status"] == "skipped"
+        assert store.rows[int(skipped)]["skipped_reason"] == "conversation_handed_off"
+        assert store.rows[int(failed)]["status"] == "failed"
+        assert queue.get_stats()["skipped"] == 1
+        assert queue.get_stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reply_stays_indexed_when_claim_fails(self, fake_redis):
+        queue, store, sent = _make_queue(fake_redis)
+        message_id = _enqueue(queue, person_id=1, seconds=-1)
+        queue._claim = MagicMock(side_effect=RuntimeError("db down"))
+
+        assert await queue.dispatch_due() == 0
+        assert fake_redis.zcard(DelayedReplyQueue.DUE_KEY) == 1
+
+        del queue._claim  # DB back
+        assert await queue.dispatch_due() == 1
+        assert [row["fub_person_id"] for row in sent] == [1]
+        assert fake_redis.zcard(DelayedReplyQueue.DUE_KEY) == 0
+        assert store.rows[int(message_id)]["status"] == "sent"
+
+
+@pytest.mark.unit
+class TestDelayedReplyRecovery:
+    """Tests for restart recovery and the no-Redis fallback."""
+
+    @pytest.mark.asyncio
+    async def test_pending_replies_reindexed_after_restart(self, fake_redis):
+        queue, store, _ = _make_queue(fake_redis)
+        _enqueue(queue, person_id=1, seconds=-1)
+        fake_redis.delete(DelayedReplyQueue.DUE_KEY)  # index lost with the old process
+
+        restarted, _, sent = _make_queue(fake_redis, store)
+        assert restarted.recover_pending() == 1
+        await restarted.dispatch_due()
+
+        assert [row["fub_person_id"] for row in sent] == [1]
+
+    def test_interrupted_send_marked_failed_not_resent(self, fake_redis):
+        queue, store, _ = _make_queue(fake_redis)
+        stuck = _enqueue(queue, person_id=1, seconds=-1)
+        fresh = _enqueue(queue, person_id=2, seconds=-1)
+        long_ago = (datetime.utcnow() - timedelta(seconds=DelayedReplyQueue.SENDING_LEASE_SECONDS + 60)).isoformat()
+        store.rows[int(stuck)].update(status="sending", claimed_at=long_ago)
+        store.rows[int(fresh)].update(status="sending", claimed_at=datetime.utcnow().isoformat())
+
+        assert queue.recover_interrupted() == 1
+
+        assert store.rows[int(stuck)]["status"] == "failed"
+        assert store.rows[int(fresh)]["status"] == "sending"
+        assert queue.get_stats()["interrupted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_local_timer_without_redis(self):
+        queue, store, sent = _make_queue(None)
+        queue.start(asyncio.get_running_loop())
+
+        message_id = _enqueue(queue, person_id=1, seconds=0.05)
+        assert queue.in_flight() == 1
+        assert not sent
+
+        await asyncio.sleep(0.15)
+
+        assert [row["fub_person_id"] for row in sent] == [1]
+        assert store.rows[int(message_id)]["status"] == "sent"
+        queue._dispatcher.cancel()
+
+    @pytest.mark.asyncio
+    async def test_supersede_cancels_local_timer(self):
+        queue, _, sent = _make_queue(None)
+        queue.start(asyncio.get_running_loop())
+        _enqueue(queue, person_id=1, seconds=0.05)
+
+        queue.supersede(1)
+        await asyncio.sleep(0.1)
+
+        assert not sent
+        assert queue.in_flight() == 0
+        queue._dispatcher.cancel()
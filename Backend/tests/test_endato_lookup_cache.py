@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Endato lookup cache tests.
+
+Covers the result cache in front of Endato enrichment searches:
+- Repeat lookups with differently formatted criteria hit the cache
+- Redis and lookup_history tiers serve other processes
+- Concurrent identical lookups share one vendor call
+- Errors are never cached; refresh bypasses cached results
+- Hit rate / vendor calls avoided
+
+Run with: pytest tests/test_endato_lookup_cache.py -v
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.enrichment.endato_client import EndatoClient
+from app.enrichment.lookup_cache import EndatoLookupCache, lookup_cache_key
+
+PERSON = {'person': {'name': {'firstName': 'Jane', 'lastName': 'Doe'}, 'phones': ['5551234567']}}
+
+
+def _history(rows=None):
+    """lookup_history query mock returning rows."""
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value
+    for method in ('eq', 'gte', 'order', 'limit'):
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(data=rows or [])
+    return supabase, query
+
+
+def _client(fake_redis, history_rows=None):
+    supabase, query = _history(history_rows)
+    client = EndatoClient(cache=EndatoLookupCache(fake_redis, supabase))
+    client.key_name, client.key_password = 'key', 'secret'
+    return client, query
+
+
+def _response(payload):
+    return MagicMock(status_code=200, json=MagicMock(return_value=payload))
+
+
+@pytest.mark.unit
+class TestEndatoLookupCache:
+    """Tests for cached Endato searches."""
+
+    def test_repeat_lookup_served_from_cache(self, fake_redis):
+        client, _ = _client(fake_redis)
+
+        with patch('app.enrichment.endato_client.requests.Session.post', return_value=_response(PERSON)) as post:
+            first = client.reverse_phone('(555) 123-4567')
+            first['person']['phones'].append('mutated by caller')
+            assert client.pop_last_lookup_key() is not None
+            second = client.reverse_phone('+1 555.123.4567')
+            assert client.pop_last_lookup_key() is None
+
+        assert post.call_count == 1
+        assert second == PERSON
+        stats = client.cache.stats()
+        assert stats['vendor_calls'] == 1
+        assert stats['hits']['memory'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_redis_tier_shared_across_processes(self, fake_redis):
+        worker, _ = _client(fake_redis)
+        web, _ = _client(fake_redis)
+
+        with patch('app.enrichment.endato_client.requests.Session.post', return_value=_response(PERSON)) as post:
+            worker.person_search(first_name='Jane', last_name='Doe', state='co')
+            result = web.person_search(first_name='JANE ', last_name='doe', state='CO')
+
+        assert post.call_count == 1
+        assert result == PERSON
+        assert web.cache.stats()['hits']['redis'] == 1
+        ttl = fake_redis.expirations[f"endato:lookup:{lookup_cache_key('advanced_person_search', {'last_name': 'doe', 'first_name': 'jane', 'state': 'co'})}"]
+        assert ttl == 30 * 24 * 3600
+
+    def test_lookup_history_tier(self, fake_redis):
+        created = (datetime.utcnow() - timedelta(days=2)).isoformat()
+        client, query = _client(fake_redis, [{'result': PERSON, 'created_at': created}])
+
+        with patch('app.enrichment.endato_client.requests.Session.post') as post:
+            result = client.criminal_search('Jane', 'Doe', 'CO')
+
+        post.assert_not_called()
+        assert result == PERSON
+        key = lookup_cache_key('criminal_search', {'first_name': 'Jane', 'last_name': 'Doe', 'state': 'CO'})
+        query.eq.assert_any_call('cache_key', key)
+        # promoted to Redis for what's left of the 7-day TTL
+        assert 4 * 24 * 3600 < fake_redis.expirations[f"endato:lookup:{key}"] <= 5 * 24 * 3600
+        # No key for a cached result, so no new history row restarts its TTL
+        assert client.pop_last_lookup_key() is None
+
+    def test_concurrent_lookups_share_one_call(self, fake_redis):
+        client, _ = _client(fake_redis)
+
+        def slow_post(*args, **kwargs):
+            time.sleep(0.2)
+            return _response(PERSON)
+
+        results = []
+        with patch('app.enrichment.endato_client.requests.Session.post', side_effect=slow_post) as post:
+            threads = [
+                threading.Thread(target=lambda: results.append(client.reverse_email('Jane@Example.com')))
+                for _ in range(5)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert post.call_count == 1
+        assert results == [PERSON] * 5
+        assert client.cache.stats()['vendor_calls_avoided'] == 4
+
+    def test_errors_not_cached_and_refresh_bypasses(self, fake_redis):
+        client, _ = _client(fake_redis)
+        error = _response({'isError': True, 'error': {'message': 'Rate limited'}})
+
+        with patch('app.enrichment.endato_client.requests.Session.post', side_effect=[error, _response(PERSON), _response(PERSON)]) as post:
+            assert 'error' in client.reverse_phone('5551234567')
+            assert client.pop_last_lookup_key() is None
+            client.reverse_phone('5551234567')
+            client.reverse_phone('5551234567')
+            client.reverse_phone('5551234567', refresh=True)
+
+        assert post.call_count == 3
+
+    def test_validation_errors_skip_vendor(self, fake_redis):
+        client, _ = _client(fake_redis)
+
+        with patch('app.enrichment.endato_client.requests.Session.post') as post:
+            result = client.contact_enrichment(first_name='Jane', last_name='Doe')
+
+        post.assert_not_called()
+        assert 'error' in result
+        assert client.cache.stats()['vendor_calls'] == 0
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Fast path responder tests.
+
+Covers template replies that skip the LLM in AIAgentService.process_message:
+- Routine messages (who is this, thanks, channel preference) get
+  a template reply when intent confidence clears the threshold
+- Anything ambiguous goes to the LLM: low confidence, long or mixed
+  messages, a "yes" answering our question, a slot pick (it must be booked)
+- Hit rate and latency saved are reported
+
+Run with: pytest tests/test_fast_path_responder.py -v
+"""
+
+import pytest
+
+from app.ai_agent.fast_path_responder import (
+    ROUTE_IDENTITY,
+    FastPathResponder,
+    FastPathStats,
+)
+from app.ai_agent.intent_detector import DetectedIntent, Intent, IntentDetector
+from app.ai_agent.template_engine import ResponseTemplateEngine
+
+VARIABLES = {"first_name": "Ann", "agent_name": "Sarah", "brokerage_name": "Oak Realty"}
+
+
+def _responder(threshold=0.9):
+    return FastPathResponder(
+        template_engine=ResponseTemplateEngine(),
+        confidence_threshold=threshold,
+        stats=FastPathStats(),
+    )
+
+
+def _respond(responder, message, **kwargs):
+    detected = IntentDetector().detect(message)
+    return responder.respond(message, detected, VARIABLES, **kwargs)
+
+
+@pytest.mark.unit
+class TestFastPathRoutes:
+    """Tests for messages answered from templates."""
+
+    def test_identity_question(self):
+        responder = _responder()
+
+        reply = _respond(responder, "who is this?")
+
+        assert reply.route == ROUTE_IDENTITY
+        assert reply.template_id == "identity_intro"
+        assert "Sarah" in reply.text and "Oak Realty" in reply.text
+
+    def test_thanks_acknowledged_unless_answering_a_question(self):
+        responder = _responder()
+
+        assert _respond(responder, "Thanks!", last_ai_message="Sent you the listings.").template_id == "ack_short"
+        assert _respond(responder, "yes", last_ai_message="Want me to send a few listings?") is None
+        assert responder.stats.snapshot()["misses_by_reason"] == {"answers_question": 1}
+
+    def test_channel_preference_replies_with_ack(self):
+        responder = _responder()
+        detected = DetectedIntent(primary_intent=Intent.CHANNEL_PREFER_EMAIL, confidence=0.9)
+
+        reply = responder.respond("email me instead", detected, VARIABLES, acknowledgment="Sure thing!")
+
+        assert reply.text == "Sure thing!"
+        assert responder.respond("email me instead", detected, VARIABLES) is None
+
+
+@pytest.mark.unit
+class TestFastPathGating:
+    """Tests for messages that must still go to the LLM."""
+
+    def test_confidence_threshold_is_configurable(self):
+        assert _respond(_responder(threshold=0.95), "who is this?") is None
+        assert _respond(_responder(threshold=0.8), "who is this?") is not None
+
+    def test_slot_pick_goes_to_llm(self):
+        responder = _responder()
+        detected = DetectedIntent(primary_intent=Intent.TIME_SELECTION, confidence=0.95)
+
+        assert responder.respond("2", detected, VARIABLES) is None
+        assert responder.stats.snapshot()["misses_by_reason"] == {"no_route": 1}
+
+    def test_long_or_mixed_messages_fall_back(self):
+        responder = _responder()
+        mixed = DetectedIntent(
+            primary_intent=Intent.THANKS, confidence=0.95,
+            secondary_intents=[(Intent.OBJECTION_TIMING, 0.8)],
+        )
+
+        assert _respond(responder, "who is this? I never signed up for anything like this") is None
+        assert responder.respond("thanks, bad time though", mixed, VARIABLES) is None
+        assert responder.stats.snapshot()["misses_by_reason"] == {"long_message": 1, "mixed_intent": 1}
+
+    def test_stats_report_hit_rate_and_latency_saved(self):
+        responder = _responder()
+        responder.stats.record_llm_latency(2000)
+
+        _respond(responder, "who is this?")
+        _respond(responder, "I'm looking for a 3 bed in Austin under 400k")
+        stats = responder.stats.snapshot()
+
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["hits_by_route"] == {ROUTE_IDENTITY: 1}
+        assert 1900 < stats["latency_saved_ms"] <= 2000
+
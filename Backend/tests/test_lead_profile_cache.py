@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Lead profile cache tests.
+
+Covers the sectioned ai_lead_profile_sections layout:
+- Full refresh writes every section in one upsert, capped per section
+- Webhook appends go through the server-side append function and only
+  touch their own section
+- Readers can fetch just the sections they need
+- Single-flight refresh, stale-while-revalidate and proactive re-warming
+
+Run with: pytest tests/test_lead_profile_cache.py -v
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.ai_agent import lead_profile_cache as lpc
+from app.ai_agent.lead_profile_cache import (
+    CachedLeadProfile,
+    LeadProfileCacheService,
+    PROFILE_SECTIONS,
+)
+
+
+class FakeSectionStore:
+    """In-memory ai_lead_profile_sections with the append function."""
+
+    def __init__(self):
+        self.rows = {}  # (person, org, section) -> row
+        self.upserts = 0
+        self.rpc_calls = []
+        self.reads = []
+
+    def table(self, name):
+        return _Query(self)
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        key = (params["p_fub_person_id"], params["p_organization_id"], params["p_section"])
+        row = self.rows.get(key)
+        if row is not None:
+            row["data"] = ([params["p_item"]] + row["data"])[:params["p_max_items"]]
+            row["update_count"] += 1
+        result = MagicMock()
+        result.execute.return_value = MagicMock(data=row is not None)
+        return result
+
+
+class _Query:
+    def __init__(self, store):
+        self._store = store
+        self._filters = {}
+        self._in = None
+        self._op = "select"
+        self._payload = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+
+    def in_(self, column, values):
+        self._in = (column, list(values))
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._op, self._payload = "upsert", rows
+        return self
+
+    def update(self, data):
+        self._op, self._payload = "update", data
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def _matches(self, row):
+        if any(row.get(k) != v for k, v in self._filters.items()):
+            return False
+        return self._in is None or row.get(self._in[0]) in self._in[1]
+
+    def execute(self):
+        store = self._store
+        if self._op == "upsert":
+            store.upserts += 1
+            for row in self._payload:
+                store.rows[(row["fub_person_id"], row["organization_id"], row["section"])] = dict(row)
+            return MagicMock(data=self._payload)
+
+        matched = [row for row in store.rows.values() if self._matches(row)]
+        if self._op == "update":
+            for row in matched:
+                row.update(self._payload)
+        elif self._op == "delete":
+            for key in [k for k, row in store.rows.items() if self._matches(row)]:
+                del store.rows[key]
+        else:
+            store.reads.append(self._in[1] if self._in else None)
+        return MagicMock(data=[dict(row) for row in matched])
+
+
+def _context(texts=3):
+    return {
+        "person": {"id": 3277, "firstName": "John"},
+        "text_messages": [{"id": i, "message": f"text {i}"} for i in range(texts)],
+        "emails": [], "calls": [], "notes": [{"id": 1, "body": "note"}],
+        "events": [], "tasks": [],
+    }
+
+
+def _make_cache(context=None, redis=None):
+    store = FakeSectionStore()
+    fub = MagicMock()
+    fub.get_complete_lead_context.return_value = context or _context()
+    fub.get_person.return_value = {"id": 3277, "firstName": "Johnny"}
+    cache = LeadProfileCacheService(supabase_client=store, fub_client=fub)
+    cache.redis = redis
+    return cache, store, fub
+
+
+def _profile(person_id=3277, org="org-1", age_hours=0.0, name="Cached"):
+    cached_at = (datetime.utcnow() - timedelta(hours=age_hours)).isoformat()
+    return CachedLeadProfile(
+        fub_person_id=person_id, organization_id=org,
+        person_data={"id": person_id, "firstName": name},
+        text_messages=[], emails=[], calls=[], notes=[], events=[], tasks=[],
+        cached_at=cached_at, last_updated_at=cached_at,
+    )
+
+
+async def _drain(cache):
+    while cache._inflight:
+        await asyncio.gather(*cache._inflight.values(), return_exceptions=True)
+
+
+@pytest.mark.unit
+class TestSectionedStorage:
+    """Tests for the full refresh and read paths."""
+
+    @pytest.mark.asyncio
+    async def test_refresh_writes_all_sections_once(self):
+        cache, store, fub = _make_cache()
+
+        profile = await cache.get_profile(3277, "org-1")
+
+        assert profile.person_data["firstName"] == "John"
+        assert store.upserts == 1
+        assert {key[2] for key in store.rows} == set(PROFILE_SECTIONS)
+
+    @pytest.mark.asyncio
+    async def test_second_read_is_cache_hit(self):
+        cache, store, fub = _make_cache()
+        await cache.get_profile(3277, "org-1")
+
+        profile = await cache.get_profile(3277, "org-1")
+
+        assert fub.get_complete_lead_context.call_count == 1
+        assert [t["id"] for t in profile.text_messages] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_refresh_caps_sections(self):
+        cache, store, _ = _make_cache(_context(texts=80))
+        await cache.get_profile(3277, "org-1")
+        assert len(store.rows[(3277, "org-1", "texts")]["data"]) == PROFILE_SECTIONS["texts"][1]
+
+    @pytest.mark.asyncio
+    async def test_get_sections_reads_only_requested(self):
+        cache, store, _ = _make_cache()
+        await cache.get_profile(3277, "org-1")
+
+        sections = await cache.get_sections(3277, "org-1", ["person", "notes"])
+
+        assert set(sections) == {"person", "notes"}
+        assert store.reads[-1] == ["person", "notes"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_section_rejected(self):
+        cache, _, _ = _make_cache()
+        with pytest.raises(ValueError):
+            await cache.get_sections(3277, "org-1", ["texts", "bogus"])
+
+
+@pytest.mark.unit
+class TestIncrementalUpdates:
+    """Tests for webhook-driven appends and person updates."""
+
+    @pytest.mark.asyncio
+    async def test_append_is_server_side_and_capped(self):
+        cache, store, _ = _make_cache(_context(texts=50))
+        await cache.get_profile(3277, "org-1")
+        upserts = store.upserts
+
+        assert await cache.add_text_message(3277, "org-1", {"id": 99, "message": "new"})
+
+        texts = store.rows[(3277, "org-1", "texts")]["data"]
+        assert texts[0]["id"] == 99
+        assert len(texts) == 50
+        assert store.upserts == upserts  # no whole-profile rewrite
+        name, params = store.rpc_calls[-1]
+        assert name == LeadProfileCacheService.APPEND_FUNCTION
+        assert params["p_section"] == "texts"
+
+    @pytest.mark.asyncio
+    async def test_appends_to_different_sections_dont_interfere(self):
+        cache, store, _ = _make_cache()
+        await cache.get_profile(3277, "org-1")
+
+        await cache.add_note(3277, "org-1", {"id": 2, "body": "second"})
+        await cache.add_email(3277, "org-1", {"id": 5})
+
+        profile = await cache.get_profile(3277, "org-1")
+        assert [n["id"] for n in profile.notes] == [2, 1]
+        assert [e["id"] for e in profile.emails] == [5]
+        assert profile.update_count == 2
+
+    @pytest.mark.asyncio
+    async def test_append_to_uncached_lead_is_noop(self):
+        cache, store, _ = _make_cache()
+        assert await cache.add_call(3277, "org-1", {"id": 1}) is False
+        assert not store.rows
+
+    @pytest.mark.asyncio
+    async def test_update_person_data_fetches_only_when_cached(self):
+        cache, store, fub = _make_cache()
+
+        assert await cache.update_person_data(3277, "org-1") is False
+        fub.get_person.assert_not_called()
+
+        await cache.get_profile(3277, "org-1")
+        assert await cache.update_person_data(3277, "org-1") is True
+        assert store.rows[(3277, "org-1", "person")]["data"]["firstName"] == "Johnny"
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_all_sections(self):
+        cache, store, _ = _make_cache()
+        await cache.get_profile(3277, "org-1")
+
+        await cache.invalidate_cache(3277, "org-1")
+
+        assert not store.rows
+
+
+@pytest.mark.unit
+class TestSingleFlightRefresh:
+    """Tests for collapsed refreshes and stale-while-revalidate."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self, fake_redis):
+        cache, _, fub = _make_cache(redis=fake_redis)
+        fub.get_complete_lead_context.side_effect = lambda _: (time.sleep(0.05), _context())[1]
+
+        profiles = await asyncio.gather(*[cache.get_profile(3277, "org-1") for _ in range(3)])
+
+        assert fub.get_complete_lead_context.call_count == 1
+        assert all(p.person_data["firstName"] == "John" for p in profiles)
+        assert cache.get_stats()["collapsed"] == 2
+        assert not fake_redis.exists(f"{cache.LOCK_PREFIX}:org-1:3277")
+
+    @pytest.mark.asyncio
+    async def test_stale_profile_served_while_refreshing(self, fake_redis):
+        cache, store, fub = _make_cache(redis=fake_redis)
+        await cache._save_to_cache(_profile(age_hours=30))
+
+        profiles = await asyncio.gather(*[cache.get_profile(3277, "org-1") for _ in range(3)])
+
+        assert all(p.person_data["firstName"] == "Cached" for p in profiles)
+        await _drain(cache)
+        assert fub.get_complete_lead_context.call_count == 1
+        assert store.rows[(3277, "org-1", "person")]["data"]["firstName"] == "John"
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_skipped_when_peer_holds_lock(self, fake_redis):
+        cache, _, fub = _make_cache(redis=fake_redis)
+        await cache._save_to_cache(_profile(age_hours=30))
+        fake_redis.set(f"{cache.LOCK_PREFIX}:org-1:3277", "other-worker")
+
+        await cache.get_profile(3277, "org-1")
+        await _drain(cache)
+
+        fub.get_complete_lead_context.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_miss_waits_for_peer_refresh(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(lpc, "REFRESH_POLL_SECONDS", 0.01)
+        cache, _, fub = _make_cache(redis=fake_redis)
+        lock_key = f"{cache.LOCK_PREFIX}:org-1:3277"
+        fake_redis.set(lock_key, "other-worker")
+
+        async def peer_refresh():
+            await asyncio.sleep(0.05)
+            await cache._save_to_cache(_profile(name="From peer"))
+            fake_redis.delete(lock_key)
+
+        profile, _ = await asyncio.gather(cache.get_profile(3277, "org-1"), peer_refresh())
+
+        assert profile.person_data["firstName"] == "From peer"
+        fub.get_complete_lead_context.assert_not_called()
+
+
+@pytest.mark.unit
+class TestProactiveRefresh:
+    """Tests for refresh_due_profiles()."""
+
+    @pytest.mark.asyncio
+    async def test_rewarms_only_active_profiles_near_expiry(self, fake_redis):
+        cache, _, fub = _make_cache(redis=fake_redis)
+        await cache._save_to_cache(_profile(person_id=1, age_hours=23))
+        await cache._save_to_cache(_profile(person_id=2, age_hours=1))
+        await cache._save_to_cache(_profile(person_id=3, age_hours=23))  # not active
+        cache.note_activity(1, "org-1")
+        cache.note_activity(2, "org-1")
+
+        stats = await cache.refresh_due_profiles()
+
+        assert stats == {"active": 2, "due": 1, "refreshed": 1}
+        fub.get_complete_lead_context.assert_called_once_with(1)
+
+    @pytest.mark.asyncio
+    async def test_old_activity_expires(self, fake_redis):
+        cache, _, _ = _make_cache(redis=fake_redis)
+        fake_redis.zadd(cache.ACTIVE_KEY, {"org-1:1": time.time() - 48 * 3600})
+
+        stats = await cache.refresh_due_profiles()
+
+        assert stats["active"] == 0
+        assert not fake_redis.zrangebyscore(cache.ACTIVE_KEY, 0, time.time())
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Next Best Action scan tests.
+
+Covers the set-based, sharded NBA scan:
+- Pending follow-ups are looked up once per sub-scan, not once per lead
+- The five sub-scans run concurrently and fail independently
+- TCPA hours use the scanned organization's own timezone
+- run_nba_scan_task fans out one shard per organization with leads, plus
+  one for leads without an organization
+
+Run with: pytest tests/test_nba_scan.py -v
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.ai_agent.next_best_action import UNASSIGNED_ORGANIZATION, ActionType, NextBestActionEngine
+
+
+def _table(rows):
+    """Chainable query mock returning rows; records in_() calls."""
+    table = MagicMock()
+    for method in ['select', 'eq', 'neq', 'lt', 'gt', 'gte', 'lte', 'limit', 'order', 'is_', 'in_']:
+        getattr(table, method).return_value = table
+    table.execute.return_value = MagicMock(data=rows)
+    return table
+
+
+def _engine(tables):
+    engine = NextBestActionEngine.__new__(NextBestActionEngine)
+    mocks = {name: _table(rows) for name, rows in tables.items()}
+    engine.supabase = MagicMock()
+    engine.supabase.table.side_effect = lambda name: mocks.setdefault(name, _table([]))
+    engine.fub_client = MagicMock()
+    engine.prioritizer = MagicMock()
+    engine.followup_manager = MagicMock()
+    return engine, mocks
+
+
+def _silent_conversation(person_id):
+    return {
+        "fub_person_id": person_id,
+        "state": "qualifying",
+        "last_ai_message_at": (datetime.utcnow() - timedelta(days=2)).isoformat(),
+        "last_lead_response_at": None,
+        "lead_score": 60,
+    }
+
+
+@pytest.mark.unit
+class TestNBASetBasedChecks:
+    """Tests for batched pending follow-up lookups."""
+
+    @pytest.mark.asyncio
+    async def test_silent_scan_uses_one_pending_lookup(self):
+        engine, tables = _engine({
+            "ai_conversations": [_silent_conversation(pid) for pid in (1, 2, 3)],
+            "ai_scheduled_followups": [{"fub_person_id": 2}],
+        })
+
+        actions = await engine._check_silent_leads("org-1", 10, "America/Denver")
+
+        assert [a.fub_person_id for a in actions] == [1, 3]
+        followups = tables["ai_scheduled_followups"]
+        assert followups.execute.call_count == 1
+        followups.in_.assert_called_once_with("fub_person_id", [1, 2, 3])
+
+    @pytest.mark.asyncio
+    async def test_dormant_scan_uses_one_pending_lookup(self):
+        last_activity = (datetime.utcnow() - timedelta(days=40)).isoformat()
+        engine, tables = _engine({
+            "leads": [{"fub_person_id": pid, "last_activity_at": last_activity} for pid in (7, 8)],
+            "ai_scheduled_followups": [{"fub_person_id": 7}],
+        })
+
+        actions = await engine._check_dormant_leads("org-1", 10)
+
+        assert [a.fub_person_id for a in actions] == [8]
+        assert actions[0].action_type == ActionType.REENGAGEMENT_SMS
+        assert tables["ai_scheduled_followups"].execute.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_tcpa_hours_use_org_timezone(self):
+        engine, _ = _engine({"ai_conversations": [_silent_conversation(1)]})
+
+        with patch(
+            "app.ai_agent.next_best_action.is_within_tcpa_hours",
+            return_value=(True, None),
+        ) as tcpa:
+            await engine._check_silent_leads("org-1", 10, "America/Los_Angeles")
+
+        tcpa.assert_called_once_with(timezone="America/Los_Angeles")
+
+
+@pytest.mark.unit
+class TestNBAConcurrentScan:
+    """Tests for scan_and_recommend() running sub-scans concurrently."""
+
+    @pytest.mark.asyncio
+    async def test_sub_scans_run_concurrently(self):
+        engine, _ = _engine({"ai_agent_settings": [{"timezone": "America/Chicago"}]})
+
+        async def slow_scan(*args):
+            time.sleep(0.1)  # sync Supabase call
+            return []
+
+        for name in ("_check_new_leads", "_check_silent_leads", "_check_dormant_leads",
+                     "_check_pending_followups", "_check_stale_handoffs"):
+            setattr(engine, name, AsyncMock(side_effect=slow_scan))
+
+        started = time.perf_counter()
+        await engine.scan_and_recommend(organization_id="org-1")
+
+        assert time.perf_counter() - started < 0.35
+        engine._check_silent_leads.assert_called_once_with("org-1", 16, "America/Chicago")
+
+    @pytest.mark.asyncio
+    async def test_failed_sub_scan_does_not_drop_others(self):
+        from app.ai_agent.next_best_action import RecommendedAction
+
+        engine, _ = _engine({})
+        action = RecommendedAction(1, ActionType.FOLLOWUP_SMS, 70, "due")
+        engine._check_new_leads = AsyncMock(return_value=[])
+        engine._check_silent_leads = AsyncMock(return_value=[])
+        engine._check_dormant_leads = AsyncMock(return_value=[])
+        engine._check_pending_followups = AsyncMock(return_value=[action])
+        engine._check_stale_handoffs = AsyncMock(side_effect=Exception("DB connection failed"))
+
+        result = await engine.scan_and_recommend(timezone="America/New_York")
+
+        assert result == [action]
+
+
+@pytest.mark.unit
+class TestNBAScanSharding:
+    """Tests for per-organization sharding in run_nba_scan_task."""
+
+    def test_shards_cover_every_lead_organization(self):
+        from app.scheduler.ai_tasks import _nba_scan_shards
+
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"organization_id": "org-a"},
+            {"organization_id": "org-b"},
+            {"organization_id": "org-c"},
+            {"organization_id": None},
+        ])
+        query = supabase.table.return_value.select.return_value.not_.is_.return_value
+        query.execute.return_value = MagicMock(data=[
+            {"organization_id": "org-a", "user_id": "u1", "timezone": "America/Denver"},
+            {"organization_id": "org-a", "user_id": None, "timezone": "America/Phoenix"},
+            {"organization_id": "org-b", "user_id": "u2", "timezone": None},
+        ])
+
+        # org-c has no settings and the last row is leads with no organization
+        assert _nba_scan_shards(supabase) == {
+            "org-a": "America/Phoenix",
+            "org-b": "America/New_York",
+            "org-c": "America/New_York",
+            UNASSIGNED_ORGANIZATION: "America/New_York",
+        }
+        supabase.rpc.assert_called_once_with("list_lead_organization_ids", {})
+
+    @pytest.mark.asyncio
+    async def test_unassigned_shard_scans_leads_without_organization(self):
+        engine, tables = _engine({"leads": []})
+        engine.followup_manager.get_pending_followups = AsyncMock(return_value=[
+            MagicMock(fub_person_id=1, organization_id="org-a", channel="sms"),
+            MagicMock(fub_person_id=2, organization_id=None, channel="sms"),
+        ])
+
+        await engine._check_dormant_leads(UNASSIGNED_ORGANIZATION, 10)
+        actions = await engine._check_pending_followups(UNASSIGNED_ORGANIZATION)
+
+        tables["leads"].is_.assert_called_with("organization_id", "null")
+        tables["leads"].eq.assert_not_called()
+        assert [a.fub_person_id for a in actions] == [2]
+
+    def test_unscoped_task_fans_out_per_org(self):
+        from app.scheduler import ai_tasks
+
+        shards = {"org-a": "America/Phoenix", "org-b": "America/New_York"}
+        with patch.object(ai_tasks, "_nba_scan_shards", return_value=shards), \
+                patch("app.database.supabase_client.SupabaseClientSingleton.get_instance"), \
+                patch.object(ai_tasks.run_nba_scan_task, "delay") as delay:
+            result = ai_tasks.run_nba_scan_task.run()
+
+        assert result["shards"] == 2
+        delay.assert_any_call(organization_id="org-a", execute=True, batch_size=50, timezone="America/Phoenix")
+        delay.assert_any_call(organization_id="org-b", execute=True, batch_size=50, timezone="America/New_York")
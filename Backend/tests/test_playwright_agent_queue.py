@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+PlaywrightSMSService per-agent queue tests.
+
+Covers the asyncio FIFO work queue that serializes browser operations:
+- Operations for one agent run in submission order, never concurrently
+- Back-to-back operations share one browser context (up to the reuse cap)
+- A failed operation discards its context and doesn't block the queue
+- Queue depth / wait-time metrics
+- Workers on different event loops (and get_or_create_session) never share
+  the agent's browser at the same time
+
+Run with: pytest tests/test_playwright_agent_queue.py -v
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.messaging import playwright_sms_service as pss
+
+
+class FakeSession:
+    """Stand-in for FUBBrowserSession (no browser)."""
+
+    created = 0
+
+    def __init__(self, browser, agent_id, session_store):
+        FakeSession.created += 1
+        self.agent_id = agent_id
+        self.closed = False
+        self.saved = False
+
+    async def login(self, credentials):
+        await asyncio.sleep(0)
+
+    async def save_cookies_and_close(self):
+        self.saved = True
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def service():
+    FakeSession.created = 0
+    with patch.object(pss, "SessionStore", MagicMock()), \
+            patch.object(pss, "FUBBrowserSession", FakeSession):
+        svc = pss.PlaywrightSMSService(context_reuse_max_ops=3)
+
+        async def browser_alive():
+            return None
+
+        svc._ensure_browser_alive = browser_alive
+        yield svc
+
+
+@pytest.mark.unit
+class TestAgentOperationQueue:
+    """Tests for PlaywrightSMSService._run_with_session queueing."""
+
+    @pytest.mark.asyncio
+    async def test_fifo_and_serialized(self, service):
+        order = []
+        running = 0
+
+        def make_op(i):
+            async def op(session):
+                nonlocal running
+                running += 1
+                assert running == 1, "operations for one agent overlapped"
+                await asyncio.sleep(0.01)
+                order.append(i)
+                running -= 1
+                return i
+            return op
+
+        results = await asyncio.gather(*[
+            service._run_with_session("agent-1", {}, f"op_{i}", make_op(i))
+            for i in range(5)
+        ])
+
+        assert results == [0, 1, 2, 3, 4]
+        assert order == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_back_to_back_ops_reuse_context(self, service):
+        contexts = []
+
+        async def op(session):
+            contexts.append(session)
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*[
+            service._run_with_session("agent-1", {}, f"op_{i}", op) for i in range(6)
+        ])
+
+        # Reuse cap is 3 → 6 queued ops need 2 contexts
+        assert FakeSession.created == 2
+        assert contexts[0] is contexts[2]
+        assert contexts[2] is not contexts[3]
+
+        metrics = service.get_queue_metrics()["agent-1"]
+        assert metrics["processed"] == 6
+        assert metrics["contexts_created"] == 2
+        assert metrics["ops_per_context"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_context_closed_when_queue_drains(self, service):
+        seen = []
+
+        async def op(session):
+            seen.append(session)
+
+        await service._run_with_session("agent-1", {}, "op", op)
+        await asyncio.sleep(0.01)  # let the worker notice the empty queue
+
+        assert seen[0].saved
+        assert "agent-1" not in service.sessions
+
+    @pytest.mark.asyncio
+    async def test_failure_discards_context_and_continues(self, service):
+        async def boom(session):
+            raise RuntimeError("page crashed")
+
+        async def ok(session):
+            return "ok"
+
+        failing = service._run_with_session("agent-1", {}, "boom", boom)
+        following = service._run_with_session("agent-1", {}, "ok", ok)
+        results = await asyncio.gather(failing, following, return_exceptions=True)
+
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] == "ok"
+        assert FakeSession.created == 2
+        assert service.get_queue_metrics()["agent-1"]["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_agents_run_independently(self, service):
+        started = asyncio.Event()
+
+        async def slow(session):
+            started.set()
+            await asyncio.sleep(0.05)
+
+        async def fast(session):
+            return "fast"
+
+        slow_task = asyncio.ensure_future(service._run_with_session("agent-1", {}, "slow", slow))
+        await started.wait()
+        assert await service._run_with_session("agent-2", {}, "fast", fast) == "fast"
+        assert not slow_task.done()
+        await slow_task
+
+
+@pytest.mark.unit
+class TestAgentQueueAcrossLoops:
+    """The agent busy flag serializes browser use across event loops."""
+
+    def test_workers_on_different_loops_do_not_overlap(self, service):
+        running = 0
+        overlaps = []
+        guard = threading.Lock()
+
+        async def op(session):
+            nonlocal running
+            with guard:
+                running += 1
+                overlaps.append(running > 1)
+            await asyncio.sleep(0.05)
+            with guard:
+                running -= 1
+
+        def run_in_own_loop():
+            asyncio.run(service._run_with_session("agent-1", {}, "op", op))
+
+        threads = [threading.Thread(target=run_in_own_loop) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert overlaps == [False, False, False]
+        assert service.get_queue_metrics()["agent-1"]["processed"] == 3
+
+    def test_short_lived_loop_releases_agent_and_context(self, service):
+        seen = []
+
+        async def op(session):
+            seen.append(session)
+
+        asyncio.run(service._run_with_session("agent-1", {}, "op", op))
+
+        # Loop is gone: the context must already be closed and the agent free
+        assert seen[0].closed
+        assert "agent-1" not in service.sessions
+        assert service._try_acquire_agent("agent-1")
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_session_waits_for_worker(self, service):
+        started = asyncio.Event()
+        events = []
+
+        async def slow(session):
+            started.set()
+            await asyncio.sleep(0.05)
+            events.append("op_done")
+
+        service._initialized = True
+        task = asyncio.ensure_future(service._run_with_session("agent-1", {}, "slow", slow))
+        await started.wait()
+
+        session = await service.get_or_create_session("agent-1", {})
+        events.append("session_acquired")
+        service._release_agent("agent-1")
+        await task
+
+        assert events == ["op_done", "session_acquired"]
+        assert isinstance(session, FakeSession)
+
+    @pytest.mark.asyncio
+    async def test_worker_waits_for_get_or_create_session(self, service):
+        service._initialized = True
+        await service.get_or_create_session("agent-1", {})
+
+        async def op(session):
+            return "ran"
+
+        task = asyncio.ensure_future(service._run_with_session("agent-1", {}, "op", op))
+        await asyncio.sleep(0.1)
+        assert not task.done()
+
+        service._release_agent("agent-1")
+        assert await asyncio.wait_for(task, timeout=5) == "ran"
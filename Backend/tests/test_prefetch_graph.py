@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Prefetch graph tests.
+
+Covers the dependency-graph prefetch stage used by process_inbound_text:
+- Independent nodes run concurrently (total ≈ slowest node, not the sum)
+- Dependencies are passed in as keyword arguments and respected
+- Results are computed once and cached; refresh() recomputes
+- Blocking coroutines run in worker threads
+- Bad graphs (unknown deps, cycles) are rejected up front
+
+Run with: pytest tests/test_prefetch_graph.py -v
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.utils.prefetch_graph import PrefetchGraph
+
+
+def _delayed(value, seconds=0.05, calls=None):
+    async def node(**deps):
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(seconds)
+        return value
+    return node
+
+
+def _blocking(value, seconds=0.05):
+    async def node():
+        time.sleep(seconds)  # sync client call that never yields
+        return value
+    return node
+
+
+@pytest.mark.unit
+class TestPrefetchGraph:
+    """Tests for PrefetchGraph."""
+
+    @pytest.mark.asyncio
+    async def test_independent_nodes_run_concurrently(self):
+        graph = PrefetchGraph("test")
+        for name in ("a", "b", "c", "d"):
+            graph.add(name, _delayed(name, 0.1))
+
+        started = time.perf_counter()
+        graph.start()
+        results = [await graph.get(name) for name in ("a", "b", "c", "d")]
+        elapsed = time.perf_counter() - started
+
+        assert results == ["a", "b", "c", "d"]
+        assert elapsed < 0.3
+        assert set(graph.timings) == {"a", "b", "c", "d"}
+
+    @pytest.mark.asyncio
+    async def test_blocking_nodes_run_in_threads(self):
+        graph = PrefetchGraph("test")
+        for name in ("a", "b", "c"):
+            graph.add(name, _blocking(name, 0.1), blocking=True)
+
+        started = time.perf_counter()
+        graph.start()
+        await asyncio.gather(*(graph.get(name) for name in ("a", "b", "c")))
+
+        assert time.perf_counter() - started < 0.25
+
+    @pytest.mark.asyncio
+    async def test_dependencies_passed_as_kwargs(self):
+        async def total(a, b):
+            return a + b
+
+        graph = PrefetchGraph("test")
+        graph.add("a", _delayed(1))
+        graph.add("b", _delayed(2))
+        graph.add("total", total, deps=("a", "b"))
+        graph.start()
+
+        assert await graph.get("total") == 3
+        # Own wall time only - the 50ms waiting on a/b isn't counted
+        assert graph.timings["total"] < 40
+
+    @pytest.mark.asyncio
+    async def test_results_are_cached_until_refreshed(self):
+        calls = []
+        graph = PrefetchGraph("test")
+        graph.add("history", _delayed("history", 0.01, calls))
+        graph.start()
+
+        await graph.get("history")
+        await graph.get("history")
+        assert calls == ["history"]
+
+        graph.refresh("history")
+        await graph.get("history")
+        assert calls == ["history", "history"]
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_dependents(self):
+        async def boom():
+            raise RuntimeError("FUB down")
+
+        graph = PrefetchGraph("test")
+        graph.add("person", boom)
+        graph.add("profile", _delayed("profile"), deps=("person",))
+        graph.add("settings", _delayed("settings"))
+        graph.start()
+
+        with pytest.raises(RuntimeError):
+            await graph.get("profile")
+        assert await graph.get("settings") == "settings"
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_unfinished_nodes(self):
+        calls = []
+        graph = PrefetchGraph("test")
+        graph.add("slow", _delayed("slow", 5))
+        graph.add("after", _delayed("after", 0, calls), deps=("slow",))
+        graph.start()
+        await asyncio.sleep(0)
+
+        graph.cancel()
+        await asyncio.sleep(0.01)
+
+        assert calls == []
+        with pytest.raises(asyncio.CancelledError):
+            await graph.get("slow")
+
+    def test_unknown_dependency_rejected(self):
+        graph = PrefetchGraph("test")
+        graph.add("profile", _delayed("profile"), deps=("person",))
+        with pytest.raises(ValueError):
+            graph.start()
+
+    def test_cycle_rejected(self):
+        graph = PrefetchGraph("test")
+        graph.add("a", _delayed("a"), deps=("b",))
+        graph.add("b", _delayed("b"), deps=("a",))
+        with pytest.raises(ValueError):
+            graph.start()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Shared settings cache tests.
+
+Covers the local LRU → Redis → DB lookup used by AIAgentSettingsService,
+the webhook handlers, the outreach orchestrator and the follow-up manager:
+- Resolution order (user row → org row → first row)
+- Local and Redis hits don't touch the database
+- invalidate() bumps the version and publishes it to other workers
+
+Run with: pytest tests/test_settings_cache.py -v
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.ai_agent.settings_cache import SettingsCache, SOURCE_USER, SOURCE_ORG, SOURCE_ANY
+
+
+class _SettingsTable:
+    """Tiny ai_agent_settings stand-in that applies eq/is_/limit filters."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executions = 0
+
+    def select(self, *args):
+        return _SettingsQuery(self)
+
+
+class _SettingsQuery:
+    def __init__(self, table):
+        self._table = table
+        self._filters = []
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def is_(self, column, value):
+        self._filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        self._table.executions += 1
+        data = [r for r in self._table.rows if all(f(r) for f in self._filters)]
+        return MagicMock(data=data)
+
+
+def _make_cache(fake_redis, rows):
+    table = _SettingsTable(rows)
+    supabase = MagicMock()
+    supabase.table.return_value = table
+
+    cache = SettingsCache(supabase_client=supabase)
+    cache.redis = fake_redis
+    cache._listener_started = True  # no background thread in tests
+    return cache, table
+
+
+ROWS = [
+    {"id": "1", "user_id": None, "organization_id": "org-1", "agent_name": "Org Agent",
+     "excluded_stages": ["Trash"]},
+    {"id": "2", "user_id": "user-1", "organization_id": "org-1", "agent_name": "User Agent"},
+]
+
+
+@pytest.mark.unit
+class TestSettingsResolution:
+    """Tests for user → org → first-row resolution."""
+
+    def test_user_row_wins(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        row, source = cache.get_row("user-1", "org-1")
+        assert source == SOURCE_USER
+        assert row["agent_name"] == "User Agent"
+
+    def test_falls_back_to_org_row(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        row, source = cache.get_row("user-2", "org-1")
+        assert source == SOURCE_ORG
+        assert row["agent_name"] == "Org Agent"
+
+    def test_org_with_only_user_rows(self, fake_redis):
+        rows = [{"id": "3", "user_id": "user-9", "organization_id": "org-2", "agent_name": "Team Agent"}] + ROWS
+        cache, _ = _make_cache(fake_redis, rows)
+        row, source = cache.get_row(organization_id="org-2")
+        assert source == SOURCE_ORG
+        assert row["agent_name"] == "Team Agent"
+
+    def test_falls_back_to_first_row(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        _, source = cache.get_row(organization_id="org-other")
+        assert source == SOURCE_ANY
+
+    def test_empty_table(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, [])
+        assert cache.get_row("user-1", "org-1") == (None, None)
+
+
+@pytest.mark.unit
+class TestSettingsCacheTiers:
+    """Tests for the local / Redis / DB tiers."""
+
+    def test_local_hit_skips_db(self, fake_redis):
+        cache, table = _make_cache(fake_redis, ROWS)
+        cache.get_row("user-1", "org-1")
+        executions = table.executions
+
+        cache.get_row("user-1", "org-1")
+
+        assert table.executions == executions
+        assert cache.get_stats()["local_hits"] == 1
+
+    def test_other_worker_reads_from_redis(self, fake_redis):
+        cache_a, _ = _make_cache(fake_redis, ROWS)
+        cache_b, table_b = _make_cache(fake_redis, ROWS)
+        cache_a.get_row("user-1", "org-1")
+
+        row, source = cache_b.get_row("user-1", "org-1")
+
+        assert table_b.executions == 0
+        assert source == SOURCE_USER
+        assert row["agent_name"] == "User Agent"
+
+    def test_use_cache_false_hits_db(self, fake_redis):
+        cache, table = _make_cache(fake_redis, ROWS)
+        cache.get_row("user-1", "org-1")
+        executions = table.executions
+
+        cache.get_row("user-1", "org-1", use_cache=False)
+
+        assert table.executions > executions
+
+    def test_returned_rows_are_copies(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        row, _ = cache.get_row("user-2", "org-1")
+        row["excluded_stages"].append("Sphere")
+        row["agent_name"] = "Changed"
+
+        again, _ = cache.get_row("user-2", "org-1")
+        assert again["agent_name"] == "Org Agent"
+        assert again["excluded_stages"] == ["Trash"]
+
+    def test_lru_evicts_oldest(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        cache.max_entries = 2
+        cache.get_row("a", "org-1")
+        cache.get_row("b", "org-1")
+        cache.get_row("c", "org-1")
+        assert cache.get_stats()["local_entries"] == 2
+
+
+@pytest.mark.unit
+class TestSettingsInvalidation:
+    """Tests for version-stamped invalidation across workers."""
+
+    def test_invalidate_bumps_version_and_publishes(self, fake_redis):
+        cache, _ = _make_cache(fake_redis, ROWS)
+        cache.get_row("user-1", "org-1")
+
+        cache.invalidate()
+
+        assert fake_redis.get(SettingsCache.VERSION_KEY) == "1"
+        assert fake_redis.published == [(SettingsCache.CHANNEL, "1")]
+        assert cache.get_stats()["local_entries"] == 0
+
+    def test_published_version_clears_other_worker(self, fake_redis):
+        cache_a, _ = _make_cache(fake_redis, ROWS)
+        cache_b, table_b = _make_cache(fake_redis, ROWS)
+        cache_b.get_row("user-1", "org-1")
+        executions = table_b.executions
+
+        # Worker A saves new settings
+        updated_rows = [dict(ROWS[0]), dict(ROWS[1], agent_name="Renamed")]
+        table_b.rows = updated_rows
+        cache_a.invalidate()
+        cache_b._handle_message({"type": "message", "data": fake_redis.published[-1][1]})
+
+        row, _ = cache_b.get_row("user-1", "org-1")
+
+        assert table_b.executions > executions
+        assert row["agent_name"] == "Renamed"
+
+    def test_stale_redis_entry_unreachable_after_bump(self, fake_redis):
+        cache_a, _ = _make_cache(fake_redis, ROWS)
+        cache_a.get_row("user-1", "org-1")
+        cache_a.invalidate()
+
+        # A fresh worker reads the new version and misses the old entry
+        cache_b, table_b = _make_cache(fake_redis, ROWS)
+        cache_b.get_row("user-1", "org-1")
+        assert table_b.executions > 0
+
+
+@pytest.mark.unit
+class TestSettingsServiceIntegration:
+    """AIAgentSettingsService goes through the shared cache."""
+
+    @pytest.mark.asyncio
+    async def test_save_invalidates_shared_cache(self, fake_redis, monkeypatch):
+        from app.ai_agent import settings_service
+
+        cache, table = _make_cache(fake_redis, ROWS)
+        monkeypatch.setattr(settings_service, "get_settings_cache", lambda *_: cache)
+
+        supabase = MagicMock()
+        supabase.table.side_effect = lambda name: table if name == "ai_agent_settings" else MagicMock()
+        service = settings_service.AIAgentSettingsService(supabase)
+
+        settings = await service.get_settings(user_id="user-1", organization_id="org-1")
+        assert settings.agent_name == "User Agent"
+
+        service.invalidate_cache("user-1", "org-1")
+        assert fake_redis.published
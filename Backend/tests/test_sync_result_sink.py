@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Sync result sink tests.
+
+Covers the streaming per-lead result sink used by referral bulk syncs:
+- Results are written in batches, memory holds only a bounded ring
+- The summary is counted from the results table
+- Failed leads can be marked recovered (HomeLight urgent sweep)
+- Database errors fall back to in-memory counters
+- The tracker keeps only bounded details
+
+Run with: pytest tests/test_sync_result_sink.py -v
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.service.sync_result_sink import SyncResultSink
+from app.service.sync_status_tracker import SyncStatusTracker
+
+
+class FakeResultsTable:
+    """In-memory sync_lead_results supporting insert / update / counted select."""
+
+    def __init__(self):
+        self.rows = []
+        self.inserts = 0
+        self.fail_inserts = False
+
+    def table(self, name):
+        return _Query(self)
+
+
+class _Query:
+    def __init__(self, store):
+        self._store = store
+        self._filters = {}
+        self._op = "select"
+        self._payload = None
+
+    def select(self, *args, count=None):
+        return self
+
+    def insert(self, rows):
+        self._op, self._payload = "insert", rows
+        return self
+
+    def update(self, data):
+        self._op, self._payload = "update", data
+        return self
+
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        store = self._store
+        if self._op == "insert":
+            if store.fail_inserts:
+                raise ConnectionError("db down")
+            store.inserts += 1
+            store.rows.extend(dict(r) for r in self._payload)
+            return MagicMock(data=self._payload)
+
+        matched = [r for r in store.rows if all(r.get(k) == v for k, v in self._filters.items())]
+        if self._op == "update":
+            for row in matched:
+                row.update(self._payload)
+        return MagicMock(data=matched, count=len(matched))
+
+
+def _detail(i, status="success"):
+    return {"lead_id": f"lead-{i}", "fub_person_id": 1000 + i, "name": f"Lead {i}", "status": status}
+
+
+@pytest.mark.unit
+class TestSyncResultSink:
+    """Tests for SyncResultSink."""
+
+    def test_results_stream_to_table_with_bounded_memory(self):
+        db = FakeResultsTable()
+        sink = SyncResultSink("sync-1", "Redfin", supabase_client=db, flush_size=10, recent_size=5)
+
+        for i in range(95):
+            sink.record(_detail(i, "failed" if i % 5 == 0 else "success"))
+        assert db.inserts == 9  # flushed as it went
+        assert len(sink.recent) == 5
+
+        summary = sink.summary()
+
+        assert len(db.rows) == 95
+        assert summary["successful"] == 76
+        assert summary["failed"] == 19
+        assert summary["skipped"] == 0
+        assert [d["name"] for d in summary["details"]] == [f"Lead {i}" for i in range(90, 95)]
+        assert summary["details_truncated"] is True
+        assert db.rows[0]["fub_person_id"] == "1000"
+
+    def test_summary_counted_from_table(self):
+        db = FakeResultsTable()
+        sink = SyncResultSink("sync-1", "HomeLight", supabase_client=db)
+        sink.record(_detail(1, "skipped"))
+        sink.flush()
+        # Another writer for the same sync (e.g. a resumed run)
+        db.rows.append({"sync_id": "sync-1", "status": "skipped"})
+
+        assert sink.summary()["skipped"] == 2
+
+    def test_mark_recovered(self):
+        db = FakeResultsTable()
+        sink = SyncResultSink("sync-1", "HomeLight", supabase_client=db)
+        sink.record(_detail(1, "failed"))
+        sink.record(_detail(2, "success"))
+
+        assert sink.mark_recovered("lead-1", "Updated via urgent sweep") is True
+        assert sink.mark_recovered("lead-1", "again") is False
+        assert sink.mark_recovered("lead-2", "never failed") is False
+
+        summary = sink.summary()
+        assert (summary["successful"], summary["failed"]) == (2, 0)
+        assert summary["details"][0]["note"] == "Updated via urgent sweep"
+
+    def test_write_failures_fall_back_to_memory_counts(self):
+        db = FakeResultsTable()
+        db.fail_inserts = True
+        sink = SyncResultSink("sync-1", "Redfin", supabase_client=db, flush_size=2)
+
+        for i in range(5):
+            sink.record(_detail(i, "skipped"))
+        summary = sink.summary()
+
+        assert sink.write_errors == 3
+        assert summary["skipped"] == 5
+        assert summary["recorded"] == 5
+
+    def test_without_sync_id_nothing_is_persisted(self):
+        sink = SyncResultSink(None, "MyAgentFinder")
+        sink.record(_detail(1))
+
+        summary = sink.summary()
+
+        assert sink.supabase is None
+        assert summary["successful"] == 1
+        assert summary["results_table"] is None
+
+
+@pytest.mark.unit
+class TestTrackerBounds:
+    """Tests for bounded in-memory tracker state."""
+
+    def test_tracker_details_are_bounded(self, fake_redis):
+        tracker = SyncStatusTracker(fake_redis)
+        tracker.start_sync("sync-1", "source-1", "Redfin", 500, "user-1")
+        for i in range(SyncStatusTracker.MAX_DETAILS + 50):
+            tracker.update_progress("sync-1", detail=_detail(i))
+
+        assert len(tracker._statuses["sync-1"]["details"]) == SyncStatusTracker.MAX_DETAILS
+        assert len(tracker.get_status("sync-1")["details"]) == SyncStatusTracker.MAX_DETAILS
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Sync status tracker tests.
+
+Covers the Redis-backed tracker behind the sync progress SSE stream:
+- A sync run by one process is visible (and cancellable) from another
+- Message history is bounded
+- Stream consumers get a snapshot, then only deltas, ending on completion
+- Reconnecting consumers resume after their Last-Event-ID
+- In-process push updates when Redis is unavailable
+
+Run with: pytest tests/test_sync_status_tracker.py -v
+"""
+
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from app.service.sync_status_tracker import SyncStatusTracker
+
+
+def _start(tracker, sync_id="sync-1", total=10):
+    tracker.start_sync(sync_id, "source-1", "Redfin", total, "user-1")
+
+
+def _events(stream, n):
+    """Next n non-keepalive events from a stream_events() generator."""
+    events = []
+    while len(events) < n:
+        item = next(stream)
+        if item is not None:
+            events.append(item)
+    return events
+
+
+@pytest.mark.unit
+class TestSyncStatusAcrossProcesses:
+    """Tests for status shared through Redis."""
+
+    def test_status_visible_from_other_process(self, fake_redis):
+        worker, web = SyncStatusTracker(fake_redis), SyncStatusTracker(fake_redis)
+        _start(worker)
+        worker.update_progress("sync-1", processed=3, successful=2, current_lead="Jane Doe", message="Updated Jane")
+        worker.update_progress("sync-1", detail={"lead": "Jane Doe", "ok": True})
+
+        status = web.get_status("sync-1")
+
+        assert status["processed"] == 3
+        assert status["current_lead"] == "Jane Doe"
+        assert status["total_leads"] == 10
+        assert [m["message"] for m in status["messages"]] == ["Updated Jane"]
+        assert status["details"] == [{"lead": "Jane Doe", "ok": True}]
+        assert [s["sync_id"] for s in web.get_active_syncs("user-1")] == ["sync-1"]
+
+    def test_message_history_is_bounded(self, fake_redis):
+        worker = SyncStatusTracker(fake_redis)
+        _start(worker)
+        for i in range(SyncStatusTracker.MAX_MESSAGES + 20):
+            worker.update_progress("sync-1", message=f"lead {i}")
+
+        messages = SyncStatusTracker(fake_redis).get_status("sync-1")["messages"]
+
+        assert len(messages) == SyncStatusTracker.MAX_MESSAGES
+        assert messages[-1]["message"] == f"lead {SyncStatusTracker.MAX_MESSAGES + 19}"
+
+    def test_cancel_from_other_process(self, fake_redis):
+        worker, web = SyncStatusTracker(fake_redis), SyncStatusTracker(fake_redis)
+        _start(worker)
+
+        assert web.cancel_sync("sync-1") is True
+        assert worker.is_cancelled("sync-1") is True
+
+        worker.complete_sync("sync-1", results={"successful": 1, "failed": 0, "details": []})
+
+        assert web.get_status("sync-1")["status"] == "cancelled"
+        assert web.cancel_sync("sync-1") is False
+        assert web.get_active_syncs("user-1") == []
+
+
+@pytest.mark.unit
+class TestSyncStatusStream:
+    """Tests for stream_events()."""
+
+    def test_snapshot_then_deltas_until_complete(self, fake_redis):
+        worker, web = SyncStatusTracker(fake_redis), SyncStatusTracker(fake_redis)
+        _start(worker)
+        worker.update_progress("sync-1", message="Logged in")
+
+        stream = web.stream_events("sync-1", idle_timeout=0)
+        (_, snapshot), (_, backlog) = _events(stream, 2)
+        assert snapshot["type"] == "status" and snapshot["data"]["total_leads"] == 10
+        assert backlog == {"type": "message", "data": snapshot["data"]["messages"][0]}
+        assert next(stream) is None  # idle keepalive
+
+        worker.update_progress("sync-1", processed=1, successful=1, current_lead="Jane Doe")
+        worker.update_progress("sync-1", message="Updated Jane")
+        worker.complete_sync("sync-1", results={"successful": 1, "failed": 0, "details": [{"lead": "Jane"}]})
+
+        (_, progress), (_, message), (_, complete) = _events(stream, 3)
+        assert progress == {"type": "progress", "data": {"processed": 1, "successful": 1, "current_lead": "Jane Doe"}}
+        assert message["data"]["message"] == "Updated Jane"
+        assert complete["type"] == "complete"
+        assert complete["data"]["details"] == [{"lead": "Jane"}]
+        with pytest.raises(StopIteration):
+            next(stream)
+
+    def test_resume_after_last_event_id(self, fake_redis):
+        worker, web = SyncStatusTracker(fake_redis), SyncStatusTracker(fake_redis)
+        _start(worker)
+        worker.update_progress("sync-1", processed=1)
+        (last_id, _), = _events(web.stream_events("sync-1", idle_timeout=0), 1)
+        worker.update_progress("sync-1", processed=2)
+
+        resumed = web.stream_events("sync-1", last_event_id=last_id, idle_timeout=0)
+
+        (_, event), = _events(resumed, 1)
+        assert event == {"type": "progress", "data": {"processed": 2}}
+
+    def test_finished_sync_streams_complete_only(self, fake_redis):
+        worker = SyncStatusTracker(fake_redis)
+        _start(worker)
+        worker.complete_sync("sync-1", error="Login failed")
+
+        events = list(SyncStatusTracker(fake_redis).stream_events("sync-1", idle_timeout=0))
+
+        assert len(events) == 1
+        assert events[0][1]["type"] == "complete"
+        assert events[0][1]["data"]["status"] == "failed"
+
+    def test_local_push_without_redis(self):
+        with patch(
+            "app.service.redis_service.RedisServiceSingleton.get_instance",
+            side_effect=ConnectionError("redis down"),
+        ):
+            tracker = SyncStatusTracker()
+            _start(tracker)
+            stream = tracker.stream_events("sync-1", idle_timeout=1)
+            (_, snapshot), = _events(stream, 1)
+
+            worker = threading.Thread(target=tracker.update_progress, args=("sync-1",), kwargs={"processed": 4})
+            worker.start()
+            (_, delta), = _events(stream, 1)
+            worker.join()
+
+        assert snapshot["type"] == "status"
+        assert delta == {"type": "progress", "data": {"processed": 4}}
+        stream.close()
+        assert tracker._listeners["sync-1"] == []
+
+    def test_unknown_sync(self, fake_redis):
+        events = list(SyncStatusTracker(fake_redis).stream_events("missing", idle_timeout=0))
+
+        assert events == [(None, {"type": "error", "message": "Sync not found"})]
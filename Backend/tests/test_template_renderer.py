@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled template renderer tests.
+
+Covers the render plans behind MessageTemplate.render and render_many:
+- Placeholders, formatters and conditional blocks (including placeholders
+  nested inside a conditional)
+- Undeclared placeholders and stray braces are left as written
+- render_many matches per-message rendering, in row order
+- Library lookups by category / tag / temperature use the prebuilt indexes
+
+Run with: pytest tests/test_template_renderer.py -v
+"""
+
+import pytest
+
+from app.ai_agent.template_engine import (
+    LeadTemperature,
+    MessageTemplate,
+    ResponseTemplateEngine,
+    TemplateCategory,
+    TemplateLibrary,
+)
+from app.ai_agent.template_renderer import CONDITIONAL, compile_variant
+
+
+def _template(*variants, variables=("first_name", "location", "home_price"), max_chars=1000):
+    return MessageTemplate(
+        id="t", category=TemplateCategory.NURTURE, name="Test",
+        variants=list(variants), variables=list(variables), max_chars=max_chars,
+    )
+
+
+@pytest.mark.unit
+class TestCompiledTemplate:
+    """Tests for compiled render plans."""
+
+    def test_placeholders_and_formatters(self):
+        template = _template("Hi {first_name}, homes near {home_price}!")
+
+        assert template.render({"home_price": 425000}, 0) == "Hi there, homes near $425,000!"
+        assert template.render({"first_name": "Ann", "home_price": "TBD"}, 0) == "Hi Ann, homes near TBD!"
+
+    def test_conditional_with_nested_placeholder(self):
+        template = _template("See you soon{?location: at {location}}!")
+
+        assert template.render({"location": "12 Oak St"}, 0) == "See you soon at 12 Oak St!"
+        assert template.render({"location": ""}, 0) == "See you soon!"
+        assert compile_variant("{?location:at {location}}", ["location"])[0][0] == CONDITIONAL
+
+    def test_undeclared_and_unbalanced_text_kept(self):
+        template = _template("{agent_name} says } hi {?location:near {location}", variables=("location",))
+
+        assert template.render({"location": "Oak"}, 0) == "{agent_name} says } hi {?location:near Oak"
+
+    def test_truncates_then_strips(self):
+        template = _template("  {first_name} has a long message  ", max_chars=10)
+
+        assert template.render({"first_name": "Ann"}, 0) == "Ann h..."
+
+    def test_render_many_matches_render(self):
+        template = _template(
+            "Hi {first_name}{?location: in {location}}",
+            "Hey {first_name}, {home_price}",
+        )
+        rows = [
+            {"first_name": f"Lead{i}" if i % 4 else "", "location": "Oak" if i % 2 else "", "home_price": 300000 + i}
+            for i in range(50)
+        ]
+        variants = [i % 2 for i in range(50)]
+
+        rendered = template.render_many(rows, variants)
+
+        assert rendered == [template.render(row, variant) for row, variant in zip(rows, variants)]
+        assert rendered[0] == "Hi there"
+        assert rendered[3] == "Hey Lead3, $300,003"
+
+    def test_engine_render_many_uses_lead_variants(self):
+        engine = ResponseTemplateEngine()
+        rows = [{"first_name": "Ann", "area": "Downtown", "agent_name": "Sarah"}] * 3
+        lead_ids = ["lead-1", "lead-2", None]
+
+        rendered = engine.render_many("re_engage_cold", rows, lead_ids=lead_ids)
+
+        assert len(rendered) == 3
+        for lead_id, text in zip(lead_ids[:2], rendered):
+            assert text == engine.get_message("re_engage_cold", rows[0], lead_id=lead_id, track_ab_test=False)
+        assert engine.render_many("missing_template", rows) == []
+
+
+@pytest.mark.unit
+class TestTemplateLibraryIndexes:
+    """Tests for TemplateLibrary lookups."""
+
+    def test_indexes_match_full_scan(self):
+        TemplateLibrary._init_templates()
+        templates = list(TemplateLibrary.TEMPLATES.values())
+
+        for category in TemplateCategory:
+            assert TemplateLibrary.get_templates_by_category(category) == [
+                t for t in templates if t.category == category
+            ]
+        for temperature in LeadTemperature:
+            assert TemplateLibrary.get_templates_by_temperature(temperature) == [
+                t for t in templates if t.temperature == temperature
+            ]
+        for tag in {tag for t in templates for tag in t.tags}:
+            assert TemplateLibrary.get_templates_by_tag(tag) == [t for t in templates if tag in t.tags]
+        assert TemplateLibrary.get_templates_by_tag("no-such-tag") == []
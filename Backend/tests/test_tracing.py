@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Span tracing tests.
+
+Covers the per-stage latency tracing used by the AI reply pipeline:
+- Child spans link to their parent across awaits, tasks and threads
+- A trace can be continued after a queue hop (delayed replies)
+- Failed stages are recorded with ERROR status
+- Rolling-window percentiles per stage
+- OTLP/JSON export shape
+- Prefetch graph nodes are traced
+
+Run with: pytest tests/test_tracing.py -v
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.utils.prefetch_graph import PrefetchGraph
+from app.utils.tracing import (
+    LocalSpanExporter,
+    Tracer,
+    _percentile,
+    current_trace_id,
+    get_tracer,
+    start_span,
+    traced,
+)
+
+
+@pytest.fixture
+def exporter():
+    exporter = get_tracer().exporter
+    exporter.reset()
+    yield exporter
+    exporter.reset()
+
+
+def _spans(exporter, name):
+    return [span for span in exporter.recent_spans(500) if span.name == name]
+
+
+@pytest.mark.unit
+class TestSpans:
+    """Tests for span nesting and status."""
+
+    @pytest.mark.asyncio
+    async def test_children_link_to_parent_across_tasks_and_threads(self, exporter):
+        async def child(name):
+            with start_span(name):
+                await asyncio.sleep(0)
+
+        def blocking_child():
+            with start_span("thread_child"):
+                pass
+
+        with start_span("root") as root:
+            await asyncio.gather(child("task_a"), asyncio.create_task(child("task_b")))
+            await asyncio.to_thread(blocking_child)
+
+        for name in ("task_a", "task_b", "thread_child"):
+            span = _spans(exporter, name)[0]
+            assert span.trace_id == root.trace_id
+            assert span.parent_span_id == root.span_id
+        assert current_trace_id() is None
+
+    def test_trace_continued_after_queue_hop(self, exporter):
+        with start_span("webhook"):
+            trace_id = current_trace_id()
+
+        with start_span("reply_dispatch", trace_id=trace_id) as dispatch:
+            get_tracer().record("reply_delay", 250.0)
+
+        assert dispatch.trace_id == trace_id
+        delay = _spans(exporter, "reply_delay")[0]
+        assert delay.trace_id == trace_id
+        assert delay.parent_span_id == dispatch.span_id
+        assert delay.duration_ms == pytest.approx(250.0, abs=1)
+
+    def test_failed_stage_marked_error_and_reraised(self, exporter):
+        with pytest.raises(ValueError):
+            with start_span("llm_generation"):
+                raise ValueError("rate limited")
+
+        span = _spans(exporter, "llm_generation")[0]
+        assert span.status == "ERROR"
+        assert "rate limited" in span.status_message
+        assert exporter.stage_stats()["llm_generation"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_traced_decorator_sync_and_async(self, exporter):
+        @traced("async_stage")
+        async def async_stage(x):
+            return x * 2
+
+        @traced("sync_stage")
+        def sync_stage(x):
+            return x + 1
+
+        assert await async_stage(2) == 4
+        assert sync_stage(2) == 3
+        assert async_stage.__name__ == "async_stage"
+        assert set(exporter.stage_stats()) == {"async_stage", "sync_stage"}
+
+
+@pytest.mark.unit
+class TestLocalSpanExporter:
+    """Tests for percentiles, windows and OTLP export."""
+
+    def test_percentiles_per_stage(self):
+        tracer = Tracer(LocalSpanExporter())
+        for ms in range(1, 101):
+            tracer.record("message_fetch", float(ms))
+
+        stats = tracer.exporter.stage_stats()["message_fetch"]
+        assert stats["count"] == 100
+        assert stats["p50_ms"] == 50.0
+        assert stats["p95_ms"] == 95.0
+        assert stats["p99_ms"] == 99.0
+        assert stats["max_ms"] == 100.0
+        assert _percentile([], 50) == 0.0
+
+    def test_old_samples_fall_out_of_window(self, monkeypatch):
+        tracer = Tracer(LocalSpanExporter(window_seconds=60))
+        tracer.record("playwright_read", 900.0)
+
+        later = time.time() + 120
+        monkeypatch.setattr("app.utils.tracing.time.time", lambda: later)
+        monkeypatch.setattr("app.utils.tracing.time.time_ns", lambda: int(later * 1e9))
+        tracer.record("playwright_read", 100.0)
+
+        assert tracer.exporter.stage_stats()["playwright_read"]["count"] == 1
+
+    def test_otlp_export_shape(self):
+        tracer = Tracer(LocalSpanExporter())
+        with tracer.span("webhook", person_id=42):
+            with tracer.span("sms_send.fub_api", success=True):
+                pass
+
+        payload = tracer.exporter.to_otlp()
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        child, root = spans
+        assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+        assert child["parentSpanId"] == root["spanId"]
+        assert "parentSpanId" not in root
+        assert root["status"] == {"code": 1}
+        assert {"key": "person_id", "value": {"intValue": "42"}} in root["attributes"]
+        assert {"key": "success", "value": {"boolValue": True}} in child["attributes"]
+
+    @pytest.mark.asyncio
+    async def test_prefetch_nodes_are_traced(self, exporter):
+        async def settings():
+            return {}
+
+        with start_span("webhook.inbound_text") as root:
+            graph = PrefetchGraph("test").add("settings", settings).start()
+            await graph.get("settings")
+
+        span = _spans(exporter, "prefetch.settings")[0]
+        assert span.parent_span_id == root.span_id
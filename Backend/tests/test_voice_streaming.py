@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Voice streaming tests.
+
+Covers the streaming voice-response mode:
+- Sentence segmentation of streamed LLM tokens
+- OpenAI-compatible SSE delta parsing
+- process_transcript_stream emitting sentences as they complete
+- Time-to-first-sentence tracking
+
+Run with: pytest tests/test_voice_streaming.py -v
+"""
+
+import pytest
+
+from app.voice.conversation_handler import VoiceConversationHandler
+from app.voice.streaming import SentenceSegmenter, TurnLatencyTracker, parse_sse_delta
+
+
+@pytest.mark.unit
+class TestSentenceSegmenter:
+    """Tests for SentenceSegmenter.feed() / flush()."""
+
+    def test_splits_across_tokens(self):
+        segmenter = SentenceSegmenter()
+        out = []
+        for token in ["Hey Jo", "hn! Great to ", "hear from you. When ", "works?"]:
+            out.extend(segmenter.feed(token))
+        assert out == ["Hey John!", "Great to hear from you."]
+        assert segmenter.flush() == "When works?"
+
+    def test_abbreviation_not_split(self):
+        segmenter = SentenceSegmenter()
+        assert segmenter.feed("Dr. Smith referred you. ") == ["Dr. Smith referred you."]
+
+    def test_decimal_not_split(self):
+        segmenter = SentenceSegmenter()
+        assert segmenter.feed("Rates are 6.5 percent now. ") == ["Rates are 6.5 percent now."]
+
+    def test_flush_empty(self):
+        assert SentenceSegmenter().flush() is None
+
+
+@pytest.mark.unit
+class TestParseSSEDelta:
+    """Tests for parse_sse_delta()."""
+
+    def test_content_delta(self):
+        line = 'data: {"choices": [{"delta": {"content": "Hi"}}]}'
+        assert parse_sse_delta(line) == "Hi"
+
+    def test_done_and_keepalive(self):
+        assert parse_sse_delta("data: [DONE]") is None
+        assert parse_sse_delta(": OPENROUTER PROCESSING") is None
+        assert parse_sse_delta("") is None
+
+    def test_malformed(self):
+        assert parse_sse_delta("data: {not json") is None
+
+
+@pytest.mark.unit
+class TestProcessTranscriptStream:
+    """Tests for VoiceConversationHandler.process_transcript_stream()."""
+
+    @pytest.mark.asyncio
+    async def test_emits_sentences_in_order(self):
+        handler = VoiceConversationHandler()
+        await handler.start_conversation(person_id=3277)
+
+        async def fake_stream(messages):
+            for token in ["Sounds good. ", "How about ", "Thursday at 3?"]:
+                yield token
+
+        handler._stream_completion = fake_stream
+        spoken = []
+
+        async def on_sentence(text, index):
+            spoken.append((index, text))
+
+        result = await handler.process_transcript_stream(3277, "I'm free this week", on_sentence)
+
+        assert spoken == [(0, "Sounds good."), (1, "How about Thursday at 3?")]
+        assert result["response"] == "Sounds good. How about Thursday at 3?"
+        assert result["timing"]["sentences"] == 2
+        assert result["timing"]["time_to_first_sentence_ms"] <= result["timing"]["total_ms"]
+        assert handler.active_conversations[3277].history[-1]["role"] == "assistant"
+        assert handler.latency.summary()["turns"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_failure_speaks_fallback(self):
+        handler = VoiceConversationHandler()
+        await handler.start_conversation(person_id=3277)
+
+        async def broken_stream(messages):
+            raise RuntimeError("OpenRouter error: 502")
+            yield  # pragma: no cover
+
+        handler._stream_completion = broken_stream
+        spoken = []
+
+        async def on_sentence(text, index):
+            spoken.append(text)
+
+        result = await handler.process_transcript_stream(3277, "Hello?", on_sentence)
+
+        assert len(spoken) == 1
+        assert result["response"] == spoken[0]
+
+
+@pytest.mark.unit
+def test_latency_tracker_percentiles():
+    tracker = TurnLatencyTracker()
+    for ms in range(1, 101):
+        tracker.record(float(ms), float(ms) * 2)
+    summary = tracker.summary()
+    assert summary["turns"] == 100
+    assert summary["time_to_first_sentence_ms"]["p50"] == 51.0
+    assert summary["total_ms"]["p95"] == 190.0
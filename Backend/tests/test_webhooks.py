@@ -20,6 +20,7 @@ from app.webhook.ai_webhook_handlers import (
     process_inbound_text,
     build_lead_profile_from_fub,
     get_conversation_history,
+    _start_inbound_text_prefetch,
 )
 from app.ai_agent.compliance_checker import (
     ComplianceChecker,
@@ -219,6 +220,42 @@ class TestMessageDirection:
         assert is_incoming is False
 
 
+class TestInboundPrefetch:
+    """Test the process_inbound_text prefetch stage."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_lead_skips_lead_lookups(self):
+        """No FUB fetch, compliance check or history read when AI is off for the lead."""
+        fub_client = Mock()
+        compliance_checker = Mock()
+        compliance_checker.check_sms_compliance = AsyncMock()
+        conversation_manager = Mock()
+        conversation_manager.get_or_create_conversation = AsyncMock()
+        lead_ai_service = Mock()
+        lead_ai_service.is_ai_enabled_for_lead = AsyncMock(return_value=None)
+        history = AsyncMock(return_value=[])
+
+        with patch("app.ai_agent.settings_service.get_agent_settings",
+                   AsyncMock(return_value=Mock(is_enabled=True, timezone="America/Denver"))), \
+                patch("app.ai_agent.lead_ai_settings_service.LeadAISettingsServiceSingleton.get_instance",
+                      return_value=lead_ai_service), \
+                patch("app.webhook.ai_webhook_handlers.get_conversation_history", history):
+            prefetch = _start_inbound_text_prefetch(
+                person_id=1, organization_id="org-1", user_id="user-1", phone="+15551234567",
+                fub_client=fub_client, compliance_checker=compliance_checker,
+                conversation_manager=conversation_manager,
+            )
+            assert await prefetch.get("ai_allowed") is False
+            assert await prefetch.get("person") is None
+            assert await prefetch.get("compliance") is None
+            assert await prefetch.get("history") == []
+
+        fub_client.get_person.assert_not_called()
+        compliance_checker.check_sms_compliance.assert_not_called()
+        history.assert_not_called()
+        conversation_manager.get_or_create_conversation.assert_not_called()
+
+
 # =============================================================================
 # OPT-OUT TESTS
 # =============================================================================
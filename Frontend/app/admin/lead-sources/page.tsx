@@ -1038,6 +1038,9 @@ export default function LeadSourcesPage() {
                 // Refresh sources (silent - no loading spinner)
                 fetchSources(false)
               }
+            } else if (update.type === 'progress') {
+              // Delta: only the fields that changed since the last event
+              setSyncStatus(prev => ({ ...prev, ...update.data }))
             } else if (update.type === 'message') {
               setSyncMessages(prev => [...prev, update.data.message])
             } else if (update.type === 'complete') {
@@ -1169,6 +1172,9 @@ export default function LeadSourcesPage() {
                 setTimeout(() => setSuccessMessage(null), 3000)
                 fetchSources(false)
               }
+            } else if (update.type === 'progress') {
+              // Delta: only the fields that changed since the last event
+              setSyncStatus(prev => ({ ...prev, ...update.data }))
             } else if (update.type === 'message') {
               setSyncMessages(prev => [...prev, update.data.message])
             } else if (update.type === 'complete') {